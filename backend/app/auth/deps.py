@@ -5,16 +5,24 @@ from fastapi import Depends, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 from app.auth.firebase import verify_id_token
+from app.auth.profile_cache import profile_cache
+from app.auth.token_cache import id_token_cache
 from app.auth.user_status import (
     DEFAULT_NEW_USER_STATUS,
-    ensure_user_status_with_migration,
+    normalize_user_status,
 )
 from app.core.config import get_settings
 from app.core.errors import AppError, forbidden_error, unauthorized_error
 from app.core.logging import get_logger
-from app.db.firestore import get_firestore_client, should_mark_first_hundred_student
+from app.db.firestore import (
+    get_async_firestore_client,
+    should_mark_first_hundred_student,
+)
+from app.db.reference_data import reference_document
+from app.services.progress import progress_fields
 from app.services.telegram import send_admin_message
 from app.services.telegram_events import fmt_registration
+from app.services.user_search import user_search_fields
 
 security = HTTPBearer(auto_error=False)
 ExperienceLevel = Literal["beginner", "intermediate", "advanced"]
@@ -170,25 +178,33 @@ async def get_current_user(
         return dev_user
 
     token = credentials.credentials
-    logger.warning(f"Verifying auth token {token}")
-    try:
-        decoded = verify_id_token(token)
-    except Exception as e:  # pragma: no cover - depends on firebase
-        logger.warning(f"Auth token verification failed: {e}")
-        raise AppError(
-            code="unauthenticated",
-            message="Invalid auth token",
-            status_code=401,
-        )
+    decoded = id_token_cache.get(token)
+    if decoded is None:
+        logger.warning(f"Verifying auth token {token}")
+        try:
+            decoded = verify_id_token(token)
+        except Exception as e:  # pragma: no cover - depends on firebase
+            logger.warning(f"Auth token verification failed: {e}")
+            raise AppError(
+                code="unauthenticated",
+                message="Invalid auth token",
+                status_code=401,
+            )
+        id_token_cache.put(token, decoded)
 
     uid = decoded.get("uid")
     if not uid:
         raise unauthorized_error("Invalid auth token payload")
 
-    firestore = get_firestore_client()
+    cached_profile = profile_cache.get(uid)
+    if cached_profile is not None:
+        request.state.uid = uid
+        return _build_user_payload(uid, decoded, cached_profile)
+
+    firestore = get_async_firestore_client()
     logger.warning(f"Fetching user profile for uid {uid} from Firestore {decoded}")
     user_ref = firestore.collection("users").document(uid)
-    doc = user_ref.get()
+    doc = await user_ref.get()
     if not doc.exists:
         logger.warning(
             f"User profile not found for uid {uid} create new student profile"
@@ -197,15 +213,19 @@ async def get_current_user(
             "role": "student",
             "status": DEFAULT_NEW_USER_STATUS,
             "level": 1,
-            "isFirstHundred": should_mark_first_hundred_student(
+            "isFirstHundred": await should_mark_first_hundred_student(
                 firestore, role="student"
             ),
             "email": decoded.get("email", ""),
             "displayName": decoded.get("name", decoded.get("email", "")),
+            **progress_fields(0, 0),
             "createdAt": datetime.now(timezone.utc),
             "updatedAt": datetime.now(timezone.utc),
         }
-        user_ref.set(created_profile)
+        created_profile.update(
+            user_search_fields(created_profile["email"], created_profile["displayName"])
+        )
+        await user_ref.set(created_profile)
         try:
             await send_admin_message(
                 fmt_registration(
@@ -228,20 +248,19 @@ async def get_current_user(
                 },
                 exc_info=True,
             )
-        doc = user_ref.get()
+        doc = await user_ref.get()
 
     profile = doc.to_dict() or {}
-    ensure_user_status_with_migration(user_ref, profile)
+    normalize_user_status(profile)
 
     selected_goal_id = _sanitize_optional_text(profile.get("selectedGoalId"))
     selected_goal_title = None
     if selected_goal_id:
-        goal_ref = firestore.collection("goals").document(selected_goal_id)
-        goal_snap = goal_ref.get()
-        if goal_snap.exists:
-            goal_data = goal_snap.to_dict() or {}
+        goal_data = await reference_document(firestore, "goals", selected_goal_id)
+        if goal_data is not None:
             selected_goal_title = _sanitize_optional_text(goal_data.get("title"))
     profile["selectedGoalTitle"] = selected_goal_title
+    profile_cache.put(uid, profile)
 
     request.state.uid = uid
     return _build_user_payload(uid, decoded, profile)
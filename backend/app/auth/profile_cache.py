@@ -0,0 +1,82 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from app.core.config import get_settings
+
+
+class ProfileCache:
+    """Short-TTL, per-instance snapshot of resolved `users/{uid}` profiles.
+
+    Holds the profile dict exactly as `get_current_user` builds it (status
+    migrated, `selectedGoalTitle` resolved). Writers that change fields the
+    auth payload exposes must call `invalidate_user_profile`; the TTL only
+    bounds staleness for writes made by other instances.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, uid: str) -> dict | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(uid)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, profile = entry
+            if expires_at <= now:
+                del self._entries[uid]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(uid)
+            self.hits += 1
+            return copy.deepcopy(profile)
+
+    def put(self, uid: str, profile: dict) -> None:
+        if self.ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries[uid] = (expires_at, copy.deepcopy(profile))
+            self._entries.move_to_end(uid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, uid: str) -> None:
+        with self._lock:
+            self._entries.pop(uid, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_settings = get_settings()
+profile_cache = ProfileCache(
+    _settings.AUTH_PROFILE_CACHE_TTL_SECONDS,
+    _settings.AUTH_PROFILE_CACHE_MAX_ENTRIES,
+)
+
+
+def invalidate_user_profile(uid: str | None) -> None:
+    if uid:
+        profile_cache.invalidate(uid)
+
+
+def invalidate_all_user_profiles() -> None:
+    profile_cache.clear()
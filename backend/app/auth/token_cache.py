@@ -0,0 +1,83 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from app.core.config import get_settings
+
+EXPIRY_SKEW_SECONDS = 5
+
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _expires_at(decoded: dict) -> float | None:
+    exp = decoded.get("exp")
+    if isinstance(exp, bool) or not isinstance(exp, (int, float)):
+        return None
+    return float(exp) - EXPIRY_SKEW_SECONDS
+
+
+class IdTokenCache:
+    """Bounded LRU of verified ID tokens, keyed by token hash.
+
+    Entries expire at the token's own `exp`, so a cached token is never
+    trusted for longer than Firebase would trust it.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> dict | None:
+        key = _token_key(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, decoded = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(decoded)
+
+    def put(self, token: str, decoded: dict) -> None:
+        expires_at = _expires_at(decoded)
+        if expires_at is None or expires_at <= time.time() or self.max_entries <= 0:
+            return
+        key = _token_key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, dict(decoded))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+id_token_cache = IdTokenCache(get_settings().AUTH_TOKEN_CACHE_MAX_ENTRIES)
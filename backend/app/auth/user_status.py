@@ -1,4 +1,4 @@
-from typing import Literal
+from typing import Any, Literal
 
 from google.cloud import firestore
 
@@ -30,19 +30,55 @@ def validate_user_status_or_400(value: object) -> UserStatus:
     )
 
 
-def ensure_user_status_with_migration(
-    user_ref: firestore.DocumentReference,
-    data: dict,
-) -> UserStatus:
-    if "status" not in data or data.get("status") is None:
+def user_status_missing(data: dict) -> bool:
+    return data.get("status") is None
+
+
+def normalize_user_status(data: dict) -> UserStatus:
+    """Resolve `status` in memory; a missing value reads as migrated-active.
+
+    Read paths never write: stored documents are fixed by the
+    `/jobs/users/migrate-status` job (or by the next write to the user).
+    """
+    if user_status_missing(data):
         data["status"] = MIGRATED_MISSING_USER_STATUS
-        user_ref.update(
-            {
-                "status": MIGRATED_MISSING_USER_STATUS,
-                "updatedAt": firestore.SERVER_TIMESTAMP,
-            }
-        )
         return MIGRATED_MISSING_USER_STATUS
     status = validate_user_status_or_400(data.get("status"))
     data["status"] = status
     return status
+
+
+async def migrate_missing_user_statuses(
+    db: firestore.AsyncClient,
+    *,
+    limit: int,
+    cursor: str | None = None,
+) -> dict[str, Any]:
+    """Persist the migrated status for one page of users ordered by id."""
+    query = db.collection("users").order_by("__name__")
+    if cursor:
+        query = query.start_after([cursor])
+    batch = db.batch()
+    scanned = 0
+    updated = 0
+    last_uid = None
+    async for snap in query.limit(limit).stream():
+        scanned += 1
+        last_uid = snap.id
+        if not user_status_missing(snap.to_dict() or {}):
+            continue
+        batch.update(
+            snap.reference,
+            {
+                "status": MIGRATED_MISSING_USER_STATUS,
+                "updatedAt": firestore.SERVER_TIMESTAMP,
+            },
+        )
+        updated += 1
+    if updated:
+        await batch.commit()
+    return {
+        "scanned": scanned,
+        "updated": updated,
+        "nextCursor": last_uid if scanned == limit else None,
+    }
@@ -0,0 +1,21 @@
+import asyncio
+import contextvars
+from collections.abc import Coroutine
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+_background_tasks: set[asyncio.Task[Any]] = set()
+
+
+def start_background_task(coro: Coroutine[Any, Any, T]) -> asyncio.Task[T]:
+    """Run `coro` on the running loop, detached from the calling request.
+
+    The task starts in an empty context, so it does not read through the
+    request's document memo or add to its Firestore op counts. A reference is
+    kept until it finishes.
+    """
+    task = asyncio.get_running_loop().create_task(coro, context=contextvars.Context())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
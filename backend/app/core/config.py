@@ -15,6 +15,16 @@ class Settings(BaseSettings):
     ENV: str = "local"
     FIREBASE_PROJECT_ID: str | None = None
     AUTH_REQUIRED: bool = True
+    AUTH_TOKEN_CACHE_MAX_ENTRIES: int = 1024
+    AUTH_PROFILE_CACHE_TTL_SECONDS: float = 30.0
+    AUTH_PROFILE_CACHE_MAX_ENTRIES: int = 4096
+    PLAN_STEPS_REFERENCE_LESSONS: bool = False
+    LESSON_CATALOG_CACHE_TTL_SECONDS: float = 300.0
+    LESSON_CATALOG_CACHE_MAX_ENTRIES: int = 8192
+    COURSE_CATALOG_CACHE_TTL_SECONDS: float = 60.0
+    COURSE_CATALOG_CACHE_MAX_ENTRIES: int = 1024
+    REFERENCE_DATA_LISTENERS: bool = True
+    REFERENCE_DATA_RESTART_SECONDS: float = 30.0
     GIT_COMMIT: str | None = None
     BUILD_TIME: str | None = None
     TELEGRAM_BOT_TOKEN: str | None = None
@@ -28,10 +38,13 @@ class Settings(BaseSettings):
     BOOSTY_EMAIL_FILTER: str = "Boosty"
     GMAIL_WEBHOOK_MAX_MESSAGES: int = 20
     JOB_TOKEN: str | None = None
+    JOB_STALE_SECONDS: float = 120.0
     PAYMENT_REJECT_NOTIFY: bool = True
     PAYMENT_AUTO_ACTIVATE_NOTIFY: bool = True
     FX_RATES_URL: str = "https://open.er-api.com/v6/latest/USD"
     FX_RATES_TIMEOUT_SECONDS: float = 10.0
+    FX_RATES_CACHE_TTL_SECONDS: float = 60.0
+    FX_RATES_RETRY_SECONDS: float = 60.0
 
 
 @lru_cache(maxsize=1)
@@ -0,0 +1,34 @@
+import hashlib
+import json
+
+from fastapi import Request, Response
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def strong_etag(*parts: object) -> str:
+    """A quoted strong ETag hashed from the values a response depends on."""
+    raw = json.dumps(parts, default=str, separators=(",", ":"))
+    return '"' + hashlib.sha256(raw.encode()).hexdigest()[:32] + '"'
+
+
+def _matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so a W/ prefix is ignored.
+    return etag in {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Response | None:
+    """Put `etag` on the response; return a 304 instead if the client has it.
+
+    Callers compute the tag from cheap reads before building the body and
+    return the 304 as-is when one comes back.
+    """
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -5,7 +5,15 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from starlette.responses import Response
 
+from app.core.config import get_settings
 from app.core.logging import get_logger
+from app.db.instrumentation import (
+    start_firestore_op_stats,
+    stop_firestore_op_stats,
+)
+from app.db.memo import start_document_memo, stop_document_memo
+
+FIRESTORE_OPS_HEADER = "X-Firestore-Ops"
 
 
 class RequestIdMiddleware(BaseHTTPMiddleware):
@@ -21,10 +29,17 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
     def __init__(self, app, logger_name: str = "app.request"):
         super().__init__(app)
         self.logger = get_logger(logger_name)
+        self.expose_db_ops = get_settings().ENV.lower() != "production"
 
     async def dispatch(self, request: Request, call_next):
         start = time.time()
-        response: Response = await call_next(request)
+        db_ops, db_ops_token = start_firestore_op_stats()
+        _, memo_token = start_document_memo()
+        try:
+            response: Response = await call_next(request)
+        finally:
+            stop_document_memo(memo_token)
+            stop_firestore_op_stats(db_ops_token)
         duration_ms = round((time.time() - start) * 1000, 2)
         request_id = getattr(request.state, "request_id", None)
         uid = getattr(request.state, "uid", None)
@@ -37,6 +52,9 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
                 "request_id": request_id,
                 "uid": uid,
                 "duration_ms": duration_ms,
+                **db_ops.log_fields(),
             },
         )
+        if self.expose_db_ops:
+            response.headers[FIRESTORE_OPS_HEADER] = db_ops.header_value()
         return response
@@ -0,0 +1,81 @@
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from app.db.bulk_writer import BulkWriter
+
+ProgressCallback = Callable[[int], Awaitable[None]]
+
+
+async def delete_query(
+    writer: BulkWriter,
+    query: Any,
+    *,
+    page_size: int = 500,
+    recursive: bool = False,
+    keep: Callable[[Any], bool] | None = None,
+    on_page: ProgressCallback | None = None,
+) -> int:
+    """Delete every document matched by `query`, one id-ordered page at a time.
+
+    Refs are handed to the writer as they stream instead of being collected
+    first. Snapshots for which `keep` returns true are left alone. With
+    `recursive`, subcollections of each deleted document are removed too, at
+    the cost of one listing call per document. Returns the number of
+    documents queued for deletion.
+    """
+    queued = 0
+    cursor: str | None = None
+    while True:
+        page = query.order_by("__name__").limit(page_size)
+        if cursor is not None:
+            page = page.start_after([cursor])
+        scanned = 0
+        async for snap in page.stream():
+            scanned += 1
+            cursor = snap.id
+            if keep is not None and keep(snap):
+                continue
+            if recursive:
+                queued += await delete_document_tree(
+                    writer, snap.reference, page_size=page_size, recursive=True
+                )
+            else:
+                await writer.delete(snap.reference)
+            queued += 1
+        if on_page is not None:
+            await on_page(queued)
+        if scanned < page_size:
+            return queued
+
+
+async def delete_document_tree(
+    writer: BulkWriter,
+    doc_ref: Any,
+    *,
+    page_size: int = 500,
+    recursive: bool = False,
+    on_page: ProgressCallback | None = None,
+) -> int:
+    """Delete `doc_ref` together with the documents of its subcollections.
+
+    Subcollections are listed even when the parent document itself is
+    missing, so a partially deleted tree is finished on a rerun. Returns the
+    number of descendant documents queued; `doc_ref` itself is not counted.
+    """
+    queued = 0
+    async for collection in doc_ref.collections():
+        base = queued
+
+        async def _report(done: int, base: int = base) -> None:
+            if on_page is not None:
+                await on_page(base + done)
+
+        queued += await delete_query(
+            writer,
+            collection,
+            page_size=page_size,
+            recursive=recursive,
+            on_page=_report,
+        )
+    await writer.delete(doc_ref)
+    return queued
@@ -0,0 +1,142 @@
+import asyncio
+import random
+from typing import Any
+
+from google.api_core import exceptions as google_exceptions
+from google.cloud import firestore
+
+from app.core.logging import get_logger
+
+logger = get_logger("app.bulk_writer")
+
+MAX_BATCH_SIZE = 500
+RETRYABLE_ERRORS = (
+    google_exceptions.Aborted,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable,
+)
+
+
+class BulkWriter:
+    """Buffers writes into batches and commits them concurrently.
+
+    Full batches are committed in background tasks with at most
+    `max_in_flight` commits running; queuing a write waits for a free slot, so
+    a fast producer cannot queue unbounded work. Commits failing with a
+    retryable error are rebuilt and retried with exponential backoff and
+    jitter.
+
+    Batches may commit in any order, so callers must not queue two writes to
+    the same document unless the writes commute (transforms such as
+    `Increment` or `ArrayUnion`).
+    """
+
+    def __init__(
+        self,
+        db: firestore.AsyncClient,
+        *,
+        batch_size: int = 450,
+        max_in_flight: int = 4,
+        max_attempts: int = 5,
+        base_delay: float = 0.2,
+        max_delay: float = 5.0,
+    ) -> None:
+        self._db = db
+        self._batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        self._slots = asyncio.Semaphore(max(1, max_in_flight))
+        self._max_attempts = max(1, max_attempts)
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._pending: list[tuple[str, Any, dict[str, Any] | None, bool]] = []
+        self._tasks: list[asyncio.Task[None]] = []
+        self.written = 0
+        self.retries = 0
+
+    async def set(self, ref: Any, data: dict[str, Any], *, merge: bool = False) -> None:
+        await self._queue(("set", ref, data, merge))
+
+    async def update(self, ref: Any, data: dict[str, Any]) -> None:
+        await self._queue(("update", ref, data, False))
+
+    async def delete(self, ref: Any) -> None:
+        await self._queue(("delete", ref, None, False))
+
+    async def _queue(self, write: tuple[str, Any, dict[str, Any] | None, bool]) -> None:
+        self._pending.append(write)
+        if len(self._pending) >= self._batch_size:
+            await self._dispatch()
+
+    async def end_batch(self) -> None:
+        """Close the current batch, so the writes queued since the last one
+        commit together. Callers keep such a group within `batch_size`."""
+        if self._pending:
+            await self._dispatch()
+
+    async def flush(self) -> int:
+        """Commit whatever is buffered and wait for every in-flight batch."""
+        if self._pending:
+            await self._dispatch()
+        tasks, self._tasks = self._tasks, []
+        if tasks:
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                # Stop the other batches before the error reaches the caller,
+                # so nothing is still writing once flush() has returned.
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+        return self.written
+
+    async def _dispatch(self) -> None:
+        writes, self._pending = self._pending, []
+        await self._slots.acquire()
+        self._tasks.append(asyncio.create_task(self._commit(writes)))
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self._max_delay, self._base_delay * (2 ** (attempt - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _build_batch(
+        self, writes: list[tuple[str, Any, dict[str, Any] | None, bool]]
+    ) -> Any:
+        batch = self._db.batch()
+        for op, ref, data, merge in writes:
+            if op == "set":
+                batch.set(ref, data, merge=merge)
+            elif op == "update":
+                batch.update(ref, data)
+            else:
+                batch.delete(ref)
+        return batch
+
+    async def _commit(
+        self, writes: list[tuple[str, Any, dict[str, Any] | None, bool]]
+    ) -> None:
+        try:
+            for attempt in range(1, self._max_attempts + 1):
+                batch = self._build_batch(writes)
+                try:
+                    await batch.commit()
+                except RETRYABLE_ERRORS as exc:
+                    if attempt == self._max_attempts:
+                        raise
+                    self.retries += 1
+                    logger.warning(
+                        "bulk_write_batch_retry",
+                        extra={
+                            "event": "bulk_write_batch_retry",
+                            "attempt": attempt,
+                            "size": len(writes),
+                            "error": type(exc).__name__,
+                        },
+                    )
+                    await asyncio.sleep(self._backoff(attempt))
+                    continue
+                self.written += len(writes)
+                return
+        finally:
+            self._slots.release()
@@ -1,14 +1,17 @@
 from functools import lru_cache
+from typing import Any
 
 from google.cloud import firestore
 
 from app.core.config import get_settings
+from app.db.instrumentation import InstrumentedAsyncClient
 
 FIRST_HUNDRED_STUDENT_LIMIT = 100
+COUNTERS_COLLECTION = "counters"
+FIRST_HUNDRED_COUNTER_DOC_ID = "firstHundredStudents"
 
 
-@lru_cache(maxsize=1)
-def get_firestore_client() -> firestore.Client:
+def _client_kwargs() -> dict[str, str]:
     settings = get_settings()
     database = (
         "testing" if settings.ENV.lower() in ["local", "development"] else "pathways"
@@ -16,16 +19,72 @@ def get_firestore_client() -> firestore.Client:
     client_kwargs: dict[str, str] = {"database": database}
     if settings.FIREBASE_PROJECT_ID:
         client_kwargs["project"] = settings.FIREBASE_PROJECT_ID
-    return firestore.Client(**client_kwargs)
+    return client_kwargs
+
+
+@lru_cache(maxsize=1)
+def get_firestore_client() -> firestore.Client:
+    return firestore.Client(**_client_kwargs())
+
+
+@lru_cache(maxsize=1)
+def get_async_firestore_client() -> InstrumentedAsyncClient:
+    return InstrumentedAsyncClient(firestore.AsyncClient(**_client_kwargs()))
+
+
+async def count_documents(query: Any) -> int:
+    """Run a `count()` aggregation; one round trip regardless of result size."""
+    results = await query.count().get()
+    for result in results:
+        for aggregation in result:
+            return int(aggregation.value)
+    return 0
+
+
+@firestore.async_transactional
+async def _claim_first_hundred_slot(
+    transaction: firestore.AsyncTransaction,
+    counter_ref: firestore.AsyncDocumentReference,
+    seed: int,
+) -> bool:
+    snap = await counter_ref.get(transaction=transaction)
+    claimed = int((snap.to_dict() or {}).get("claimed") or 0) if snap.exists else seed
+    eligible = claimed < FIRST_HUNDRED_STUDENT_LIMIT
+    if eligible or not snap.exists:
+        transaction.set(
+            counter_ref,
+            {
+                "claimed": claimed + 1 if eligible else claimed,
+                "limit": FIRST_HUNDRED_STUDENT_LIMIT,
+                "updatedAt": firestore.SERVER_TIMESTAMP,
+            },
+        )
+    return eligible
+
 
+async def should_mark_first_hundred_student(
+    db: firestore.AsyncClient, *, role: str
+) -> bool:
+    """Claim one of the first-hundred slots for a newly registered student.
 
-def should_mark_first_hundred_student(db: firestore.Client, *, role: str) -> bool:
+    Slots live on a counter document updated in a transaction, so concurrent
+    sign-ups cannot hand out more than the limit. The counter is seeded once
+    with a `count()` of existing students; after the slots run out a single
+    document read answers every call.
+    """
     if role != "student":
         return False
-    student_docs = list(
-        db.collection("users")
-        .where("role", "==", "student")
-        .limit(FIRST_HUNDRED_STUDENT_LIMIT)
-        .stream()
+    counter_ref = db.collection(COUNTERS_COLLECTION).document(
+        FIRST_HUNDRED_COUNTER_DOC_ID
     )
-    return len(student_docs) < FIRST_HUNDRED_STUDENT_LIMIT
+    snap = await counter_ref.get()
+    if snap.exists:
+        claimed = int((snap.to_dict() or {}).get("claimed") or 0)
+        if claimed >= FIRST_HUNDRED_STUDENT_LIMIT:
+            return False
+        seed = claimed
+    else:
+        seed = await count_documents(
+            db.collection("users").where("role", "==", "student")
+        )
+    return await _claim_first_hundred_slot(db.transaction(), counter_ref, seed)
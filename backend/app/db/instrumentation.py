@@ -0,0 +1,430 @@
+import time
+from collections.abc import AsyncIterator
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+from typing import Any
+
+from app.db.memo import DocumentMemo, current_document_memo
+
+_QUERY_CHAIN_METHODS = frozenset(
+    {
+        "where",
+        "order_by",
+        "limit",
+        "limit_to_last",
+        "offset",
+        "select",
+        "start_at",
+        "start_after",
+        "end_at",
+        "end_before",
+    }
+)
+_AGGREGATION_METHODS = frozenset({"count", "sum", "avg"})
+
+
+@dataclass
+class FirestoreOpStats:
+    reads: int = 0
+    writes: int = 0
+    deletes: int = 0
+    round_trips: int = 0
+    memo_hits: int = 0
+    duration_ms: float = 0.0
+
+    def log_fields(self) -> dict[str, int | float]:
+        return {
+            "db_reads": self.reads,
+            "db_writes": self.writes,
+            "db_deletes": self.deletes,
+            "db_round_trips": self.round_trips,
+            "db_memo_hits": self.memo_hits,
+            "db_time_ms": round(self.duration_ms, 2),
+        }
+
+    def header_value(self) -> str:
+        return (
+            f"reads={self.reads}, writes={self.writes}, deletes={self.deletes}, "
+            f"round_trips={self.round_trips}, memo_hits={self.memo_hits}, "
+            f"time_ms={round(self.duration_ms, 2)}"
+        )
+
+
+_current_stats: ContextVar[FirestoreOpStats | None] = ContextVar(
+    "firestore_op_stats", default=None
+)
+
+
+def start_firestore_op_stats() -> tuple[FirestoreOpStats, Token]:
+    stats = FirestoreOpStats()
+    return stats, _current_stats.set(stats)
+
+
+def stop_firestore_op_stats(token: Token) -> None:
+    _current_stats.reset(token)
+
+
+def current_firestore_op_stats() -> FirestoreOpStats | None:
+    return _current_stats.get()
+
+
+def firestore_op_log_fields() -> dict[str, int | float]:
+    return (current_firestore_op_stats() or FirestoreOpStats()).log_fields()
+
+
+def _record(
+    started: float,
+    *,
+    round_trips: int = 0,
+    reads: int = 0,
+    writes: int = 0,
+    deletes: int = 0,
+) -> None:
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    stats.round_trips += round_trips
+    stats.reads += reads
+    stats.writes += writes
+    stats.deletes += deletes
+    stats.duration_ms += (time.perf_counter() - started) * 1000
+
+
+def _record_memo_hit() -> None:
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.memo_hits += 1
+
+
+def _unwrap(value: Any) -> Any:
+    if isinstance(value, _Instrumented):
+        return value._wrapped
+    if isinstance(value, (list, tuple)):
+        return type(value)(_unwrap(item) for item in value)
+    return value
+
+
+def _unwrap_kwargs(kwargs: dict[str, Any]) -> dict[str, Any]:
+    return {key: _unwrap(value) for key, value in kwargs.items()}
+
+
+async def _counted_stream(
+    stream: Any, memo: DocumentMemo | None = None
+) -> AsyncIterator["InstrumentedSnapshot"]:
+    started = time.perf_counter()
+    _record(started, round_trips=1)
+    iterator = stream.__aiter__()
+    while True:
+        started = time.perf_counter()
+        try:
+            snap = await iterator.__anext__()
+        except StopAsyncIteration:
+            _record(started)
+            return
+        _record(started, reads=1)
+        if memo is not None and snap is not None:
+            memo.remember(snap)
+        yield InstrumentedSnapshot(snap)
+
+
+class _Instrumented:
+    __slots__ = ("_wrapped",)
+
+    def __init__(self, wrapped: Any) -> None:
+        self._wrapped = wrapped
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._wrapped, name)
+
+    def __eq__(self, other: object) -> bool:
+        return self._wrapped == _unwrap(other)
+
+    def __hash__(self) -> int:
+        return hash(self._wrapped)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._wrapped!r})"
+
+
+class InstrumentedSnapshot(_Instrumented):
+    __slots__ = ()
+
+    @property
+    def reference(self) -> "InstrumentedDocumentReference":
+        return InstrumentedDocumentReference(self._wrapped.reference)
+
+
+class InstrumentedDocumentReference(_Instrumented):
+    __slots__ = ()
+
+    async def get(self, *args: Any, **kwargs: Any) -> InstrumentedSnapshot:
+        memo = current_document_memo() if not args and not kwargs else None
+        if memo is not None:
+            snap = memo.snapshot(self._wrapped)
+            if snap is not None:
+                _record_memo_hit()
+                return InstrumentedSnapshot(snap)
+        started = time.perf_counter()
+        snap = await self._wrapped.get(*args, **_unwrap_kwargs(kwargs))
+        _record(started, round_trips=1, reads=1)
+        if memo is not None:
+            memo.remember(snap)
+        return InstrumentedSnapshot(snap)
+
+    async def _write(self, kind: str, *args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        result = await getattr(self._wrapped, kind)(*args, **kwargs)
+        if kind == "delete":
+            _record(started, round_trips=1, deletes=1)
+        else:
+            _record(started, round_trips=1, writes=1)
+        memo = current_document_memo()
+        if memo is not None:
+            data = args[0] if args else kwargs.get("document_data")
+            if kind == "update":
+                data = args[0] if args else kwargs.get("field_updates")
+            memo.apply_write(
+                self._wrapped.path,
+                kind,
+                data,
+                merge=kwargs.get("merge", False),
+                write_result=result,
+            )
+        return result
+
+    async def create(self, *args: Any, **kwargs: Any) -> Any:
+        return await self._write("create", *args, **kwargs)
+
+    async def set(self, *args: Any, **kwargs: Any) -> Any:
+        return await self._write("set", *args, **kwargs)
+
+    async def update(self, *args: Any, **kwargs: Any) -> Any:
+        return await self._write("update", *args, **kwargs)
+
+    async def delete(self, *args: Any, **kwargs: Any) -> Any:
+        return await self._write("delete", *args, **kwargs)
+
+    def collection(
+        self, *args: Any, **kwargs: Any
+    ) -> "InstrumentedCollectionReference":
+        return InstrumentedCollectionReference(
+            self._wrapped.collection(*args, **kwargs)
+        )
+
+
+class InstrumentedAggregationQuery(_Instrumented):
+    __slots__ = ()
+
+    async def get(self, *args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        result = await self._wrapped.get(*args, **_unwrap_kwargs(kwargs))
+        _record(started, round_trips=1, reads=1)
+        return result
+
+    def count(self, *args: Any, **kwargs: Any) -> "InstrumentedAggregationQuery":
+        return InstrumentedAggregationQuery(self._wrapped.count(*args, **kwargs))
+
+    def sum(self, *args: Any, **kwargs: Any) -> "InstrumentedAggregationQuery":
+        return InstrumentedAggregationQuery(self._wrapped.sum(*args, **kwargs))
+
+    def avg(self, *args: Any, **kwargs: Any) -> "InstrumentedAggregationQuery":
+        return InstrumentedAggregationQuery(self._wrapped.avg(*args, **kwargs))
+
+
+class InstrumentedQuery(_Instrumented):
+    __slots__ = ("_projected",)
+
+    def __init__(self, wrapped: Any, projected: bool = False) -> None:
+        super().__init__(wrapped)
+        self._projected = projected
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._wrapped, name)
+        if name in _QUERY_CHAIN_METHODS:
+            projected = self._projected or name == "select"
+
+            def _chain(*args: Any, **kwargs: Any) -> InstrumentedQuery:
+                return InstrumentedQuery(attr(*args, **kwargs), projected)
+
+            return _chain
+        if name in _AGGREGATION_METHODS:
+
+            def _aggregate(*args: Any, **kwargs: Any) -> InstrumentedAggregationQuery:
+                return InstrumentedAggregationQuery(attr(*args, **kwargs))
+
+            return _aggregate
+        return attr
+
+    def stream(self, *args: Any, **kwargs: Any) -> AsyncIterator[InstrumentedSnapshot]:
+        memo = None
+        if not self._projected and "transaction" not in kwargs:
+            memo = current_document_memo()
+        return _counted_stream(
+            self._wrapped.stream(*args, **_unwrap_kwargs(kwargs)), memo
+        )
+
+    async def get(self, *args: Any, **kwargs: Any) -> list[InstrumentedSnapshot]:
+        return [snap async for snap in self.stream(*args, **kwargs)]
+
+
+class InstrumentedCollectionReference(InstrumentedQuery):
+    __slots__ = ()
+
+    def document(self, *args: Any, **kwargs: Any) -> InstrumentedDocumentReference:
+        return InstrumentedDocumentReference(self._wrapped.document(*args, **kwargs))
+
+    async def add(
+        self, *args: Any, **kwargs: Any
+    ) -> tuple[Any, InstrumentedDocumentReference]:
+        started = time.perf_counter()
+        update_time, doc_ref = await self._wrapped.add(*args, **kwargs)
+        _record(started, round_trips=1, writes=1)
+        return update_time, InstrumentedDocumentReference(doc_ref)
+
+    async def list_documents(
+        self, *args: Any, **kwargs: Any
+    ) -> AsyncIterator[InstrumentedDocumentReference]:
+        started = time.perf_counter()
+        _record(started, round_trips=1)
+        async for doc_ref in self._wrapped.list_documents(*args, **kwargs):
+            yield InstrumentedDocumentReference(doc_ref)
+
+
+class InstrumentedWriteBatch(_Instrumented):
+    __slots__ = ("_ops",)
+
+    def __init__(self, wrapped: Any) -> None:
+        super().__init__(wrapped)
+        self._ops: list[tuple[str, str, Any, Any]] = []
+
+    def _track(self, kind: str, reference: Any, data: Any = None, merge: Any = False):
+        self._ops.append((kind, _unwrap(reference).path, data, merge))
+        return self
+
+    def create(
+        self, reference: Any, document_data: Any, *args: Any, **kwargs: Any
+    ) -> "InstrumentedWriteBatch":
+        self._wrapped.create(_unwrap(reference), document_data, *args, **kwargs)
+        return self._track("create", reference, document_data)
+
+    def set(
+        self, reference: Any, document_data: Any, merge: Any = False
+    ) -> "InstrumentedWriteBatch":
+        self._wrapped.set(_unwrap(reference), document_data, merge=merge)
+        return self._track("set", reference, document_data, merge)
+
+    def update(
+        self, reference: Any, field_updates: Any, *args: Any, **kwargs: Any
+    ) -> "InstrumentedWriteBatch":
+        self._wrapped.update(_unwrap(reference), field_updates, *args, **kwargs)
+        return self._track("update", reference, field_updates)
+
+    def delete(
+        self, reference: Any, *args: Any, **kwargs: Any
+    ) -> "InstrumentedWriteBatch":
+        self._wrapped.delete(_unwrap(reference), *args, **kwargs)
+        return self._track("delete", reference)
+
+    async def _committed(self, commit: Any, *args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        result = await commit(*args, **kwargs)
+        deletes = sum(1 for op in self._ops if op[0] == "delete")
+        _record(
+            started,
+            round_trips=1,
+            writes=len(self._ops) - deletes,
+            deletes=deletes,
+        )
+        memo = current_document_memo()
+        if memo is not None:
+            write_results = list(result) if isinstance(result, list) else []
+            for index, (kind, path, data, merge) in enumerate(self._ops):
+                memo.apply_write(
+                    path,
+                    kind,
+                    data,
+                    merge=merge,
+                    write_result=(
+                        write_results[index] if index < len(write_results) else None
+                    ),
+                )
+        self._ops = []
+        return result
+
+    async def commit(self, *args: Any, **kwargs: Any) -> Any:
+        return await self._committed(self._wrapped.commit, *args, **kwargs)
+
+
+class InstrumentedTransaction(InstrumentedWriteBatch):
+    __slots__ = ()
+
+    async def get(self, ref_or_query: Any, *args: Any, **kwargs: Any) -> Any:
+        result = await self._wrapped.get(_unwrap(ref_or_query), *args, **kwargs)
+        return _counted_stream(result)
+
+    def _clean_up(self) -> None:
+        # async_transactional calls this before every attempt; drop writes
+        # tracked by an aborted attempt so retries are not double counted.
+        self._ops = []
+        self._wrapped._clean_up()
+
+    async def _commit(self, *args: Any, **kwargs: Any) -> Any:
+        return await self._committed(self._wrapped._commit, *args, **kwargs)
+
+
+class InstrumentedAsyncClient(_Instrumented):
+    """Counting proxy around `firestore.AsyncClient`.
+
+    Every document read, write, delete and RPC issued through the proxy is
+    added to the `FirestoreOpStats` of the current request, if one is active.
+    """
+
+    __slots__ = ()
+
+    def collection(self, *args: Any, **kwargs: Any) -> InstrumentedCollectionReference:
+        return InstrumentedCollectionReference(
+            self._wrapped.collection(*args, **kwargs)
+        )
+
+    def collection_group(self, *args: Any, **kwargs: Any) -> InstrumentedQuery:
+        return InstrumentedQuery(self._wrapped.collection_group(*args, **kwargs))
+
+    def document(self, *args: Any, **kwargs: Any) -> InstrumentedDocumentReference:
+        return InstrumentedDocumentReference(self._wrapped.document(*args, **kwargs))
+
+    def batch(self) -> InstrumentedWriteBatch:
+        return InstrumentedWriteBatch(self._wrapped.batch())
+
+    def transaction(self, *args: Any, **kwargs: Any) -> InstrumentedTransaction:
+        return InstrumentedTransaction(self._wrapped.transaction(*args, **kwargs))
+
+    def get_all(
+        self, references: Any, *args: Any, **kwargs: Any
+    ) -> AsyncIterator[InstrumentedSnapshot]:
+        raw_refs = [_unwrap(ref) for ref in references]
+        memo = current_document_memo()
+        if memo is None or args or kwargs:
+            return _counted_stream(
+                self._wrapped.get_all(raw_refs, *args, **_unwrap_kwargs(kwargs))
+            )
+        return self._get_all_memoized(memo, raw_refs)
+
+    async def _get_all_memoized(
+        self, memo: DocumentMemo, raw_refs: list[Any]
+    ) -> AsyncIterator[InstrumentedSnapshot]:
+        pending: dict[str, Any] = {}
+        for ref in raw_refs:
+            if ref.path in pending:
+                continue
+            snap = memo.snapshot(ref)
+            if snap is None:
+                pending[ref.path] = ref
+                continue
+            _record_memo_hit()
+            pending[ref.path] = None
+            yield InstrumentedSnapshot(snap)
+        missing = [ref for ref in pending.values() if ref is not None]
+        if not missing:
+            return
+        async for snap in _counted_stream(self._wrapped.get_all(missing), memo):
+            yield snap
@@ -0,0 +1,59 @@
+import asyncio
+from collections.abc import Iterable
+from typing import Any
+
+from google.cloud import firestore
+
+
+class DocumentLoader:
+    """DataLoader-style batcher for document reads.
+
+    `load` calls made in the same event-loop tick are collected and
+    resolved with a single `db.get_all(...)`. Each document path is fetched
+    at most once per loader; repeated loads share the same result.
+    """
+
+    def __init__(self, db: firestore.AsyncClient) -> None:
+        self._db = db
+        self._results: dict[str, asyncio.Future] = {}
+        self._pending: dict[str, Any] = {}
+        self._flush_task: asyncio.Task | None = None
+
+    def load(self, ref: Any) -> asyncio.Future:
+        path = ref.path
+        result = self._results.get(path)
+        if result is not None:
+            return result
+        loop = asyncio.get_running_loop()
+        result = loop.create_future()
+        self._results[path] = result
+        self._pending[path] = ref
+        if self._flush_task is None:
+            self._flush_task = loop.create_task(self._flush())
+        return result
+
+    async def load_many(self, refs: Iterable[Any]) -> list[Any]:
+        return list(await asyncio.gather(*(self.load(ref) for ref in refs)))
+
+    async def _flush(self) -> None:
+        # Yield once so every load() issued in the current tick is batched.
+        await asyncio.sleep(0)
+        pending, self._pending = self._pending, {}
+        self._flush_task = None
+        if not pending:
+            return
+        try:
+            found: dict[str, Any] = {}
+            async for snap in self._db.get_all(list(pending.values())):
+                found[snap.reference.path] = snap
+        except Exception as exc:
+            for path in pending:
+                self._results.pop(path).set_exception(exc)
+            return
+        for path in pending:
+            self._results[path].set_result(found.get(path))
+
+
+async def get_documents(db: firestore.AsyncClient, refs: list[Any]) -> list[Any]:
+    """Fetch `refs` in one round trip; returns snapshots (or None) in order."""
+    return await DocumentLoader(db).load_many(refs)
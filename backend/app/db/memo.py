@@ -0,0 +1,194 @@
+import copy
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+from typing import Any
+
+from google.cloud import firestore
+from google.cloud.firestore_v1 import transforms
+from google.cloud.firestore_v1.base_document import DocumentSnapshot
+from google.cloud.firestore_v1.field_path import split_field_path
+
+MAX_MEMO_ENTRIES = 2000
+
+
+class _Unresolvable(Exception):
+    pass
+
+
+@dataclass
+class _MemoEntry:
+    data: dict[str, Any] | None
+    create_time: Any = None
+    update_time: Any = None
+    read_time: Any = None
+
+
+def _resolve_value(value: Any, commit_time: Any, base: Any) -> Any:
+    if value is firestore.SERVER_TIMESTAMP:
+        if commit_time is None:
+            raise _Unresolvable()
+        return commit_time
+    if isinstance(value, transforms.Increment):
+        if isinstance(base, bool) or not isinstance(base, (int, float)):
+            base = 0
+        return base + value.value
+    if isinstance(value, (transforms.Sentinel, transforms._ValueList)):
+        raise _Unresolvable()
+    if isinstance(value, transforms._NumericValue):
+        raise _Unresolvable()
+    if isinstance(value, dict):
+        nested_base = base if isinstance(base, dict) else {}
+        return {
+            key: _resolve_value(item, commit_time, nested_base.get(key))
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_resolve_value(item, commit_time, None) for item in value]
+    return copy.deepcopy(value)
+
+
+def _merge(target: dict[str, Any], updates: dict[str, Any], commit_time: Any) -> None:
+    for key, value in updates.items():
+        if value is firestore.DELETE_FIELD:
+            target.pop(key, None)
+            continue
+        current = target.get(key)
+        if isinstance(value, dict) and isinstance(current, dict):
+            _merge(current, value, commit_time)
+            continue
+        target[key] = _resolve_value(value, commit_time, current)
+
+
+def _apply_field_updates(
+    target: dict[str, Any], updates: dict[str, Any], commit_time: Any
+) -> None:
+    for raw_path, value in updates.items():
+        if "`" in raw_path:
+            raise _Unresolvable()
+        parts = split_field_path(raw_path)
+        container = target
+        for part in parts[:-1]:
+            nested = container.get(part)
+            if not isinstance(nested, dict):
+                nested = {}
+                container[part] = nested
+            container = nested
+        leaf = parts[-1]
+        if value is firestore.DELETE_FIELD:
+            container.pop(leaf, None)
+            continue
+        container[leaf] = _resolve_value(value, commit_time, container.get(leaf))
+
+
+def _commit_time(write_result: Any) -> Any:
+    return getattr(write_result, "update_time", None)
+
+
+class DocumentMemo:
+    """Request-scoped memo of document snapshots keyed by document path.
+
+    Reads remember what they saw; writes are merged locally when their
+    result can be derived (SERVER_TIMESTAMP resolves to the write's commit
+    time, Increment to the known base plus delta). Anything else evicts the
+    entry so the next read goes back to Firestore.
+    """
+
+    def __init__(self, max_entries: int = MAX_MEMO_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._entries: dict[str, _MemoEntry] = {}
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._entries
+
+    def snapshot(self, reference: Any) -> DocumentSnapshot | None:
+        entry = self._entries.get(reference.path)
+        if entry is None:
+            return None
+        return DocumentSnapshot(
+            reference,
+            copy.deepcopy(entry.data) if entry.data is not None else None,
+            entry.data is not None,
+            entry.read_time,
+            entry.create_time,
+            entry.update_time,
+        )
+
+    def remember(self, snapshot: Any) -> None:
+        reference = getattr(snapshot, "reference", None)
+        path = getattr(reference, "path", None)
+        if not isinstance(path, str):
+            return
+        if path not in self._entries and len(self._entries) >= self.max_entries:
+            return
+        self._entries[path] = _MemoEntry(
+            data=copy.deepcopy(snapshot.to_dict()) if snapshot.exists else None,
+            create_time=getattr(snapshot, "create_time", None),
+            update_time=getattr(snapshot, "update_time", None),
+            read_time=getattr(snapshot, "read_time", None),
+        )
+
+    def forget(self, path: str) -> None:
+        self._entries.pop(path, None)
+
+    def apply_write(
+        self,
+        path: str,
+        kind: str,
+        data: Any = None,
+        *,
+        merge: Any = False,
+        write_result: Any = None,
+    ) -> None:
+        if kind == "delete":
+            self._entries[path] = _MemoEntry(data=None)
+            return
+        commit_time = _commit_time(write_result)
+        entry = self._entries.get(path)
+        try:
+            if kind in {"create", "set"} and not merge:
+                resolved = _resolve_value(data, commit_time, None)
+                known_create_time = (
+                    entry.create_time
+                    if entry is not None and entry.data is not None
+                    else None
+                )
+                self._entries[path] = _MemoEntry(
+                    data=resolved,
+                    create_time=known_create_time or commit_time,
+                    update_time=commit_time,
+                )
+                return
+            if entry is None or (merge is not True and kind == "set"):
+                raise _Unresolvable()
+            if kind == "set":
+                target = copy.deepcopy(entry.data) if entry.data is not None else {}
+                _merge(target, data, commit_time)
+            elif kind == "update" and entry.data is not None:
+                target = copy.deepcopy(entry.data)
+                _apply_field_updates(target, data, commit_time)
+            else:
+                raise _Unresolvable()
+        except _Unresolvable:
+            self.forget(path)
+            return
+        entry.data = target
+        entry.update_time = commit_time
+        entry.create_time = entry.create_time or commit_time
+
+
+_current_memo: ContextVar[DocumentMemo | None] = ContextVar(
+    "firestore_document_memo", default=None
+)
+
+
+def start_document_memo() -> tuple[DocumentMemo, Token]:
+    memo = DocumentMemo()
+    return memo, _current_memo.set(memo)
+
+
+def stop_document_memo(token: Token) -> None:
+    _current_memo.reset(token)
+
+
+def current_document_memo() -> DocumentMemo | None:
+    return _current_memo.get()
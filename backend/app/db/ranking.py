@@ -0,0 +1,54 @@
+from typing import Any
+
+# Digits in ASCII order, so ranks compare correctly as plain strings.
+RANK_DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+RANK_BASE = len(RANK_DIGITS)
+# Rank of items that were never moved: the middle digit, leaving room on both
+# sides.
+DEFAULT_RANK = RANK_DIGITS[RANK_BASE // 2]
+# Moves producing a longer rank renumber the whole list before returning.
+MAX_RANK_LENGTH = 8
+
+
+def _digit(value: str, index: int, default: int) -> int:
+    return RANK_DIGITS.index(value[index]) if index < len(value) else default
+
+
+def rank_between(before: str | None, after: str | None) -> str:
+    """A rank sorting strictly between `before` and `after` (None = open end).
+
+    Ranks are base-62 fractions without trailing zeros, so there is always
+    room on either side of an existing rank.
+    """
+    low = before or ""
+    if after is not None and low >= after:
+        raise ValueError("before must sort below after")
+    prefix = []
+    index = 0
+    while True:
+        low_digit = _digit(low, index, 0)
+        high_digit = _digit(after, index, RANK_BASE) if after is not None else RANK_BASE
+        if high_digit - low_digit > 1:
+            prefix.append(RANK_DIGITS[(low_digit + high_digit) // 2])
+            return "".join(prefix)
+        prefix.append(RANK_DIGITS[low_digit])
+        if high_digit != low_digit:
+            # Any extension of `low` at this digit now sorts below `after`.
+            after = None
+        index += 1
+
+
+def effective_rank(data: dict[str, Any]) -> str:
+    rank = data.get("rank")
+    return rank if isinstance(rank, str) and rank else DEFAULT_RANK
+
+
+def rank_sort_key(data: dict[str, Any]) -> tuple[int, str]:
+    """Items sort by their integer `order`, then by `rank` among equal orders."""
+    order = data.get("order")
+    return (order if isinstance(order, int) else 0, effective_rank(data))
+
+
+def sort_ranked(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    items.sort(key=rank_sort_key)
+    return items
@@ -0,0 +1,283 @@
+import copy
+import threading
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Any
+
+from google.cloud import firestore
+
+from app.core.config import get_settings
+from app.core.etag import strong_etag
+from app.core.logging import get_logger
+from app.db.firestore import get_firestore_client
+from app.db.loader import get_documents
+
+logger = get_logger("app.reference_data")
+
+# Small, rarely edited collections and documents kept in memory per instance.
+# `settings/gmail` is left out: it holds the webhook's history checkpoint,
+# which is written on every push and must be read fresh.
+REFERENCE_PATHS = (
+    "goals",
+    "categories",
+    "step_templates",
+    "config/fx_rates",
+)
+# A local write that never comes back through the watch (e.g. a no-op merge)
+# stops forcing direct reads after this long.
+_PENDING_WRITE_TIMEOUT_SECONDS = 30.0
+
+
+@dataclass(frozen=True, slots=True)
+class ReferenceSnapshot:
+    """Read-only documents of one reference path at one point in time.
+
+    `source` is "listener" for snapshots pushed by the watch and "direct"
+    for the fallback read. Accessors return copies, so callers may mutate
+    what they get.
+    """
+
+    docs: Mapping[str, Mapping[str, Any]]
+    fingerprint: str
+    read_time: datetime | None
+    source: str
+
+    def document(self, doc_id: str) -> dict[str, Any] | None:
+        data = self.docs.get(doc_id)
+        return copy.deepcopy(dict(data)) if data is not None else None
+
+    def items(self) -> list[dict[str, Any]]:
+        return [
+            {**copy.deepcopy(dict(data)), "id": doc_id}
+            for doc_id, data in self.docs.items()
+        ]
+
+
+def _build_snapshot(
+    docs: dict[str, dict[str, Any]], read_time: datetime | None, source: str
+) -> ReferenceSnapshot:
+    return ReferenceSnapshot(
+        docs=MappingProxyType(
+            {doc_id: MappingProxyType(data) for doc_id, data in docs.items()}
+        ),
+        fingerprint=strong_etag(sorted(docs.items())),
+        read_time=read_time,
+        source=source,
+    )
+
+
+class ReferenceListener:
+    """Keeps one collection or document in memory through a Firestore watch.
+
+    The snapshot is served only while the watch is active and no write made
+    by this instance is still on its way back through it; otherwise reads go
+    to Firestore and count as fallback reads. A dropped watch is restarted by
+    the next read, at most once per `REFERENCE_DATA_RESTART_SECONDS`.
+    """
+
+    def __init__(self, path: str, restart_seconds: float) -> None:
+        self.path = path
+        self.restart_seconds = restart_seconds
+        self.updates = 0
+        self.fallback_reads = 0
+        self.restarts = 0
+        self._enabled = False
+        self._watch: Any = None
+        self._last_start: float | None = None
+        self._snapshot: ReferenceSnapshot | None = None
+        self._received_at: float | None = None
+        self._pending_write_at: datetime | None = None
+        self._lock = threading.Lock()
+
+    def _ref(self, client: Any) -> Any:
+        collection, _, doc_id = self.path.partition("/")
+        ref = client.collection(collection)
+        return ref.document(doc_id) if doc_id else ref
+
+    @property
+    def listening(self) -> bool:
+        watch = self._watch
+        return watch is not None and watch.is_active
+
+    def start(self, client: firestore.Client | None = None) -> None:
+        with self._lock:
+            if self.listening:
+                return
+            if self._last_start is not None:
+                self.restarts += 1
+            self._enabled = True
+            self._last_start = time.monotonic()
+        try:
+            client = client or get_firestore_client()
+            watch = self._ref(client).on_snapshot(self._on_snapshot)
+        except Exception:
+            logger.warning(
+                "reference_listener_start_failed",
+                extra={"event": "reference_listener_start_failed", "path": self.path},
+                exc_info=True,
+            )
+            return
+        with self._lock:
+            self._watch = watch
+
+    def stop(self) -> None:
+        with self._lock:
+            watch, self._watch = self._watch, None
+            self._enabled = False
+            self._snapshot = None
+            self._received_at = None
+            self._pending_write_at = None
+        if watch is not None:
+            watch.unsubscribe()
+
+    def _on_snapshot(
+        self, docs: list[Any], changes: list[Any], read_time: datetime | None
+    ) -> None:
+        _ = changes
+        data = {snap.id: snap.to_dict() or {} for snap in docs if snap.exists}
+        snapshot = _build_snapshot(data, read_time, "listener")
+        with self._lock:
+            self._snapshot = snapshot
+            self._received_at = time.monotonic()
+            self.updates += 1
+            pending = self._pending_write_at
+            if pending is not None and read_time is not None and read_time >= pending:
+                self._pending_write_at = None
+
+    def mark_written(self) -> None:
+        """Call after writing to this path, so reads skip the older snapshot."""
+        with self._lock:
+            self._pending_write_at = datetime.now(timezone.utc)
+
+    def _write_pending(self) -> bool:
+        pending = self._pending_write_at
+        if pending is None:
+            return False
+        age = (datetime.now(timezone.utc) - pending).total_seconds()
+        return age < _PENDING_WRITE_TIMEOUT_SECONDS
+
+    def current(self) -> ReferenceSnapshot | None:
+        with self._lock:
+            if self._snapshot is None or not self.listening or self._write_pending():
+                return None
+            return self._snapshot
+
+    def _fallback(self) -> None:
+        with self._lock:
+            self.fallback_reads += 1
+            restart = (
+                self._enabled
+                and not self.listening
+                and time.monotonic() - (self._last_start or 0.0) >= self.restart_seconds
+            )
+        if restart:
+            logger.warning(
+                "reference_listener_restarting",
+                extra={"event": "reference_listener_restarting", "path": self.path},
+            )
+            self.start()
+
+    async def get(self, db: firestore.AsyncClient) -> ReferenceSnapshot:
+        current = self.current()
+        if current is not None:
+            return current
+        self._fallback()
+        ref = self._ref(db)
+        if "/" in self.path:
+            snap = await ref.get()
+            docs = {snap.id: snap.to_dict() or {}} if snap.exists else {}
+        else:
+            docs = {snap.id: snap.to_dict() or {} async for snap in ref.stream()}
+        return _build_snapshot(docs, None, "direct")
+
+    async def document(
+        self, db: firestore.AsyncClient, doc_id: str
+    ) -> dict[str, Any] | None:
+        current = self.current()
+        if current is not None:
+            return current.document(doc_id)
+        self._fallback()
+        snap = await self._ref(db).document(doc_id).get()
+        return (snap.to_dict() or {}) if snap.exists else None
+
+    async def documents(
+        self, db: firestore.AsyncClient, doc_ids: list[str]
+    ) -> dict[str, dict[str, Any] | None]:
+        current = self.current()
+        if current is not None:
+            return {doc_id: current.document(doc_id) for doc_id in doc_ids}
+        self._fallback()
+        ref = self._ref(db)
+        snaps = await get_documents(db, [ref.document(doc_id) for doc_id in doc_ids])
+        return {
+            doc_id: (snap.to_dict() or {}) if snap is not None and snap.exists else None
+            for doc_id, snap in zip(doc_ids, snaps)
+        }
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            snapshot = self._snapshot
+            received_at = self._received_at
+            return {
+                "listening": self.listening,
+                "snapshotAgeSeconds": (
+                    round(time.monotonic() - received_at, 3)
+                    if received_at is not None
+                    else None
+                ),
+                "readTime": snapshot.read_time if snapshot else None,
+                "documents": len(snapshot.docs) if snapshot else None,
+                "writePending": self._write_pending(),
+                "updates": self.updates,
+                "fallbackReads": self.fallback_reads,
+                "restarts": self.restarts,
+            }
+
+
+_settings = get_settings()
+_listeners = {
+    path: ReferenceListener(path, _settings.REFERENCE_DATA_RESTART_SECONDS)
+    for path in REFERENCE_PATHS
+}
+
+
+def start_reference_listeners() -> None:
+    for listener in _listeners.values():
+        listener.start()
+
+
+def stop_reference_listeners() -> None:
+    for listener in _listeners.values():
+        listener.stop()
+
+
+def reference_data_stats() -> dict[str, dict[str, Any]]:
+    return {path: listener.stats() for path, listener in _listeners.items()}
+
+
+def mark_reference_written(path: str) -> None:
+    """Call after writing under `path` (a collection or a single document)."""
+    _listeners[path].mark_written()
+
+
+async def reference_snapshot(db: firestore.AsyncClient, path: str) -> ReferenceSnapshot:
+    return await _listeners[path].get(db)
+
+
+async def reference_documents(
+    db: firestore.AsyncClient, collection: str, doc_ids: list[str]
+) -> dict[str, dict[str, Any] | None]:
+    """Documents of a reference collection by id; None for missing ones."""
+    return await _listeners[collection].documents(db, doc_ids)
+
+
+async def reference_document(
+    db: firestore.AsyncClient, collection: str, doc_id: str
+) -> dict[str, Any] | None:
+    path = f"{collection}/{doc_id}"
+    if path in _listeners:
+        return (await _listeners[path].get(db)).document(doc_id)
+    return await _listeners[collection].document(db, doc_id)
@@ -1,3 +1,5 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 import yaml
@@ -10,6 +12,7 @@ from app.core.config import get_settings
 from app.core.errors import AppError, error_payload
 from app.core.logging import get_logger, setup_logging
 from app.core.middleware import RequestIdMiddleware, RequestLoggingMiddleware
+from app.db.reference_data import start_reference_listeners, stop_reference_listeners
 from app.routers import (
     admin_courses,
     admin_goals,
@@ -43,11 +46,23 @@ logger.info(
 
 OPENAPI_PATH = Path(__file__).with_name("openapi.yaml")
 
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    if settings.REFERENCE_DATA_LISTENERS:
+        start_reference_listeners()
+    try:
+        yield
+    finally:
+        stop_reference_listeners()
+
+
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     docs_url="/docs",
     openapi_url="/openapi.json",
+    lifespan=lifespan,
 )
 
 
@@ -2,6 +2,8 @@ from typing import Any
 
 from google.cloud import firestore
 
+from app.db.loader import get_documents
+from app.db.ranking import rank_sort_key
 from app.schemas.courses import (
     Course,
     CourseCreate,
@@ -12,13 +14,13 @@ from app.schemas.courses import (
 )
 
 
-def _course_collection(db: firestore.Client) -> firestore.CollectionReference:
+def _course_collection(db: firestore.AsyncClient) -> firestore.AsyncCollectionReference:
     return db.collection("courses")
 
 
 def _lessons_collection(
-    db: firestore.Client, course_id: str
-) -> firestore.CollectionReference:
+    db: firestore.AsyncClient, course_id: str
+) -> firestore.AsyncCollectionReference:
     return _course_collection(db).document(course_id).collection("lessons")
 
 
@@ -34,31 +36,31 @@ def _lesson_from_snapshot(snap: firestore.DocumentSnapshot) -> Lesson:
     return Lesson.model_validate(payload)
 
 
-def list_active_courses(
-    db: firestore.Client, goal_id: str | None = None
+async def list_active_courses(
+    db: firestore.AsyncClient, goal_id: str | None = None
 ) -> list[Course]:
-    query: firestore.Query = _course_collection(db).where("isActive", "==", True)
+    query: firestore.AsyncQuery = _course_collection(db).where("isActive", "==", True)
     if goal_id:
         query = query.where("goalIds", "array_contains", goal_id)
     query = query.order_by("title")
-    return [_course_from_snapshot(snap) for snap in query.stream()]
+    return [_course_from_snapshot(snap) async for snap in query.stream()]
 
 
-def admin_list_courses(
-    db: firestore.Client,
+async def admin_list_courses(
+    db: firestore.AsyncClient,
     *,
     is_active: bool | None = None,
     goal_id: str | None = None,
     q: str | None = None,
     limit: int = 100,
 ) -> list[Course]:
-    query: firestore.Query = _course_collection(db)
+    query: firestore.AsyncQuery = _course_collection(db)
     if is_active is not None:
         query = query.where("isActive", "==", is_active)
     if goal_id:
         query = query.where("goalIds", "array_contains", goal_id)
     query = query.order_by("title").limit(limit)
-    items = [_course_from_snapshot(snap) for snap in query.stream()]
+    items = [_course_from_snapshot(snap) async for snap in query.stream()]
     if not q:
         return items
     needle = q.strip().lower()
@@ -73,80 +75,95 @@ def admin_list_courses(
     return filtered
 
 
-def get_course_by_id(db: firestore.Client, course_id: str) -> Course | None:
-    snap = _course_collection(db).document(course_id).get()
+async def get_course_by_id(db: firestore.AsyncClient, course_id: str) -> Course | None:
+    snap = await _course_collection(db).document(course_id).get()
     if not snap.exists:
         return None
     return _course_from_snapshot(snap)
 
 
-def list_lessons_by_course_id(
-    db: firestore.Client,
+async def get_courses_by_ids(
+    db: firestore.AsyncClient, course_ids: list[str]
+) -> dict[str, Course | None]:
+    collection = _course_collection(db)
+    snaps = await get_documents(
+        db, [collection.document(course_id) for course_id in course_ids]
+    )
+    return {
+        course_id: _course_from_snapshot(snap) if snap and snap.exists else None
+        for course_id, snap in zip(course_ids, snaps)
+    }
+
+
+async def list_lessons_by_course_id(
+    db: firestore.AsyncClient,
     course_id: str,
     *,
     include_inactive: bool = False,
 ) -> list[Lesson]:
-    query: firestore.Query = _lessons_collection(db, course_id)
+    query: firestore.AsyncQuery = _lessons_collection(db, course_id)
     if not include_inactive:
         query = query.where("isActive", "==", True)
     query = query.order_by("order")
-    return [_lesson_from_snapshot(snap) for snap in query.stream()]
+    lessons = [_lesson_from_snapshot(snap) async for snap in query.stream()]
+    lessons.sort(key=lambda lesson: rank_sort_key(lesson.model_dump()))
+    return lessons
 
 
-def get_lesson_by_course_id_and_lesson_id(
-    db: firestore.Client,
+async def get_lesson_by_course_id_and_lesson_id(
+    db: firestore.AsyncClient,
     course_id: str,
     lesson_id: str,
 ) -> Lesson | None:
-    snap = _lessons_collection(db, course_id).document(lesson_id).get()
+    snap = await _lessons_collection(db, course_id).document(lesson_id).get()
     if not snap.exists:
         return None
     return _lesson_from_snapshot(snap)
 
 
-def create_course(db: firestore.Client, payload: CourseCreate) -> Course:
+async def create_course(db: firestore.AsyncClient, payload: CourseCreate) -> Course:
     now = firestore.SERVER_TIMESTAMP
     data = payload.model_dump()
     data["createdAt"] = now
     data["updatedAt"] = now
     doc_ref = _course_collection(db).document()
-    doc_ref.set(data)
-    return _course_from_snapshot(doc_ref.get())
+    await doc_ref.set(data)
+    return _course_from_snapshot(await doc_ref.get())
 
 
-def update_course(
-    db: firestore.Client,
+async def update_course(
+    db: firestore.AsyncClient,
     course_id: str,
     payload: CourseUpdate,
 ) -> Course | None:
     doc_ref = _course_collection(db).document(course_id)
-    snap = doc_ref.get()
+    snap = await doc_ref.get()
     if not snap.exists:
         return None
     updates: dict[str, Any] = payload.model_dump(exclude_unset=True)
     if not updates:
         return _course_from_snapshot(snap)
     updates["updatedAt"] = firestore.SERVER_TIMESTAMP
-    doc_ref.update(updates)
-    return _course_from_snapshot(doc_ref.get())
+    await doc_ref.update(updates)
+    return _course_from_snapshot(await doc_ref.get())
 
 
-def soft_delete_course(db: firestore.Client, course_id: str) -> bool:
+async def soft_delete_course(db: firestore.AsyncClient, course_id: str) -> bool:
     doc_ref = _course_collection(db).document(course_id)
-    snap = doc_ref.get()
+    snap = await doc_ref.get()
     if not snap.exists:
         return False
-    doc_ref.update({"isActive": False, "updatedAt": firestore.SERVER_TIMESTAMP})
+    await doc_ref.update({"isActive": False, "updatedAt": firestore.SERVER_TIMESTAMP})
     return True
 
 
-def compute_next_lesson_order(db: firestore.Client, course_id: str) -> int:
+async def compute_next_lesson_order(db: firestore.AsyncClient, course_id: str) -> int:
     query = (
         _lessons_collection(db, course_id)
         .order_by("order", direction=firestore.Query.DESCENDING)
         .limit(1)
     )
-    snaps = list(query.stream())
+    snaps = [snap async for snap in query.stream()]
     if not snaps:
         return 0
     data = snaps[0].to_dict() or {}
@@ -156,50 +173,50 @@ def compute_next_lesson_order(db: firestore.Client, course_id: str) -> int:
     return 0
 
 
-def create_lesson(
-    db: firestore.Client,
+async def create_lesson(
+    db: firestore.AsyncClient,
     course_id: str,
     payload: LessonCreate,
 ) -> Lesson:
     now = firestore.SERVER_TIMESTAMP
     order = payload.order
     if order is None:
-        order = compute_next_lesson_order(db, course_id)
+        order = await compute_next_lesson_order(db, course_id)
     data = payload.model_dump()
     data["order"] = order
     data["createdAt"] = now
     data["updatedAt"] = now
     doc_ref = _lessons_collection(db, course_id).document()
-    doc_ref.set(data)
-    return _lesson_from_snapshot(doc_ref.get())
+    await doc_ref.set(data)
+    return _lesson_from_snapshot(await doc_ref.get())
 
 
-def update_lesson(
-    db: firestore.Client,
+async def update_lesson(
+    db: firestore.AsyncClient,
     course_id: str,
     lesson_id: str,
     payload: LessonUpdate,
 ) -> Lesson | None:
     doc_ref = _lessons_collection(db, course_id).document(lesson_id)
-    snap = doc_ref.get()
+    snap = await doc_ref.get()
     if not snap.exists:
         return None
     updates: dict[str, Any] = payload.model_dump(exclude_unset=True)
     if not updates:
         return _lesson_from_snapshot(snap)
     updates["updatedAt"] = firestore.SERVER_TIMESTAMP
-    doc_ref.update(updates)
-    return _lesson_from_snapshot(doc_ref.get())
+    await doc_ref.update(updates)
+    return _lesson_from_snapshot(await doc_ref.get())
 
 
-def soft_delete_lesson(
-    db: firestore.Client,
+async def soft_delete_lesson(
+    db: firestore.AsyncClient,
     course_id: str,
     lesson_id: str,
 ) -> bool:
     doc_ref = _lessons_collection(db, course_id).document(lesson_id)
-    snap = doc_ref.get()
+    snap = await doc_ref.get()
     if not snap.exists:
         return False
-    doc_ref.update({"isActive": False, "updatedAt": firestore.SERVER_TIMESTAMP})
+    await doc_ref.update({"isActive": False, "updatedAt": firestore.SERVER_TIMESTAMP})
     return True
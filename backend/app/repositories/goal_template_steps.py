@@ -2,9 +2,12 @@ from typing import Any
 
 from google.cloud import firestore
 
+from app.db.bulk_delete import delete_query
+from app.db.bulk_writer import BulkWriter
 
-def list_goal_template_steps(
-    db: firestore.Client,
+
+async def list_goal_template_steps(
+    db: firestore.AsyncClient,
     goal_id: str,
 ) -> list[dict[str, Any]]:
     steps_ref = (
@@ -14,7 +17,7 @@ def list_goal_template_steps(
         .order_by("order", direction=firestore.Query.ASCENDING)
     )
     items: list[dict[str, Any]] = []
-    for snap in steps_ref.stream():
+    async for snap in steps_ref.stream():
         data = snap.to_dict() or {}
         data["id"] = snap.id
         data["goalId"] = goal_id
@@ -22,38 +25,26 @@ def list_goal_template_steps(
     return items
 
 
-def replace_goal_template_steps(
-    db: firestore.Client,
+async def replace_goal_template_steps(
+    db: firestore.AsyncClient,
     goal_id: str,
     steps: list[dict[str, Any]],
 ) -> list[dict[str, Any]]:
-    steps_ref = db.collection("goals").document(goal_id).collection("template_steps")
-    existing = list(steps_ref.stream())
-
-    operations = len(existing) + len(steps)
-    if operations > 500:
-        raise ValueError("Too many template steps for a single batch write")
+    """Replace a goal's template steps with `steps`, in as many batches as needed.
 
-    batch = db.batch()
-    for snap in existing:
-        batch.delete(snap.reference)
+    Existing steps whose id is reused are overwritten rather than deleted, so
+    no document gets both a delete and a set in concurrently committed
+    batches.
+    """
+    steps_ref = db.collection("goals").document(goal_id).collection("template_steps")
+    kept_ids = {step["id"] for step in steps if step.get("id")}
 
-    created_refs: list[firestore.DocumentReference] = []
+    writer = BulkWriter(db)
+    await delete_query(writer, steps_ref, keep=lambda snap: snap.id in kept_ids)
     for step in steps:
         step_id = step.get("id")
         doc_ref = steps_ref.document(step_id) if step_id else steps_ref.document()
-        created_refs.append(doc_ref)
-        batch.set(doc_ref, step)
-
-    batch.commit()
+        await writer.set(doc_ref, step)
+    await writer.flush()
 
-    items: list[dict[str, Any]] = []
-    for doc_ref in created_refs:
-        snap = doc_ref.get()
-        data = snap.to_dict() or {}
-        data["id"] = doc_ref.id
-        data["goalId"] = goal_id
-        items.append(data)
-
-    items.sort(key=lambda item: item.get("order", 0))
-    return items
+    return await list_goal_template_steps(db, goal_id)
@@ -5,7 +5,9 @@ from google.cloud import firestore
 from app.schemas.payments import Payment
 
 
-def _payments_collection(db: firestore.Client) -> firestore.CollectionReference:
+def _payments_collection(
+    db: firestore.AsyncClient,
+) -> firestore.AsyncCollectionReference:
     return db.collection("payments")
 
 
@@ -14,22 +16,22 @@ def _payment_from_snapshot(snap: firestore.DocumentSnapshot) -> Payment:
     return Payment.model_validate(data)
 
 
-def get_payment(db: firestore.Client, payment_id: str) -> Payment | None:
-    snap = _payments_collection(db).document(payment_id).get()
+async def get_payment(db: firestore.AsyncClient, payment_id: str) -> Payment | None:
+    snap = await _payments_collection(db).document(payment_id).get()
     if not snap.exists:
         return None
     return _payment_from_snapshot(snap)
 
 
-def list_payments_page(
-    db: firestore.Client,
+async def list_payments_page(
+    db: firestore.AsyncClient,
     *,
     status: str | None = None,
     provider: str | None = None,
     limit: int = 50,
     cursor: tuple[datetime, str] | None = None,
 ) -> list[tuple[str, Payment]]:
-    query: firestore.Query = _payments_collection(db)
+    query: firestore.AsyncQuery = _payments_collection(db)
     if status:
         query = query.where("status", "==", status)
     if provider:
@@ -40,17 +42,17 @@ def list_payments_page(
     if cursor:
         query = query.start_after([cursor[0], cursor[1]])
     items: list[tuple[str, Payment]] = []
-    for snap in query.stream():
+    async for snap in query.stream():
         items.append((snap.id, _payment_from_snapshot(snap)))
     return items
 
 
-def set_payment(
-    db: firestore.Client,
+async def set_payment(
+    db: firestore.AsyncClient,
     payment_id: str,
     payload: Payment,
 ) -> Payment:
     doc_ref = _payments_collection(db).document(payment_id)
     data = payload.model_dump(exclude_none=True)
-    doc_ref.set(data, merge=True)
-    return _payment_from_snapshot(doc_ref.get())
+    await doc_ref.set(data, merge=True)
+    return _payment_from_snapshot(await doc_ref.get())
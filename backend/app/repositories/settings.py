@@ -6,20 +6,56 @@ _SETTINGS_COLLECTION = "settings"
 _GMAIL_DOC_ID = "gmail"
 
 
-def _gmail_settings_doc(db: firestore.Client) -> firestore.DocumentReference:
+def _gmail_settings_doc(db: firestore.AsyncClient) -> firestore.AsyncDocumentReference:
     return db.collection(_SETTINGS_COLLECTION).document(_GMAIL_DOC_ID)
 
 
-def get_gmail_settings(db: firestore.Client) -> GmailSettings | None:
-    snap = _gmail_settings_doc(db).get()
+async def get_gmail_settings(db: firestore.AsyncClient) -> GmailSettings | None:
+    # Read directly, not from the reference snapshot: the webhook moves
+    # `lastHistoryId` on every push and must not resume from an older one.
+    snap = await _gmail_settings_doc(db).get()
     if not snap.exists:
         return None
-    data = snap.to_dict() or {}
-    return GmailSettings.model_validate(data)
+    return GmailSettings.model_validate(snap.to_dict() or {})
 
 
-def set_gmail_settings(db: firestore.Client, payload: GmailSettings) -> GmailSettings:
+async def set_gmail_settings(
+    db: firestore.AsyncClient, payload: GmailSettings
+) -> GmailSettings:
     doc_ref = _gmail_settings_doc(db)
-    doc_ref.set(payload.model_dump(exclude_none=True), merge=True)
-    data = doc_ref.get().to_dict() or {}
+    await doc_ref.set(payload.model_dump(exclude_none=True), merge=True)
+    data = (await doc_ref.get()).to_dict() or {}
     return GmailSettings.model_validate(data)
+
+
+def _history_id_after(history_id: str, current: object) -> bool:
+    if not isinstance(current, str) or not current:
+        return True
+    if history_id.isdigit() and current.isdigit():
+        return int(history_id) > int(current)
+    return history_id != current
+
+
+@firestore.async_transactional
+async def _advance_history_id(
+    transaction: firestore.AsyncTransaction,
+    doc_ref: firestore.AsyncDocumentReference,
+    history_id: str,
+) -> bool:
+    snap = await doc_ref.get(transaction=transaction)
+    current = (snap.to_dict() or {}).get("lastHistoryId") if snap.exists else None
+    if not _history_id_after(history_id, current):
+        return False
+    transaction.set(doc_ref, {"lastHistoryId": history_id}, merge=True)
+    return True
+
+
+async def advance_gmail_history_id(db: firestore.AsyncClient, history_id: str) -> bool:
+    """Move the webhook's `lastHistoryId` checkpoint forward to `history_id`.
+
+    The check and the write share a transaction, so an older push finishing
+    late cannot move the checkpoint back. Returns whether it moved.
+    """
+    return await _advance_history_id(
+        db.transaction(), _gmail_settings_doc(db), history_id
+    )
@@ -5,7 +5,8 @@ from pydantic_core import PydanticCustomError
 
 from app.auth.deps import require_staff
 from app.core.errors import AppError
-from app.db.firestore import get_firestore_client
+from app.db.bulk_writer import BulkWriter
+from app.db.firestore import get_async_firestore_client
 from app.repositories.courses import (
     admin_list_courses,
     create_course,
@@ -19,9 +20,16 @@ from app.repositories.courses import (
     update_lesson,
 )
 from app.schemas.courses import CourseCreate, CourseUpdate, LessonCreate, LessonUpdate
+from app.services.course_catalog import invalidate_course, invalidate_course_lessons
+from app.services.lesson_catalog import invalidate_lesson
+from app.services.lesson_fanout import fanout_job_ref, start_lesson_fanout
+from app.services.ranked_lists import move_ranked_item
 
 router = APIRouter(prefix="/api/admin", tags=["Admin - Courses"])
 
+# Lesson fields that are copied into student plan steps.
+_FANOUT_FIELDS = ("title", "content", "materialUrl")
+
 
 def _course_payload(course) -> dict:
     return {
@@ -44,6 +52,7 @@ def _lesson_payload(lesson) -> dict:
         "content": lesson.content,
         "materialUrl": lesson.materialUrl,
         "order": lesson.order,
+        "rank": lesson.rank,
         "isActive": lesson.isActive,
         "createdAt": lesson.createdAt,
         "updatedAt": lesson.updatedAt,
@@ -82,6 +91,11 @@ class ReorderLessonsRequest(BaseModel):
         return value
 
 
+class MoveLessonRequest(BaseModel):
+    afterLessonId: str | None = None
+    beforeLessonId: str | None = None
+
+
 @router.get("/courses")
 async def list_admin_courses(
     user: dict = Depends(require_staff),
@@ -93,8 +107,8 @@ async def list_admin_courses(
 ):
     _ = user
     _ = cursor
-    db = get_firestore_client()
-    items = admin_list_courses(
+    db = get_async_firestore_client()
+    items = await admin_list_courses(
         db,
         is_active=is_active,
         goal_id=goal_id.strip()
@@ -112,8 +126,9 @@ async def create_admin_course(
     user: dict = Depends(require_staff),
 ):
     _ = user
-    db = get_firestore_client()
-    created = create_course(db, payload)
+    db = get_async_firestore_client()
+    created = await create_course(db, payload)
+    invalidate_course(created.id)
     return _course_payload(created)
 
 
@@ -124,13 +139,14 @@ async def patch_admin_course(
     user: dict = Depends(require_staff),
 ):
     _ = user
-    db = get_firestore_client()
-    existing = get_course_by_id(db, course_id)
+    db = get_async_firestore_client()
+    existing = await get_course_by_id(db, course_id)
     if not existing:
         raise AppError(code="not_found", message="Course not found", status_code=404)
-    updated = update_course(db, course_id, payload)
+    updated = await update_course(db, course_id, payload)
     if not updated:
         raise AppError(code="not_found", message="Course not found", status_code=404)
+    invalidate_course(course_id)
     return _course_payload(updated)
 
 
@@ -140,10 +156,11 @@ async def delete_admin_course(
     user: dict = Depends(require_staff),
 ):
     _ = user
-    db = get_firestore_client()
-    ok = soft_delete_course(db, course_id)
+    db = get_async_firestore_client()
+    ok = await soft_delete_course(db, course_id)
     if not ok:
         raise AppError(code="not_found", message="Course not found", status_code=404)
+    invalidate_course(course_id)
     return None
 
 
@@ -153,10 +170,10 @@ async def list_admin_course_lessons(
     user: dict = Depends(require_staff),
 ):
     _ = user
-    db = get_firestore_client()
-    if not get_course_by_id(db, course_id):
+    db = get_async_firestore_client()
+    if not await get_course_by_id(db, course_id):
         raise AppError(code="not_found", message="Course not found", status_code=404)
-    items = list_lessons_by_course_id(db, course_id, include_inactive=True)
+    items = await list_lessons_by_course_id(db, course_id, include_inactive=True)
     return {"items": [_lesson_payload(item) for item in items]}
 
 
@@ -167,10 +184,11 @@ async def create_admin_course_lesson(
     user: dict = Depends(require_staff),
 ):
     _ = user
-    db = get_firestore_client()
-    if not get_course_by_id(db, course_id):
+    db = get_async_firestore_client()
+    if not await get_course_by_id(db, course_id):
         raise AppError(code="not_found", message="Course not found", status_code=404)
-    created = create_lesson(db, course_id, payload)
+    created = await create_lesson(db, course_id, payload)
+    invalidate_course_lessons(course_id)
     return _lesson_payload(created)
 
 
@@ -181,12 +199,15 @@ async def reorder_admin_course_lessons(
     user: dict = Depends(require_staff),
 ):
     _ = user
-    db = get_firestore_client()
-    if not get_course_by_id(db, course_id):
+    db = get_async_firestore_client()
+    if not await get_course_by_id(db, course_id):
         raise AppError(code="not_found", message="Course not found", status_code=404)
 
-    existing_lessons = list_lessons_by_course_id(db, course_id, include_inactive=True)
-    existing_ids = {lesson.id for lesson in existing_lessons}
+    existing_lessons = await list_lessons_by_course_id(
+        db, course_id, include_inactive=True
+    )
+    existing = {lesson.id: lesson for lesson in existing_lessons}
+    existing_ids = set(existing)
     requested_ids = {item.lessonId for item in payload.items}
 
     missing_ids = sorted(requested_ids - existing_ids)
@@ -199,33 +220,106 @@ async def reorder_admin_course_lessons(
         )
 
     lessons_ref = db.collection("courses").document(course_id).collection("lessons")
-    batch = db.batch()
+    writer = BulkWriter(db)
     for item in payload.items:
-        batch.update(
+        lesson = existing[item.lessonId]
+        if lesson.order == item.order and lesson.rank is None:
+            continue
+        await writer.update(
             lessons_ref.document(item.lessonId),
-            {"order": item.order, "updatedAt": firestore.SERVER_TIMESTAMP},
+            {
+                "order": item.order,
+                "rank": firestore.DELETE_FIELD,
+                "updatedAt": firestore.SERVER_TIMESTAMP,
+            },
         )
-    batch.commit()
+    await writer.flush()
+    invalidate_course_lessons(course_id)
     return {"updated": len(payload.items)}
 
 
+@router.post("/courses/{course_id}/lessons/{lesson_id}/move")
+async def move_admin_course_lesson(
+    course_id: str,
+    lesson_id: str,
+    payload: MoveLessonRequest,
+    user: dict = Depends(require_staff),
+):
+    _ = user
+    db = get_async_firestore_client()
+    if not await get_course_by_id(db, course_id):
+        raise AppError(code="not_found", message="Course not found", status_code=404)
+    lessons_ref = db.collection("courses").document(course_id).collection("lessons")
+    moved = await move_ranked_item(
+        db,
+        lessons_ref,
+        lesson_id,
+        after_id=payload.afterLessonId,
+        before_id=payload.beforeLessonId,
+    )
+    invalidate_course_lessons(course_id)
+    return {
+        "lessonId": lesson_id,
+        "order": moved["order"],
+        "rank": moved["rank"],
+        "rebalanced": moved["rebalanced"],
+    }
+
+
 @router.patch("/courses/{course_id}/lessons/{lesson_id}")
 async def patch_admin_course_lesson(
     course_id: str,
     lesson_id: str,
     payload: LessonUpdate,
+    fan_out: bool = Query(True, alias="fanOut"),
     user: dict = Depends(require_staff),
 ):
-    _ = user
-    db = get_firestore_client()
-    if not get_course_by_id(db, course_id):
+    db = get_async_firestore_client()
+    if not await get_course_by_id(db, course_id):
         raise AppError(code="not_found", message="Course not found", status_code=404)
-    if not get_lesson_by_course_id_and_lesson_id(db, course_id, lesson_id):
+    existing = await get_lesson_by_course_id_and_lesson_id(db, course_id, lesson_id)
+    if not existing:
         raise AppError(code="not_found", message="Lesson not found", status_code=404)
-    updated = update_lesson(db, course_id, lesson_id, payload)
+    updated = await update_lesson(db, course_id, lesson_id, payload)
     if not updated:
         raise AppError(code="not_found", message="Lesson not found", status_code=404)
-    return _lesson_payload(updated)
+    invalidate_lesson(course_id, lesson_id)
+    invalidate_course_lessons(course_id)
+
+    job_id = None
+    content_changed = any(
+        getattr(existing, field) != getattr(updated, field) for field in _FANOUT_FIELDS
+    )
+    if fan_out and content_changed:
+        job_id = await start_lesson_fanout(
+            db, course_id, lesson_id, requested_by=user.get("uid")
+        )
+    return {**_lesson_payload(updated), "fanOutJobId": job_id}
+
+
+@router.get("/lesson-fanouts/{job_id}")
+async def get_lesson_fanout(
+    job_id: str,
+    user: dict = Depends(require_staff),
+):
+    _ = user
+    db = get_async_firestore_client()
+    snap = await fanout_job_ref(db, job_id).get()
+    if not snap.exists:
+        raise AppError(code="not_found", message="Job not found", status_code=404)
+    data = snap.to_dict() or {}
+    return {
+        "id": job_id,
+        "courseId": data.get("courseId"),
+        "lessonId": data.get("lessonId"),
+        "status": data.get("status"),
+        "scanned": data.get("scanned", 0),
+        "updated": data.get("updated", 0),
+        "failures": data.get("failures", 0),
+        "requestedBy": data.get("requestedBy"),
+        "startedAt": data.get("startedAt"),
+        "updatedAt": data.get("updatedAt"),
+    }
 
 
 @router.delete(
@@ -237,9 +331,11 @@ async def delete_admin_course_lesson(
     user: dict = Depends(require_staff),
 ):
     _ = user
-    db = get_firestore_client()
-    if not get_course_by_id(db, course_id):
+    db = get_async_firestore_client()
+    if not await get_course_by_id(db, course_id):
         raise AppError(code="not_found", message="Course not found", status_code=404)
-    if not soft_delete_lesson(db, course_id, lesson_id):
+    if not await soft_delete_lesson(db, course_id, lesson_id):
         raise AppError(code="not_found", message="Lesson not found", status_code=404)
+    invalidate_lesson(course_id, lesson_id)
+    invalidate_course_lessons(course_id)
     return None
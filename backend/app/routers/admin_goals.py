@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 
 from app.auth.deps import require_staff
-from app.db.firestore import get_firestore_client
+from app.db.firestore import get_async_firestore_client
 from app.services.goal_template_steps import list_steps, replace_steps
 
 router = APIRouter(prefix="/api/admin", tags=["Admin - Goals"])
@@ -25,8 +25,8 @@ async def list_goal_template_steps(
     id: str,
     user: dict = Depends(require_staff),
 ):
-    db = get_firestore_client()
-    items = list_steps(db, id)
+    db = get_async_firestore_client()
+    items = await list_steps(db, id)
     return {"items": items}
 
 
@@ -36,6 +36,6 @@ async def replace_goal_template_steps(
     payload: UpsertGoalTemplateStepsRequest,
     user: dict = Depends(require_staff),
 ):
-    db = get_firestore_client()
-    items = replace_steps(db, id, payload.items)
+    db = get_async_firestore_client()
+    items = await replace_steps(db, id, payload.items)
     return {"items": items}
@@ -7,8 +7,9 @@ from google.cloud import firestore
 from pydantic import BaseModel, field_validator
 
 from app.auth.deps import require_staff
+from app.auth.profile_cache import invalidate_user_profile
 from app.core.errors import AppError
-from app.db.firestore import get_firestore_client
+from app.db.firestore import get_async_firestore_client
 from app.repositories.payments import get_payment, list_payments_page
 from app.schemas.payments import Payment, PaymentStatus
 from app.services.course_plan_sync import append_courses_to_student_plan
@@ -108,7 +109,7 @@ async def list_admin_payments(
     cursor: str | None = Query(None),
 ):
     _ = user
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     provider_value = (
         provider.strip() if isinstance(provider, str) and provider.strip() else None
     )
@@ -120,7 +121,7 @@ async def list_admin_payments(
     iterations = 0
     while len(collected) < limit + 1 and iterations < 10:
         iterations += 1
-        page = list_payments_page(
+        page = await list_payments_page(
             db,
             status=status.value if status else None,
             provider=provider_value,
@@ -161,8 +162,8 @@ async def get_admin_payment(
     user: dict = Depends(require_staff),
 ):
     _ = user
-    db = get_firestore_client()
-    payment = get_payment(db, payment_id)
+    db = get_async_firestore_client()
+    payment = await get_payment(db, payment_id)
     if not payment:
         raise AppError(code="not_found", message="Payment not found", status_code=404)
     return _payment_payload(payment_id, payment)
@@ -173,14 +174,14 @@ async def activate_admin_payment(
     payment_id: str,
     user: dict = Depends(require_staff),
 ):
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     payment_ref = db.collection("payments").document(payment_id)
-    payment_snap = payment_ref.get()
+    payment_snap = await payment_ref.get()
     if not payment_snap.exists:
         raise AppError(code="not_found", message="Payment not found", status_code=404)
     payment_data = payment_snap.to_dict() or {}
     if payment_data.get("status") == PaymentStatus.activated.value:
-        payment = get_payment(db, payment_id)
+        payment = await get_payment(db, payment_id)
         if not payment:
             raise AppError(
                 code="not_found", message="Payment not found", status_code=404
@@ -200,13 +201,13 @@ async def activate_admin_payment(
             status_code=400,
         )
     user_ref = db.collection("users").document(user_uid)
-    user_snap = user_ref.get()
+    user_snap = await user_ref.get()
     if not user_snap.exists:
         raise AppError(code="not_found", message="User not found", status_code=404)
 
     selected_courses = payment_data.get("selectedCourses")
     if isinstance(selected_courses, list) and selected_courses:
-        append_courses_to_student_plan(db, user_uid, selected_courses)
+        await append_courses_to_student_plan(db, user_uid, selected_courses)
 
     tx = db.transaction()
     tx.update(
@@ -225,9 +226,10 @@ async def activate_admin_payment(
             "updatedAt": firestore.SERVER_TIMESTAMP,
         },
     )
-    tx.commit()
+    await tx.commit()
+    invalidate_user_profile(user_uid)
 
-    payment = get_payment(db, payment_id)
+    payment = await get_payment(db, payment_id)
     if not payment:
         raise AppError(code="not_found", message="Payment not found", status_code=404)
     return {
@@ -244,14 +246,14 @@ async def reject_admin_payment(
     payload: RejectPaymentRequest,
     user: dict = Depends(require_staff),
 ):
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     payment_ref = db.collection("payments").document(payment_id)
-    payment_snap = payment_ref.get()
+    payment_snap = await payment_ref.get()
     if not payment_snap.exists:
         raise AppError(code="not_found", message="Payment not found", status_code=404)
     payment_data = payment_snap.to_dict() or {}
     if payment_data.get("status") == PaymentStatus.rejected.value:
-        payment = get_payment(db, payment_id)
+        payment = await get_payment(db, payment_id)
         if not payment:
             raise AppError(
                 code="not_found", message="Payment not found", status_code=404
@@ -263,7 +265,7 @@ async def reject_admin_payment(
             "payment": _payment_payload(payment_id, payment),
         }
 
-    payment_ref.update(
+    await payment_ref.update(
         {
             "status": PaymentStatus.rejected.value,
             "rejectedAt": firestore.SERVER_TIMESTAMP,
@@ -272,7 +274,7 @@ async def reject_admin_payment(
             "updatedAt": firestore.SERVER_TIMESTAMP,
         }
     )
-    payment = get_payment(db, payment_id)
+    payment = await get_payment(db, payment_id)
     if not payment:
         raise AppError(code="not_found", message="Payment not found", status_code=404)
     return {
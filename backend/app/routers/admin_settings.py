@@ -1,12 +1,14 @@
 from typing import Any
 
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Depends, Query, Request, Response, status
 from google.cloud import firestore
 from pydantic import BaseModel
 
 from app.auth.deps import get_current_user, require_staff
 from app.core.errors import AppError
-from app.db.firestore import get_firestore_client
+from app.core.etag import not_modified, strong_etag
+from app.db.firestore import get_async_firestore_client
+from app.db.reference_data import mark_reference_written, reference_snapshot
 
 router = APIRouter(prefix="/api/admin", tags=["Admin - Settings"])
 
@@ -53,8 +55,8 @@ class PatchStepTemplateRequest(BaseModel):
     isActive: bool | None = None
 
 
-def _doc_or_404(doc_ref: firestore.DocumentReference) -> dict[str, Any]:
-    snap = doc_ref.get()
+async def _doc_or_404(doc_ref: firestore.AsyncDocumentReference) -> dict[str, Any]:
+    snap = await doc_ref.get()
     if not snap.exists:
         raise AppError(code="not_found", message="Resource not found", status_code=404)
     data = snap.to_dict() or {}
@@ -62,19 +64,28 @@ def _doc_or_404(doc_ref: firestore.DocumentReference) -> dict[str, Any]:
     return data
 
 
+def _ordered(items: list[dict[str, Any]], field: str) -> list[dict[str, Any]]:
+    # Same as a Firestore order_by: documents without the field are left out.
+    present = [item for item in items if item.get(field) is not None]
+    present.sort(key=lambda item: (item[field], item["id"]))
+    return present
+
+
 @router.get("/categories")
 async def list_categories(
+    request: Request,
+    response: Response,
     user: dict = Depends(get_current_user),
     limit: int = Query(100, ge=1, le=100),
 ):
-    db = get_firestore_client()
-    query = db.collection("categories").order_by("name").limit(limit)
-    items = []
-    for snap in query.stream():
-        data = snap.to_dict() or {}
-        data["id"] = snap.id
-        items.append(data)
-    return {"items": items}
+    db = get_async_firestore_client()
+    snapshot = await reference_snapshot(db, "categories")
+    cached = not_modified(
+        request, response, strong_etag("categories", snapshot.fingerprint, limit)
+    )
+    if cached is not None:
+        return cached
+    return {"items": _ordered(snapshot.items(), "name")[:limit]}
 
 
 @router.post("/categories", status_code=status.HTTP_201_CREATED)
@@ -82,10 +93,10 @@ async def create_category(
     payload: CreateCategoryRequest,
     user: dict = Depends(require_staff),
 ):
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     doc_id = payload.slug
     doc_ref = db.collection("categories").document(doc_id)
-    if doc_ref.get().exists:
+    if (await doc_ref.get()).exists:
         raise AppError(
             code="conflict", message="Category already exists", status_code=409
         )
@@ -97,8 +108,9 @@ async def create_category(
         "createdAt": now,
         "updatedAt": now,
     }
-    doc_ref.set(data)
-    return _doc_or_404(doc_ref)
+    await doc_ref.set(data)
+    mark_reference_written("categories")
+    return await _doc_or_404(doc_ref)
 
 
 @router.patch("/categories/{id}")
@@ -107,13 +119,14 @@ async def update_category(
     payload: PatchCategoryRequest,
     user: dict = Depends(require_staff),
 ):
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     doc_ref = db.collection("categories").document(id)
-    _doc_or_404(doc_ref)
+    await _doc_or_404(doc_ref)
     updates = payload.model_dump(exclude_unset=True)
     updates["updatedAt"] = firestore.SERVER_TIMESTAMP
-    doc_ref.update(updates)
-    return _doc_or_404(doc_ref)
+    await doc_ref.update(updates)
+    mark_reference_written("categories")
+    return await _doc_or_404(doc_ref)
 
 
 @router.delete("/categories/{id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -121,24 +134,32 @@ async def delete_category(
     id: str,
     user: dict = Depends(require_staff),
 ):
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     doc_ref = db.collection("categories").document(id)
-    _doc_or_404(doc_ref)
-    doc_ref.delete()
+    await _doc_or_404(doc_ref)
+    await doc_ref.delete()
+    mark_reference_written("categories")
     return None
 
 
 @router.get("/goals")
 async def list_goals(
+    request: Request,
+    response: Response,
     user: dict = Depends(get_current_user),
     is_active: bool | None = Query(None, alias="isActive"),
     limit: int = Query(100, ge=1, le=100),
 ):
-    db = get_firestore_client()
-    query = db.collection("goals").order_by("createdAt")
+    db = get_async_firestore_client()
+    snapshot = await reference_snapshot(db, "goals")
+    etag = strong_etag(
+        "goals", snapshot.fingerprint, user.get("role") == "staff", is_active, limit
+    )
+    cached = not_modified(request, response, etag)
+    if cached is not None:
+        return cached
     items = []
-    for snap in query.stream():
-        data = snap.to_dict() or {}
+    for data in _ordered(snapshot.items(), "createdAt"):
         goal_is_active = data.get("isActive")
         if user.get("role") == "staff":
             expected_is_active = True if is_active is None else is_active
@@ -146,7 +167,6 @@ async def list_goals(
                 continue
         elif data.get("isActive") is False:
             continue
-        data["id"] = snap.id
         items.append(data)
         if len(items) >= limit:
             break
@@ -158,7 +178,7 @@ async def create_goal(
     payload: CreateGoalRequest,
     user: dict = Depends(require_staff),
 ):
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     now = firestore.SERVER_TIMESTAMP
     data = {
         "title": payload.title,
@@ -168,8 +188,9 @@ async def create_goal(
         "updatedAt": now,
     }
     doc_ref = db.collection("goals").document()
-    doc_ref.set(data)
-    return _doc_or_404(doc_ref)
+    await doc_ref.set(data)
+    mark_reference_written("goals")
+    return await _doc_or_404(doc_ref)
 
 
 @router.patch("/goals/{id}")
@@ -178,13 +199,14 @@ async def update_goal(
     payload: PatchGoalRequest,
     user: dict = Depends(require_staff),
 ):
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     doc_ref = db.collection("goals").document(id)
-    _doc_or_404(doc_ref)
+    await _doc_or_404(doc_ref)
     updates = payload.model_dump(exclude_unset=True)
     updates["updatedAt"] = firestore.SERVER_TIMESTAMP
-    doc_ref.update(updates)
-    return _doc_or_404(doc_ref)
+    await doc_ref.update(updates)
+    mark_reference_written("goals")
+    return await _doc_or_404(doc_ref)
 
 
 @router.delete("/goals/{id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -192,10 +214,11 @@ async def delete_goal(
     id: str,
     user: dict = Depends(require_staff),
 ):
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     doc_ref = db.collection("goals").document(id)
-    _doc_or_404(doc_ref)
-    doc_ref.update({"isActive": False, "updatedAt": firestore.SERVER_TIMESTAMP})
+    await _doc_or_404(doc_ref)
+    await doc_ref.update({"isActive": False, "updatedAt": firestore.SERVER_TIMESTAMP})
+    mark_reference_written("goals")
     return None
 
 
@@ -207,19 +230,15 @@ async def list_step_templates(
     limit: int = Query(100, ge=1, le=100),
     cursor: str | None = Query(None),
 ):
-    db = get_firestore_client()
-    query = db.collection("step_templates")
-    if is_active is not None:
-        query = query.where("isActive", "==", is_active)
-    if category_id:
-        query = query.where("categoryId", "==", category_id)
-    query = query.order_by("createdAt").limit(limit)
-    items = []
-    for snap in query.stream():
-        data = snap.to_dict() or {}
-        data["id"] = snap.id
-        items.append(data)
-    return {"items": items}
+    db = get_async_firestore_client()
+    snapshot = await reference_snapshot(db, "step_templates")
+    items = [
+        data
+        for data in _ordered(snapshot.items(), "createdAt")
+        if (is_active is None or data.get("isActive") == is_active)
+        and (not category_id or data.get("categoryId") == category_id)
+    ]
+    return {"items": items[:limit]}
 
 
 @router.post("/step-templates", status_code=status.HTTP_201_CREATED)
@@ -227,7 +246,7 @@ async def create_step_template(
     payload: CreateStepTemplateRequest,
     user: dict = Depends(require_staff),
 ):
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     now = firestore.SERVER_TIMESTAMP
     data = {
         "title": payload.title,
@@ -240,8 +259,9 @@ async def create_step_template(
         "updatedAt": now,
     }
     doc_ref = db.collection("step_templates").document()
-    doc_ref.set(data)
-    return _doc_or_404(doc_ref)
+    await doc_ref.set(data)
+    mark_reference_written("step_templates")
+    return await _doc_or_404(doc_ref)
 
 
 @router.patch("/step-templates/{id}")
@@ -250,15 +270,16 @@ async def update_step_template(
     payload: PatchStepTemplateRequest,
     user: dict = Depends(require_staff),
 ):
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     doc_ref = db.collection("step_templates").document(id)
-    _doc_or_404(doc_ref)
+    await _doc_or_404(doc_ref)
     updates = payload.model_dump(exclude_unset=True)
     if "tags" in updates and updates["tags"] is None:
         updates["tags"] = []
     updates["updatedAt"] = firestore.SERVER_TIMESTAMP
-    doc_ref.update(updates)
-    return _doc_or_404(doc_ref)
+    await doc_ref.update(updates)
+    mark_reference_written("step_templates")
+    return await _doc_or_404(doc_ref)
 
 
 @router.delete("/step-templates/{id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -266,8 +287,9 @@ async def delete_step_template(
     id: str,
     user: dict = Depends(require_staff),
 ):
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     doc_ref = db.collection("step_templates").document(id)
-    _doc_or_404(doc_ref)
-    doc_ref.delete()
+    await _doc_or_404(doc_ref)
+    await doc_ref.delete()
+    mark_reference_written("step_templates")
     return None
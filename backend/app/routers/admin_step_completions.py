@@ -11,16 +11,19 @@ from pydantic import BaseModel
 from app.auth.deps import require_staff
 from app.core.errors import AppError
 from app.core.logging import get_logger
-from app.db.firestore import get_firestore_client
+from app.db.firestore import get_async_firestore_client
+from app.db.instrumentation import firestore_op_log_fields
+from app.services.progress import write_step_done
+from app.services.student_plan import steps_changed
 
 router = APIRouter(prefix="/api/admin", tags=["Admin - Students"])
 logger = get_logger("app.db")
 
 
-def _doc_or_404(
-    doc_ref: firestore.DocumentReference,
+async def _doc_or_404(
+    doc_ref: firestore.AsyncDocumentReference,
 ) -> tuple[firestore.DocumentSnapshot, dict[str, Any]]:
-    snap = doc_ref.get()
+    snap = await doc_ref.get()
     if not snap.exists:
         raise AppError(code="not_found", message="Resource not found", status_code=404)
     data = snap.to_dict() or {}
@@ -67,38 +70,6 @@ def _decode_cursor(cursor: str) -> tuple[datetime, str]:
     return completed_at, doc_id
 
 
-def _progress_percent(done: int, total: int) -> int:
-    if total <= 0:
-        return 0
-    return round((done / total) * 100)
-
-
-def _sync_user_progress(
-    db: firestore.Client,
-    uid: str,
-    *,
-    done_delta: int = 0,
-) -> None:
-    user_ref = db.collection("users").document(uid)
-    snap = user_ref.get()
-    if not snap.exists:
-        return
-    data = snap.to_dict() or {}
-    prev_done = int(data.get("stepsDone") or 0)
-    prev_total = int(data.get("stepsTotal") or 0)
-    next_done = max(0, prev_done + done_delta)
-    if next_done > prev_total:
-        next_done = prev_total
-    user_ref.update(
-        {
-            "stepsDone": next_done,
-            "stepsTotal": prev_total,
-            "progressPercent": _progress_percent(next_done, prev_total),
-            "updatedAt": firestore.SERVER_TIMESTAMP,
-        }
-    )
-
-
 @router.get("/step-completions")
 async def list_step_completions(
     user: dict = Depends(require_staff),
@@ -107,7 +78,7 @@ async def list_step_completions(
     status_filter: str = Query("completed", alias="status"),
 ):
     started = time.perf_counter()
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     if status_filter not in {"completed", "revoked", "all"}:
         raise AppError(
             code="validation_error",
@@ -125,7 +96,7 @@ async def list_step_completions(
         cursor_completed_at, cursor_id = _decode_cursor(cursor)
         query = query.start_after([cursor_completed_at, cursor_id])
 
-    snaps = list(query.stream())
+    snaps = [snap async for snap in query.stream()]
     items: list[dict[str, Any]] = []
     for snap in snaps:
         data = snap.to_dict() or {}
@@ -142,8 +113,7 @@ async def list_step_completions(
             "duration_ms": round((time.perf_counter() - started) * 1000, 2),
             "returned": len(items),
             "limit": limit,
-            "db_reads_estimate": len(items),
-            "db_writes_estimate": 0,
+            **firestore_op_log_fields(),
         },
     )
     return {"items": items, "nextCursor": next_cursor}
@@ -163,9 +133,9 @@ async def patch_step_completion(
             status_code=400,
         )
 
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     completion_ref = db.collection("step_completions").document(completion_id)
-    _, completion = _doc_or_404(completion_ref)
+    _, completion = await _doc_or_404(completion_ref)
 
     patch = {**updates, "updatedAt": firestore.SERVER_TIMESTAMP}
     batch = db.batch()
@@ -174,13 +144,9 @@ async def patch_step_completion(
     student_uid = completion.get("studentUid")
     step_id = completion.get("stepId")
     if student_uid and step_id:
-        step_ref = (
-            db.collection("student_plans")
-            .document(student_uid)
-            .collection("steps")
-            .document(step_id)
-        )
-        step_snap = step_ref.get()
+        plan_ref = db.collection("student_plans").document(student_uid)
+        step_ref = plan_ref.collection("steps").document(step_id)
+        step_snap = await step_ref.get()
         step_data = step_snap.to_dict() if step_snap.exists else None
         if step_data and step_data.get("isDone") is True:
             step_updates: dict[str, Any] = {"updatedAt": firestore.SERVER_TIMESTAMP}
@@ -192,7 +158,8 @@ async def patch_step_completion(
                 step_ref,
                 step_updates,
             )
-    batch.commit()
+            batch.update(plan_ref, steps_changed())
+    await batch.commit()
 
     return {"status": "updated", "id": completion_id}
 
@@ -202,9 +169,9 @@ async def revoke_step_completion(
     completion_id: str,
     user: dict = Depends(require_staff),
 ):
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     completion_ref = db.collection("step_completions").document(completion_id)
-    completion_snap = completion_ref.get()
+    completion_snap = await completion_ref.get()
     if not completion_snap.exists:
         raise AppError(code="not_found", message="Resource not found", status_code=404)
     completion = completion_snap.to_dict() or {}
@@ -214,31 +181,11 @@ async def revoke_step_completion(
     if not student_uid or not step_id:
         raise AppError(code="not_found", message="Resource not found", status_code=404)
 
-    step_ref = (
-        db.collection("student_plans")
-        .document(student_uid)
-        .collection("steps")
-        .document(step_id)
-    )
-    step_snap = step_ref.get()
-    if not step_snap.exists:
-        raise AppError(code="not_found", message="Resource not found", status_code=404)
-    step_data = step_snap.to_dict() or {}
-    should_decrement = completion.get("status") == "completed" and bool(
-        step_data.get("isDone")
-    )
-
-    batch = db.batch()
-    batch.update(
-        completion_ref,
-        {
-            "status": "revoked",
-            "revokedAt": firestore.SERVER_TIMESTAMP,
-            "revokedBy": user.get("uid"),
-            "updatedAt": firestore.SERVER_TIMESTAMP,
-        },
-    )
-    batch.update(
+    plan_ref = db.collection("student_plans").document(student_uid)
+    step_ref = plan_ref.collection("steps").document(step_id)
+    previous = await write_step_done(
+        db,
+        student_uid,
         step_ref,
         {
             "isDone": False,
@@ -247,9 +194,20 @@ async def revoke_step_completion(
             "doneLink": None,
             "updatedAt": firestore.SERVER_TIMESTAMP,
         },
+        extra_updates=[
+            (
+                completion_ref,
+                {
+                    "status": "revoked",
+                    "revokedAt": firestore.SERVER_TIMESTAMP,
+                    "revokedBy": user.get("uid"),
+                    "updatedAt": firestore.SERVER_TIMESTAMP,
+                },
+            ),
+            (plan_ref, steps_changed()),
+        ],
     )
-    batch.commit()
-    if should_decrement:
-        _sync_user_progress(db, student_uid, done_delta=-1)
+    if previous is None:
+        raise AppError(code="not_found", message="Resource not found", status_code=404)
 
     return {"status": "ok"}
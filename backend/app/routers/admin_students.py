@@ -1,31 +1,77 @@
+import base64
+import json
 import time
+from datetime import datetime
 from typing import Any
 
-from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi import APIRouter, Depends, Query, Request, Response, status
 from google.cloud import firestore
 from pydantic import BaseModel, field_validator
 from pydantic_core import PydanticCustomError
 
 from app.auth.deps import get_current_user, require_staff
 from app.auth.firebase import get_or_create_user
+from app.auth.profile_cache import invalidate_user_profile
 from app.auth.user_status import (
     DEFAULT_NEW_USER_STATUS,
     UserStatus,
-    ensure_user_status_with_migration,
+    normalize_user_status,
+    user_status_missing,
     validate_user_status_or_400,
 )
 from app.core.errors import AppError, forbidden_error
 from app.core.logging import get_logger
-from app.db.firestore import get_firestore_client, should_mark_first_hundred_student
-from app.services.course_plan_sync import append_courses_to_student_plan
+from app.db.bulk_writer import BulkWriter
+from app.db.firestore import (
+    count_documents,
+    get_async_firestore_client,
+    should_mark_first_hundred_student,
+)
+from app.db.instrumentation import firestore_op_log_fields
+from app.db.reference_data import reference_document, reference_documents
+from app.services.course_plan_sync import (
+    SOURCE_LESSON_KEYS_FIELD,
+    append_courses_to_student_plan,
+    step_source_lesson_key,
+)
 from app.services.goal_template_steps import list_steps
+from app.services.plan_reset import reset_plan_from_template
+from app.services.progress import (
+    apply_user_progress_delta,
+    progress_fields,
+    progress_percent,
+    set_user_progress,
+)
+from app.services.ranked_lists import move_ranked_item
+from app.services.resumable_jobs import JOB_QUEUED
+from app.services.student_deletion import (
+    delete_student_data,
+    deletion_progress_ref,
+    queue_student_deletion,
+)
+from app.services.student_dossier import DOSSIER_SECTIONS, load_student_dossier
+from app.services.student_plan import (
+    PLAN_SYNC_FIELDS,
+    list_plan_step_changes,
+    plan_payload,
+    step_tombstone,
+    steps_changed,
+)
 from app.services.telegram import send_admin_message
 from app.services.telegram_events import fmt_registration, fmt_status_changed
+from app.services.user_search import (
+    matches_search_terms,
+    primary_search_term,
+    search_terms,
+    user_search_fields,
+    without_search_fields,
+)
 
 router = APIRouter(prefix="/api/admin", tags=["Admin - Students"])
 logger = get_logger("app.db")
 ALLOWED_USER_ROLES = {"student", "admin", "expert"}
 ALLOWED_STUDENT_SORT_BY = {"createdAt", "progress"}
+STUDENT_SORT_FIELDS = {"createdAt": "createdAt", "progress": "progressPercent"}
 ALLOWED_SORT_DIR = {"asc", "desc"}
 
 
@@ -134,8 +180,13 @@ class ReorderStepsRequest(BaseModel):
     items: list[ReorderStepItem]
 
 
-def _doc_or_404(doc_ref: firestore.DocumentReference) -> dict[str, Any]:
-    snap = doc_ref.get()
+class MoveStepRequest(BaseModel):
+    afterStepId: str | None = None
+    beforeStepId: str | None = None
+
+
+async def _doc_or_404(doc_ref: firestore.AsyncDocumentReference) -> dict[str, Any]:
+    snap = await doc_ref.get()
     if not snap.exists:
         raise AppError(code="not_found", message="Resource not found", status_code=404)
     data = snap.to_dict() or {}
@@ -143,16 +194,9 @@ def _doc_or_404(doc_ref: firestore.DocumentReference) -> dict[str, Any]:
     return data
 
 
-def _ensure_user_exists(db: firestore.Client, uid: str) -> None:
+async def _ensure_user_exists(db: firestore.AsyncClient, uid: str) -> None:
     doc_ref = db.collection("users").document(uid)
-    data = _doc_or_404(doc_ref)
-    ensure_user_status_with_migration(doc_ref, data)
-
-
-def _progress_percent(done: int, total: int) -> int:
-    if total <= 0:
-        return 0
-    return round((done / total) * 100)
+    normalize_user_status(await _doc_or_404(doc_ref))
 
 
 def _validate_student_sort_or_400(sort_by: str, sort_dir: str) -> None:
@@ -170,92 +214,39 @@ def _validate_student_sort_or_400(sort_by: str, sort_dir: str) -> None:
         )
 
 
-def _sort_student_items(
-    items: list[dict[str, Any]],
-    *,
-    sort_by: str,
-    sort_dir: str,
-) -> list[dict[str, Any]]:
-    sorted_items = items[:]
-    sorted_items.sort(key=lambda item: str(item.get("uid") or ""))
-    if sort_by == "progress":
-        sorted_items.sort(
-            key=lambda item: int(item.get("progressPercent") or 0),
-            reverse=sort_dir == "desc",
-        )
-        return sorted_items
-    sorted_items.sort(
-        key=lambda item: item.get("createdAt") or "",
-        reverse=sort_dir == "desc",
-    )
-    return sorted_items
-
-
-def _sync_user_progress(
-    db: firestore.Client,
-    uid: str,
-    *,
-    done_delta: int = 0,
-    total_delta: int = 0,
-    absolute_done: int | None = None,
-    absolute_total: int | None = None,
-) -> None:
-    user_ref = db.collection("users").document(uid)
-    snap = user_ref.get()
-    if not snap.exists:
-        return
-    data = snap.to_dict() or {}
-    prev_done = int(data.get("stepsDone") or 0)
-    prev_total = int(data.get("stepsTotal") or 0)
-    next_done = absolute_done if absolute_done is not None else prev_done + done_delta
-    next_total = (
-        absolute_total if absolute_total is not None else prev_total + total_delta
-    )
-    next_done = max(0, int(next_done))
-    next_total = max(0, int(next_total))
-    if next_done > next_total:
-        next_done = next_total
-    user_ref.update(
-        {
-            "stepsDone": next_done,
-            "stepsTotal": next_total,
-            "progressPercent": _progress_percent(next_done, next_total),
-            "updatedAt": firestore.SERVER_TIMESTAMP,
-        }
-    )
+def _encode_student_cursor(sort_by: str, value: Any, uid: str) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = {"sortBy": sort_by, "value": value, "id": uid}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("utf-8")
 
 
-def _recalculate_progress_from_steps(
-    db: firestore.Client, uid: str
-) -> tuple[int, int, int]:
-    plan_ref = db.collection("student_plans").document(uid)
-    if not plan_ref.get().exists:
-        _sync_user_progress(db, uid, absolute_done=0, absolute_total=0)
-        return 0, 0, 0
-    total = 0
-    done = 0
-    for step_snap in plan_ref.collection("steps").stream():
-        total += 1
-        if (step_snap.to_dict() or {}).get("isDone"):
-            done += 1
-    percent = _progress_percent(done, total)
-    _sync_user_progress(db, uid, absolute_done=done, absolute_total=total)
-    return done, total, percent
-
-
-def _commit_deletes_in_batches(
-    db: firestore.Client,
-    refs: list[firestore.DocumentReference],
-    *,
-    batch_limit: int = 450,
-) -> None:
-    if not refs:
-        return
-    for i in range(0, len(refs), batch_limit):
-        batch = db.batch()
-        for ref in refs[i : i + batch_limit]:
-            batch.delete(ref)
-        batch.commit()
+def _decode_student_cursor(cursor: str, sort_by: str) -> tuple[Any, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("utf-8")).decode("utf-8")
+        payload = json.loads(raw)
+        value = payload["value"]
+        uid = payload["id"]
+        if payload["sortBy"] != sort_by:
+            raise ValueError("cursor sortBy mismatch")
+        if sort_by == "createdAt":
+            value = datetime.fromisoformat(value)
+        elif isinstance(value, bool) or not isinstance(value, int):
+            raise ValueError("progress cursor must be an integer")
+    except Exception:
+        raise AppError(
+            code="validation_error",
+            message="Invalid cursor",
+            status_code=400,
+        )
+    if not isinstance(uid, str) or not uid:
+        raise AppError(
+            code="validation_error",
+            message="Invalid cursor",
+            status_code=400,
+        )
+    return value, uid
 
 
 def _emit_status_changed_event(
@@ -293,7 +284,7 @@ async def list_students(
     if status_filter:
         validate_user_status_or_400(status_filter)
     _validate_student_sort_or_400(sort_by, sort_dir)
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     query = db.collection("users")
     if role:
         if role == "staff":
@@ -302,68 +293,82 @@ async def list_students(
             query = query.where("role", "==", role)
     if status_filter:
         query = query.where("status", "==", status_filter)
-    query = query.order_by("createdAt")
-
-    items = []
-    for snap in query.stream():
-        data = snap.to_dict() or {}
-        ensure_user_status_with_migration(snap.reference, data)
-        data["uid"] = snap.id
-        items.append(data)
-
-    if items:
-        for item in items:
-            if item.get("role") != "student":
-                item["progressPercent"] = 0
-                item["stepsDone"] = 0
-                item["stepsTotal"] = 0
-                continue
-            has_cached_progress = (
-                item.get("stepsDone") is not None and item.get("stepsTotal") is not None
-            )
-            if not has_cached_progress:
-                done, total, percent = _recalculate_progress_from_steps(db, item["uid"])
-                item["stepsDone"] = done
-                item["stepsTotal"] = total
-                item["progressPercent"] = percent
-                continue
-            done = int(item.get("stepsDone") or 0)
-            total = int(item.get("stepsTotal") or 0)
-            item["stepsDone"] = done
-            item["stepsTotal"] = total
-            item["progressPercent"] = int(
-                item.get("progressPercent")
-                if item.get("progressPercent") is not None
-                else _progress_percent(done, total)
-            )
-
-    if q:
-        q_lower = q.lower()
-        items = [
-            item
-            for item in items
-            if q_lower in (item.get("email") or "").lower()
-            or q_lower in (item.get("displayName") or "").lower()
-        ]
-
-    items = _sort_student_items(items, sort_by=sort_by, sort_dir=sort_dir)
-
-    if cursor:
-        cursor_index = next(
-            (index for index, item in enumerate(items) if item.get("uid") == cursor),
-            None,
+    terms = search_terms(q)
+    if terms:
+        query = query.where(
+            "searchTokens", "array_contains", primary_search_term(terms)
         )
-        if cursor_index is None:
-            raise AppError(
-                code="not_found",
-                message="Cursor not found",
-                status_code=404,
-            )
-        items = items[cursor_index + 1 :]
+
+    sort_field = STUDENT_SORT_FIELDS[sort_by]
+    direction = (
+        firestore.Query.DESCENDING if sort_dir == "desc" else firestore.Query.ASCENDING
+    )
+    # uid ascending breaks ties regardless of direction, matching the UI order.
+    query = query.order_by(sort_field, direction=direction).order_by(
+        "__name__", direction=firestore.Query.ASCENDING
+    )
+    # One array_contains narrows the query; extra q words are checked here,
+    # reading bounded batches until the page fills like the payments feed.
+    post_filter = len(terms) > 1
+    # Counted on the ordered query: order_by drops docs missing the sort field,
+    # and the total must match the items the pages can reach. A count cannot
+    # apply the extra q words, so there is no total when they are used.
+    total = None if post_filter else await count_documents(query)
+    cursor_value = _decode_student_cursor(cursor, sort_by) if cursor else None
+    batch_limit = min(100, max(limit * 2, limit + 1)) if post_filter else limit + 1
+    items: list[dict[str, Any]] = []
+    last_scanned: dict[str, Any] | None = None
+    exhausted = False
+    iterations = 0
+    while len(items) < limit + 1 and iterations < 10:
+        iterations += 1
+        page_query = query
+        if cursor_value is not None:
+            page_query = page_query.start_after(list(cursor_value))
+        scanned = 0
+        async for snap in page_query.limit(batch_limit).stream():
+            scanned += 1
+            data = snap.to_dict() or {}
+            data["uid"] = snap.id
+            last_scanned = data
+            cursor_value = (data.get(sort_field), snap.id)
+            if not post_filter or matches_search_terms(data, terms):
+                items.append(data)
+                if len(items) >= limit + 1:
+                    break
+        if scanned < batch_limit:
+            exhausted = True
+            break
 
     has_more = len(items) > limit
     page_items = items[:limit]
-    next_cursor = page_items[-1]["uid"] if has_more and page_items else None
+    next_cursor = None
+    if has_more and page_items:
+        last = page_items[-1]
+        next_cursor = _encode_student_cursor(sort_by, last.get(sort_field), last["uid"])
+    elif not exhausted and last_scanned is not None:
+        # The scan budget ran out before the page filled; resume after it.
+        next_cursor = _encode_student_cursor(
+            sort_by, last_scanned.get(sort_field), last_scanned["uid"]
+        )
+
+    for item in page_items:
+        normalize_user_status(item)
+        without_search_fields(item)
+        if item.get("role") != "student":
+            item["progressPercent"] = 0
+            item["stepsDone"] = 0
+            item["stepsTotal"] = 0
+            continue
+        done = int(item.get("stepsDone") or 0)
+        total_steps = int(item.get("stepsTotal") or 0)
+        item["stepsDone"] = done
+        item["stepsTotal"] = total_steps
+        item["progressPercent"] = int(
+            item.get("progressPercent")
+            if item.get("progressPercent") is not None
+            else progress_percent(done, total_steps)
+        )
 
     logger.info(
         "students_list_db_timing",
@@ -371,11 +376,10 @@ async def list_students(
             "duration_ms": round((time.perf_counter() - started) * 1000, 2),
             "returned": len(page_items),
             "limit": limit,
-            "db_reads_estimate": len(items),
-            "db_writes_estimate": 0,
+            **firestore_op_log_fields(),
         },
     )
-    return {"items": page_items, "nextCursor": next_cursor}
+    return {"items": page_items, "nextCursor": next_cursor, "total": total}
 
 
 @router.post("/students", status_code=status.HTTP_201_CREATED)
@@ -383,7 +387,7 @@ async def create_student(
     payload: CreateStudentRequest,
     user: dict = Depends(require_staff),
 ):
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     try:
         auth_user = get_or_create_user(payload.email, payload.displayName)
     except Exception as exc:  # pragma: no cover - depends on firebase
@@ -396,25 +400,29 @@ async def create_student(
     now = firestore.SERVER_TIMESTAMP
     role = payload.role or "student"
     doc_ref = db.collection("users").document(auth_user.uid)
-    existing = doc_ref.get()
+    existing = await doc_ref.get()
     is_new_user = not existing.exists
-    created_at = (
-        (existing.to_dict() or {}).get("createdAt", now) if existing.exists else now
+    existing_data = (existing.to_dict() or {}) if existing.exists else {}
+    created_at = existing_data.get("createdAt", now) if existing.exists else now
+    # Only new users claim a first-hundred slot; re-saving keeps the flag.
+    is_first_hundred = (
+        await should_mark_first_hundred_student(db, role=role)
+        if is_new_user
+        else bool(existing_data.get("isFirstHundred"))
     )
     data = {
         "email": payload.email,
         "displayName": payload.displayName,
         "role": role,
         "status": DEFAULT_NEW_USER_STATUS,
-        "isFirstHundred": should_mark_first_hundred_student(db, role=role),
-        "stepsDone": 0,
-        "stepsTotal": 0,
-        "progressPercent": 0,
+        "isFirstHundred": is_first_hundred,
+        **progress_fields(0, 0),
+        **user_search_fields(payload.email, payload.displayName),
         "createdAt": created_at,
         "updatedAt": now,
     }
-    doc_ref.set(data)
-    created = _doc_or_404(doc_ref)
+    await doc_ref.set(data)
+    created = without_search_fields(await _doc_or_404(doc_ref))
     created["uid"] = created.pop("id")
     if is_new_user:
         try:
@@ -444,10 +452,11 @@ async def update_student(
             raise forbidden_error()
         raise forbidden_error()
 
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     doc_ref = db.collection("users").document(uid)
-    current = _doc_or_404(doc_ref)
-    current_status = ensure_user_status_with_migration(doc_ref, current)
+    current = await _doc_or_404(doc_ref)
+    status_missing = user_status_missing(current)
+    current_status = normalize_user_status(current)
     updates = payload.model_dump(exclude_unset=True)
 
     if not updates:
@@ -472,6 +481,7 @@ async def update_student(
                 status_code=400,
             )
         updates["displayName"] = display_name
+        updates.update(user_search_fields(current.get("email"), display_name))
     role = updates.get("role")
     if role is not None:
         role_normalized = (role or "").strip()
@@ -492,10 +502,13 @@ async def update_student(
     if status_changed:
         updates["statusChangedAt"] = firestore.SERVER_TIMESTAMP
         updates["statusChangedBy"] = actor_uid
+    elif status_missing and "status" not in updates:
+        updates["status"] = current_status
     updates["updatedAt"] = firestore.SERVER_TIMESTAMP
-    doc_ref.update(updates)
-    data = _doc_or_404(doc_ref)
-    ensure_user_status_with_migration(doc_ref, data)
+    await doc_ref.update(updates)
+    invalidate_user_profile(uid)
+    data = without_search_fields(await _doc_or_404(doc_ref))
+    normalize_user_status(data)
     data["uid"] = uid
 
     if status_changed and new_status is not None:
@@ -542,12 +555,14 @@ async def update_student(
 @router.delete("/students/{uid}")
 async def delete_student(
     uid: str,
+    response: Response,
+    background: bool = Query(False),
     user: dict = Depends(require_staff),
 ):
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     user_ref = db.collection("users").document(uid)
-    user_data = _doc_or_404(user_ref)
-    ensure_user_status_with_migration(user_ref, user_data)
+    user_data = await _doc_or_404(user_ref)
+    normalize_user_status(user_data)
 
     if user_data.get("role") != "student":
         raise AppError(
@@ -556,31 +571,25 @@ async def delete_student(
             status_code=400,
         )
 
-    deleted_steps = 0
-    plan_ref = db.collection("student_plans").document(uid)
-    plan_snap = plan_ref.get()
-    step_refs: list[firestore.DocumentReference] = []
-    if plan_snap.exists:
-        for step_snap in plan_ref.collection("steps").stream():
-            step_refs.append(step_snap.reference)
-            deleted_steps += 1
-        _commit_deletes_in_batches(db, step_refs)
-        plan_ref.delete()
-
-    deleted_completions = 0
-    completions_query = db.collection("step_completions").where("studentUid", "==", uid)
-    completion_refs: list[firestore.DocumentReference] = []
-    for completion_snap in completions_query.stream():
-        completion_refs.append(completion_snap.reference)
-        deleted_completions += 1
-    _commit_deletes_in_batches(db, completion_refs)
-
-    user_ref.delete()
-    return {
-        "deleted": uid,
-        "deletedSteps": deleted_steps,
-        "deletedCompletions": deleted_completions,
-    }
+    if background:
+        # Run by the deletion jobs rather than after the response: Cloud Run
+        # throttles CPU once the response is sent.
+        await queue_student_deletion(db, uid, requested_by=user.get("uid"))
+        response.status_code = status.HTTP_202_ACCEPTED
+        return {"deleted": uid, "status": JOB_QUEUED}
+
+    counts = await delete_student_data(db, uid)
+    invalidate_user_profile(uid)
+    return {"deleted": uid, **counts}
+
+
+@router.get("/students/{uid}/deletion")
+async def get_student_deletion(
+    uid: str,
+    user: dict = Depends(require_staff),
+):
+    db = get_async_firestore_client()
+    return await _doc_or_404(deletion_progress_ref(db, uid))
 
 
 @router.post("/students/{uid}/plan")
@@ -589,12 +598,12 @@ async def assign_plan(
     payload: AssignPlanRequest,
     user: dict = Depends(require_staff),
 ):
-    db = get_firestore_client()
-    _ensure_user_exists(db, uid)
+    db = get_async_firestore_client()
+    await _ensure_user_exists(db, uid)
 
     user_ref = db.collection("users").document(uid)
     plan_ref = db.collection("student_plans").document(uid)
-    snap = plan_ref.get()
+    snap = await plan_ref.get()
     now = firestore.SERVER_TIMESTAMP
     reset = bool(payload.resetStepsFromGoalTemplate)
 
@@ -605,113 +614,60 @@ async def assign_plan(
                 message="confirm must be RESET_STEPS",
                 status_code=400,
             )
-        goal_ref = db.collection("goals").document(payload.goalId)
-        goal_snap = goal_ref.get()
-        if not goal_snap.exists:
+        goal_data = await reference_document(db, "goals", payload.goalId)
+        if goal_data is None:
             raise AppError(code="not_found", message="Goal not found", status_code=404)
-        goal_data = goal_snap.to_dict() or {}
-
-        template_steps = list_steps(db, payload.goalId)
-        steps_ref = plan_ref.collection("steps")
-        existing_steps = list(steps_ref.stream())
-
-        total_ops = len(existing_steps) + len(template_steps) + 1
-        if total_ops > 500:
-            raise AppError(
-                code="validation_error",
-                message="Too many steps to reset in a single request",
-                status_code=400,
-            )
-
-        created_at = (
-            (snap.to_dict() or {}).get("createdAt", now) if snap.exists else now
-        )
-        source_version = goal_data.get("updatedAt") or now
 
-        plan_data = {
-            "studentUid": uid,
-            "goalId": payload.goalId,
-            "createdAt": created_at,
-            "updatedAt": now,
-            "lastResetAt": now,
-            "lastResetBy": user.get("uid"),
-            "sourceGoalTemplateVersion": source_version,
-        }
-
-        batch = db.batch()
-        batch.set(plan_ref, plan_data)
-        batch.set(
-            user_ref,
-            {
-                "selectedGoalId": payload.goalId,
-                "updatedAt": now,
-            },
-            merge=True,
-        )
-        for snap in existing_steps:
-            batch.delete(snap.reference)
-        for order, step in enumerate(template_steps):
-            step_doc = steps_ref.document()
-            data = {
-                "templateId": None,
-                "title": step.get("title"),
-                "description": step.get("description"),
-                "materialUrl": step.get("materialUrl"),
-                "order": order,
-                "isDone": False,
-                "doneAt": None,
-                "createdAt": now,
-                "updatedAt": now,
-            }
-            batch.set(step_doc, data)
-        batch.commit()
-        _sync_user_progress(
+        template_steps = await list_steps(db, payload.goalId)
+        await reset_plan_from_template(
             db,
             uid,
-            absolute_done=0,
-            absolute_total=len(template_steps),
+            goal_id=payload.goalId,
+            goal_data=goal_data,
+            template_steps=template_steps,
+            actor_uid=user.get("uid"),
+            plan=snap.to_dict() if snap.exists else None,
         )
+        invalidate_user_profile(uid)
 
-        plan = _doc_or_404(plan_ref)
+        plan = await _doc_or_404(plan_ref)
     else:
         if snap.exists:
             existing = snap.to_dict() or {}
             created_at = existing.get("createdAt", now)
-            plan_ref.set(
-                {
-                    "studentUid": uid,
-                    "goalId": payload.goalId,
-                    "createdAt": created_at,
-                    "updatedAt": now,
-                }
-            )
+            plan_data = {
+                "studentUid": uid,
+                "goalId": payload.goalId,
+                "createdAt": created_at,
+                "updatedAt": now,
+            }
+            for field in (SOURCE_LESSON_KEYS_FIELD, *PLAN_SYNC_FIELDS):
+                if field in existing:
+                    plan_data[field] = existing[field]
+            await plan_ref.set(plan_data)
         else:
-            plan_ref.set(
+            await plan_ref.set(
                 {
                     "studentUid": uid,
                     "goalId": payload.goalId,
+                    SOURCE_LESSON_KEYS_FIELD: [],
                     "createdAt": now,
                     "updatedAt": now,
                 }
             )
-            _sync_user_progress(db, uid, absolute_done=0, absolute_total=0)
-        user_ref.set(
+            await set_user_progress(db, uid, done=0, total=0)
+        await user_ref.set(
             {
                 "selectedGoalId": payload.goalId,
                 "updatedAt": now,
             },
             merge=True,
         )
+        invalidate_user_profile(uid)
 
-        plan = _doc_or_404(plan_ref)
+        plan = await _doc_or_404(plan_ref)
 
-    return {
-        "planId": uid,
-        "studentUid": uid,
-        "goalId": plan.get("goalId"),
-        "createdAt": plan.get("createdAt"),
-        "updatedAt": plan.get("updatedAt"),
-    }
+    return plan_payload(uid, plan)
 
 
 @router.post("/students/{uid}/plan/preview-reset-from-goal")
@@ -720,18 +676,18 @@ async def preview_reset_from_goal(
     payload: PreviewResetFromGoalRequest,
     user: dict = Depends(require_staff),
 ):
-    db = get_firestore_client()
-    _ensure_user_exists(db, uid)
+    db = get_async_firestore_client()
+    await _ensure_user_exists(db, uid)
 
-    template_steps = list_steps(db, payload.goalId)
+    template_steps = await list_steps(db, payload.goalId)
     plan_ref = db.collection("student_plans").document(uid)
-    plan_snap = plan_ref.get()
+    plan_snap = await plan_ref.get()
 
     existing_total = 0
     done_total = 0
     if plan_snap.exists:
         steps_ref = plan_ref.collection("steps")
-        for snap in steps_ref.stream():
+        async for snap in steps_ref.stream():
             existing_total += 1
             if (snap.to_dict() or {}).get("isDone"):
                 done_total += 1
@@ -755,9 +711,9 @@ async def append_courses_to_plan(
     user: dict = Depends(require_staff),
 ):
     _ = user
-    db = get_firestore_client()
-    _ensure_user_exists(db, uid)
-    result = append_courses_to_student_plan(db, uid, payload.courseIds)
+    db = get_async_firestore_client()
+    await _ensure_user_exists(db, uid)
+    result = await append_courses_to_student_plan(db, uid, payload.courseIds)
     return {
         "status": "ok",
         "addedCourseIds": result["addedCourseIds"],
@@ -770,47 +726,81 @@ async def get_student(
     uid: str,
     user: dict = Depends(require_staff),
 ):
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     doc_ref = db.collection("users").document(uid)
-    data = _doc_or_404(doc_ref)
-    ensure_user_status_with_migration(doc_ref, data)
+    data = without_search_fields(await _doc_or_404(doc_ref))
+    normalize_user_status(data)
     data["uid"] = uid
     return data
 
 
+def _parse_dossier_fields(raw: str | None) -> dict[str, list[str]]:
+    fields: dict[str, list[str]] = {}
+    for item in (raw or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        section, _, field = item.partition(".")
+        if section not in DOSSIER_SECTIONS or not field:
+            raise AppError(
+                code="validation_error",
+                message="fields must look like section.field",
+                status_code=400,
+                details={"field": item, "sections": list(DOSSIER_SECTIONS)},
+            )
+        fields.setdefault(section, []).append(field)
+    return fields
+
+
+@router.get("/students/{uid}/dossier")
+async def get_student_dossier(
+    uid: str,
+    response: Response,
+    fields: str | None = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    user: dict = Depends(require_staff),
+):
+    started = time.perf_counter()
+    db = get_async_firestore_client()
+    payload, timings = await load_student_dossier(
+        db, uid, fields=_parse_dossier_fields(fields), limit=limit
+    )
+    timings["total"] = round((time.perf_counter() - started) * 1000, 2)
+    response.headers["Server-Timing"] = ", ".join(
+        f"{name};dur={duration}" for name, duration in timings.items()
+    )
+    logger.info(
+        "student_dossier_timing",
+        extra={
+            "event": "student_dossier_timing",
+            "uid": uid,
+            **{f"{name}_ms": duration for name, duration in timings.items()},
+            **firestore_op_log_fields(),
+        },
+    )
+    return payload
+
+
 @router.get("/students/{uid}/plan")
 async def get_plan(
     uid: str,
     user: dict = Depends(require_staff),
 ):
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     plan_ref = db.collection("student_plans").document(uid)
-    plan = _doc_or_404(plan_ref)
-    return {
-        "planId": uid,
-        "studentUid": uid,
-        "goalId": plan.get("goalId"),
-        "createdAt": plan.get("createdAt"),
-        "updatedAt": plan.get("updatedAt"),
-    }
+    plan = await _doc_or_404(plan_ref)
+    return plan_payload(uid, plan)
 
 
 @router.get("/students/{uid}/plan/steps")
 async def get_plan_steps(
     uid: str,
+    since: datetime | None = Query(None),
     user: dict = Depends(require_staff),
 ):
-    db = get_firestore_client()
-    plan_ref = db.collection("student_plans").document(uid)
-    _doc_or_404(plan_ref)
-    steps_ref = plan_ref.collection("steps")
-    query = steps_ref.order_by("order", direction=firestore.Query.ASCENDING)
-    items = []
-    for snap in query.stream():
-        data = snap.to_dict() or {}
-        data["stepId"] = snap.id
-        items.append(data)
-    return {"items": items}
+    db = get_async_firestore_client()
+    plan = await _doc_or_404(db.collection("student_plans").document(uid))
+    return await list_plan_step_changes(db, uid, plan, since=since)
 
 
 @router.delete("/students/{uid}/plan/steps/{step_id}")
@@ -819,13 +809,21 @@ async def delete_plan_step(
     step_id: str,
     user: dict = Depends(require_staff),
 ):
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     plan_ref = db.collection("student_plans").document(uid)
-    _doc_or_404(plan_ref)
+    await _doc_or_404(plan_ref)
     step_ref = plan_ref.collection("steps").document(step_id)
-    step = _doc_or_404(step_ref)
-    step_ref.delete()
-    _sync_user_progress(
+    step = await _doc_or_404(step_ref)
+    plan_update = steps_changed()
+    source_key = step_source_lesson_key(step)
+    if source_key is not None:
+        plan_update[SOURCE_LESSON_KEYS_FIELD] = firestore.ArrayRemove([source_key])
+    batch = db.batch()
+    batch.delete(step_ref)
+    batch.set(*step_tombstone(plan_ref, step_id))
+    batch.update(plan_ref, plan_update)
+    await batch.commit()
+    await apply_user_progress_delta(
         db,
         uid,
         done_delta=-1 if step.get("isDone") else 0,
@@ -840,20 +838,28 @@ async def bulk_add_steps(
     payload: BulkAddStepsRequest,
     user: dict = Depends(require_staff),
 ):
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     plan_ref = db.collection("student_plans").document(uid)
-    _doc_or_404(plan_ref)
+    await _doc_or_404(plan_ref)
 
     steps_ref = plan_ref.collection("steps")
-    existing_steps = list(
-        steps_ref.order_by("order", direction=firestore.Query.DESCENDING)
+    existing_steps = [
+        snap
+        async for snap in steps_ref.order_by(
+            "order", direction=firestore.Query.DESCENDING
+        )
         .limit(1)
         .stream()
-    )
+    ]
     start_order = (
         existing_steps[0].to_dict().get("order", -1) + 1 if existing_steps else 0
     )
 
+    template_ids = list(
+        dict.fromkeys(item.templateId for item in payload.items if item.templateId)
+    )
+    templates = await reference_documents(db, "step_templates", template_ids)
+
     created = []
     batch = db.batch()
     order = start_order
@@ -861,8 +867,11 @@ async def bulk_add_steps(
         step_data: dict[str, Any]
         template_id = item.templateId
         if template_id:
-            tmpl_ref = db.collection("step_templates").document(template_id)
-            tmpl = _doc_or_404(tmpl_ref)
+            tmpl = templates.get(template_id)
+            if tmpl is None:
+                raise AppError(
+                    code="not_found", message="Resource not found", status_code=404
+                )
             step_data = {
                 "templateId": template_id,
                 "title": tmpl.get("title"),
@@ -908,8 +917,9 @@ async def bulk_add_steps(
         )
         order += 1
 
-    batch.commit()
-    _sync_user_progress(db, uid, total_delta=len(created))
+    batch.update(plan_ref, steps_changed())
+    await batch.commit()
+    await apply_user_progress_delta(db, uid, total_delta=len(created))
     return {"created": created}
 
 
@@ -919,20 +929,48 @@ async def reorder_steps(
     payload: ReorderStepsRequest,
     user: dict = Depends(require_staff),
 ):
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     plan_ref = db.collection("student_plans").document(uid)
-    _doc_or_404(plan_ref)
+    await _doc_or_404(plan_ref)
 
     steps_ref = plan_ref.collection("steps")
-    batch = db.batch()
+    writer = BulkWriter(db)
     for item in payload.items:
-        doc_ref = steps_ref.document(item.stepId)
-        batch.update(
-            doc_ref,
+        await writer.update(
+            steps_ref.document(item.stepId),
             {
                 "order": item.order,
+                "rank": firestore.DELETE_FIELD,
                 "updatedAt": firestore.SERVER_TIMESTAMP,
             },
         )
-    batch.commit()
+    await writer.flush()
+    await plan_ref.update(steps_changed())
     return {"updated": len(payload.items)}
+
+
+@router.post("/students/{uid}/plan/steps/{step_id}/move")
+async def move_step(
+    uid: str,
+    step_id: str,
+    payload: MoveStepRequest,
+    user: dict = Depends(require_staff),
+):
+    db = get_async_firestore_client()
+    plan_ref = db.collection("student_plans").document(uid)
+    await _doc_or_404(plan_ref)
+    steps_ref = plan_ref.collection("steps")
+    moved = await move_ranked_item(
+        db,
+        steps_ref,
+        step_id,
+        after_id=payload.afterStepId,
+        before_id=payload.beforeStepId,
+        parent_update=steps_changed(),
+    )
+    return {
+        "stepId": step_id,
+        "order": moved["order"],
+        "rank": moved["rank"],
+        "rebalanced": moved["rebalanced"],
+    }
@@ -1,8 +1,10 @@
+import asyncio
 import re
+from datetime import datetime
 from typing import Any, Literal
 from urllib.parse import urlparse
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Request, Response, status
 from google.cloud import firestore
 from pydantic import BaseModel, Field, field_validator
 from pydantic_core import PydanticCustomError
@@ -11,15 +13,38 @@ from app.auth.deps import (
     get_current_user,
     require_active_student,
 )
-from app.auth.user_status import UserStatus, ensure_user_status_with_migration
+from app.auth.profile_cache import invalidate_user_profile
+from app.auth.user_status import (
+    UserStatus,
+    normalize_user_status,
+    user_status_missing,
+)
 from app.core.errors import AppError
+from app.core.etag import not_modified, strong_etag
 from app.core.logging import get_logger
-from app.db.firestore import get_firestore_client
+from app.db.firestore import get_async_firestore_client
+from app.db.instrumentation import firestore_op_log_fields
+from app.db.reference_data import reference_document
+from app.services.course_catalog import list_catalog_courses
+from app.services.course_plan_sync import SOURCE_LESSON_KEYS_FIELD
+from app.services.fx_rates import load_fx_rates
+from app.services.lesson_catalog import hydrate_plan_steps, lesson_content_version
+from app.services.progress import write_step_done
+from app.services.student_plan import (
+    PLAN_REVISION_FIELD,
+    STEPS_RESET_AT_FIELD,
+    STEPS_UPDATED_AT_FIELD,
+    list_plan_step_changes,
+    list_plan_steps,
+    plan_payload,
+    steps_changed,
+)
 from app.services.telegram import send_admin_message
 from app.services.telegram_events import (
     fmt_lesson_completed,
     fmt_questionnaire_completed,
 )
+from app.services.user_search import user_search_fields
 
 router = APIRouter(prefix="/api", tags=["Auth"])
 logger = get_logger("app.db")
@@ -479,13 +504,16 @@ async def patch_me(
     if "subscriptionSelected" in payload_data:
         updates["subscriptionSelected"] = payload.subscriptionSelected
 
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     doc_ref = db.collection("users").document(user["uid"])
-    snap = doc_ref.get()
+    snap = await doc_ref.get()
     if not snap.exists:
         raise AppError(code="not_found", message="User not found", status_code=404)
     current = snap.to_dict() or {}
-    current_status = ensure_user_status_with_migration(doc_ref, current)
+    status_missing = user_status_missing(current)
+    current_status = normalize_user_status(current)
+    if status_missing:
+        updates["status"] = current_status
 
     if "profileForm" in payload_data:
         updates["profileForm"] = _sanitize_profile_form(
@@ -501,6 +529,13 @@ async def patch_me(
             part for part in [first_name, last_name] if part
         )
 
+    if "displayName" in updates:
+        updates.update(
+            user_search_fields(
+                current.get("email") or user.get("email"), updates["displayName"]
+            )
+        )
+
     before_step = _onboarding_step(current)
     next_state = {**current, **updates}
     after_step = _onboarding_step(next_state)
@@ -522,16 +557,15 @@ async def patch_me(
         }
 
     updates["updatedAt"] = firestore.SERVER_TIMESTAMP
-    doc_ref.update(updates)
+    await doc_ref.update(updates)
+    invalidate_user_profile(user["uid"])
 
     response_data = {**current, **updates}
     selected_goal_id = _sanitize_optional_text(response_data.get("selectedGoalId"))
     selected_goal_title = None
     if selected_goal_id:
-        goal_ref = db.collection("goals").document(selected_goal_id)
-        goal_snap = goal_ref.get()
-        if goal_snap.exists:
-            goal_data = goal_snap.to_dict() or {}
+        goal_data = await reference_document(db, "goals", selected_goal_id)
+        if goal_data is not None:
             selected_goal_title = _sanitize_optional_text(goal_data.get("title"))
     role_raw = current.get("role") or user.get("roleRaw") or "student"
     role = "staff" if role_raw in {"admin", "expert"} else "student"
@@ -594,10 +628,10 @@ async def patch_me(
     return me_response
 
 
-def _doc_or_404(
-    doc_ref: firestore.DocumentReference, code: str, message: str
+async def _doc_or_404(
+    doc_ref: firestore.AsyncDocumentReference, code: str, message: str
 ) -> dict[str, Any]:
-    snap = doc_ref.get()
+    snap = await doc_ref.get()
     if not snap.exists:
         raise AppError(code=code, message=message, status_code=404)
     data = snap.to_dict() or {}
@@ -605,67 +639,86 @@ def _doc_or_404(
     return data
 
 
-def _progress_percent(done: int, total: int) -> int:
-    if total <= 0:
-        return 0
-    return round((done / total) * 100)
-
-
-def _sync_user_progress(
-    db: firestore.Client,
-    uid: str,
-    *,
-    done_delta: int = 0,
-    total_delta: int = 0,
-) -> None:
-    user_ref = db.collection("users").document(uid)
-    snap = user_ref.get()
+async def _my_plan_and_steps(
+    db: firestore.AsyncClient, uid: str
+) -> tuple[dict[str, Any] | None, list[dict[str, Any]]]:
+    # The plan is read first so its stepsUpdatedAt is a safe `since` cursor
+    # for the steps that follow.
+    snap = await db.collection("student_plans").document(uid).get()
     if not snap.exists:
-        return
-    data = snap.to_dict() or {}
-    prev_done = int(data.get("stepsDone") or 0)
-    prev_total = int(data.get("stepsTotal") or 0)
-    next_done = max(0, prev_done + done_delta)
-    next_total = max(0, prev_total + total_delta)
-    if next_done > next_total:
-        next_done = next_total
-    user_ref.update(
-        {
-            "stepsDone": next_done,
-            "stepsTotal": next_total,
-            "progressPercent": _progress_percent(next_done, next_total),
-            "updatedAt": firestore.SERVER_TIMESTAMP,
-        }
+        return None, []
+    return plan_payload(uid, snap.to_dict() or {}), await list_plan_steps(db, uid)
+
+
+@router.get("/me/home")
+async def get_my_home(user: dict = Depends(get_current_user)):
+    """`/me`, `/me/plan`, `/me/plan/steps`, `/courses` and `/fx-rates` in one call.
+
+    The sections are read concurrently. Blocked students still get their
+    profile, courses and rates, with `plan: null` and no steps.
+    """
+    db = get_async_firestore_client()
+    uid = user["uid"]
+    reads = [list_catalog_courses(db), load_fx_rates(db)]
+    if user.get("role") != "student" or user.get("status") == "active":
+        reads.append(_my_plan_and_steps(db, uid))
+    courses, fx, *plan_reads = await asyncio.gather(*reads)
+    plan, steps = plan_reads[0] if plan_reads else (None, [])
+    logger.info(
+        "me_home_loaded",
+        extra={
+            "event": "me_home_loaded",
+            "uid": uid,
+            "steps": len(steps),
+            "courses": len(courses),
+            **firestore_op_log_fields(),
+        },
     )
+    return {
+        "me": MeResponse.model_validate(user),
+        "plan": plan,
+        "steps": steps,
+        "courses": courses,
+        "fxRates": fx,
+    }
 
 
 @router.get("/me/plan")
 async def get_my_plan(user: dict = Depends(require_active_student)):
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     plan_ref = db.collection("student_plans").document(user["uid"])
-    plan = _doc_or_404(plan_ref, "not_found", "Plan not found")
-    return {
-        "planId": user["uid"],
-        "studentUid": user["uid"],
-        "goalId": plan.get("goalId"),
-        "createdAt": plan.get("createdAt"),
-        "updatedAt": plan.get("updatedAt"),
-    }
+    plan = await _doc_or_404(plan_ref, "not_found", "Plan not found")
+    return plan_payload(user["uid"], plan)
 
 
 @router.get("/me/plan/steps")
-async def get_my_plan_steps(user: dict = Depends(require_active_student)):
-    db = get_firestore_client()
+async def get_my_plan_steps(
+    request: Request,
+    response: Response,
+    since: datetime | None = Query(None),
+    user: dict = Depends(require_active_student),
+):
+    db = get_async_firestore_client()
     plan_ref = db.collection("student_plans").document(user["uid"])
-    _doc_or_404(plan_ref, "not_found", "Plan not found")
-    steps_ref = plan_ref.collection("steps")
-    query = steps_ref.order_by("order", direction=firestore.Query.ASCENDING)
-    items = []
-    for snap in query.stream():
-        data = snap.to_dict() or {}
-        data["stepId"] = snap.id
-        items.append(data)
-    return {"items": items}
+    plan = await _doc_or_404(plan_ref, "not_found", "Plan not found")
+    # Reference steps show lesson content, so the tag also covers the
+    # versions of the plan's indexed lessons (lesson catalog, mostly cached).
+    content_version = await lesson_content_version(
+        db, plan.get(SOURCE_LESSON_KEYS_FIELD)
+    )
+    etag = strong_etag(
+        "plan-steps",
+        user["uid"],
+        plan.get(PLAN_REVISION_FIELD),
+        plan.get(STEPS_UPDATED_AT_FIELD),
+        plan.get(STEPS_RESET_AT_FIELD),
+        content_version,
+        since,
+    )
+    cached = not_modified(request, response, etag)
+    if cached is not None:
+        return cached
+    return await list_plan_step_changes(db, user["uid"], plan, since=since)
 
 
 class UpdateStepProgressRequest(BaseModel):
@@ -699,27 +752,28 @@ async def update_my_step_progress(
     payload: UpdateStepProgressRequest,
     user: dict = Depends(require_active_student),
 ):
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     plan_ref = db.collection("student_plans").document(user["uid"])
-    _doc_or_404(plan_ref, "not_found", "Plan not found")
+    await _doc_or_404(plan_ref, "not_found", "Plan not found")
     step_ref = plan_ref.collection("steps").document(step_id)
-    prev = _doc_or_404(step_ref, "not_found", "Step not found")
-    prev_done = bool(prev.get("isDone"))
     next_done = payload.isDone
     update = {
         "isDone": next_done,
         "doneAt": firestore.SERVER_TIMESTAMP if next_done else None,
         "updatedAt": firestore.SERVER_TIMESTAMP,
     }
-    step_ref.update(update)
-    if prev_done != next_done:
-        _sync_user_progress(
-            db,
-            user["uid"],
-            done_delta=1 if next_done else -1,
-        )
-    data = _doc_or_404(step_ref, "not_found", "Step not found")
+    previous = await write_step_done(
+        db,
+        user["uid"],
+        step_ref,
+        update,
+        extra_updates=[(plan_ref, steps_changed())],
+    )
+    if previous is None:
+        raise AppError(code="not_found", message="Step not found", status_code=404)
+    data = await _doc_or_404(step_ref, "not_found", "Step not found")
     data["stepId"] = data.pop("id")
+    await hydrate_plan_steps(db, [data])
     return data
 
 
@@ -736,28 +790,47 @@ async def complete_my_step(
             status_code=403,
         )
 
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     plan_ref = db.collection("student_plans").document(user["uid"])
-    plan = _doc_or_404(plan_ref, "not_found", "Plan not found")
+    plan = await _doc_or_404(plan_ref, "not_found", "Plan not found")
 
     step_ref = plan_ref.collection("steps").document(step_id)
-    step = _doc_or_404(step_ref, "not_found", "Step not found")
-    was_done = bool(step.get("isDone"))
+    step = await _doc_or_404(step_ref, "not_found", "Step not found")
+    await hydrate_plan_steps(db, [step])
 
     goal_id = plan.get("goalId")
     goal_title = None
-    if goal_id:
-        goal_snap = db.collection("goals").document(goal_id).get()
-        if goal_snap.exists:
-            goal_title = (goal_snap.to_dict() or {}).get("title")
+    if goal_id and goal_id == user.get("selectedGoalId"):
+        # get_current_user already resolved the selected goal's title.
+        goal_title = user.get("selectedGoalTitle")
+    elif goal_id:
+        goal_data = await reference_document(db, "goals", goal_id)
+        if goal_data is not None:
+            goal_title = goal_data.get("title")
 
     comment = _sanitize_optional_text(payload.comment if payload else None)
     link = _sanitize_link(payload.link if payload else None)
     now = firestore.SERVER_TIMESTAMP
 
     completion_ref = db.collection("step_completions").document()
-    batch = db.batch()
-    batch.update(
+    completion = {
+        "studentUid": user["uid"],
+        "studentDisplayName": user.get("displayName"),
+        "goalId": goal_id,
+        "goalTitle": goal_title,
+        "stepId": step_id,
+        "stepTitle": step.get("title"),
+        "completedAt": now,
+        "comment": comment,
+        "link": link,
+        "status": "completed",
+        "revokedAt": None,
+        "revokedBy": None,
+        "updatedAt": now,
+    }
+    previous = await write_step_done(
+        db,
+        user["uid"],
         step_ref,
         {
             "isDone": True,
@@ -766,28 +839,11 @@ async def complete_my_step(
             "doneLink": link,
             "updatedAt": now,
         },
+        extra_updates=[(plan_ref, steps_changed())],
+        extra_sets=[(completion_ref, completion)],
     )
-    batch.set(
-        completion_ref,
-        {
-            "studentUid": user["uid"],
-            "studentDisplayName": user.get("displayName"),
-            "goalId": goal_id,
-            "goalTitle": goal_title,
-            "stepId": step_id,
-            "stepTitle": step.get("title"),
-            "completedAt": now,
-            "comment": comment,
-            "link": link,
-            "status": "completed",
-            "revokedAt": None,
-            "revokedBy": None,
-            "updatedAt": now,
-        },
-    )
-    batch.commit()
-    if not was_done:
-        _sync_user_progress(db, user["uid"], done_delta=1)
+    if previous is None:
+        raise AppError(code="not_found", message="Step not found", status_code=404)
     try:
         await send_admin_message(
             fmt_lesson_completed(
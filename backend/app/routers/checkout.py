@@ -9,8 +9,10 @@ from pydantic_core import PydanticCustomError
 from app.auth.deps import get_current_user
 from app.core.errors import AppError, forbidden_error
 from app.core.logging import get_logger
-from app.db.firestore import get_firestore_client
+from app.db.firestore import get_async_firestore_client
 from app.schemas.payments import PaymentStatus
+from app.services.course_catalog import load_catalog_courses
+from app.services.fx_rates import load_fx_rates
 
 router = APIRouter(prefix="/api", tags=["Checkout"])
 logger = get_logger("app")
@@ -24,8 +26,6 @@ _ACTIVATION_PREFIX = "SW-"
 _ACTIVATION_LENGTH = 8
 _ACTIVATION_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
 _SUPPORTED_CURRENCIES = {"USD", "EUR", "PLN", "RUB"}
-_FX_DOC_COLLECTION = "config"
-_FX_DOC_ID = "fx_rates"
 _MAX_ACTIVATION_RETRIES = 10
 
 
@@ -79,17 +79,11 @@ def _resolve_currency(user: dict[str, Any]) -> str:
     return "USD"
 
 
-def _get_fx_rate(db: firestore.Client, currency: str) -> float:
+async def _get_fx_rate(db: firestore.AsyncClient, currency: str) -> float:
     if currency == "USD":
         return 1.0
-    snap = db.collection(_FX_DOC_COLLECTION).document(_FX_DOC_ID).get()
-    if not snap.exists:
-        return 1.0
-    data = snap.to_dict() or {}
-    rates = data.get("rates")
-    if not isinstance(rates, dict):
-        return 1.0
-    value = rates.get(currency)
+    payload = await load_fx_rates(db)
+    value = payload["rates"].get(currency)
     if isinstance(value, (int, float)) and value > 0:
         return float(value)
     return 1.0
@@ -102,19 +96,23 @@ def _generate_activation_code() -> str:
     return f"{_ACTIVATION_PREFIX}{token}"
 
 
-def _is_activation_code_taken(db: firestore.Client, activation_code: str) -> bool:
+async def _is_activation_code_taken(
+    db: firestore.AsyncClient, activation_code: str
+) -> bool:
     query = (
         db.collection("payments")
         .where("activationCode", "==", activation_code)
         .limit(1)
     )
-    return any(True for _ in query.stream())
+    async for _ in query.stream():
+        return True
+    return False
 
 
-def _generate_unique_activation_code(db: firestore.Client) -> str:
+async def _generate_unique_activation_code(db: firestore.AsyncClient) -> str:
     for _ in range(_MAX_ACTIVATION_RETRIES):
         code = _generate_activation_code()
-        if not _is_activation_code_taken(db, code):
+        if not await _is_activation_code_taken(db, code):
             return code
     raise AppError(
         code="internal",
@@ -123,25 +121,18 @@ def _generate_unique_activation_code(db: firestore.Client) -> str:
     )
 
 
-def _resolve_active_course_prices(
-    db: firestore.Client, selected_course_ids: list[str]
+async def _resolve_active_course_prices(
+    db: firestore.AsyncClient, selected_course_ids: list[str]
 ) -> tuple[int, list[str]]:
     total_usd_cents = 0
     invalid: list[str] = []
+    catalog = await load_catalog_courses(db)
     for course_id in selected_course_ids:
-        snap = db.collection("courses").document(course_id).get()
-        if not snap.exists:
-            invalid.append(course_id)
-            continue
-        data = snap.to_dict() or {}
-        if data.get("isActive") is not True:
-            invalid.append(course_id)
-            continue
-        price = data.get("priceUsdCents")
-        if not isinstance(price, int) or price < 0:
+        course = catalog.by_id.get(course_id)
+        if course is None:
             invalid.append(course_id)
             continue
-        total_usd_cents += price
+        total_usd_cents += course.priceUsdCents
     return total_usd_cents, invalid
 
 
@@ -189,8 +180,8 @@ async def create_checkout_intent(
             details={"alreadyOwnedCourseIds": already_owned},
         )
 
-    db = get_firestore_client()
-    total_usd_cents, invalid_course_ids = _resolve_active_course_prices(
+    db = get_async_firestore_client()
+    total_usd_cents, invalid_course_ids = await _resolve_active_course_prices(
         db, payload.selectedCourses
     )
     if invalid_course_ids:
@@ -211,13 +202,13 @@ async def create_checkout_intent(
         total_usd_cents = 0
 
     currency = _resolve_currency(user)
-    fx_rate = _get_fx_rate(db, currency)
+    fx_rate = await _get_fx_rate(db, currency)
     amount = int(round(total_usd_cents * fx_rate))
-    activation_code = _generate_unique_activation_code(db)
+    activation_code = await _generate_unique_activation_code(db)
 
     now = firestore.SERVER_TIMESTAMP
     doc_ref = db.collection("payments").document()
-    doc_ref.set(
+    await doc_ref.set(
         {
             "userUid": user["uid"],
             "email": user.get("email") or "",
@@ -12,9 +12,8 @@ from google.cloud import firestore
 from app.core.config import get_settings
 from app.core.errors import AppError
 from app.core.logging import get_logger
-from app.db.firestore import get_firestore_client
-from app.repositories.settings import get_gmail_settings, set_gmail_settings
-from app.schemas.settings import GmailSettings
+from app.db.firestore import get_async_firestore_client
+from app.repositories.settings import advance_gmail_history_id, get_gmail_settings
 from app.services.gmail_client import GmailClient
 from app.services.payments import activate_by_code
 from app.services.telegram import send_admin_message
@@ -439,7 +438,7 @@ def _parse_boosty_email_event(message: dict[str, Any]) -> _BoostyEmailEvent | No
     return None
 
 
-def _save_boosty_user_id_for_email(
+async def _save_boosty_user_id_for_email(
     db: Any,
     *,
     email_address: str,
@@ -450,13 +449,13 @@ def _save_boosty_user_id_for_email(
         return None
 
     query = db.collection("users").where("email", "==", normalized_email).limit(1)
-    snaps = list(query.stream())
+    snaps = [snap async for snap in query.stream()]
     if not snaps:
         return None
 
     snap = snaps[0]
     user_data: dict[str, Any] = snap.to_dict() or {}
-    snap.reference.set(
+    await snap.reference.set(
         {
             "boostyUserId": boosty_user_id.strip(),
             "updatedAt": firestore.SERVER_TIMESTAMP,
@@ -471,7 +470,7 @@ def _save_boosty_user_id_for_email(
     }
 
 
-def _apply_activation_codes(
+async def _apply_activation_codes(
     db: Any,
     *,
     message: dict[str, Any],
@@ -525,7 +524,7 @@ def _apply_activation_codes(
         and isinstance(boosty_event.boosty_user_id, str)
         and boosty_event.boosty_user_id
     ):
-        matched_user = _save_boosty_user_id_for_email(
+        matched_user = await _save_boosty_user_id_for_email(
             db,
             email_address=boosty_event.boosty_email,
             boosty_user_id=boosty_event.boosty_user_id,
@@ -574,28 +573,14 @@ def _apply_activation_codes(
         f"subject={(subject or '-')}"
     )
     for code in found_codes:
-        activate_by_code(db, code, evidence)
+        await activate_by_code(db, code, evidence)
     return len(found_codes)
 
 
-def _persist_history_checkpoint(
-    db: Any,
-    *,
-    history_id: str | None,
-    gmail_settings: GmailSettings | None,
-) -> None:
+async def _persist_history_checkpoint(db: Any, *, history_id: str | None) -> None:
     if not history_id:
         return
-    if gmail_settings is None:
-        set_gmail_settings(db, GmailSettings(lastHistoryId=history_id))
-        return
-    updated_settings = GmailSettings(
-        enabled=gmail_settings.enabled,
-        watchTopic=gmail_settings.watchTopic,
-        lastHistoryId=history_id,
-        watchExpiration=gmail_settings.watchExpiration,
-    )
-    set_gmail_settings(db, updated_settings)
+    await advance_gmail_history_id(db, history_id)
 
 
 def _notify_admin_async(text: str) -> None:
@@ -672,24 +657,19 @@ async def gmail_webhook(request: Request) -> dict[str, bool]:
     except Exception:
         payload = {}
 
-    db = get_firestore_client()
-    gmail_settings = get_gmail_settings(db)
+    db = get_async_firestore_client()
     direct_message = _extract_direct_message(payload)
     if direct_message is not None:
         history_id = direct_message.get("historyId")
         history_id_str = history_id if isinstance(history_id, str) else None
-        activated_count = _apply_activation_codes(
+        activated_count = await _apply_activation_codes(
             db,
             message=direct_message,
             email_address=direct_message.get("emailAddress"),
             history_id=history_id_str,
             delivery_mode="direct",
         )
-        _persist_history_checkpoint(
-            db,
-            history_id=history_id_str,
-            gmail_settings=gmail_settings,
-        )
+        await _persist_history_checkpoint(db, history_id=history_id_str)
         _log_processing(
             history_id=history_id_str,
             activation_codes=activated_count,
@@ -727,6 +707,7 @@ async def gmail_webhook(request: Request) -> dict[str, bool]:
         )
         return {"ok": True}
 
+    gmail_settings = await get_gmail_settings(db)
     if not gmail_settings or not gmail_settings.lastHistoryId:
         logger.info(
             "gmail_webhook_skipped",
@@ -747,7 +728,7 @@ async def gmail_webhook(request: Request) -> dict[str, bool]:
     for message_id in message_ids[:max_messages]:
         processed += 1
         message = gmail.get_message(message_id, format="full")
-        activated_count += _apply_activation_codes(
+        activated_count += await _apply_activation_codes(
             db,
             message=message,
             email_address=email_address if isinstance(email_address, str) else None,
@@ -756,11 +737,7 @@ async def gmail_webhook(request: Request) -> dict[str, bool]:
             message_id_fallback=message_id,
         )
 
-    _persist_history_checkpoint(
-        db,
-        history_id=history_id_str,
-        gmail_settings=gmail_settings,
-    )
+    await _persist_history_checkpoint(db, history_id=history_id_str)
 
     _log_processing(
         history_id=history_id_str,
@@ -1,17 +1,32 @@
+from collections.abc import Awaitable, Callable
 from datetime import datetime, timezone
 from typing import Any
 
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Query, Request
 from fastapi.security import HTTPAuthorizationCredentials
 
 from app.auth.deps import get_current_user, security
+from app.auth.profile_cache import invalidate_user_profile
+from app.auth.user_status import migrate_missing_user_statuses
 from app.core.config import get_settings
 from app.core.errors import AppError, forbidden_error
 from app.core.logging import get_logger
-from app.db.firestore import get_firestore_client
+from app.db.firestore import get_async_firestore_client
+from app.db.reference_data import reference_data_stats
 from app.repositories.settings import get_gmail_settings, set_gmail_settings
 from app.schemas.settings import GmailSettings
+from app.services.course_catalog import invalidate_course_lessons
+from app.services.fx_rates import refresh_fx_rates
 from app.services.gmail_client import GmailClient
+from app.services.lesson_fanout import run_lesson_fanout, run_pending_lesson_fanouts
+from app.services.progress import backfill_user_progress
+from app.services.ranked_lists import rebalance_ranks
+from app.services.student_deletion import (
+    run_pending_student_deletions,
+    run_student_deletion,
+)
+from app.services.student_plan import steps_changed
+from app.services.user_search import backfill_user_search_fields
 
 router = APIRouter(tags=["Jobs"])
 logger = get_logger("app.jobs")
@@ -76,8 +91,8 @@ async def renew_gmail_watch(
         )
     history_id_str = str(history_id)
 
-    db = get_firestore_client()
-    current = get_gmail_settings(db)
+    db = get_async_firestore_client()
+    current = await get_gmail_settings(db)
     next_settings = GmailSettings(
         enabled=True,
         watchTopic=topic,
@@ -89,7 +104,7 @@ async def renew_gmail_watch(
         next_settings.watchTopic = topic
         next_settings.lastHistoryId = history_id_str
         next_settings.watchExpiration = _parse_watch_expiration(expiration)
-    set_gmail_settings(db, next_settings)
+    await set_gmail_settings(db, next_settings)
 
     logger.info(
         "gmail_watch_renewed",
@@ -104,3 +119,189 @@ async def renew_gmail_watch(
         "expiration": expiration,
         "historyId": history_id_str,
     }
+
+
+async def _run_user_backfill(
+    event: str,
+    run_page: Callable[[str | None], Awaitable[dict[str, Any]]],
+    *,
+    max_batches: int,
+    cursor: str | None,
+) -> dict[str, Any]:
+    scanned = 0
+    updated = 0
+    for _batch in range(max_batches):
+        page = await run_page(cursor)
+        scanned += page["scanned"]
+        updated += page["updated"]
+        cursor = page["nextCursor"]
+        if cursor is None:
+            break
+
+    logger.info(
+        event,
+        extra={
+            "event": event,
+            "scanned": scanned,
+            "updated": updated,
+            "nextCursor": cursor,
+        },
+    )
+    return {
+        "status": "ok" if cursor is None else "partial",
+        "scanned": scanned,
+        "updated": updated,
+        "nextCursor": cursor,
+    }
+
+
+@router.post("/jobs/users/backfill-search")
+async def backfill_user_search(
+    auth: dict[str, Any] = Depends(_require_staff_or_job_token),
+    limit: int = Query(200, ge=1, le=500),
+    max_batches: int = Query(20, ge=1, le=100, alias="maxBatches"),
+    cursor: str | None = Query(None),
+) -> dict[str, Any]:
+    _ = auth
+    db = get_async_firestore_client()
+    return await _run_user_backfill(
+        "user_search_backfill",
+        lambda page_cursor: backfill_user_search_fields(
+            db, limit=limit, cursor=page_cursor
+        ),
+        max_batches=max_batches,
+        cursor=cursor,
+    )
+
+
+@router.post("/jobs/users/backfill-progress")
+async def backfill_progress(
+    auth: dict[str, Any] = Depends(_require_staff_or_job_token),
+    limit: int = Query(100, ge=1, le=500),
+    max_batches: int = Query(20, ge=1, le=100, alias="maxBatches"),
+    cursor: str | None = Query(None),
+    force: bool = Query(False),
+) -> dict[str, Any]:
+    _ = auth
+    db = get_async_firestore_client()
+    return await _run_user_backfill(
+        "user_progress_backfill",
+        lambda page_cursor: backfill_user_progress(
+            db, limit=limit, cursor=page_cursor, force=force
+        ),
+        max_batches=max_batches,
+        cursor=cursor,
+    )
+
+
+@router.post("/jobs/users/migrate-status")
+async def migrate_user_status(
+    auth: dict[str, Any] = Depends(_require_staff_or_job_token),
+    limit: int = Query(400, ge=1, le=500),
+    max_batches: int = Query(20, ge=1, le=100, alias="maxBatches"),
+    cursor: str | None = Query(None),
+) -> dict[str, Any]:
+    _ = auth
+    db = get_async_firestore_client()
+    return await _run_user_backfill(
+        "user_status_migration",
+        lambda page_cursor: migrate_missing_user_statuses(
+            db, limit=limit, cursor=page_cursor
+        ),
+        max_batches=max_batches,
+        cursor=cursor,
+    )
+
+
+@router.post("/jobs/students/deletions/run-pending")
+async def run_pending_deletions(
+    auth: dict[str, Any] = Depends(_require_staff_or_job_token),
+    limit: int = Query(5, ge=1, le=50),
+) -> dict[str, Any]:
+    _ = auth
+    db = get_async_firestore_client()
+    result = await run_pending_student_deletions(db, limit=limit)
+    for uid in result["done"]:
+        invalidate_user_profile(uid)
+    return result
+
+
+@router.post("/jobs/students/{uid}/deletion")
+async def resume_student_deletion(
+    uid: str,
+    auth: dict[str, Any] = Depends(_require_staff_or_job_token),
+) -> dict[str, Any]:
+    _ = auth
+    db = get_async_firestore_client()
+    progress = await run_student_deletion(db, uid, force=True)
+    invalidate_user_profile(uid)
+    return progress
+
+
+@router.post("/jobs/lessons/fan-outs/run-pending")
+async def run_pending_fanouts(
+    auth: dict[str, Any] = Depends(_require_staff_or_job_token),
+    limit: int = Query(5, ge=1, le=50),
+    max_pages: int = Query(20, ge=1, le=100, alias="maxPages"),
+) -> dict[str, Any]:
+    _ = auth
+    db = get_async_firestore_client()
+    return await run_pending_lesson_fanouts(db, limit=limit, max_pages=max_pages)
+
+
+@router.post("/jobs/lessons/fan-out/{job_id}")
+async def resume_lesson_fanout(
+    job_id: str,
+    auth: dict[str, Any] = Depends(_require_staff_or_job_token),
+    max_pages: int = Query(20, ge=1, le=100, alias="maxPages"),
+) -> dict[str, Any]:
+    _ = auth
+    db = get_async_firestore_client()
+    return await run_lesson_fanout(db, job_id, max_pages=max_pages, force=True)
+
+
+@router.post("/jobs/plans/{uid}/steps/rebalance")
+async def rebalance_plan_steps(
+    uid: str,
+    auth: dict[str, Any] = Depends(_require_staff_or_job_token),
+) -> dict[str, Any]:
+    _ = auth
+    db = get_async_firestore_client()
+    steps_ref = db.collection("student_plans").document(uid).collection("steps")
+    return await rebalance_ranks(db, steps_ref, parent_update=steps_changed())
+
+
+@router.post("/jobs/courses/{course_id}/lessons/rebalance")
+async def rebalance_course_lessons(
+    course_id: str,
+    auth: dict[str, Any] = Depends(_require_staff_or_job_token),
+) -> dict[str, Any]:
+    _ = auth
+    db = get_async_firestore_client()
+    lessons_ref = db.collection("courses").document(course_id).collection("lessons")
+    result = await rebalance_ranks(db, lessons_ref)
+    invalidate_course_lessons(course_id)
+    return result
+
+
+@router.post("/jobs/fx-rates/refresh")
+async def refresh_fx_rates_job(
+    auth: dict[str, Any] = Depends(_require_staff_or_job_token),
+) -> dict[str, Any]:
+    _ = auth
+    payload = await refresh_fx_rates(get_async_firestore_client(), force=True)
+    if payload is None:
+        raise AppError(
+            code="fx_rates_refresh_failed",
+            message="FX provider refresh failed",
+            status_code=502,
+        )
+    return payload
+
+
+@router.get("/jobs/reference-data")
+async def get_reference_data_status(
+    auth: dict[str, Any] = Depends(_require_staff_or_job_token),
+) -> dict[str, Any]:
+    _ = auth
+    return {"items": reference_data_stats()}
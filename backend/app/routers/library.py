@@ -2,14 +2,16 @@ import re
 import time
 from typing import Any
 
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Depends, Query, Request, Response, status
 from google.cloud import firestore
 from pydantic import BaseModel
 
 from app.auth.deps import get_current_user, require_staff
 from app.core.errors import AppError
+from app.core.etag import not_modified, strong_etag
 from app.core.logging import get_logger
-from app.db.firestore import get_firestore_client
+from app.db.firestore import get_async_firestore_client
+from app.db.instrumentation import firestore_op_log_fields
 
 router = APIRouter(prefix="/api", tags=["Library"])
 logger = get_logger("app.db")
@@ -33,8 +35,8 @@ class PatchLibraryEntryRequest(BaseModel):
     keywords: list[str] | None = None
 
 
-def _doc_or_404(doc_ref: firestore.DocumentReference) -> dict[str, Any]:
-    snap = doc_ref.get()
+async def _doc_or_404(doc_ref: firestore.AsyncDocumentReference) -> dict[str, Any]:
+    snap = await doc_ref.get()
     if not snap.exists:
         raise AppError(
             code="not_found", message="Library entry not found", status_code=404
@@ -74,7 +76,7 @@ async def library_root(
     cursor: str | None = Query(None),
 ):
     started = time.perf_counter()
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     query = db.collection("library_entries")
     if user.get("role") != "staff":
         query = query.where("status", "==", "published")
@@ -91,7 +93,7 @@ async def library_root(
     )
     _ = cursor
     items = []
-    for snap in query.stream():
+    async for snap in query.stream():
         data = snap.to_dict() or {}
         data["id"] = snap.id
         items.append(
@@ -109,22 +111,38 @@ async def library_root(
             "duration_ms": round((time.perf_counter() - started) * 1000, 2),
             "returned": len(items),
             "limit": limit,
-            "db_reads_estimate": len(items),
-            "db_writes_estimate": 0,
+            **firestore_op_log_fields(),
         },
     )
     return {"items": items, "nextCursor": None}
 
 
 @router.get("/library/{id}")
-async def library_by_id(id: str, user: dict = Depends(get_current_user)):
-    db = get_firestore_client()
+async def library_by_id(
+    id: str,
+    request: Request,
+    response: Response,
+    user: dict = Depends(get_current_user),
+):
+    db = get_async_firestore_client()
     doc_ref = db.collection("library_entries").document(id)
-    entry = _doc_or_404(doc_ref)
+    snap = await doc_ref.get()
+    if not snap.exists:
+        raise AppError(
+            code="not_found", message="Library entry not found", status_code=404
+        )
+    entry = snap.to_dict() or {}
+    entry["id"] = snap.id
     if user.get("role") != "staff" and entry.get("status") != "published":
         raise AppError(
             code="not_found", message="Library entry not found", status_code=404
         )
+    # The body is the document itself, so its update_time identifies it.
+    update_time = getattr(snap, "update_time", None)
+    etag = strong_etag("library", id, update_time or entry)
+    cached = not_modified(request, response, etag)
+    if cached is not None:
+        return cached
     return entry
 
 
@@ -133,7 +151,7 @@ async def admin_library_root(
     payload: CreateLibraryEntryRequest,
     user: dict = Depends(require_staff),
 ):
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     now = firestore.SERVER_TIMESTAMP
     title = payload.title.strip()
     content = payload.content.strip()
@@ -156,8 +174,8 @@ async def admin_library_root(
         "updatedAt": now,
     }
     doc_ref = db.collection("library_entries").document()
-    doc_ref.set(data)
-    created = _doc_or_404(doc_ref)
+    await doc_ref.set(data)
+    created = await _doc_or_404(doc_ref)
     return {
         "id": created.get("id"),
         "categoryId": created.get("categoryId"),
@@ -174,9 +192,9 @@ async def admin_library_by_id(
     payload: PatchLibraryEntryRequest,
     user: dict = Depends(require_staff),
 ):
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     doc_ref = db.collection("library_entries").document(id)
-    entry = _doc_or_404(doc_ref)
+    entry = await _doc_or_404(doc_ref)
     updates: dict[str, Any] = {}
     if payload.categoryId is not None:
         updates["categoryId"] = payload.categoryId
@@ -226,7 +244,7 @@ async def admin_library_by_id(
         )
 
     updates["updatedAt"] = firestore.SERVER_TIMESTAMP
-    doc_ref.update(updates)
+    await doc_ref.update(updates)
     return {
         "id": id,
         "status": updates.get("status", entry.get("status")),
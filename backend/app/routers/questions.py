@@ -9,7 +9,8 @@ from pydantic import BaseModel
 from app.auth.deps import get_current_user, require_staff
 from app.core.errors import AppError
 from app.core.logging import get_logger
-from app.db.firestore import get_firestore_client
+from app.db.firestore import get_async_firestore_client
+from app.db.instrumentation import firestore_op_log_fields
 
 router = APIRouter(prefix="/api", tags=["Questions"])
 logger = get_logger("app.db")
@@ -36,8 +37,8 @@ class AnswerQuestionRequest(BaseModel):
     library: AnswerLibraryPayload | None = None
 
 
-def _doc_or_404(doc_ref: firestore.DocumentReference) -> dict[str, Any]:
-    snap = doc_ref.get()
+async def _doc_or_404(doc_ref: firestore.AsyncDocumentReference) -> dict[str, Any]:
+    snap = await doc_ref.get()
     if not snap.exists:
         raise AppError(code="not_found", message="Question not found", status_code=404)
     data = snap.to_dict() or {}
@@ -76,7 +77,7 @@ async def list_questions(
     cursor: str | None = Query(None),
 ):
     started = time.perf_counter()
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     query = db.collection("questions")
     if user.get("role") != "staff":
         query = query.where("studentUid", "==", user["uid"])
@@ -91,7 +92,7 @@ async def list_questions(
     )
     _ = cursor
     items = []
-    for snap in query.stream():
+    async for snap in query.stream():
         data = snap.to_dict() or {}
         data["id"] = snap.id
         items.append(data)
@@ -99,9 +100,8 @@ async def list_questions(
         uids = {item.get("studentUid") for item in items if item.get("studentUid")}
         if uids:
             refs = [db.collection("users").document(uid) for uid in uids]
-            snaps = db.get_all(refs)
             name_map: dict[str, str] = {}
-            for snap in snaps:
+            async for snap in db.get_all(refs):
                 profile = snap.to_dict() or {}
                 display = profile.get("displayName") or profile.get("email") or snap.id
                 name_map[snap.id] = display
@@ -124,8 +124,7 @@ async def list_questions(
             "duration_ms": round((time.perf_counter() - started) * 1000, 2),
             "returned": len(items),
             "limit": limit,
-            "db_reads_estimate": len(items),
-            "db_writes_estimate": 0,
+            **firestore_op_log_fields(),
         },
     )
     return {"items": items, "nextCursor": None}
@@ -136,7 +135,7 @@ async def create_question(
     payload: CreateQuestionRequest,
     user: dict = Depends(get_current_user),
 ):
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     now = firestore.SERVER_TIMESTAMP
     data = {
         "studentUid": user["uid"],
@@ -149,8 +148,8 @@ async def create_question(
         "updatedAt": now,
     }
     doc_ref = db.collection("questions").document()
-    doc_ref.set(data)
-    created = _doc_or_404(doc_ref)
+    await doc_ref.set(data)
+    created = await _doc_or_404(doc_ref)
     return created
 
 
@@ -159,9 +158,9 @@ async def get_question(
     id: str,
     user: dict = Depends(get_current_user),
 ):
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     doc_ref = db.collection("questions").document(id)
-    question = _doc_or_404(doc_ref)
+    question = await _doc_or_404(doc_ref)
     if user.get("role") != "staff" and question.get("studentUid") != user["uid"]:
         raise AppError(code="not_found", message="Question not found", status_code=404)
     return question
@@ -173,9 +172,9 @@ async def questions_answer(
     payload: AnswerQuestionRequest,
     user: dict = Depends(require_staff),
 ):
-    db = get_firestore_client()
+    db = get_async_firestore_client()
     doc_ref = db.collection("questions").document(id)
-    question = _doc_or_404(doc_ref)
+    question = await _doc_or_404(doc_ref)
 
     now = firestore.SERVER_TIMESTAMP
     answer = {
@@ -185,7 +184,7 @@ async def questions_answer(
         "createdAt": now,
         "publishToLibrary": payload.publishToLibrary,
     }
-    doc_ref.update({"status": "answered", "answer": answer, "updatedAt": now})
+    await doc_ref.update({"status": "answered", "answer": answer, "updatedAt": now})
 
     library_entry = None
     if payload.publishToLibrary:
@@ -217,21 +216,21 @@ async def questions_answer(
             "updatedAt": now,
         }
         existing = (
-            db.collection("library_entries")
+            await db.collection("library_entries")
             .where("sourceQuestionId", "==", id)
             .limit(1)
             .get()
         )
         if existing:
             entry_ref = existing[0].reference
-            entry_ref.update(entry_data)
+            await entry_ref.update(entry_data)
         else:
             entry_ref = db.collection("library_entries").document()
             entry_data["createdAt"] = now
-            entry_ref.set(entry_data)
+            await entry_ref.set(entry_data)
         library_entry = {"id": entry_ref.id, "status": status_value}
 
-    updated = _doc_or_404(doc_ref)
+    updated = await _doc_or_404(doc_ref)
     return {
         "question": {
             "id": updated.get("id"),
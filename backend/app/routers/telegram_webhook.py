@@ -9,7 +9,7 @@ from google.cloud import firestore
 from app.core.config import get_settings
 from app.core.errors import AppError
 from app.core.logging import get_logger
-from app.db.firestore import get_firestore_client
+from app.db.firestore import get_async_firestore_client
 from app.services.telegram import send_admin_message, send_message
 
 router = APIRouter(tags=["Webhooks"])
@@ -200,9 +200,9 @@ async def telegram_webhook(request: Request) -> dict[str, bool]:
         target_uid = parts[1]
         reply_text = parts[2].strip()[:MAX_TELEGRAM_TEXT_LEN]
         try:
-            db = get_firestore_client()
+            db = get_async_firestore_client()
             target_ref = db.collection("telegram_users").document(target_uid)
-            target_snap = target_ref.get()
+            target_snap = await target_ref.get()
             target_data = target_snap.to_dict() or {}
             target_chat_id = target_data.get("chatId")
             if not target_snap.exists or not isinstance(target_chat_id, (int, str)):
@@ -237,9 +237,9 @@ async def telegram_webhook(request: Request) -> dict[str, bool]:
         return {"ok": True}
 
     try:
-        db = get_firestore_client()
+        db = get_async_firestore_client()
         user_ref = db.collection("telegram_users").document(telegram_user_id)
-        existing = user_ref.get()
+        existing = await user_ref.get()
         existing_data = existing.to_dict() or {}
         mapping_update: dict[str, Any] = {
             "chatId": chat_id,
@@ -247,7 +247,7 @@ async def telegram_webhook(request: Request) -> dict[str, bool]:
         }
         if not existing.exists or not existing_data.get("firstSeenAt"):
             mapping_update["firstSeenAt"] = firestore.SERVER_TIMESTAMP
-        user_ref.set(mapping_update, merge=True)
+        await user_ref.set(mapping_update, merge=True)
 
         last_forwarded_at = _as_utc_datetime(existing_data.get("lastForwardedAt"))
         now_utc = datetime.now(timezone.utc)
@@ -304,10 +304,14 @@ async def telegram_webhook(request: Request) -> dict[str, bool]:
         ok, _ = await send_admin_message(relay_text)
         if ok:
             try:
-                db = get_firestore_client()
-                db.collection("telegram_users").document(telegram_user_id).set(
-                    {"lastForwardedAt": firestore.SERVER_TIMESTAMP},
-                    merge=True,
+                db = get_async_firestore_client()
+                await (
+                    db.collection("telegram_users")
+                    .document(telegram_user_id)
+                    .set(
+                        {"lastForwardedAt": firestore.SERVER_TIMESTAMP},
+                        merge=True,
+                    )
                 )
             except Exception:
                 logger.warning(
@@ -199,5 +199,6 @@ class LessonUpdate(BaseModel):
 
 class Lesson(LessonBase):
     id: str
+    rank: str | None = None
     createdAt: datetime | None = None
     updatedAt: datetime | None = None
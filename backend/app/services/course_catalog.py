@@ -0,0 +1,214 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from google.cloud import firestore
+
+from app.core.config import get_settings
+from app.core.etag import strong_etag
+from app.db.ranking import sort_ranked
+from app.repositories.courses import list_active_courses
+from app.schemas.courses import Course
+
+
+def course_item(course: Course) -> dict[str, Any]:
+    """A course as the student catalog shows it."""
+    return {
+        "id": course.id,
+        "title": course.title,
+        "description": course.description,
+        "goalIds": course.goalIds,
+        "priceUsdCents": course.priceUsdCents,
+        "currencyBase": "USD",
+    }
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogCourses:
+    """Active courses ordered by title, as loaded at one point in time."""
+
+    items: tuple[Course, ...]
+    by_id: dict[str, Course]
+    fingerprint: str
+
+    def for_goal(self, goal_id: str | None = None) -> list[dict[str, Any]]:
+        return [
+            course_item(course)
+            for course in self.items
+            if not goal_id or goal_id in course.goalIds
+        ]
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogLessons:
+    """Raw active lesson documents of one course, in display order.
+
+    `exists` is False for a course id without a document; such lookups are
+    cached too.
+    """
+
+    exists: bool
+    items: tuple[dict[str, Any], ...]
+    fingerprint: str
+
+
+class CourseCatalog:
+    """Per-instance, versioned snapshot of the student course catalog.
+
+    Holds the active course list and, per course, its active lessons. Every
+    invalidation bumps `version`, and a load that started before one is not
+    stored, so a slow read cannot put stale data back. Admin course and lesson
+    writes must invalidate; the TTL only bounds staleness for writes made by
+    other instances.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._courses: tuple[float, CatalogCourses] | None = None
+        self._lessons: OrderedDict[str, tuple[float, CatalogLessons]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _fresh(self, entry: tuple[float, Any] | None, now: float) -> Any:
+        if entry is None or entry[0] <= now:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def get_courses(self) -> CatalogCourses | None:
+        now = time.monotonic()
+        with self._lock:
+            return self._fresh(self._courses, now)
+
+    def put_courses(self, version: int, courses: CatalogCourses) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            if version == self.version:
+                self._courses = (expires_at, courses)
+
+    def get_lessons(self, course_id: str) -> CatalogLessons | None:
+        now = time.monotonic()
+        with self._lock:
+            lessons = self._fresh(self._lessons.get(course_id), now)
+            if lessons is not None:
+                self._lessons.move_to_end(course_id)
+            return lessons
+
+    def put_lessons(
+        self, version: int, course_id: str, lessons: CatalogLessons
+    ) -> None:
+        if self.ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            if version != self.version:
+                return
+            self._lessons[course_id] = (expires_at, lessons)
+            self._lessons.move_to_end(course_id)
+            while len(self._lessons) > self.max_entries:
+                self._lessons.popitem(last=False)
+
+    def invalidate_course(self, course_id: str) -> None:
+        with self._lock:
+            self.version += 1
+            self._courses = None
+            self._lessons.pop(course_id, None)
+
+    def invalidate_lessons(self, course_id: str) -> None:
+        with self._lock:
+            self.version += 1
+            self._lessons.pop(course_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.version += 1
+            self._courses = None
+            self._lessons.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "version": self.version,
+                "lessonLists": len(self._lessons),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_settings = get_settings()
+course_catalog = CourseCatalog(
+    _settings.COURSE_CATALOG_CACHE_TTL_SECONDS,
+    _settings.COURSE_CATALOG_CACHE_MAX_ENTRIES,
+)
+
+
+def invalidate_course(course_id: str) -> None:
+    """Call after a course is created, edited or deleted."""
+    course_catalog.invalidate_course(course_id)
+
+
+def invalidate_course_lessons(course_id: str) -> None:
+    """Call after any write to a course's lessons, including order changes."""
+    course_catalog.invalidate_lessons(course_id)
+
+
+async def load_catalog_courses(db: firestore.AsyncClient) -> CatalogCourses:
+    cached = course_catalog.get_courses()
+    if cached is not None:
+        return cached
+    version = course_catalog.version
+    items = tuple(await list_active_courses(db))
+    courses = CatalogCourses(
+        items=items,
+        by_id={course.id: course for course in items},
+        fingerprint=strong_etag([(course.id, course.updatedAt) for course in items]),
+    )
+    course_catalog.put_courses(version, courses)
+    return courses
+
+
+async def list_catalog_courses(
+    db: firestore.AsyncClient, goal_id: str | None = None
+) -> list[dict[str, Any]]:
+    return (await load_catalog_courses(db)).for_goal(goal_id)
+
+
+async def _stream_active_lessons(
+    lessons_ref: firestore.AsyncCollectionReference,
+) -> list[dict[str, Any]]:
+    query = lessons_ref.where("isActive", "==", True).order_by("order")
+    return [{**(snap.to_dict() or {}), "id": snap.id} async for snap in query.stream()]
+
+
+async def load_course_lessons(
+    db: firestore.AsyncClient, course_id: str
+) -> CatalogLessons:
+    cached = course_catalog.get_lessons(course_id)
+    if cached is not None:
+        return cached
+    version = course_catalog.version
+    course_ref = db.collection("courses").document(course_id)
+    course_snap, items = await asyncio.gather(
+        course_ref.get(), _stream_active_lessons(course_ref.collection("lessons"))
+    )
+    if not course_snap.exists:
+        items = []
+    sort_ranked(items)
+    lessons = CatalogLessons(
+        exists=course_snap.exists,
+        items=tuple(items),
+        fingerprint=strong_etag(
+            [(item["id"], item.get("updatedAt")) for item in items]
+        ),
+    )
+    course_catalog.put_lessons(version, course_id, lessons)
+    return lessons
@@ -1,9 +1,16 @@
+import asyncio
 from typing import Any
 
 from google.cloud import firestore
 
+from app.auth.profile_cache import invalidate_user_profile
+from app.core.config import get_settings
 from app.core.errors import AppError
-from app.repositories.courses import get_course_by_id, list_lessons_by_course_id
+from app.db.bulk_writer import BulkWriter
+from app.repositories.courses import get_courses_by_ids, list_lessons_by_course_id
+from app.schemas.courses import Lesson
+from app.services.progress import apply_user_progress_delta, progress_fields
+from app.services.student_plan import steps_changed
 
 
 def _normalize_selected_courses(value: object) -> list[str]:
@@ -22,19 +29,104 @@ def _normalize_selected_courses(value: object) -> list[str]:
     return normalized
 
 
-def _progress_percent(done: int, total: int) -> int:
-    if total <= 0:
-        return 0
-    return round((done / total) * 100)
+SOURCE_LESSON_KEYS_FIELD = "sourceLessonKeys"
+# New steps per write batch; the batch also carries the plan index update.
+STEPS_PER_BATCH = 400
 
 
-def append_courses_to_student_plan(
-    db: firestore.Client,
+def source_lesson_key(course_id: str, lesson_id: str) -> str:
+    """Entry of the plan's `sourceLessonKeys` index for a course lesson step."""
+    return f"{course_id}/{lesson_id}"
+
+
+def step_source_lesson_key(step: dict[str, Any]) -> str | None:
+    course_id = step.get("sourceCourseId")
+    lesson_id = step.get("sourceLessonId")
+    if isinstance(course_id, str) and isinstance(lesson_id, str):
+        return source_lesson_key(course_id, lesson_id)
+    return None
+
+
+def _lesson_step_payload(
+    course_id: str, lesson: Lesson, order: int, *, reference: bool
+) -> dict[str, Any]:
+    """Step data for a course lesson.
+
+    In reference mode the step keeps only its source ids, order and done
+    state; readers fill in the lesson content from the lesson catalog.
+    """
+    now = firestore.SERVER_TIMESTAMP
+    payload: dict[str, Any] = {
+        "order": order,
+        "isDone": False,
+        "doneAt": None,
+        "sourceCourseId": course_id,
+        "sourceLessonId": lesson.id,
+        "createdAt": now,
+        "updatedAt": now,
+    }
+    if not reference:
+        payload.update(
+            {
+                "templateId": None,
+                "title": lesson.title,
+                "description": lesson.content,
+                "materialUrl": lesson.materialUrl,
+            }
+        )
+    return payload
+
+
+async def _scan_plan_steps(
+    steps_ref: firestore.AsyncCollectionReference,
+) -> tuple[set[str], int, int, int]:
+    """Legacy path for plans without an index: (keys, done, total, max order)."""
+    keys: set[str] = set()
+    done_count = 0
+    total_count = 0
+    max_order = -1
+    async for step_snap in steps_ref.stream():
+        step_data = step_snap.to_dict() or {}
+        key = step_source_lesson_key(step_data)
+        if key is not None:
+            keys.add(key)
+        total_count += 1
+        if step_data.get("isDone"):
+            done_count += 1
+        order = step_data.get("order")
+        if isinstance(order, int) and order > max_order:
+            max_order = order
+    return keys, done_count, total_count, max_order
+
+
+async def _max_step_order(steps_ref: firestore.AsyncCollectionReference) -> int:
+    query = steps_ref.order_by("order", direction=firestore.Query.DESCENDING).limit(1)
+    async for step_snap in query.stream():
+        order = (step_snap.to_dict() or {}).get("order")
+        if isinstance(order, int):
+            return order
+    return -1
+
+
+async def append_courses_to_student_plan(
+    db: firestore.AsyncClient,
     uid: str,
     course_ids: list[str],
 ) -> dict[str, Any]:
+    """Add the active lessons of `course_ids` to a student's plan as steps.
+
+    Courses are read in one batch and their lessons queried concurrently.
+    Lessons already in the plan are found through the plan doc's
+    `sourceLessonKeys` index, so only the missing steps are written and the
+    existing ones are never streamed. Plans created before the index existed
+    are scanned once and indexed on the way.
+
+    The index exists before any step is written, and every batch of new steps
+    adds its own keys to it, so a run that fails part-way is retried without
+    creating the committed steps again.
+    """
     user_ref = db.collection("users").document(uid)
-    user_snap = user_ref.get()
+    user_snap = await user_ref.get()
     if not user_snap.exists:
         raise AppError(code="not_found", message="User not found", status_code=404)
 
@@ -47,105 +139,127 @@ def append_courses_to_student_plan(
             status_code=400,
         )
 
+    courses = await get_courses_by_ids(db, normalized_course_ids)
+    invalid_course_ids = [
+        course_id
+        for course_id in normalized_course_ids
+        if not courses.get(course_id) or not courses[course_id].isActive
+    ]
+    if invalid_course_ids:
+        raise AppError(
+            code="validation_error",
+            message="courseIds contains inactive or missing courses",
+            status_code=400,
+            details={"invalidCourseIds": invalid_course_ids},
+        )
+
     plan_ref = db.collection("student_plans").document(uid)
-    plan_snap = plan_ref.get()
     steps_ref = plan_ref.collection("steps")
+    plan_snap, lessons_by_course = await asyncio.gather(
+        plan_ref.get(),
+        asyncio.gather(
+            *(
+                list_lessons_by_course_id(db, course_id, include_inactive=False)
+                for course_id in normalized_course_ids
+            )
+        ),
+    )
+    plan_data = (plan_snap.to_dict() or {}) if plan_snap.exists else {}
+    indexed_keys = plan_data.get(SOURCE_LESSON_KEYS_FIELD)
 
-    existing_pairs: set[tuple[str, str]] = set()
-    done_count = 0
-    total_count = 0
-    max_order = -1
-    for step_snap in steps_ref.stream():
-      step_data = step_snap.to_dict() or {}
-      source_course_id = step_data.get("sourceCourseId")
-      source_lesson_id = step_data.get("sourceLessonId")
-      if isinstance(source_course_id, str) and isinstance(source_lesson_id, str):
-          existing_pairs.add((source_course_id, source_lesson_id))
-      total_count += 1
-      if step_data.get("isDone"):
-          done_count += 1
-      order = step_data.get("order")
-      if isinstance(order, int) and order > max_order:
-          max_order = order
+    scanned_progress: tuple[int, int] | None = None
+    if not plan_snap.exists:
+        existing_keys: set[str] = set()
+        max_order = -1
+    elif isinstance(indexed_keys, list):
+        existing_keys = {key for key in indexed_keys if isinstance(key, str)}
+        max_order = await _max_step_order(steps_ref)
+    else:
+        existing_keys, done_count, total_count, max_order = await _scan_plan_steps(
+            steps_ref
+        )
+        scanned_progress = (done_count, total_count)
+
+    selected_courses = _normalize_selected_courses(user_data.get("selectedCourses"))
+    selected_course_set = set(selected_courses)
+    added_course_ids = [
+        course_id
+        for course_id in normalized_course_ids
+        if course_id not in selected_course_set
+    ]
 
+    now = firestore.SERVER_TIMESTAMP
     if not plan_snap.exists:
-        now = firestore.SERVER_TIMESTAMP
-        plan_ref.set(
+        await plan_ref.set(
             {
                 "studentUid": uid,
                 "goalId": user_data.get("selectedGoalId") or "",
+                SOURCE_LESSON_KEYS_FIELD: [],
                 "createdAt": now,
                 "updatedAt": now,
             }
         )
+    elif scanned_progress is not None:
+        await plan_ref.update(
+            {SOURCE_LESSON_KEYS_FIELD: sorted(existing_keys), "updatedAt": now}
+        )
 
-    selected_courses = _normalize_selected_courses(user_data.get("selectedCourses"))
-    selected_course_set = set(selected_courses)
-    added_course_ids: list[str] = []
-    created_steps = 0
-    pending_step_payloads: list[tuple[firestore.DocumentReference, dict[str, Any]]] = []
-
-    next_order = max_order + 1
-    for course_id in normalized_course_ids:
-        course = get_course_by_id(db, course_id)
-        if not course or not course.isActive:
-            raise AppError(
-                code="validation_error",
-                message="courseIds contains inactive or missing courses",
-                status_code=400,
-                details={"invalidCourseIds": [course_id]},
-            )
+    reference_lessons = get_settings().PLAN_STEPS_REFERENCE_LESSONS
+    writer = BulkWriter(db)
+    new_keys: list[str] = []
+    batch_keys: list[str] = []
 
-        if course_id not in selected_course_set:
-            added_course_ids.append(course_id)
-            selected_course_set.add(course_id)
+    async def _index_batch() -> None:
+        await writer.update(
+            plan_ref,
+            {
+                SOURCE_LESSON_KEYS_FIELD: firestore.ArrayUnion(batch_keys),
+                "updatedAt": now,
+                **steps_changed(),
+            },
+        )
+        await writer.end_batch()
+        batch_keys.clear()
 
-        for lesson in list_lessons_by_course_id(db, course_id, include_inactive=False):
-            pair = (course_id, lesson.id)
-            if pair in existing_pairs:
+    next_order = max_order + 1
+    for course_id, lessons in zip(normalized_course_ids, lessons_by_course):
+        for lesson in lessons:
+            key = source_lesson_key(course_id, lesson.id)
+            if key in existing_keys:
                 continue
-            now = firestore.SERVER_TIMESTAMP
-            step_ref = steps_ref.document()
-            pending_step_payloads.append(
-                (
-                    step_ref,
-                    {
-                        "templateId": None,
-                        "title": lesson.title,
-                        "description": lesson.content,
-                        "materialUrl": lesson.materialUrl,
-                        "order": next_order,
-                        "isDone": False,
-                        "doneAt": None,
-                        "sourceCourseId": course_id,
-                        "sourceLessonId": lesson.id,
-                        "createdAt": now,
-                        "updatedAt": now,
-                    },
-                )
+            await writer.set(
+                steps_ref.document(),
+                _lesson_step_payload(
+                    course_id, lesson, next_order, reference=reference_lessons
+                ),
             )
-            existing_pairs.add(pair)
+            existing_keys.add(key)
+            new_keys.append(key)
+            batch_keys.append(key)
             next_order += 1
-            created_steps += 1
-
-    for start in range(0, len(pending_step_payloads), 400):
-        batch = db.batch()
-        for step_ref, payload in pending_step_payloads[start : start + 400]:
-            batch.set(step_ref, payload)
-        batch.commit()
-
-    user_ref.update(
-        {
-            "selectedCourses": selected_courses + added_course_ids,
-            "stepsDone": done_count,
-            "stepsTotal": total_count + created_steps,
-            "progressPercent": _progress_percent(done_count, total_count + created_steps),
-            "updatedAt": firestore.SERVER_TIMESTAMP,
-        }
-    )
+            if len(batch_keys) >= STEPS_PER_BATCH:
+                await _index_batch()
+    if batch_keys:
+        await _index_batch()
+    await writer.flush()
+    created_steps = len(new_keys)
+
+    if plan_snap.exists and not new_keys and added_course_ids:
+        await plan_ref.update({"updatedAt": now})
 
-    if plan_snap.exists and (added_course_ids or created_steps):
-        plan_ref.update({"updatedAt": firestore.SERVER_TIMESTAMP})
+    user_updates: dict[str, Any] = {
+        "selectedCourses": selected_courses + added_course_ids,
+        "updatedAt": now,
+    }
+    if scanned_progress is not None:
+        done_count, total_count = scanned_progress
+        user_updates.update(progress_fields(done_count, total_count + created_steps))
+    elif not plan_snap.exists:
+        user_updates.update(progress_fields(0, created_steps))
+    await user_ref.update(user_updates)
+    if plan_snap.exists and scanned_progress is None:
+        await apply_user_progress_delta(db, uid, total_delta=created_steps)
+    invalidate_user_profile(uid)
 
     return {
         "addedCourseIds": added_course_ids,
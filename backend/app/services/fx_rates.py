@@ -0,0 +1,286 @@
+import asyncio
+import copy
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import httpx
+from google.cloud import firestore
+
+from app.core.background import start_background_task
+from app.core.config import get_settings
+from app.core.errors import AppError
+from app.core.logging import get_logger
+from app.db.reference_data import mark_reference_written, reference_document
+
+logger = get_logger("app.fx")
+
+DEFAULT_FX_BASE = "USD"
+DEFAULT_FX_RATES = {
+    "USD": 1.0,
+    "EUR": 0.88,
+    "PLN": 3.79,
+    "RUB": 82.0,
+}
+FX_DOC_COLLECTION = "config"
+FX_DOC_ID = "fx_rates"
+FX_REFERENCE_PATH = f"{FX_DOC_COLLECTION}/{FX_DOC_ID}"
+FX_REFRESH_INTERVAL = timedelta(hours=12)
+
+
+class FxRatesCache:
+    """The last FX payload this instance read or fetched, plus its refresh task.
+
+    Reads within `ttl_seconds` skip Firestore. At most one provider refresh
+    runs at a time; callers that need it share the running task. After a
+    failed refresh, background refreshes wait `retry_seconds`.
+    """
+
+    def __init__(self, ttl_seconds: float, retry_seconds: float) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.retry_seconds = retry_seconds
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.refresh_task: asyncio.Task[dict[str, Any] | None] | None = None
+        self._payload: dict[str, Any] | None = None
+        self._expires_at = 0.0
+        self._retry_at = 0.0
+
+    def get(self) -> dict[str, Any] | None:
+        if self._payload is None or self._expires_at <= time.monotonic():
+            return None
+        return copy.deepcopy(self._payload)
+
+    def put(self, payload: dict[str, Any]) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        self._payload = copy.deepcopy(payload)
+        self._expires_at = time.monotonic() + self.ttl_seconds
+
+    def retry_due(self) -> bool:
+        return time.monotonic() >= self._retry_at
+
+    def refreshed(self, payload: dict[str, Any]) -> None:
+        self.refreshes += 1
+        self._retry_at = 0.0
+        self.put(payload)
+
+    def refresh_failed(self) -> None:
+        self.refresh_failures += 1
+        self._retry_at = time.monotonic() + self.retry_seconds
+
+    def clear(self) -> None:
+        self._payload = None
+        self._expires_at = 0.0
+        self._retry_at = 0.0
+        self.refresh_task = None
+
+
+_settings = get_settings()
+fx_rates_cache = FxRatesCache(
+    _settings.FX_RATES_CACHE_TTL_SECONDS,
+    _settings.FX_RATES_RETRY_SECONDS,
+)
+
+
+def _as_string(value: object, default: str = "") -> str:
+    if isinstance(value, str):
+        return value
+    return default
+
+
+def _as_datetime(value: object) -> datetime | None:
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    if isinstance(value, str):
+        text = value.strip()
+        if not text:
+            return None
+        try:
+            if text.endswith("Z"):
+                text = text[:-1] + "+00:00"
+            parsed = datetime.fromisoformat(text)
+        except ValueError:
+            return None
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+    return None
+
+
+def _to_iso8601(value: datetime | None) -> str | None:
+    if value is None:
+        return None
+    return value.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+async def _get_or_bootstrap_fx_rates(db: firestore.AsyncClient) -> dict[str, Any]:
+    data = await reference_document(db, FX_DOC_COLLECTION, FX_DOC_ID)
+    if data is None:
+        now = datetime.now(timezone.utc)
+        bootstrap = {
+            "base": DEFAULT_FX_BASE,
+            "rates": DEFAULT_FX_RATES,
+            "asOf": None,
+            "fetchedAt": _to_iso8601(now),
+        }
+        await db.collection(FX_DOC_COLLECTION).document(FX_DOC_ID).set(bootstrap)
+        mark_reference_written(FX_REFERENCE_PATH)
+        data = bootstrap
+        as_of = bootstrap["asOf"]
+        fetched_at = bootstrap["fetchedAt"]
+        source = "bootstrap"
+    else:
+        as_of = data.get("asOf") or data.get("updatedAt")
+        fetched_at = data.get("fetchedAt") or data.get("updatedAt")
+        source = "firestore"
+
+    base = _as_string(data.get("base"), default=DEFAULT_FX_BASE).upper()
+    raw_rates = data.get("rates")
+    rates: dict[str, float] = {}
+    if isinstance(raw_rates, dict):
+        for key, value in raw_rates.items():
+            if not isinstance(key, str):
+                continue
+            if isinstance(value, (int, float)) and value > 0:
+                rates[key.upper()] = float(value)
+    for currency, rate in DEFAULT_FX_RATES.items():
+        if currency not in rates:
+            rates[currency] = rate
+    return {
+        "base": base,
+        "rates": rates,
+        "asOf": as_of,
+        "fetchedAt": fetched_at,
+        "source": source,
+    }
+
+
+def _is_stale(payload: dict[str, Any]) -> bool:
+    fetched_at = _as_datetime(payload.get("fetchedAt"))
+    return (
+        fetched_at is None
+        or datetime.now(timezone.utc) - fetched_at >= FX_REFRESH_INTERVAL
+    )
+
+
+async def load_fx_rates(db: firestore.AsyncClient) -> dict[str, Any]:
+    """The FX snapshot; a stale one is served as-is and refreshed in the background.
+
+    Only when nothing but the built-in defaults is available does the caller
+    wait for the provider.
+    """
+    payload = fx_rates_cache.get()
+    if payload is None:
+        payload = await _get_or_bootstrap_fx_rates(db)
+        fx_rates_cache.put(payload)
+    if payload.get("source") == "bootstrap":
+        return await refresh_fx_rates(db) or payload
+    if _is_stale(payload):
+        _start_refresh(db)
+    return payload
+
+
+def _start_refresh(
+    db: firestore.AsyncClient, *, force: bool = False
+) -> asyncio.Task[dict[str, Any] | None] | None:
+    task = fx_rates_cache.refresh_task
+    loop = asyncio.get_running_loop()
+    if task is not None and not task.done() and task.get_loop() is loop:
+        return task
+    if not force and not fx_rates_cache.retry_due():
+        return None
+    task = start_background_task(_refresh_fx_rates(db))
+    fx_rates_cache.refresh_task = task
+    return task
+
+
+async def refresh_fx_rates(
+    db: firestore.AsyncClient, *, force: bool = False
+) -> dict[str, Any] | None:
+    """Fetch and store live rates, joining a refresh that is already running.
+
+    Returns None when the provider fails, or, unless `force`, while waiting
+    out the retry delay after a failure.
+    """
+    task = _start_refresh(db, force=force)
+    if task is None:
+        return None
+    # A cancelled caller must not cancel the refresh other callers share.
+    return await asyncio.shield(task)
+
+
+async def _refresh_fx_rates(db: firestore.AsyncClient) -> dict[str, Any] | None:
+    try:
+        live_payload = await _fetch_live_fx_rates()
+        await _store_fx_rates(db, live_payload)
+    except Exception:
+        fx_rates_cache.refresh_failed()
+        logger.warning(
+            "fx_rates_refresh_failed",
+            extra={
+                "event": "fx_rates_refresh_failed",
+                "failures": fx_rates_cache.refresh_failures,
+            },
+            exc_info=True,
+        )
+        return None
+    fx_rates_cache.refreshed(live_payload)
+    return live_payload
+
+
+async def _fetch_live_fx_rates() -> dict[str, Any]:
+    settings = get_settings()
+    async with httpx.AsyncClient(
+        timeout=httpx.Timeout(settings.FX_RATES_TIMEOUT_SECONDS)
+    ) as client:
+        response = await client.get(settings.FX_RATES_URL)
+        response.raise_for_status()
+        payload = response.json()
+
+    rates_raw = payload.get("rates") if isinstance(payload, dict) else None
+    if not isinstance(rates_raw, dict):
+        raise AppError(
+            code="fx_rates_invalid",
+            message="FX provider returned invalid rates payload",
+            status_code=502,
+        )
+
+    base = _as_string(payload.get("base_code"), default=DEFAULT_FX_BASE).upper()
+    rates: dict[str, float] = {}
+    for key, value in rates_raw.items():
+        if not isinstance(key, str):
+            continue
+        if isinstance(value, (int, float)) and value > 0:
+            rates[key.upper()] = float(value)
+    for currency, rate in DEFAULT_FX_RATES.items():
+        rates.setdefault(currency, rate)
+
+    fetched_at = datetime.now(timezone.utc)
+    provider_as_of = _provider_as_of(payload)
+    return {
+        "base": base or DEFAULT_FX_BASE,
+        "rates": rates,
+        "asOf": _to_iso8601(provider_as_of),
+        "fetchedAt": _to_iso8601(fetched_at),
+        "source": "live",
+    }
+
+
+def _provider_as_of(payload: dict[str, Any]) -> datetime | None:
+    timestamp = payload.get("time_last_update_unix")
+    if isinstance(timestamp, (int, float)) and timestamp > 0:
+        return datetime.fromtimestamp(float(timestamp), tz=timezone.utc)
+    return None
+
+
+async def _store_fx_rates(db: firestore.AsyncClient, payload: dict[str, Any]) -> None:
+    doc_ref = db.collection(FX_DOC_COLLECTION).document(FX_DOC_ID)
+    await doc_ref.set(
+        {
+            "base": payload["base"],
+            "rates": payload["rates"],
+            "asOf": payload["asOf"],
+            "fetchedAt": payload["fetchedAt"],
+            "updatedAt": payload["fetchedAt"],
+        }
+    )
+    mark_reference_written(FX_REFERENCE_PATH)
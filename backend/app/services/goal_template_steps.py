@@ -4,15 +4,15 @@ from urllib.parse import urlparse
 from google.cloud import firestore
 
 from app.core.errors import AppError
+from app.db.reference_data import reference_document
 from app.repositories.goal_template_steps import (
     list_goal_template_steps,
     replace_goal_template_steps,
 )
 
 
-def _ensure_goal_exists(db: firestore.Client, goal_id: str) -> None:
-    doc_ref = db.collection("goals").document(goal_id)
-    if not doc_ref.get().exists:
+async def _ensure_goal_exists(db: firestore.AsyncClient, goal_id: str) -> None:
+    if await reference_document(db, "goals", goal_id) is None:
         raise AppError(code="not_found", message="Goal not found", status_code=404)
 
 
@@ -63,17 +63,17 @@ def build_goal_template_steps_payload(
     return _normalize_steps(cleaned)
 
 
-def list_steps(db: firestore.Client, goal_id: str) -> list[dict[str, Any]]:
-    _ensure_goal_exists(db, goal_id)
-    return list_goal_template_steps(db, goal_id)
+async def list_steps(db: firestore.AsyncClient, goal_id: str) -> list[dict[str, Any]]:
+    await _ensure_goal_exists(db, goal_id)
+    return await list_goal_template_steps(db, goal_id)
 
 
-def replace_steps(
-    db: firestore.Client,
+async def replace_steps(
+    db: firestore.AsyncClient,
     goal_id: str,
     items: list[Any],
 ) -> list[dict[str, Any]]:
-    _ensure_goal_exists(db, goal_id)
+    await _ensure_goal_exists(db, goal_id)
     payload = build_goal_template_steps_payload(items)
 
     now = firestore.SERVER_TIMESTAMP
@@ -81,11 +81,4 @@ def replace_steps(
         step["createdAt"] = now
         step["updatedAt"] = now
 
-    try:
-        return replace_goal_template_steps(db, goal_id, payload)
-    except ValueError as exc:
-        raise AppError(
-            code="validation_error",
-            message=str(exc),
-            status_code=400,
-        ) from exc
+    return await replace_goal_template_steps(db, goal_id, payload)
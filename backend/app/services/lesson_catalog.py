@@ -0,0 +1,242 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Any
+
+from google.cloud import firestore
+
+from app.core.config import get_settings
+from app.core.etag import strong_etag
+from app.db.loader import get_documents
+
+LESSON_CONTENT_FIELDS = ("title", "description", "materialUrl")
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogLesson:
+    """A lesson's step content as read at `fetchedAt`.
+
+    `content` is empty for a lesson without a document. `updatedAt` is the
+    lesson's own timestamp and versions the content.
+    """
+
+    content: MappingProxyType
+    updatedAt: Any
+    fetchedAt: datetime
+
+
+class LessonCatalogCache:
+    """Per-instance TTL cache of the lesson fields plan steps display.
+
+    Entries are keyed by `{courseId}/{lessonId}`; lessons that do not exist
+    are cached too. Admin lesson writes must call `invalidate_lesson`; for
+    writes made by other instances, readers pass `not_before` (see
+    `hydrate_plan_steps`) and the TTL bounds what is left.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, CatalogLesson]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(
+        self, key: str, *, not_before: datetime | None = None
+    ) -> CatalogLesson | None:
+        """The cached entry, unless it expired or was read before `not_before`."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, lesson = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            if not_before is not None and lesson.fetchedAt < not_before:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return lesson
+
+    def put(self, key: str, lesson: CatalogLesson) -> None:
+        if self.ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries[key] = (expires_at, lesson)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_settings = get_settings()
+lesson_catalog = LessonCatalogCache(
+    _settings.LESSON_CATALOG_CACHE_TTL_SECONDS,
+    _settings.LESSON_CATALOG_CACHE_MAX_ENTRIES,
+)
+
+
+def _catalog_key(course_id: str, lesson_id: str) -> str:
+    return f"{course_id}/{lesson_id}"
+
+
+def invalidate_lesson(course_id: str, lesson_id: str) -> None:
+    lesson_catalog.invalidate(_catalog_key(course_id, lesson_id))
+
+
+def lesson_content(data: dict[str, Any]) -> dict[str, Any]:
+    """The step fields a lesson document provides."""
+    return {
+        "title": data.get("title"),
+        "description": data.get("content"),
+        "materialUrl": data.get("materialUrl"),
+    }
+
+
+def is_reference_step(step: dict[str, Any]) -> bool:
+    """Steps written in reference mode carry source ids but no content."""
+    return (
+        "title" not in step
+        and isinstance(step.get("sourceCourseId"), str)
+        and isinstance(step.get("sourceLessonId"), str)
+    )
+
+
+def _aware(value: Any) -> datetime | None:
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+async def get_catalog_lessons(
+    db: firestore.AsyncClient,
+    pairs: list[tuple[str, str]],
+    *,
+    not_before: dict[tuple[str, str], datetime] | None = None,
+) -> dict[tuple[str, str], CatalogLesson]:
+    """Catalog entries for `(courseId, lessonId)` pairs; cache misses share one read.
+
+    An entry read before `not_before[pair]` is read again.
+    """
+    not_before = not_before or {}
+    lessons: dict[tuple[str, str], CatalogLesson] = {}
+    missing: list[tuple[str, str]] = []
+    for pair in dict.fromkeys(pairs):
+        cached = lesson_catalog.get(
+            _catalog_key(*pair), not_before=not_before.get(pair)
+        )
+        if cached is None:
+            missing.append(pair)
+        else:
+            lessons[pair] = cached
+    if missing:
+        courses = db.collection("courses")
+        fetched_at = datetime.now(timezone.utc)
+        snaps = await get_documents(
+            db,
+            [
+                courses.document(course_id).collection("lessons").document(lesson_id)
+                for course_id, lesson_id in missing
+            ],
+        )
+        for pair, snap in zip(missing, snaps):
+            data = (snap.to_dict() or {}) if snap is not None and snap.exists else None
+            lesson = CatalogLesson(
+                content=MappingProxyType(lesson_content(data) if data else {}),
+                updatedAt=data.get("updatedAt") if data else None,
+                fetchedAt=fetched_at,
+            )
+            lesson_catalog.put(_catalog_key(*pair), lesson)
+            lessons[pair] = lesson
+    return lessons
+
+
+async def lesson_content_version(
+    db: firestore.AsyncClient, lesson_keys: object
+) -> str | None:
+    """Fingerprint of the content versions of `{courseId}/{lessonId}` keys.
+
+    Plans index their lesson steps by these keys (`sourceLessonKeys`), so
+    validators of hydrated step lists can change with the lessons without
+    reading the steps.
+    """
+    if not isinstance(lesson_keys, list):
+        return None
+    pairs: list[tuple[str, str]] = []
+    for key in lesson_keys:
+        if not isinstance(key, str):
+            continue
+        course_id, sep, lesson_id = key.partition("/")
+        if sep:
+            pairs.append((course_id, lesson_id))
+    if not pairs:
+        return None
+    lessons = await get_catalog_lessons(db, pairs)
+    return strong_etag(
+        sorted(
+            (_catalog_key(*pair), lesson.updatedAt) for pair, lesson in lessons.items()
+        )
+    )
+
+
+async def hydrate_plan_steps(
+    db: firestore.AsyncClient, steps: list[dict[str, Any]]
+) -> list[dict[str, Any]]:
+    """Fill title/description/materialUrl of reference steps in place.
+
+    A lesson edit reaches its steps through the fan-out, which touches their
+    `updatedAt` after the lesson is written. A cache entry read before a
+    step's `updatedAt` may therefore predate an edit made on another
+    instance, and is read again for that step.
+    """
+    pairs: list[tuple[str, str]] = []
+    not_before: dict[tuple[str, str], datetime] = {}
+    for step in steps:
+        if not is_reference_step(step):
+            continue
+        pair = (step["sourceCourseId"], step["sourceLessonId"])
+        pairs.append(pair)
+        updated_at = _aware(step.get("updatedAt"))
+        if updated_at is not None and (
+            pair not in not_before or not_before[pair] < updated_at
+        ):
+            not_before[pair] = updated_at
+    if not pairs:
+        return steps
+    lessons = await get_catalog_lessons(db, pairs, not_before=not_before)
+    for step in steps:
+        if not is_reference_step(step):
+            continue
+        lesson = lessons.get((step["sourceCourseId"], step["sourceLessonId"]))
+        content = lesson.content if lesson is not None else {}
+        step.setdefault("templateId", None)
+        for field in LESSON_CONTENT_FIELDS:
+            step[field] = content.get(field)
+    return steps
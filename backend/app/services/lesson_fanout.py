@@ -0,0 +1,230 @@
+from typing import Any
+
+from google.cloud import firestore
+
+from app.core.errors import AppError
+from app.core.logging import get_logger
+from app.db.bulk_writer import BulkWriter
+from app.services.lesson_catalog import is_reference_step, lesson_content
+from app.services.resumable_jobs import (
+    JOB_DONE,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    claim_job,
+    list_pending_jobs,
+    mark_job_failed,
+)
+from app.services.student_plan import steps_changed
+
+logger = get_logger("app.lesson_fanout")
+
+LESSON_FANOUTS_COLLECTION = "lesson_fanouts"
+FANOUT_PAGE_SIZE = 400
+FANOUT_BATCH_SIZE = 100
+
+
+def fanout_job_ref(
+    db: firestore.AsyncClient, job_id: str
+) -> firestore.AsyncDocumentReference:
+    return db.collection(LESSON_FANOUTS_COLLECTION).document(job_id)
+
+
+async def start_lesson_fanout(
+    db: firestore.AsyncClient,
+    course_id: str,
+    lesson_id: str,
+    *,
+    requested_by: str | None,
+) -> str:
+    """Create the checkpoint doc that the fan-out jobs pick up; returns its id."""
+    job_ref = db.collection(LESSON_FANOUTS_COLLECTION).document()
+    now = firestore.SERVER_TIMESTAMP
+    await job_ref.set(
+        {
+            "courseId": course_id,
+            "lessonId": lesson_id,
+            "status": JOB_QUEUED,
+            "cursor": None,
+            "scanned": 0,
+            "updated": 0,
+            "failures": 0,
+            "requestedBy": requested_by,
+            "startedAt": now,
+            "updatedAt": now,
+        }
+    )
+    return job_ref.id
+
+
+def _step_updates(
+    step: dict[str, Any], course_id: str, content: dict[str, Any]
+) -> dict[str, Any] | None:
+    if step.get("sourceCourseId") != course_id:
+        return None
+    if is_reference_step(step):
+        # Nothing to copy, but what the step displays changed: touching it
+        # lets plan deltas and ETags pick the edit up.
+        return {}
+    changed = {
+        field: value for field, value in content.items() if step.get(field) != value
+    }
+    return changed or None
+
+
+async def run_lesson_fanout(
+    db: firestore.AsyncClient,
+    job_id: str,
+    *,
+    max_pages: int | None = None,
+    page_size: int = FANOUT_PAGE_SIZE,
+    force: bool = False,
+) -> dict[str, Any]:
+    """Copy a lesson's current content into the plan steps created from it.
+
+    Reference steps have nothing to copy and only get `updatedAt` touched.
+    Steps are found with a collection-group query on `sourceLessonId`,
+    walked in document-path order. Each page is written through a bulk
+    writer in parallel batches and committed before the page's last path is
+    checkpointed on the job doc, so a run stopped by `max_pages`, a timeout
+    or an error resumes where the last committed page ended. A run stopped
+    by `max_pages` puts the job back to queued; a job that is done, or still
+    running elsewhere, is returned as is.
+    """
+    job_ref = fanout_job_ref(db, job_id)
+    claimed, job = await claim_job(db, job_ref, force=force)
+    if not claimed:
+        return {**job, "id": job_id}
+    course_id = job["courseId"]
+    lesson_id = job["lessonId"]
+    try:
+        return await _run_claimed_fanout(
+            db, job_ref, job, max_pages=max_pages, page_size=page_size
+        )
+    except Exception:
+        logger.warning(
+            "lesson_fanout_failed",
+            extra={
+                "event": "lesson_fanout_failed",
+                "job_id": job_id,
+                "course_id": course_id,
+                "lesson_id": lesson_id,
+            },
+            exc_info=True,
+        )
+        await mark_job_failed(job_ref)
+        raise
+
+
+async def _run_claimed_fanout(
+    db: firestore.AsyncClient,
+    job_ref: firestore.AsyncDocumentReference,
+    job: dict[str, Any],
+    *,
+    max_pages: int | None,
+    page_size: int,
+) -> dict[str, Any]:
+    course_id = job["courseId"]
+    lesson_id = job["lessonId"]
+    lesson_snap = await (
+        db.collection("courses")
+        .document(course_id)
+        .collection("lessons")
+        .document(lesson_id)
+        .get()
+    )
+    if not lesson_snap.exists:
+        raise AppError(code="not_found", message="Lesson not found", status_code=404)
+    content = lesson_content(lesson_snap.to_dict() or {})
+
+    cursor = job.get("cursor")
+    scanned = int(job.get("scanned") or 0)
+    updated = int(job.get("updated") or 0)
+    query = (
+        db.collection_group("steps")
+        .where("sourceLessonId", "==", lesson_id)
+        .order_by("__name__")
+    )
+    pages = 0
+    status = JOB_RUNNING
+    while status == JOB_RUNNING:
+        page = query.limit(page_size)
+        if cursor:
+            page = page.start_after([db.document(cursor)])
+        writer = BulkWriter(db, batch_size=FANOUT_BATCH_SIZE)
+        page_scanned = 0
+        page_updated = 0
+        async for snap in page.stream():
+            page_scanned += 1
+            cursor = snap.reference.path
+            changes = _step_updates(snap.to_dict() or {}, course_id, content)
+            if changes is None:
+                continue
+            await writer.update(
+                snap.reference,
+                {**changes, "updatedAt": firestore.SERVER_TIMESTAMP},
+            )
+            await writer.update(snap.reference.parent.parent, steps_changed())
+            page_updated += 1
+        await writer.flush()
+        updated += page_updated
+        scanned += page_scanned
+        pages += 1
+        if page_scanned < page_size:
+            status = JOB_DONE
+        elif max_pages is not None and pages >= max_pages:
+            status = JOB_QUEUED
+        await job_ref.update(
+            {
+                "status": status,
+                "cursor": cursor,
+                "scanned": scanned,
+                "updated": updated,
+                "updatedAt": firestore.SERVER_TIMESTAMP,
+            }
+        )
+
+    logger.info(
+        "lesson_fanout_progress",
+        extra={
+            "event": "lesson_fanout_progress",
+            "job_id": job_ref.id,
+            "course_id": course_id,
+            "lesson_id": lesson_id,
+            "status": status,
+            "pages": pages,
+            "scanned": scanned,
+            "updated": updated,
+        },
+    )
+    return {
+        "id": job_ref.id,
+        "courseId": course_id,
+        "lessonId": lesson_id,
+        "status": status,
+        "cursor": cursor,
+        "scanned": scanned,
+        "updated": updated,
+    }
+
+
+async def run_pending_lesson_fanouts(
+    db: firestore.AsyncClient, *, limit: int, max_pages: int | None = None
+) -> dict[str, list[str]]:
+    """Run queued fan-outs and restart stopped or failed ones, one at a time.
+
+    Each gets at most `max_pages` pages; unfinished ones stay queued for the
+    next sweep.
+    """
+    result: dict[str, list[str]] = {"done": [], "queued": [], "failed": []}
+    for job_id in await list_pending_jobs(db, LESSON_FANOUTS_COLLECTION, limit=limit):
+        try:
+            job = await run_lesson_fanout(db, job_id, max_pages=max_pages)
+        except Exception:
+            # Recorded on the job doc; the next sweep retries it.
+            result["failed"].append(job_id)
+            continue
+        if job.get("status") == JOB_DONE:
+            result["done"].append(job_id)
+        elif job.get("status") == JOB_QUEUED:
+            result["queued"].append(job_id)
+    return result
@@ -3,6 +3,7 @@ from typing import Any
 
 from google.cloud import firestore
 
+from app.auth.profile_cache import invalidate_user_profile
 from app.core.config import get_settings
 from app.core.logging import get_logger
 from app.schemas.payments import PaymentStatus
@@ -49,8 +50,8 @@ def _notify_admin_async(text: str) -> None:
     loop.create_task(_send())
 
 
-def activate_by_code(
-    db: firestore.Client,
+async def activate_by_code(
+    db: firestore.AsyncClient,
     code: str,
     evidence: str | None = None,
 ) -> bool:
@@ -62,7 +63,7 @@ def activate_by_code(
         .where("activationCode", "==", activation_code)
         .limit(1)
     )
-    snaps = list(query.stream())
+    snaps = [snap async for snap in query.stream()]
     if not snaps:
         logger.warning(
             "payment_activation_code_not_found",
@@ -108,7 +109,7 @@ def activate_by_code(
         return True
 
     if payment_status not in _ALLOWED_AUTOMATIC_ACTIVATION_STATUSES:
-        snap.reference.set(
+        await snap.reference.set(
             {
                 "status": PaymentStatus.rejected.value,
                 "emailEvidence": evidence,
@@ -139,7 +140,7 @@ def activate_by_code(
         return False
 
     if not isinstance(user_uid, str) or not user_uid.strip():
-        snap.reference.set(
+        await snap.reference.set(
             {
                 "status": PaymentStatus.rejected.value,
                 "emailEvidence": evidence,
@@ -167,11 +168,11 @@ def activate_by_code(
         return False
 
     user_ref = db.collection("users").document(user_uid)
-    user_snap = user_ref.get()
+    user_snap = await user_ref.get()
     user_data = user_snap.to_dict() or {}
     user_status = user_data.get("status")
     if not user_snap.exists or user_status not in {"disabled", "active"}:
-        snap.reference.set(
+        await snap.reference.set(
             {
                 "status": PaymentStatus.rejected.value,
                 "emailEvidence": evidence,
@@ -204,7 +205,7 @@ def activate_by_code(
 
     selected_courses = data.get("selectedCourses")
     if isinstance(selected_courses, list) and selected_courses:
-        append_courses_to_student_plan(db, user_uid, selected_courses)
+        await append_courses_to_student_plan(db, user_uid, selected_courses)
 
     transaction = db.transaction()
     transaction.update(
@@ -223,7 +224,8 @@ def activate_by_code(
             "updatedAt": firestore.SERVER_TIMESTAMP,
         },
     )
-    transaction.commit()
+    await transaction.commit()
+    invalidate_user_profile(user_uid)
 
     logger.info(
         "payment_auto_activated",
@@ -0,0 +1,147 @@
+import uuid
+from typing import Any
+
+from google.cloud import firestore
+
+from app.core.logging import get_logger
+from app.db.bulk_delete import delete_query
+from app.db.bulk_writer import BulkWriter
+from app.services.course_plan_sync import SOURCE_LESSON_KEYS_FIELD
+from app.services.progress import set_user_progress
+from app.services.student_plan import (
+    PLAN_SYNC_FIELDS,
+    STEP_TOMBSTONES_COLLECTION,
+    STEPS_RESET_AT_FIELD,
+    steps_changed,
+)
+
+logger = get_logger("app.plan_reset")
+
+
+def _reset_step_id(reset_id: str, order: int) -> str:
+    return f"{reset_id}-{order:05d}"
+
+
+def _reset_step_data(step: dict[str, Any], order: int) -> dict[str, Any]:
+    now = firestore.SERVER_TIMESTAMP
+    return {
+        "templateId": None,
+        "title": step.get("title"),
+        "description": step.get("description"),
+        "materialUrl": step.get("materialUrl"),
+        "order": order,
+        "isDone": False,
+        "doneAt": None,
+        "createdAt": now,
+        "updatedAt": now,
+    }
+
+
+def resumable_reset_id(plan: dict[str, Any] | None, goal_id: str) -> str | None:
+    """The id of an unfinished reset to the same goal, if there is one."""
+    if not plan or not plan.get("resetInProgress"):
+        return None
+    if plan.get("resetGoalId") != goal_id:
+        return None
+    reset_id = plan.get("resetId")
+    return reset_id if isinstance(reset_id, str) and reset_id else None
+
+
+async def reset_plan_from_template(
+    db: firestore.AsyncClient,
+    uid: str,
+    *,
+    goal_id: str,
+    goal_data: dict[str, Any],
+    template_steps: list[dict[str, Any]],
+    actor_uid: str | None,
+    plan: dict[str, Any] | None,
+) -> dict[str, int]:
+    """Replace a student's plan steps with a goal template, in chunks.
+
+    The plan doc is marked `resetInProgress` before any step changes and
+    cleared only after every chunk has committed. New steps get ids derived
+    from the reset id and their order, so rerunning an interrupted reset to
+    the same goal rewrites the same documents and only deletes the rest.
+    """
+    now = firestore.SERVER_TIMESTAMP
+    plan_ref = db.collection("student_plans").document(uid)
+    steps_ref = plan_ref.collection("steps")
+    reset_id = resumable_reset_id(plan, goal_id)
+    resumed = reset_id is not None
+    if reset_id is None:
+        reset_id = uuid.uuid4().hex[:12]
+
+    await plan_ref.set(
+        {
+            "studentUid": uid,
+            "goalId": goal_id,
+            "createdAt": (plan or {}).get("createdAt", now),
+            "updatedAt": now,
+            "resetInProgress": True,
+            "resetId": reset_id,
+            "resetGoalId": goal_id,
+            "lastResetBy": actor_uid,
+            # Template steps have no source lesson; see course_plan_sync.
+            SOURCE_LESSON_KEYS_FIELD: [],
+            **{
+                field: (plan or {})[field]
+                for field in PLAN_SYNC_FIELDS
+                if field in (plan or {})
+            },
+        }
+    )
+    await (
+        db.collection("users")
+        .document(uid)
+        .set(
+            {"selectedGoalId": goal_id, "updatedAt": now},
+            merge=True,
+        )
+    )
+
+    writer = BulkWriter(db)
+    # Only ids the current template maps to survive; an interrupted attempt
+    # may have written more steps if the template has shrunk since.
+    keep_ids = {_reset_step_id(reset_id, order) for order in range(len(template_steps))}
+    deleted = await delete_query(
+        writer,
+        steps_ref,
+        keep=lambda snap: snap.id in keep_ids,
+    )
+    for order, step in enumerate(template_steps):
+        await writer.set(
+            steps_ref.document(_reset_step_id(reset_id, order)),
+            _reset_step_data(step, order),
+        )
+    # Clients syncing from before the reset get a full list instead.
+    await delete_query(writer, plan_ref.collection(STEP_TOMBSTONES_COLLECTION))
+    await writer.flush()
+
+    await plan_ref.set(
+        {
+            **steps_changed(),
+            STEPS_RESET_AT_FIELD: now,
+            "updatedAt": now,
+            "lastResetAt": now,
+            "sourceGoalTemplateVersion": goal_data.get("updatedAt") or now,
+            "resetInProgress": False,
+            "resetId": None,
+            "resetGoalId": None,
+        },
+        merge=True,
+    )
+    await set_user_progress(db, uid, done=0, total=len(template_steps))
+    logger.info(
+        "plan_reset_from_template",
+        extra={
+            "event": "plan_reset_from_template",
+            "uid": uid,
+            "goal_id": goal_id,
+            "resumed": resumed,
+            "deleted_steps": deleted,
+            "created_steps": len(template_steps),
+            "retries": writer.retries,
+        },
+    )
+    return {"deletedSteps": deleted, "createdSteps": len(template_steps)}
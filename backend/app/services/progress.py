@@ -0,0 +1,221 @@
+import asyncio
+from collections.abc import Sequence
+from typing import Any
+
+from google.api_core import exceptions as google_exceptions
+from google.cloud import firestore
+
+from app.db.firestore import count_documents
+
+PROGRESS_FIELDS = ("stepsDone", "stepsTotal", "progressPercent")
+
+_DocWrite = tuple[firestore.AsyncDocumentReference, dict[str, Any]]
+
+
+def progress_percent(done: int, total: int) -> int:
+    if total <= 0:
+        return 0
+    return round((done / total) * 100)
+
+
+def progress_fields(done: int, total: int) -> dict[str, Any]:
+    """Clamped `stepsDone`/`stepsTotal`/`progressPercent` for a users/{uid} write."""
+    next_total = max(0, int(total))
+    next_done = min(max(0, int(done)), next_total)
+    return {
+        "stepsDone": next_done,
+        "stepsTotal": next_total,
+        "progressPercent": progress_percent(next_done, next_total),
+    }
+
+
+async def set_user_progress(
+    db: firestore.AsyncClient, uid: str, *, done: int, total: int
+) -> None:
+    """Overwrite the progress counters without reading the user first."""
+    try:
+        await (
+            db.collection("users")
+            .document(uid)
+            .update(
+                {
+                    **progress_fields(done, total),
+                    "updatedAt": firestore.SERVER_TIMESTAMP,
+                }
+            )
+        )
+    except google_exceptions.NotFound:
+        return
+
+
+@firestore.async_transactional
+async def _apply_delta(
+    transaction: firestore.AsyncTransaction,
+    user_ref: firestore.AsyncDocumentReference,
+    done_delta: int,
+    total_delta: int,
+) -> None:
+    snap = await user_ref.get(transaction=transaction)
+    if not snap.exists:
+        return
+    data = snap.to_dict() or {}
+    transaction.update(
+        user_ref,
+        {
+            **progress_fields(
+                int(data.get("stepsDone") or 0) + done_delta,
+                int(data.get("stepsTotal") or 0) + total_delta,
+            ),
+            "updatedAt": firestore.SERVER_TIMESTAMP,
+        },
+    )
+
+
+async def apply_user_progress_delta(
+    db: firestore.AsyncClient,
+    uid: str,
+    *,
+    done_delta: int = 0,
+    total_delta: int = 0,
+) -> None:
+    """Shift the progress counters by a delta.
+
+    Clamping and `progressPercent` depend on the stored values, so the
+    read-modify-write runs in a transaction; concurrent toggles are retried
+    by Firestore instead of overwriting each other.
+    """
+    if not done_delta and not total_delta:
+        return
+    user_ref = db.collection("users").document(uid)
+    await _apply_delta(db.transaction(), user_ref, done_delta, total_delta)
+
+
+@firestore.async_transactional
+async def _write_step_done(
+    transaction: firestore.AsyncTransaction,
+    user_ref: firestore.AsyncDocumentReference,
+    step_ref: firestore.AsyncDocumentReference,
+    step_update: dict[str, Any],
+    extra_updates: Sequence[_DocWrite],
+    extra_sets: Sequence[_DocWrite],
+) -> dict[str, Any] | None:
+    step_snap = await step_ref.get(transaction=transaction)
+    if not step_snap.exists:
+        return None
+    user_snap = await user_ref.get(transaction=transaction)
+    previous = step_snap.to_dict() or {}
+    transaction.update(step_ref, step_update)
+    for ref, data in extra_updates:
+        transaction.update(ref, data)
+    for ref, data in extra_sets:
+        transaction.set(ref, data)
+    done_delta = int(bool(step_update["isDone"])) - int(bool(previous.get("isDone")))
+    if done_delta and user_snap.exists:
+        data = user_snap.to_dict() or {}
+        transaction.update(
+            user_ref,
+            {
+                **progress_fields(
+                    int(data.get("stepsDone") or 0) + done_delta,
+                    int(data.get("stepsTotal") or 0),
+                ),
+                "updatedAt": firestore.SERVER_TIMESTAMP,
+            },
+        )
+    return previous
+
+
+async def write_step_done(
+    db: firestore.AsyncClient,
+    uid: str,
+    step_ref: firestore.AsyncDocumentReference,
+    step_update: dict[str, Any],
+    *,
+    extra_updates: Sequence[_DocWrite] = (),
+    extra_sets: Sequence[_DocWrite] = (),
+) -> dict[str, Any] | None:
+    """Write a step's `isDone` change and shift `stepsDone` to match.
+
+    The step is read in the same transaction as the writes, so concurrent
+    toggles of one step count once. Returns the step as it was before the
+    write, or None when it does not exist.
+    """
+    user_ref = db.collection("users").document(uid)
+    return await _write_step_done(
+        db.transaction(),
+        user_ref,
+        step_ref,
+        step_update,
+        extra_updates,
+        extra_sets,
+    )
+
+
+async def count_plan_progress(db: firestore.AsyncClient, uid: str) -> tuple[int, int]:
+    """(done, total) for a student's plan via two count aggregations."""
+    steps = db.collection("student_plans").document(uid).collection("steps")
+    done, total = await asyncio.gather(
+        count_documents(steps.where("isDone", "==", True)),
+        count_documents(steps),
+    )
+    return done, total
+
+
+def needs_progress_backfill(data: dict[str, Any]) -> bool:
+    # Any role: the admin list sorts every role it returns on progressPercent.
+    return any(data.get(field) is None for field in PROGRESS_FIELDS)
+
+
+async def _backfill_counts(
+    db: firestore.AsyncClient, uid: str, data: dict[str, Any]
+) -> tuple[int, int]:
+    if data.get("role") != "student":
+        return 0, 0
+    return await count_plan_progress(db, uid)
+
+
+async def backfill_user_progress(
+    db: firestore.AsyncClient,
+    *,
+    limit: int,
+    cursor: str | None = None,
+    force: bool = False,
+) -> dict[str, Any]:
+    """Recompute cached progress for one page of users ordered by document id.
+
+    Users missing a cached field are filled in, and with `force` every
+    student is recounted. Only students are counted; other roles get zeros,
+    which is what the admin list shows for them. Counts run concurrently and
+    the page is written in one batch.
+    """
+    query = db.collection("users").order_by("__name__")
+    if cursor:
+        query = query.start_after([cursor])
+    scanned = 0
+    last_uid = None
+    pending: list[Any] = []
+    async for snap in query.limit(limit).stream():
+        scanned += 1
+        last_uid = snap.id
+        data = snap.to_dict() or {}
+        if needs_progress_backfill(data) or (force and data.get("role") == "student"):
+            pending.append((snap, data))
+    counts = await asyncio.gather(
+        *(_backfill_counts(db, snap.id, data) for snap, data in pending)
+    )
+    if pending:
+        batch = db.batch()
+        for (snap, _), (done, total) in zip(pending, counts):
+            batch.update(
+                snap.reference,
+                {
+                    **progress_fields(done, total),
+                    "updatedAt": firestore.SERVER_TIMESTAMP,
+                },
+            )
+        await batch.commit()
+    return {
+        "scanned": scanned,
+        "updated": len(pending),
+        "nextCursor": last_uid if scanned == limit else None,
+    }
@@ -0,0 +1,145 @@
+from typing import Any
+
+from google.cloud import firestore
+
+from app.core.errors import AppError
+from app.core.logging import get_logger
+from app.db.bulk_writer import BulkWriter
+from app.db.loader import get_documents
+from app.db.ranking import (
+    MAX_RANK_LENGTH,
+    effective_rank,
+    rank_between,
+    rank_sort_key,
+)
+
+logger = get_logger("app.ranked_lists")
+
+
+async def move_ranked_item(
+    db: firestore.AsyncClient,
+    collection: firestore.AsyncCollectionReference,
+    item_id: str,
+    *,
+    after_id: str | None,
+    before_id: str | None,
+    parent_update: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Move one item between two neighbours with a single document write.
+
+    The item takes the `order` of a neighbour and a rank between theirs, so
+    no other document changes. Callers pass the neighbours the item should
+    end up between; at least one is required. `parent_update` is applied
+    to the collection's parent after the move. A rank longer than
+    `MAX_RANK_LENGTH` renumbers the whole list before returning (see
+    `rebalance_ranks`), and the item's new order is returned without a rank.
+    """
+    if after_id is None and before_id is None:
+        raise AppError(
+            code="validation_error",
+            message="afterId or beforeId is required",
+            status_code=400,
+        )
+    if item_id in (after_id, before_id) or (after_id and after_id == before_id):
+        raise AppError(
+            code="validation_error",
+            message="Neighbours must be other items",
+            status_code=400,
+        )
+    ids = [item_id, after_id, before_id]
+    snaps = await get_documents(
+        db, [collection.document(doc_id) for doc_id in ids if doc_id is not None]
+    )
+    if any(snap is None or not snap.exists for snap in snaps):
+        raise AppError(code="not_found", message="Resource not found", status_code=404)
+    by_id = {snap.id: snap.to_dict() or {} for snap in snaps}
+    after = by_id.get(after_id) if after_id else None
+    before = by_id.get(before_id) if before_id else None
+
+    if after is not None and before is not None:
+        if rank_sort_key(after) >= rank_sort_key(before):
+            raise AppError(
+                code="conflict",
+                message="Neighbours are out of order",
+                status_code=409,
+            )
+        order = rank_sort_key(after)[0]
+        same_order = rank_sort_key(before)[0] == order
+        rank = rank_between(
+            effective_rank(after), effective_rank(before) if same_order else None
+        )
+    elif after is not None:
+        order = rank_sort_key(after)[0]
+        rank = rank_between(effective_rank(after), None)
+    else:
+        order = rank_sort_key(before)[0]
+        rank = rank_between(None, effective_rank(before))
+
+    await collection.document(item_id).update(
+        {"order": order, "rank": rank, "updatedAt": firestore.SERVER_TIMESTAMP}
+    )
+    if parent_update is not None:
+        await collection.parent.update(parent_update)
+    if len(rank) <= MAX_RANK_LENGTH:
+        return {"id": item_id, "order": order, "rank": rank, "rebalanced": False}
+    _, orders = await _rebalance(db, collection, parent_update=parent_update)
+    return {
+        "id": item_id,
+        "order": orders.get(item_id, order),
+        "rank": None,
+        "rebalanced": True,
+    }
+
+
+async def rebalance_ranks(
+    db: firestore.AsyncClient,
+    collection: firestore.AsyncCollectionReference,
+    *,
+    parent_update: dict[str, Any] | None = None,
+) -> dict[str, int]:
+    """Renumber a list to orders 0..n-1 and drop ranks, in chunked batches.
+
+    Only documents whose order or rank changes are written. When anything
+    was, `parent_update` is applied to the collection's parent document.
+    """
+    result, _ = await _rebalance(db, collection, parent_update=parent_update)
+    return result
+
+
+async def _rebalance(
+    db: firestore.AsyncClient,
+    collection: firestore.AsyncCollectionReference,
+    *,
+    parent_update: dict[str, Any] | None,
+) -> tuple[dict[str, int], dict[str, int]]:
+    items = []
+    async for snap in collection.order_by("order").stream():
+        items.append((snap.reference, snap.to_dict() or {}))
+    items.sort(key=lambda item: rank_sort_key(item[1]))
+
+    writer = BulkWriter(db)
+    for order, (ref, data) in enumerate(items):
+        if data.get("order") == order and "rank" not in data:
+            continue
+        await writer.update(
+            ref,
+            {
+                "order": order,
+                "rank": firestore.DELETE_FIELD,
+                "updatedAt": firestore.SERVER_TIMESTAMP,
+            },
+        )
+    updated = await writer.flush()
+    if updated and parent_update is not None:
+        await collection.parent.update(parent_update)
+    logger.info(
+        "ranks_rebalanced",
+        extra={
+            "event": "ranks_rebalanced",
+            "collection": collection.id,
+            "scanned": len(items),
+            "updated": updated,
+        },
+    )
+    orders = {ref.id: order for order, (ref, _) in enumerate(items)}
+    return {"scanned": len(items), "updated": updated}, orders
@@ -0,0 +1,118 @@
+from datetime import datetime, timezone
+from typing import Any
+
+from google.cloud import firestore
+
+from app.core.config import get_settings
+from app.core.errors import AppError
+
+# Job docs move queued -> running -> done | failed. A run that stops early
+# on its page budget puts the job back to queued.
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+# Failed runs, and runs that stopped without reporting, before the
+# run-pending sweep gives up on a job. Runs for one job id still retry it.
+MAX_JOB_FAILURES = 3
+_PENDING_STATUSES = [JOB_QUEUED, JOB_RUNNING, JOB_FAILED]
+_PENDING_SCAN_LIMIT = 100
+
+
+def _stalled(data: dict[str, Any], now: datetime, stale_seconds: float) -> bool:
+    updated_at = data.get("updatedAt")
+    if not isinstance(updated_at, datetime):
+        return True
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    return (now - updated_at).total_seconds() >= stale_seconds
+
+
+def job_due(
+    data: dict[str, Any], now: datetime, *, stale_seconds: float, force: bool = False
+) -> bool:
+    """Whether a job doc should be (re)started now.
+
+    A running job counts as stopped once its `updatedAt` is older than
+    `stale_seconds`; runs report after every page, so a live run keeps it
+    fresh.
+    """
+    status = data.get("status")
+    if status == JOB_QUEUED:
+        return True
+    if status == JOB_RUNNING:
+        return _stalled(data, now, stale_seconds)
+    if status == JOB_FAILED:
+        return force or int(data.get("failures") or 0) < MAX_JOB_FAILURES
+    return False
+
+
+@firestore.async_transactional
+async def _claim_job(
+    transaction: firestore.AsyncTransaction,
+    job_ref: firestore.AsyncDocumentReference,
+    stale_seconds: float,
+    force: bool,
+) -> tuple[bool, dict[str, Any]]:
+    snap = await job_ref.get(transaction=transaction)
+    if not snap.exists:
+        raise AppError(code="not_found", message="Job not found", status_code=404)
+    data = snap.to_dict() or {}
+    now = datetime.now(timezone.utc)
+    if not job_due(data, now, stale_seconds=stale_seconds, force=force):
+        return False, data
+    update: dict[str, Any] = {
+        "status": JOB_RUNNING,
+        "updatedAt": firestore.SERVER_TIMESTAMP,
+    }
+    if data.get("status") == JOB_RUNNING:
+        # The previous run stopped without reporting, e.g. the instance was
+        # shut down; count it like a failure.
+        update["failures"] = firestore.Increment(1)
+    transaction.update(job_ref, update)
+    return True, data
+
+
+async def claim_job(
+    db: firestore.AsyncClient,
+    job_ref: firestore.AsyncDocumentReference,
+    *,
+    force: bool = False,
+) -> tuple[bool, dict[str, Any]]:
+    """Mark a due job as running; (claimed, job data as read).
+
+    The check and the write share a transaction, so two sweeps cannot run
+    the same job. `force` retries a failed job past `MAX_JOB_FAILURES`.
+    """
+    stale_seconds = get_settings().JOB_STALE_SECONDS
+    return await _claim_job(db.transaction(), job_ref, stale_seconds, force)
+
+
+async def mark_job_failed(job_ref: firestore.AsyncDocumentReference) -> None:
+    await job_ref.update(
+        {
+            "status": JOB_FAILED,
+            "failures": firestore.Increment(1),
+            "updatedAt": firestore.SERVER_TIMESTAMP,
+        }
+    )
+
+
+async def list_pending_jobs(
+    db: firestore.AsyncClient, collection: str, *, limit: int
+) -> list[str]:
+    """Ids of up to `limit` jobs in `collection` that are due to run."""
+    stale_seconds = get_settings().JOB_STALE_SECONDS
+    now = datetime.now(timezone.utc)
+    query = (
+        db.collection(collection)
+        .where("status", "in", _PENDING_STATUSES)
+        .limit(_PENDING_SCAN_LIMIT)
+    )
+    job_ids: list[str] = []
+    async for snap in query.stream():
+        if job_due(snap.to_dict() or {}, now, stale_seconds=stale_seconds):
+            job_ids.append(snap.id)
+            if len(job_ids) >= limit:
+                break
+    return job_ids
@@ -0,0 +1,156 @@
+from typing import Any
+
+from google.cloud import firestore
+
+from app.core.logging import get_logger
+from app.db.bulk_delete import delete_document_tree, delete_query
+from app.db.bulk_writer import BulkWriter
+from app.services.resumable_jobs import (
+    JOB_DONE,
+    JOB_QUEUED,
+    claim_job,
+    list_pending_jobs,
+    mark_job_failed,
+)
+
+logger = get_logger("app.student_deletion")
+
+STUDENT_DELETIONS_COLLECTION = "student_deletions"
+
+
+def deletion_progress_ref(
+    db: firestore.AsyncClient, uid: str
+) -> firestore.AsyncDocumentReference:
+    return db.collection(STUDENT_DELETIONS_COLLECTION).document(uid)
+
+
+async def delete_student_data(
+    db: firestore.AsyncClient,
+    uid: str,
+    *,
+    progress_ref: firestore.AsyncDocumentReference | None = None,
+    writer: BulkWriter | None = None,
+) -> dict[str, int]:
+    """Remove a student's plan tree, completions, questions and profile.
+
+    Everything is streamed through one `BulkWriter`; `users/{uid}` goes last,
+    after every other delete has committed, so a failed run can simply be
+    started again. When `progress_ref` is given, running counts are merged
+    into it after every page.
+    """
+    writer = writer or BulkWriter(db)
+    counts = {"deletedSteps": 0, "deletedCompletions": 0, "deletedQuestions": 0}
+
+    async def _report(field: str, done: int) -> None:
+        counts[field] = done
+        if progress_ref is None:
+            return
+        await progress_ref.set(
+            {
+                **counts,
+                "phase": field,
+                "updatedAt": firestore.SERVER_TIMESTAMP,
+            },
+            merge=True,
+        )
+
+    counts["deletedSteps"] = await delete_document_tree(
+        writer,
+        db.collection("student_plans").document(uid),
+        on_page=lambda done: _report("deletedSteps", done),
+    )
+    counts["deletedCompletions"] = await delete_query(
+        writer,
+        db.collection("step_completions").where("studentUid", "==", uid),
+        on_page=lambda done: _report("deletedCompletions", done),
+    )
+    counts["deletedQuestions"] = await delete_query(
+        writer,
+        db.collection("questions").where("studentUid", "==", uid),
+        on_page=lambda done: _report("deletedQuestions", done),
+    )
+    await writer.flush()
+    await db.collection("users").document(uid).delete()
+    logger.info(
+        "student_data_deleted",
+        extra={
+            "event": "student_data_deleted",
+            "uid": uid,
+            "retries": writer.retries,
+            **counts,
+        },
+    )
+    return counts
+
+
+async def queue_student_deletion(
+    db: firestore.AsyncClient, uid: str, *, requested_by: str | None
+) -> None:
+    """Create the progress doc that the deletion jobs pick up."""
+    await deletion_progress_ref(db, uid).set(
+        {
+            "studentUid": uid,
+            "status": JOB_QUEUED,
+            "phase": None,
+            "deletedSteps": 0,
+            "deletedCompletions": 0,
+            "deletedQuestions": 0,
+            "failures": 0,
+            "requestedBy": requested_by,
+            "startedAt": firestore.SERVER_TIMESTAMP,
+            "updatedAt": firestore.SERVER_TIMESTAMP,
+        }
+    )
+
+
+async def run_student_deletion(
+    db: firestore.AsyncClient, uid: str, *, force: bool = False
+) -> dict[str, Any]:
+    """Run a queued or stopped deletion and record the outcome on its progress doc.
+
+    Deleting is idempotent, so a run that stopped part-way is resumed by
+    starting it again. A deletion that is done, or still running elsewhere,
+    is returned as is.
+    """
+    progress_ref = deletion_progress_ref(db, uid)
+    claimed, progress = await claim_job(db, progress_ref, force=force)
+    if not claimed:
+        return {**progress, "id": uid}
+    try:
+        counts = await delete_student_data(db, uid, progress_ref=progress_ref)
+    except Exception:
+        logger.warning(
+            "student_deletion_failed",
+            extra={"event": "student_deletion_failed", "uid": uid},
+            exc_info=True,
+        )
+        await mark_job_failed(progress_ref)
+        raise
+    await progress_ref.set(
+        {
+            **counts,
+            "status": JOB_DONE,
+            "phase": None,
+            "finishedAt": firestore.SERVER_TIMESTAMP,
+            "updatedAt": firestore.SERVER_TIMESTAMP,
+        },
+        merge=True,
+    )
+    return {**progress, **counts, "id": uid, "status": JOB_DONE, "phase": None}
+
+
+async def run_pending_student_deletions(
+    db: firestore.AsyncClient, *, limit: int
+) -> dict[str, list[str]]:
+    """Run queued deletions and restart stopped or failed ones, one at a time."""
+    result: dict[str, list[str]] = {"done": [], "failed": []}
+    for uid in await list_pending_jobs(db, STUDENT_DELETIONS_COLLECTION, limit=limit):
+        try:
+            progress = await run_student_deletion(db, uid)
+        except Exception:
+            # Recorded on the progress doc; the next sweep retries it.
+            result["failed"].append(uid)
+            continue
+        if progress.get("status") == JOB_DONE:
+            result["done"].append(uid)
+    return result
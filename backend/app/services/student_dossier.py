@@ -0,0 +1,152 @@
+import asyncio
+import time
+from collections.abc import Awaitable
+from typing import Any
+
+from google.cloud import firestore
+
+from app.auth.user_status import normalize_user_status
+from app.core.errors import AppError
+from app.services.student_plan import list_plan_steps, plan_payload
+from app.services.user_search import without_search_fields
+
+DOSSIER_SECTIONS = ("user", "plan", "steps", "completions", "payments", "questions")
+
+
+def _project(
+    data: dict[str, Any], fields: list[str] | None, *keep: str
+) -> dict[str, Any]:
+    if fields is None:
+        return data
+    return {key: data[key] for key in (*keep, *fields) if key in data}
+
+
+def _select(query: Any, fields: list[str] | None, *required: str) -> Any:
+    if fields is None:
+        return query
+    return query.select(list(dict.fromkeys((*required, *fields))))
+
+
+async def _timed(timings: dict[str, float], name: str, work: Awaitable[Any]) -> Any:
+    started = time.perf_counter()
+    try:
+        return await work
+    finally:
+        timings[name] = round((time.perf_counter() - started) * 1000, 2)
+
+
+async def _user_section(db: firestore.AsyncClient, uid: str) -> dict[str, Any]:
+    snap = await db.collection("users").document(uid).get()
+    if not snap.exists:
+        raise AppError(code="not_found", message="Resource not found", status_code=404)
+    data = without_search_fields(snap.to_dict() or {})
+    normalize_user_status(data)
+    data["uid"] = uid
+    return data
+
+
+async def _plan_section(db: firestore.AsyncClient, uid: str) -> dict[str, Any] | None:
+    snap = await db.collection("student_plans").document(uid).get()
+    if not snap.exists:
+        return None
+    return plan_payload(uid, snap.to_dict() or {})
+
+
+async def _steps_section(
+    db: firestore.AsyncClient, uid: str, fields: list[str] | None
+) -> list[dict[str, Any]]:
+    steps = await list_plan_steps(db, uid, fields=fields)
+    return [_project(step, fields, "stepId") for step in steps]
+
+
+async def _recent(
+    db: firestore.AsyncClient,
+    collection: str,
+    owner_field: str,
+    uid: str,
+    order_field: str,
+    *,
+    limit: int,
+    fields: list[str] | None,
+) -> list[dict[str, Any]]:
+    query = (
+        db.collection(collection)
+        .where(owner_field, "==", uid)
+        .order_by(order_field, direction=firestore.Query.DESCENDING)
+        .limit(limit)
+    )
+    query = _select(query, fields, order_field)
+    items = []
+    async for snap in query.stream():
+        data = snap.to_dict() or {}
+        data["id"] = snap.id
+        items.append(_project(data, fields, "id"))
+    return items
+
+
+async def load_student_dossier(
+    db: firestore.AsyncClient,
+    uid: str,
+    *,
+    fields: dict[str, list[str]],
+    limit: int,
+) -> tuple[dict[str, Any], dict[str, float]]:
+    """Everything the admin student screen shows, read concurrently.
+
+    `fields` maps a section to the fields to return; sections not in it come
+    back whole. Returns the payload and per-section read time in ms.
+    """
+    timings: dict[str, float] = {}
+    user, plan, steps, completions, payments, questions = await asyncio.gather(
+        _timed(timings, "user", _user_section(db, uid)),
+        _timed(timings, "plan", _plan_section(db, uid)),
+        _timed(timings, "steps", _steps_section(db, uid, fields.get("steps"))),
+        _timed(
+            timings,
+            "completions",
+            _recent(
+                db,
+                "step_completions",
+                "studentUid",
+                uid,
+                "completedAt",
+                limit=limit,
+                fields=fields.get("completions"),
+            ),
+        ),
+        _timed(
+            timings,
+            "payments",
+            _recent(
+                db,
+                "payments",
+                "userUid",
+                uid,
+                "createdAt",
+                limit=limit,
+                fields=fields.get("payments"),
+            ),
+        ),
+        _timed(
+            timings,
+            "questions",
+            _recent(
+                db,
+                "questions",
+                "studentUid",
+                uid,
+                "createdAt",
+                limit=limit,
+                fields=fields.get("questions"),
+            ),
+        ),
+    )
+    payload = {
+        "user": _project(user, fields.get("user"), "uid"),
+        "plan": _project(plan, fields.get("plan"), "planId") if plan else None,
+        "steps": steps,
+        "completions": completions,
+        "payments": payments,
+        "questions": questions,
+    }
+    return payload, timings
@@ -0,0 +1,134 @@
+from datetime import datetime, timezone
+from typing import Any
+
+from google.cloud import firestore
+
+from app.db.ranking import sort_ranked
+from app.services.lesson_catalog import hydrate_plan_steps
+
+# Fields a projected step query still needs for sorting and lesson hydration.
+_STEP_QUERY_FIELDS = (
+    "order",
+    "rank",
+    "title",
+    "sourceCourseId",
+    "sourceLessonId",
+    "updatedAt",
+)
+
+PLAN_REVISION_FIELD = "revision"
+STEPS_UPDATED_AT_FIELD = "stepsUpdatedAt"
+STEPS_RESET_AT_FIELD = "stepsResetAt"
+STEP_TOMBSTONES_COLLECTION = "step_tombstones"
+
+# Plan fields that must survive a plan doc being rewritten with `set()`.
+PLAN_SYNC_FIELDS = (PLAN_REVISION_FIELD, STEPS_UPDATED_AT_FIELD, STEPS_RESET_AT_FIELD)
+
+
+def plan_payload(uid: str, plan: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "planId": uid,
+        "studentUid": uid,
+        "goalId": plan.get("goalId"),
+        "createdAt": plan.get("createdAt"),
+        "updatedAt": plan.get("updatedAt"),
+        "resetInProgress": bool(plan.get("resetInProgress")),
+        "revision": int(plan.get(PLAN_REVISION_FIELD) or 0),
+        "stepsUpdatedAt": plan.get(STEPS_UPDATED_AT_FIELD),
+    }
+
+
+def steps_changed() -> dict[str, Any]:
+    """Plan doc fields to write with (or after) any change to its steps.
+
+    `stepsUpdatedAt` is the delta cursor handed to clients, so it has to be
+    written no earlier than the step changes it covers.
+    """
+    return {
+        PLAN_REVISION_FIELD: firestore.Increment(1),
+        STEPS_UPDATED_AT_FIELD: firestore.SERVER_TIMESTAMP,
+    }
+
+
+def step_tombstone(
+    plan_ref: firestore.AsyncDocumentReference, step_id: str
+) -> tuple[firestore.AsyncDocumentReference, dict[str, Any]]:
+    """The tombstone doc and data to write when a step is deleted."""
+    return (
+        plan_ref.collection(STEP_TOMBSTONES_COLLECTION).document(step_id),
+        {"deletedAt": firestore.SERVER_TIMESTAMP},
+    )
+
+
+async def list_plan_steps(
+    db: firestore.AsyncClient, uid: str, *, fields: list[str] | None = None
+) -> list[dict[str, Any]]:
+    """A plan's steps in display order, with reference steps hydrated.
+
+    With `fields`, the query is projected to those fields plus what sorting
+    and hydration need; the caller trims the extras.
+    """
+    query = (
+        db.collection("student_plans")
+        .document(uid)
+        .collection("steps")
+        .order_by("order", direction=firestore.Query.ASCENDING)
+    )
+    if fields is not None:
+        query = query.select(list(dict.fromkeys((*_STEP_QUERY_FIELDS, *fields))))
+    items = []
+    async for snap in query.stream():
+        data = snap.to_dict() or {}
+        data["stepId"] = snap.id
+        items.append(data)
+    return await hydrate_plan_steps(db, sort_ranked(items))
+
+
+async def list_plan_step_changes(
+    db: firestore.AsyncClient,
+    uid: str,
+    plan: dict[str, Any],
+    *,
+    since: datetime | None,
+) -> dict[str, Any]:
+    """Steps changed and deleted after `since`, or the whole list.
+
+    `plan` must be read before this is called: its `stepsUpdatedAt` becomes
+    the returned cursor, and every change up to it is visible to the step
+    queries that follow. Changes racing the read come back again next time.
+    A full list (`full: true`) is returned without `since`, for plans that
+    predate cursors, and when the plan was reset after `since`.
+    """
+    cursor = plan.get(STEPS_UPDATED_AT_FIELD)
+    reset_at = plan.get(STEPS_RESET_AT_FIELD)
+    if since is not None and since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    full = (
+        since is None or cursor is None or (reset_at is not None and since < reset_at)
+    )
+    items: list[dict[str, Any]] = []
+    deleted: list[str] = []
+    if full:
+        items = await list_plan_steps(db, uid)
+    elif since < cursor:
+        plan_ref = db.collection("student_plans").document(uid)
+        async for snap in (
+            plan_ref.collection("steps").where("updatedAt", ">", since).stream()
+        ):
+            data = snap.to_dict() or {}
+            data["stepId"] = snap.id
+            items.append(data)
+        async for snap in (
+            plan_ref.collection(STEP_TOMBSTONES_COLLECTION)
+            .where("deletedAt", ">", since)
+            .stream()
+        ):
+            deleted.append(snap.id)
+        items = await hydrate_plan_steps(db, sort_ranked(items))
+    return {
+        "items": items,
+        "deleted": deleted,
+        "cursor": cursor,
+        "revision": int(plan.get(PLAN_REVISION_FIELD) or 0),
+        "full": full,
+    }
@@ -0,0 +1,108 @@
+import re
+from typing import Any
+
+from google.cloud import firestore
+
+SEARCH_FIELDS = ("emailLower", "displayNameLower", "searchTokens")
+MAX_TOKEN_LENGTH = 32
+_WORD_SPLIT = re.compile(r"[\W_]+")
+
+
+def normalize_search_text(value: Any) -> str:
+    if not isinstance(value, str):
+        return ""
+    return " ".join(value.strip().lower().split())
+
+
+def _words(value: str) -> list[str]:
+    return [word for word in _WORD_SPLIT.split(value) if word]
+
+
+def _prefixes(value: str) -> list[str]:
+    value = value[:MAX_TOKEN_LENGTH]
+    return [value[:end] for end in range(1, len(value) + 1)]
+
+
+def user_search_fields(email: Any, display_name: Any) -> dict[str, Any]:
+    """Normalized fields backing the admin students `q` filter.
+
+    `searchTokens` holds every prefix of the whole email and of each word in
+    the email and display name, so a single `array_contains` finds users by
+    the start of any of them.
+    """
+    email_lower = normalize_search_text(email)
+    display_name_lower = normalize_search_text(display_name)
+    tokens: set[str] = set()
+    for value in [email_lower, *_words(email_lower), *_words(display_name_lower)]:
+        tokens.update(_prefixes(value))
+    return {
+        "emailLower": email_lower,
+        "displayNameLower": display_name_lower,
+        "searchTokens": sorted(tokens),
+    }
+
+
+def search_terms(q: str | None) -> list[str]:
+    """Split a `q` value into tokens comparable with `searchTokens`."""
+    normalized = normalize_search_text(q)
+    if not normalized:
+        return []
+    if "@" in normalized and " " not in normalized:
+        return [normalized[:MAX_TOKEN_LENGTH]]
+    return [word[:MAX_TOKEN_LENGTH] for word in _words(normalized)]
+
+
+def primary_search_term(terms: list[str]) -> str:
+    return max(terms, key=len)
+
+
+def matches_search_terms(data: dict[str, Any], terms: list[str]) -> bool:
+    tokens = data.get("searchTokens")
+    if not isinstance(tokens, list):
+        return False
+    return all(term in tokens for term in terms)
+
+
+def without_search_fields(data: dict[str, Any]) -> dict[str, Any]:
+    for field in SEARCH_FIELDS:
+        data.pop(field, None)
+    return data
+
+
+def needs_search_backfill(data: dict[str, Any]) -> bool:
+    expected = user_search_fields(data.get("email"), data.get("displayName"))
+    return any(data.get(field) != value for field, value in expected.items())
+
+
+async def backfill_user_search_fields(
+    db: firestore.AsyncClient,
+    *,
+    limit: int,
+    cursor: str | None = None,
+) -> dict[str, Any]:
+    """Write search fields for one page of users ordered by document id."""
+    query = db.collection("users").order_by("__name__")
+    if cursor:
+        query = query.start_after([cursor])
+    batch = db.batch()
+    scanned = 0
+    updated = 0
+    last_uid = None
+    async for snap in query.limit(limit).stream():
+        scanned += 1
+        last_uid = snap.id
+        data = snap.to_dict() or {}
+        if not needs_search_backfill(data):
+            continue
+        batch.update(
+            snap.reference,
+            user_search_fields(data.get("email"), data.get("displayName")),
+        )
+        updated += 1
+    if updated:
+        await batch.commit()
+    return {
+        "scanned": scanned,
+        "updated": updated,
+        "nextCursor": last_uid if scanned == limit else None,
+    }
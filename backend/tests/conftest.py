@@ -1,4 +1,30 @@
 import sys
 from pathlib import Path
 
+import pytest
+
 sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app.auth.profile_cache import invalidate_all_user_profiles  # noqa: E402
+from app.auth.token_cache import id_token_cache  # noqa: E402
+from app.db.reference_data import stop_reference_listeners  # noqa: E402
+from app.services.course_catalog import course_catalog  # noqa: E402
+from app.services.fx_rates import fx_rates_cache  # noqa: E402
+from app.services.lesson_catalog import lesson_catalog  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _reset_auth_caches():
+    id_token_cache.clear()
+    invalidate_all_user_profiles()
+    course_catalog.clear()
+    lesson_catalog.clear()
+    fx_rates_cache.clear()
+    stop_reference_listeners()
+    yield
+    id_token_cache.clear()
+    invalidate_all_user_profiles()
+    course_catalog.clear()
+    lesson_catalog.clear()
+    fx_rates_cache.clear()
+    stop_reference_listeners()
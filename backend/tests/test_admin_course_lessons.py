@@ -28,13 +28,13 @@ class FakeDoc:
         self.id = doc_id
         self._subcollections = subcollections or {}
 
-    def get(self):
+    async def get(self):
         return FakeSnap(self, self._store.get(self.id))
 
-    def set(self, data):
+    async def set(self, data):
         self._store[self.id] = _normalize(data)
 
-    def update(self, data):
+    async def update(self, data):
         if self.id not in self._store:
             raise KeyError("missing doc")
         self._store[self.id].update(_normalize(data))
@@ -67,7 +67,11 @@ class FakeQuery:
         self._limit = value
         return self
 
-    def stream(self):
+    async def stream(self):
+        for snap in self._snapshots():
+            yield snap
+
+    def _snapshots(self):
         snaps = []
         for doc_id, data in self._store.items():
             if data is None:
@@ -112,6 +116,8 @@ class FakeFirestore:
     def __init__(self, courses_store, lessons_store=None):
         self._courses = courses_store
         self._lessons = lessons_store or {}
+        self.fanouts = {}
+        self._fanouts_collection = FakeCollection(self.fanouts)
 
     def collection(self, name):
         if name == "courses":
@@ -119,6 +125,8 @@ class FakeFirestore:
                 self._courses,
                 {cid: {"lessons": lessons} for cid, lessons in self._lessons.items()},
             )
+        if name == "lesson_fanouts":
+            return self._fanouts_collection
         raise ValueError(f"unsupported collection {name}")
 
     def batch(self):
@@ -132,9 +140,9 @@ class FakeBatch:
     def update(self, doc_ref, data):
         self._ops.append((doc_ref, data))
 
-    def commit(self):
+    async def commit(self):
         for doc_ref, data in self._ops:
-            doc_ref.update(data)
+            await doc_ref.update(data)
 
 
 def _normalize(data):
@@ -173,7 +181,7 @@ def test_admin_course_lessons_forbidden_for_non_staff(monkeypatch):
     fake_db = FakeFirestore(
         {"c1": {"title": "Course 1", "goalIds": [], "priceUsdCents": 100}}
     )
-    monkeypatch.setattr(admin_courses, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_courses, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _student
     client = TestClient(app)
 
@@ -212,7 +220,7 @@ def test_admin_reorder_lessons_forbidden_for_non_staff(monkeypatch):
         {"c1": {"title": "Course 1", "goalIds": [], "priceUsdCents": 100}},
         lessons_store,
     )
-    monkeypatch.setattr(admin_courses, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_courses, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _student
     client = TestClient(app)
 
@@ -231,7 +239,7 @@ def test_admin_reorder_lessons_forbidden_for_non_staff(monkeypatch):
 
 def test_admin_course_lessons_require_existing_course(monkeypatch):
     fake_db = FakeFirestore({})
-    monkeypatch.setattr(admin_courses, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_courses, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _staff
     client = TestClient(app)
 
@@ -264,7 +272,7 @@ def test_admin_list_lessons_includes_inactive_order_asc(monkeypatch):
             }
         },
     )
-    monkeypatch.setattr(admin_courses, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_courses, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _staff
     client = TestClient(app)
 
@@ -299,7 +307,7 @@ def test_admin_create_lesson_default_order_is_max_plus_one(monkeypatch):
             }
         },
     )
-    monkeypatch.setattr(admin_courses, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_courses, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _staff
     client = TestClient(app)
 
@@ -333,7 +341,7 @@ def test_admin_patch_lesson_allowlist_and_soft_delete(monkeypatch):
         {"c1": {"title": "Course 1", "goalIds": [], "priceUsdCents": 100}},
         lessons_store,
     )
-    monkeypatch.setattr(admin_courses, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_courses, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _staff
     client = TestClient(app)
 
@@ -351,6 +359,16 @@ def test_admin_patch_lesson_allowlist_and_soft_delete(monkeypatch):
     assert lessons_store["c1"]["l1"]["title"] == "Updated"
     assert lessons_store["c1"]["l1"]["type"] == "task"
     assert lessons_store["c1"]["l1"]["order"] == 3
+    job_id = patch_response.json()["fanOutJobId"]
+    assert fake_db.fanouts[job_id]["lessonId"] == "l1"
+    # Queued for the fan-out job; nothing runs after the response.
+    assert fake_db.fanouts[job_id]["status"] == "queued"
+    assert fake_db.fanouts[job_id]["requestedBy"] == "s1"
+
+    order_only = client.patch("/api/admin/courses/c1/lessons/l1", json={"order": 4})
+    assert order_only.status_code == 200
+    assert order_only.json()["fanOutJobId"] is None
+    assert list(fake_db.fanouts) == [job_id]
 
     delete_response = client.delete("/api/admin/courses/c1/lessons/l1")
     assert delete_response.status_code == 204
@@ -388,7 +406,7 @@ def test_admin_reorder_lessons_success(monkeypatch):
         {"c1": {"title": "Course 1", "goalIds": [], "priceUsdCents": 100}},
         lessons_store,
     )
-    monkeypatch.setattr(admin_courses, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_courses, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _staff
     client = TestClient(app)
 
@@ -435,7 +453,7 @@ def test_admin_reorder_lessons_rejects_duplicate_orders(monkeypatch):
         {"c1": {"title": "Course 1", "goalIds": [], "priceUsdCents": 100}},
         lessons_store,
     )
-    monkeypatch.setattr(admin_courses, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_courses, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _staff
     client = TestClient(app)
 
@@ -471,7 +489,7 @@ def test_admin_reorder_lessons_rejects_missing_lesson_id(monkeypatch):
         {"c1": {"title": "Course 1", "goalIds": [], "priceUsdCents": 100}},
         lessons_store,
     )
-    monkeypatch.setattr(admin_courses, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_courses, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _staff
     client = TestClient(app)
 
@@ -4,6 +4,7 @@ from google.cloud import firestore
 from app.auth import deps as auth_deps
 from app.main import app
 from app.routers import admin_courses
+from app.services.course_catalog import CatalogCourses, course_catalog
 
 
 class FakeSnap:
@@ -24,13 +25,13 @@ class FakeDoc:
         self._store = store
         self.id = doc_id
 
-    def get(self):
+    async def get(self):
         return FakeSnap(self.id, self._store.get(self.id))
 
-    def set(self, data):
+    async def set(self, data):
         self._store[self.id] = _normalize(data)
 
-    def update(self, data):
+    async def update(self, data):
         if self.id not in self._store:
             raise KeyError("missing doc")
         self._store[self.id].update(_normalize(data))
@@ -56,7 +57,11 @@ class FakeQuery:
         self._limit = value
         return self
 
-    def stream(self):
+    async def stream(self):
+        for snap in self._snapshots():
+            yield snap
+
+    def _snapshots(self):
         snaps = []
         for doc_id, data in self._store.items():
             if data is None:
@@ -137,7 +142,7 @@ def _staff():
 
 def test_admin_courses_forbidden_for_non_staff(monkeypatch):
     fake_db = FakeFirestore({})
-    monkeypatch.setattr(admin_courses, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_courses, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _student
     client = TestClient(app)
 
@@ -158,7 +163,7 @@ def test_admin_courses_write_forbidden_for_non_staff(monkeypatch):
         }
     }
     fake_db = FakeFirestore(courses_store)
-    monkeypatch.setattr(admin_courses, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_courses, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _student
     client = TestClient(app)
 
@@ -192,13 +197,17 @@ def test_admin_delete_course_soft_delete(monkeypatch):
         }
     }
     fake_db = FakeFirestore(courses_store)
-    monkeypatch.setattr(admin_courses, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_courses, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _staff
     client = TestClient(app)
+    course_catalog.put_courses(
+        course_catalog.version, CatalogCourses(items=(), by_id={}, fingerprint="f")
+    )
 
     response = client.delete("/api/admin/courses/c1")
     assert response.status_code == 204
     assert courses_store["c1"]["isActive"] is False
     assert courses_store["c1"]["updatedAt"] == "SERVER_TIMESTAMP"
+    assert course_catalog.get_courses() is None
 
     app.dependency_overrides.clear()
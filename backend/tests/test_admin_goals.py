@@ -24,37 +24,65 @@ class FakeDoc:
         self._store = store
         self.id = doc_id
 
-    def get(self):
+    async def get(self):
         return FakeSnap(self.id, self._store.get(self.id))
 
-    def set(self, data):
+    async def set(self, data):
         self._store[self.id] = _normalize(data)
 
-    def update(self, data):
+    async def update(self, data):
         if self.id not in self._store:
             raise KeyError("missing doc")
         self._store[self.id].update(_normalize(data))
 
 
+class FakeAggregation:
+    def __init__(self, value):
+        self.value = value
+
+
+class FakeCountQuery:
+    def __init__(self, query):
+        self._query = query
+
+    async def get(self):
+        return [[FakeAggregation(len(self._query._snapshots()))]]
+
+
 class FakeQuery:
-    def __init__(self, store):
+    def __init__(self, store, order_field=None, limit=None):
         self._store = store
-        self._order_field = None
+        self._order_field = order_field
+        self._limit = limit
 
     def order_by(self, field, direction=None):
         _ = direction
-        self._order_field = field
-        return self
+        return FakeQuery(self._store, field, self._limit)
+
+    def limit(self, value):
+        return FakeQuery(self._store, self._order_field, value)
 
-    def stream(self):
+    def count(self):
+        return FakeCountQuery(self)
+
+    async def stream(self):
+        for snap in self._snapshots():
+            yield snap
+
+    def _snapshots(self):
         snaps = [
             FakeSnap(doc_id, data)
             for doc_id, data in self._store.items()
             if data is not None
         ]
         if self._order_field:
+            snaps = [
+                snap
+                for snap in snaps
+                if (snap.to_dict() or {}).get(self._order_field) is not None
+            ]
             snaps.sort(key=lambda snap: (snap.to_dict() or {}).get(self._order_field))
-        return snaps
+        return snaps[: self._limit]
 
 
 class FakeCollection(FakeQuery):
@@ -126,7 +154,7 @@ def test_student_goal_list_excludes_inactive_goals(monkeypatch):
         },
     }
     fake_db = FakeFirestore(goals_store)
-    monkeypatch.setattr(admin_settings, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_settings, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _student
     client = TestClient(app)
 
@@ -154,7 +182,7 @@ def test_admin_goal_list_defaults_to_active_and_can_request_inactive(monkeypatch
         },
     }
     fake_db = FakeFirestore(goals_store)
-    monkeypatch.setattr(admin_settings, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_settings, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _staff
     client = TestClient(app)
 
@@ -172,7 +200,7 @@ def test_admin_goal_list_defaults_to_active_and_can_request_inactive(monkeypatch
 def test_create_goal_defaults_to_active(monkeypatch):
     goals_store = {}
     fake_db = FakeFirestore(goals_store)
-    monkeypatch.setattr(admin_settings, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_settings, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _staff
     client = TestClient(app)
 
@@ -200,7 +228,7 @@ def test_delete_goal_soft_deletes(monkeypatch):
         }
     }
     fake_db = FakeFirestore(goals_store)
-    monkeypatch.setattr(admin_settings, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_settings, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _staff
     client = TestClient(app)
 
@@ -224,7 +252,7 @@ def test_reactivate_goal_reappears_in_student_list(monkeypatch):
         }
     }
     fake_db = FakeFirestore(goals_store)
-    monkeypatch.setattr(admin_settings, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_settings, "get_async_firestore_client", lambda: fake_db)
     client = TestClient(app)
 
     app.dependency_overrides[auth_deps.get_current_user] = _staff
@@ -238,3 +266,37 @@ def test_reactivate_goal_reappears_in_student_list(monkeypatch):
     assert [item["id"] for item in list_response.json()["items"]] == ["g1"]
 
     app.dependency_overrides.clear()
+
+
+def test_goal_list_etag_revalidates_until_a_goal_changes(monkeypatch):
+    goals_store = {
+        "g1": {
+            "title": "Goal 1",
+            "isActive": True,
+            "createdAt": "t0",
+            "updatedAt": "t0",
+        }
+    }
+    fake_db = FakeFirestore(goals_store)
+    monkeypatch.setattr(admin_settings, "get_async_firestore_client", lambda: fake_db)
+    client = TestClient(app)
+
+    app.dependency_overrides[auth_deps.get_current_user] = _staff
+    first = client.get("/api/admin/goals")
+    etag = first.headers["ETag"]
+    repeat = client.get("/api/admin/goals", headers={"If-None-Match": etag})
+    client.patch("/api/admin/goals/g1", json={"title": "Renamed"})
+    changed = client.get("/api/admin/goals", headers={"If-None-Match": etag})
+    app.dependency_overrides[auth_deps.get_current_user] = _student
+    as_student = client.get("/api/admin/goals")
+    app.dependency_overrides.clear()
+
+    assert first.status_code == 200
+    assert etag.startswith('"')
+    assert repeat.status_code == 304
+    assert repeat.content == b""
+    assert repeat.headers["ETag"] == etag
+    assert changed.status_code == 200
+    assert changed.json()["items"][0]["title"] == "Renamed"
+    assert changed.headers["ETag"] != etag
+    assert as_student.headers["ETag"] != changed.headers["ETag"]
@@ -31,17 +31,17 @@ class FakeDoc:
         self._store = store
         self.id = doc_id
 
-    def get(self):
+    async def get(self):
         return FakeSnap(self, self._store.get(self.id))
 
-    def set(self, data, merge=False):
+    async def set(self, data, merge=False):
         payload = _normalize(data)
         if merge and self.id in self._store:
             self._store[self.id].update(payload)
         else:
             self._store[self.id] = payload
 
-    def update(self, data):
+    async def update(self, data):
         if self.id not in self._store:
             raise KeyError("missing doc")
         self._store[self.id].update(_normalize(data))
@@ -71,7 +71,11 @@ class FakeQuery:
         self._start_after = values
         return self
 
-    def stream(self):
+    async def stream(self):
+        for snap in self._snapshots():
+            yield snap
+
+    def _snapshots(self):
         snaps = []
         for doc_id, data in self._store.items():
             if data is None:
@@ -90,9 +94,11 @@ class FakeQuery:
         for field, direction in reversed(self._order_fields):
             reverse = direction == "DESCENDING"
             snaps.sort(
-                key=lambda snap: snap.id
-                if field == "__name__"
-                else (snap.to_dict() or {}).get(field),
+                key=lambda snap: (
+                    snap.id
+                    if field == "__name__"
+                    else (snap.to_dict() or {}).get(field)
+                ),
                 reverse=reverse,
             )
 
@@ -150,9 +156,9 @@ class FakeTransaction:
     def update(self, doc_ref, data):
         self._ops.append((doc_ref, data))
 
-    def commit(self):
+    async def commit(self):
         for doc_ref, data in self._ops:
-            doc_ref.update(data)
+            await doc_ref.update(data)
         self.committed = True
 
 
@@ -190,7 +196,7 @@ def _staff():
 
 def test_admin_payments_forbidden_for_non_staff(monkeypatch):
     fake_db = FakeFirestore()
-    monkeypatch.setattr(admin_payments, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_payments, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _student
     client = TestClient(app)
 
@@ -256,7 +262,7 @@ def test_admin_payments_list_filters_and_stable_order(monkeypatch):
             },
         }
     )
-    monkeypatch.setattr(admin_payments, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_payments, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _staff
     client = TestClient(app)
 
@@ -301,7 +307,7 @@ def test_admin_payments_list_supports_cursor_pagination(monkeypatch):
             },
         }
     )
-    monkeypatch.setattr(admin_payments, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_payments, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _staff
     client = TestClient(app)
 
@@ -339,14 +345,14 @@ def test_admin_activate_payment_transaction_and_idempotency(monkeypatch):
         },
         users={"u1": {"status": "disabled"}},
     )
-    monkeypatch.setattr(admin_payments, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_payments, "get_async_firestore_client", lambda: fake_db)
     append_calls: list[tuple[str, list[str]]] = []
-    monkeypatch.setattr(
-        admin_payments,
-        "append_courses_to_student_plan",
-        lambda db, uid, course_ids: append_calls.append((uid, course_ids))
-        or {"addedCourseIds": course_ids, "createdSteps": 2},
-    )
+
+    async def _fake_append(db, uid, course_ids):
+        append_calls.append((uid, course_ids))
+        return {"addedCourseIds": course_ids, "createdSteps": 2}
+
+    monkeypatch.setattr(admin_payments, "append_courses_to_student_plan", _fake_append)
     app.dependency_overrides[auth_deps.get_current_user] = _staff
     client = TestClient(app)
 
@@ -389,7 +395,7 @@ def test_admin_reject_payment_idempotency(monkeypatch):
         },
         users={"u2": {"status": "disabled"}},
     )
-    monkeypatch.setattr(admin_payments, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_payments, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _staff
     client = TestClient(app)
 
@@ -1,9 +1,14 @@
+import copy
+from datetime import datetime, timezone
+
 from fastapi.testclient import TestClient
 from google.cloud import firestore
 
 from app.auth.deps import get_current_user, require_staff
 from app.main import app
-from app.routers import admin_students
+from app.routers import admin_students, jobs
+from app.services import resumable_jobs
+from app.services.user_search import user_search_fields
 
 
 class FakeSnap:
@@ -30,18 +35,26 @@ class FakeDoc:
         self.id = doc_id
         self._subcollections = subcollections or {}
 
-    def get(self):
+    async def get(self, transaction=None):
+        _ = transaction
         return FakeSnap(self)
 
-    def set(self, data):
+    async def set(self, data, merge=False):
+        if merge and self.id in self._store:
+            self._store[self.id].update(_normalize(data))
+            return
         self._store[self.id] = _normalize(data)
 
-    def update(self, data):
+    async def update(self, data):
         if self.id not in self._store:
             raise KeyError("missing doc")
-        self._store[self.id].update(_normalize(data))
+        current = self._store[self.id]
+        for key, value in _normalize(data).items():
+            if isinstance(value, firestore.Increment):
+                value = (current.get(key) or 0) + value.value
+            current[key] = value
 
-    def delete(self):
+    async def delete(self):
         self._store.pop(self.id, None)
 
     def collection(self, name):
@@ -50,26 +63,87 @@ class FakeDoc:
             per_doc[name] = {}
         return FakeCollection(per_doc[name])
 
+    async def collections(self):
+        for store in self._subcollections.get(self.id, {}).values():
+            yield FakeCollection(store)
+
+
+class FakeAggregation:
+    def __init__(self, value):
+        self.value = value
+
+
+class FakeCountQuery:
+    def __init__(self, query):
+        self._query = query
+
+    async def get(self):
+        return [[FakeAggregation(len(self._query._snapshots()))]]
+
 
 class FakeQuery:
     def __init__(self, store):
         self._store = store
         self._filters = []
+        self._orders = []
+        self._start_after = None
         self._limit = None
+        self.streams = []
+
+    def _copy(self):
+        query = FakeQuery(self._store)
+        query._filters = list(self._filters)
+        query._orders = list(self._orders)
+        query._start_after = self._start_after
+        query._limit = self._limit
+        query.streams = self.streams
+        return query
 
     def where(self, field, op, value):
-        self._filters.append((field, op, value))
-        return self
+        query = self._copy()
+        query._filters.append((field, op, value))
+        return query
+
+    def order_by(self, field, direction=None):
+        query = self._copy()
+        query._orders.append((field, direction == firestore.Query.DESCENDING))
+        return query
 
-    def order_by(self, _field):
-        return self
+    def start_after(self, values):
+        query = self._copy()
+        query._start_after = list(values)
+        return query
 
     def limit(self, value):
-        self._limit = value
-        return self
+        query = self._copy()
+        query._limit = value
+        return query
+
+    def count(self):
+        return FakeCountQuery(self)
+
+    async def stream(self):
+        snaps = self._snapshots()
+        self.streams.append(len(snaps))
+        for snap in snaps:
+            yield snap
+
+    def _sort_key(self, doc_id, data):
+        return [
+            doc_id if field == "__name__" else data[field] for field, _ in self._orders
+        ]
+
+    def _after_cursor(self, key):
+        for value, cursor_value, (_field, descending) in zip(
+            key, self._start_after, self._orders
+        ):
+            if value == cursor_value:
+                continue
+            return value < cursor_value if descending else value > cursor_value
+        return False
 
-    def stream(self):
-        items = []
+    def _snapshots(self):
+        matched = []
         for doc_id, data in self._store.items():
             if data is None:
                 continue
@@ -79,12 +153,33 @@ class FakeQuery:
                     include = data.get(field) == value
                 elif op == "in":
                     include = data.get(field) in value
+                elif op == "array_contains":
+                    include = value in (data.get(field) or [])
                 else:
                     include = False
                 if not include:
                     break
+            # Firestore omits documents that lack an order_by field.
+            if any(
+                field != "__name__" and field not in data for field, _ in self._orders
+            ):
+                include = False
             if include:
-                items.append(FakeSnap(FakeDoc(self._store, doc_id)))
+                matched.append(doc_id)
+        for field, descending in reversed(self._orders):
+            matched.sort(
+                key=lambda doc_id, field=field: (
+                    doc_id if field == "__name__" else self._store[doc_id][field]
+                ),
+                reverse=descending,
+            )
+        if self._start_after is not None:
+            matched = [
+                doc_id
+                for doc_id in matched
+                if self._after_cursor(self._sort_key(doc_id, self._store[doc_id]))
+            ]
+        items = [FakeSnap(FakeDoc(self._store, doc_id)) for doc_id in matched]
         if self._limit is not None:
             items = items[: self._limit]
         return items
@@ -102,28 +197,66 @@ class FakeCollection(FakeQuery):
 
 
 class FakeBatch:
-    def __init__(self):
+    def __init__(self, db=None):
+        self._db = db
         self._ops = []
 
     def delete(self, doc_ref):
         self._ops.append(("delete", doc_ref))
 
-    def commit(self):
+    async def commit(self):
+        if self._db is not None:
+            self._db.commits.append(len(self._ops))
         for op, doc_ref in self._ops:
             if op == "delete":
-                doc_ref.delete()
+                await doc_ref.delete()
+
+
+class FakeTransaction:
+    _read_only = False
+    _max_attempts = 1
+    _id = b"fake-transaction"
+
+    def __init__(self):
+        self._ops = []
+
+    def _clean_up(self):
+        pass
+
+    async def _begin(self, retry_id=None):
+        _ = retry_id
+
+    async def _commit(self):
+        for op, doc_ref, data in self._ops:
+            await getattr(doc_ref, op)(data)
+
+    async def _rollback(self):
+        self._ops = []
+
+    def set(self, doc_ref, data):
+        self._ops.append(("set", doc_ref, data))
+
+    def update(self, doc_ref, data):
+        self._ops.append(("update", doc_ref, data))
 
 
 class FakeFirestore:
-    def __init__(self, users, plans=None, steps=None, completions=None):
+    def __init__(self, users, plans=None, steps=None, completions=None, questions=None):
         self._users = users
+        self.user_streams = []
+        self._counters = {}
         self._plans = plans or {}
         self._steps = steps or {}
         self._completions = completions or {}
+        self._questions = questions or {}
+        self._deletions = {}
+        self.commits = []
 
     def collection(self, name):
         if name == "users":
-            return FakeCollection(self._users)
+            collection = FakeCollection(self._users)
+            collection.streams = self.user_streams
+            return collection
         if name == "student_plans":
             return FakeCollection(
                 self._plans,
@@ -131,10 +264,19 @@ class FakeFirestore:
             )
         if name == "step_completions":
             return FakeCollection(self._completions)
+        if name == "counters":
+            return FakeCollection(self._counters)
+        if name == "questions":
+            return FakeCollection(self._questions)
+        if name == "student_deletions":
+            return FakeCollection(self._deletions)
         raise ValueError(f"unsupported collection {name}")
 
     def batch(self):
-        return FakeBatch()
+        return FakeBatch(self)
+
+    def transaction(self):
+        return FakeTransaction()
 
 
 def _normalize(data):
@@ -159,13 +301,29 @@ def _override_staff():
 
 
 def test_list_students_staff_filter(monkeypatch):
+    created_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
     users = {
-        "s1": {"role": "student", "status": "active", "email": "s1@x.com"},
-        "a1": {"role": "admin", "status": "active", "email": "a1@x.com"},
-        "e1": {"role": "expert", "status": "active", "email": "e1@x.com"},
+        "s1": {
+            "role": "student",
+            "status": "active",
+            "email": "s1@x.com",
+            "createdAt": created_at,
+        },
+        "a1": {
+            "role": "admin",
+            "status": "active",
+            "email": "a1@x.com",
+            "createdAt": created_at,
+        },
+        "e1": {
+            "role": "expert",
+            "status": "active",
+            "email": "e1@x.com",
+            "createdAt": created_at,
+        },
     }
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[require_staff] = _override_staff
     client = TestClient(app)
 
@@ -180,15 +338,12 @@ def test_list_students_staff_filter(monkeypatch):
 def test_append_courses_to_plan_returns_created_steps(monkeypatch):
     users = {"u1": {"role": "student", "status": "active", "email": "u1@x.com"}}
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
-    monkeypatch.setattr(
-        admin_students,
-        "append_courses_to_student_plan",
-        lambda db, uid, course_ids: {
-            "addedCourseIds": course_ids,
-            "createdSteps": 3,
-        },
-    )
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
+
+    async def _fake_append(db, uid, course_ids):
+        return {"addedCourseIds": course_ids, "createdSteps": 3}
+
+    monkeypatch.setattr(admin_students, "append_courses_to_student_plan", _fake_append)
     app.dependency_overrides[require_staff] = _override_staff
     client = TestClient(app)
 
@@ -210,7 +365,7 @@ def test_append_courses_to_plan_returns_created_steps(monkeypatch):
 def test_list_students_rejects_invalid_status_filter(monkeypatch):
     users = {"s1": {"role": "student", "status": "active", "email": "s1@x.com"}}
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[require_staff] = _override_staff
     client = TestClient(app)
 
@@ -223,7 +378,7 @@ def test_list_students_rejects_invalid_status_filter(monkeypatch):
 def test_list_students_rejects_invalid_sort_by(monkeypatch):
     users = {"s1": {"role": "student", "status": "active", "email": "s1@x.com"}}
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[require_staff] = _override_staff
     client = TestClient(app)
 
@@ -240,23 +395,23 @@ def test_list_students_sorts_by_created_at(monkeypatch):
             "role": "student",
             "status": "active",
             "email": "u1@x.com",
-            "createdAt": "2026-01-02T00:00:00Z",
+            "createdAt": datetime(2026, 1, 2, tzinfo=timezone.utc),
         },
         "u2": {
             "role": "student",
             "status": "active",
             "email": "u2@x.com",
-            "createdAt": "2026-01-03T00:00:00Z",
+            "createdAt": datetime(2026, 1, 3, tzinfo=timezone.utc),
         },
         "u3": {
             "role": "student",
             "status": "active",
             "email": "u3@x.com",
-            "createdAt": "2026-01-01T00:00:00Z",
+            "createdAt": datetime(2026, 1, 1, tzinfo=timezone.utc),
         },
     }
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[require_staff] = _override_staff
     client = TestClient(app)
 
@@ -299,7 +454,7 @@ def test_list_students_sorts_by_progress_desc_with_uid_tie_breaker(monkeypatch):
         },
     }
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[require_staff] = _override_staff
     client = TestClient(app)
 
@@ -311,6 +466,33 @@ def test_list_students_sorts_by_progress_desc_with_uid_tie_breaker(monkeypatch):
     app.dependency_overrides.clear()
 
 
+def test_list_students_total_matches_items_for_every_sort(monkeypatch):
+    created_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    users = {
+        "u1": {
+            "role": "student",
+            "status": "active",
+            "createdAt": created_at,
+            "progressPercent": 50,
+        },
+        "legacy": {"role": "student", "status": "active", "createdAt": created_at},
+    }
+    fake_db = FakeFirestore(users)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
+    app.dependency_overrides[require_staff] = _override_staff
+    client = TestClient(app)
+    try:
+        responses = [
+            client.get(f"/api/admin/students?sortBy={sort_by}").json()
+            for sort_by in ("progress", "createdAt")
+        ]
+    finally:
+        app.dependency_overrides.clear()
+
+    assert [body["total"] for body in responses] == [1, 2]
+    assert all(body["total"] == len(body["items"]) for body in responses)
+
+
 def test_list_students_applies_combined_filters_and_search(monkeypatch):
     users = {
         "u1": {
@@ -318,25 +500,28 @@ def test_list_students_applies_combined_filters_and_search(monkeypatch):
             "status": "active",
             "email": "anna@example.com",
             "displayName": "Anna",
-            "createdAt": "2026-01-01T00:00:00Z",
+            **user_search_fields("anna@example.com", "Anna"),
+            "createdAt": datetime(2026, 1, 1, tzinfo=timezone.utc),
         },
         "u2": {
             "role": "student",
             "status": "disabled",
             "email": "anna-disabled@example.com",
             "displayName": "Anna Disabled",
-            "createdAt": "2026-01-02T00:00:00Z",
+            **user_search_fields("anna-disabled@example.com", "Anna Disabled"),
+            "createdAt": datetime(2026, 1, 2, tzinfo=timezone.utc),
         },
         "u3": {
             "role": "expert",
             "status": "active",
             "email": "anna-staff@example.com",
             "displayName": "Anna Staff",
-            "createdAt": "2026-01-03T00:00:00Z",
+            **user_search_fields("anna-staff@example.com", "Anna Staff"),
+            "createdAt": datetime(2026, 1, 3, tzinfo=timezone.utc),
         },
     }
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[require_staff] = _override_staff
     client = TestClient(app)
 
@@ -350,29 +535,63 @@ def test_list_students_applies_combined_filters_and_search(monkeypatch):
     app.dependency_overrides.clear()
 
 
+def test_list_students_multi_word_search_has_no_total(monkeypatch):
+    created_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    users = {
+        uid: {
+            "role": "student",
+            "status": "active",
+            "email": f"{uid}@example.com",
+            "displayName": name,
+            **user_search_fields(f"{uid}@example.com", name),
+            "createdAt": created_at,
+        }
+        for uid, name in (("u1", "Anna Smith"), ("u2", "Anna Jones"))
+    }
+    monkeypatch.setattr(
+        admin_students,
+        "get_async_firestore_client",
+        # The fake hands out the stored dicts, which the list trims.
+        lambda: FakeFirestore(copy.deepcopy(users)),
+    )
+    app.dependency_overrides[require_staff] = _override_staff
+    client = TestClient(app)
+    try:
+        one_word = client.get("/api/admin/students?q=anna").json()
+        two_words = client.get("/api/admin/students?q=anna%20sm").json()
+    finally:
+        app.dependency_overrides.clear()
+
+    assert one_word["total"] == 2
+    # Both match "anna", the word the query filters on, but only u1 also
+    # matches "sm".
+    assert [item["uid"] for item in two_words["items"]] == ["u1"]
+    assert two_words["total"] is None
+
+
 def test_list_students_cursor_paginates_sorted_results(monkeypatch):
     users = {
         "u1": {
             "role": "student",
             "status": "active",
             "email": "u1@x.com",
-            "createdAt": "2026-01-01T00:00:00Z",
+            "createdAt": datetime(2026, 1, 1, tzinfo=timezone.utc),
         },
         "u2": {
             "role": "student",
             "status": "active",
             "email": "u2@x.com",
-            "createdAt": "2026-01-02T00:00:00Z",
+            "createdAt": datetime(2026, 1, 2, tzinfo=timezone.utc),
         },
         "u3": {
             "role": "student",
             "status": "active",
             "email": "u3@x.com",
-            "createdAt": "2026-01-03T00:00:00Z",
+            "createdAt": datetime(2026, 1, 3, tzinfo=timezone.utc),
         },
     }
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[require_staff] = _override_staff
     client = TestClient(app)
 
@@ -382,7 +601,8 @@ def test_list_students_cursor_paginates_sorted_results(monkeypatch):
     assert first_response.status_code == 200
     first_payload = first_response.json()
     assert [item["uid"] for item in first_payload["items"]] == ["u1", "u2"]
-    assert first_payload["nextCursor"] == "u2"
+    assert first_payload["nextCursor"]
+    assert first_payload["total"] == 3
 
     second_response = client.get(
         f"/api/admin/students?sortBy=createdAt&sortDir=asc&limit=2&cursor={first_payload['nextCursor']}"
@@ -391,27 +611,71 @@ def test_list_students_cursor_paginates_sorted_results(monkeypatch):
     second_payload = second_response.json()
     assert [item["uid"] for item in second_payload["items"]] == ["u3"]
     assert second_payload["nextCursor"] is None
+    assert fake_db.user_streams == [3, 1]
+
+    app.dependency_overrides.clear()
+
+
+def test_list_students_paginates_progress_sort_across_ties(monkeypatch):
+    users = {
+        uid: {
+            "role": "student",
+            "status": "active",
+            "email": f"{uid}@x.com",
+            "progressPercent": percent,
+            "stepsDone": done,
+            "stepsTotal": 10,
+        }
+        for uid, percent, done in [("u3", 50, 5), ("u1", 50, 5), ("u2", 90, 9)]
+    }
+    fake_db = FakeFirestore(users)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
+    app.dependency_overrides[require_staff] = _override_staff
+    client = TestClient(app)
+
+    seen = []
+    cursor = ""
+    for _ in range(3):
+        payload = client.get(
+            f"/api/admin/students?sortBy=progress&sortDir=desc&limit=1{cursor}"
+        ).json()
+        seen.extend(item["uid"] for item in payload["items"])
+        assert payload["total"] == 3
+        cursor = f"&cursor={payload['nextCursor']}" if payload["nextCursor"] else ""
+
+    assert seen == ["u2", "u1", "u3"]
+    assert cursor == ""
+    assert fake_db.user_streams == [2, 2, 1]
 
     app.dependency_overrides.clear()
 
 
-def test_list_students_rejects_unknown_cursor(monkeypatch):
+def test_list_students_rejects_invalid_cursor(monkeypatch):
     users = {
         "u1": {
             "role": "student",
             "status": "active",
             "email": "u1@x.com",
-            "createdAt": "2026-01-01T00:00:00Z",
+            "createdAt": datetime(2026, 1, 1, tzinfo=timezone.utc),
         }
     }
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[require_staff] = _override_staff
     client = TestClient(app)
 
+    created_at_cursor = admin_students._encode_student_cursor(
+        "createdAt", users["u1"]["createdAt"], "u1"
+    )
+
     response = client.get("/api/admin/students?cursor=missing-user")
+    mismatched = client.get(
+        f"/api/admin/students?sortBy=progress&cursor={created_at_cursor}"
+    )
 
-    assert response.status_code == 404
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == "validation_error"
+    assert mismatched.status_code == 400
 
     app.dependency_overrides.clear()
 
@@ -419,7 +683,7 @@ def test_list_students_rejects_unknown_cursor(monkeypatch):
 def test_patch_student_role_validation(monkeypatch):
     users = {"s1": {"role": "student", "status": "active", "email": "s1@x.com"}}
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[get_current_user] = _override_staff
     client = TestClient(app)
 
@@ -432,7 +696,7 @@ def test_patch_student_role_validation(monkeypatch):
 def test_create_student_defaults_status_to_disabled(monkeypatch):
     users = {}
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
     monkeypatch.setattr(
         admin_students,
         "get_or_create_user",
@@ -456,7 +720,7 @@ def test_create_student_defaults_status_to_disabled(monkeypatch):
 def test_create_student_sends_registration_telegram_for_new_user(monkeypatch):
     users = {}
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
     monkeypatch.setattr(
         admin_students,
         "get_or_create_user",
@@ -503,7 +767,7 @@ def test_create_student_does_not_send_registration_telegram_for_existing_user(
         }
     }
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
     monkeypatch.setattr(
         admin_students,
         "get_or_create_user",
@@ -540,7 +804,7 @@ def test_create_student_keeps_first_hundred_false_after_threshold(monkeypatch):
         for index in range(100)
     }
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
     monkeypatch.setattr(
         admin_students,
         "get_or_create_user",
@@ -564,7 +828,7 @@ def test_create_student_keeps_first_hundred_false_after_threshold(monkeypatch):
 def test_patch_student_updates_role_for_staff(monkeypatch):
     users = {"s1": {"role": "student", "status": "active", "email": "s1@x.com"}}
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[get_current_user] = _override_staff
     client = TestClient(app)
 
@@ -578,7 +842,7 @@ def test_patch_student_updates_role_for_staff(monkeypatch):
 def test_patch_student_status_updates_with_new_enum(monkeypatch):
     users = {"s1": {"role": "student", "status": "active", "email": "s1@x.com"}}
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[get_current_user] = _override_staff
     client = TestClient(app)
 
@@ -593,7 +857,7 @@ def test_patch_student_status_updates_with_new_enum(monkeypatch):
 def test_patch_student_updates_first_hundred_flag(monkeypatch):
     users = {"s1": {"role": "student", "status": "active", "email": "s1@x.com"}}
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[get_current_user] = _override_staff
     client = TestClient(app)
 
@@ -608,7 +872,7 @@ def test_patch_student_updates_first_hundred_flag(monkeypatch):
 def test_patch_student_status_change_logs_and_emits_hook(monkeypatch):
     users = {"s1": {"role": "student", "status": "active", "email": "s1@x.com"}}
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[get_current_user] = _override_staff
     client = TestClient(app)
 
@@ -671,7 +935,7 @@ def test_patch_student_does_not_send_telegram_when_status_unchanged(monkeypatch)
         }
     }
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[get_current_user] = _override_staff
     client = TestClient(app)
 
@@ -694,7 +958,7 @@ def test_patch_student_does_not_send_telegram_when_status_unchanged(monkeypatch)
 def test_patch_student_rejects_invalid_status(monkeypatch):
     users = {"s1": {"role": "student", "status": "active", "email": "s1@x.com"}}
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[get_current_user] = _override_staff
     client = TestClient(app)
 
@@ -707,7 +971,7 @@ def test_patch_student_rejects_invalid_status(monkeypatch):
 def test_patch_student_requires_staff(monkeypatch):
     users = {"s1": {"role": "student", "status": "active", "email": "s1@x.com"}}
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
 
     def _student_user():
         return {
@@ -731,7 +995,7 @@ def test_patch_student_requires_staff(monkeypatch):
 def test_patch_student_rejects_student_self_patch(monkeypatch):
     users = {"u1": {"role": "student", "status": "active", "email": "u1@x.com"}}
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
 
     def _student_self():
         return {
@@ -755,7 +1019,7 @@ def test_patch_student_rejects_student_self_patch(monkeypatch):
 def test_patch_student_validates_display_name(monkeypatch):
     users = {"s1": {"role": "student", "status": "active", "email": "s1@x.com"}}
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[get_current_user] = _override_staff
     client = TestClient(app)
 
@@ -768,18 +1032,17 @@ def test_patch_student_validates_display_name(monkeypatch):
     app.dependency_overrides.clear()
 
 
-def test_get_student_migrates_missing_status(monkeypatch):
+def test_get_student_normalizes_missing_status_without_writing(monkeypatch):
     users = {"s1": {"role": "student", "email": "s1@x.com"}}
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[require_staff] = _override_staff
     client = TestClient(app)
 
     response = client.get("/api/admin/students/s1")
     assert response.status_code == 200
     assert response.json()["status"] == "active"
-    assert users["s1"]["status"] == "active"
-    assert users["s1"]["updatedAt"] == "SERVER_TIMESTAMP"
+    assert "updatedAt" not in users["s1"]
 
     app.dependency_overrides.clear()
 
@@ -787,7 +1050,7 @@ def test_get_student_migrates_missing_status(monkeypatch):
 def test_patch_student_updates_display_name_and_timestamp(monkeypatch):
     users = {"s1": {"role": "student", "status": "active", "email": "s1@x.com"}}
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[get_current_user] = _override_staff
     client = TestClient(app)
 
@@ -811,7 +1074,7 @@ def test_patch_student_updates_boosty_user_id(monkeypatch):
         }
     }
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[get_current_user] = _override_staff
     client = TestClient(app)
 
@@ -837,7 +1100,7 @@ def test_patch_student_clears_boosty_user_id(monkeypatch):
         }
     }
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[get_current_user] = _override_staff
     client = TestClient(app)
 
@@ -855,7 +1118,7 @@ def test_patch_student_clears_boosty_user_id(monkeypatch):
 def test_patch_student_rejects_invalid_boosty_user_id(monkeypatch):
     users = {"s1": {"role": "student", "status": "active", "email": "s1@x.com"}}
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[get_current_user] = _override_staff
     client = TestClient(app)
 
@@ -879,13 +1142,18 @@ def test_delete_student_removes_user_related_data(monkeypatch):
         "c2": {"studentUid": "s1", "stepId": "step2"},
         "c3": {"studentUid": "other", "stepId": "x"},
     }
+    questions = {
+        "q1": {"studentUid": "s1", "title": "Help"},
+        "q2": {"studentUid": "other", "title": "Other"},
+    }
     fake_db = FakeFirestore(
         users=users,
         plans=plans,
         steps=steps,
         completions=completions,
+        questions=questions,
     )
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[require_staff] = _override_staff
     client = TestClient(app)
 
@@ -895,6 +1163,7 @@ def test_delete_student_removes_user_related_data(monkeypatch):
     assert payload["deleted"] == "s1"
     assert payload["deletedSteps"] == 2
     assert payload["deletedCompletions"] == 2
+    assert payload["deletedQuestions"] == 1
 
     assert "s1" not in users
     assert "s1" not in plans
@@ -903,14 +1172,105 @@ def test_delete_student_removes_user_related_data(monkeypatch):
     assert "c1" not in completions
     assert "c2" not in completions
     assert "c3" in completions
+    assert set(questions) == {"q2"}
+    # Steps, the plan doc, completions and questions share one batch.
+    assert fake_db.commits == [6]
 
     app.dependency_overrides.clear()
 
 
+class _JobSettings:
+    JOB_TOKEN = "job-secret"
+    JOB_STALE_SECONDS = 120.0
+
+
+def _job_client(monkeypatch, fake_db):
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(jobs, "get_async_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(jobs, "get_settings", lambda: _JobSettings())
+    monkeypatch.setattr(resumable_jobs, "get_settings", lambda: _JobSettings())
+    app.dependency_overrides[require_staff] = _override_staff
+    return TestClient(app)
+
+
+def test_delete_student_in_background_is_run_by_the_deletion_job(monkeypatch):
+    users = {"s1": {"role": "student", "status": "active", "email": "s1@x.com"}}
+    plans = {"s1": {"goalId": "g1"}}
+    steps = {"s1": {f"step{i:03d}": {"title": str(i)} for i in range(120)}}
+    completions = {
+        f"c{i}": {"studentUid": "s1", "stepId": f"step{i:03d}"} for i in range(30)
+    }
+    fake_db = FakeFirestore(
+        users=users,
+        plans=plans,
+        steps=steps,
+        completions=completions,
+    )
+    client = _job_client(monkeypatch, fake_db)
+    headers = {"X-Job-Token": "job-secret"}
+    try:
+        response = client.delete("/api/admin/students/s1?background=true")
+        queued = client.get("/api/admin/students/s1/deletion")
+        swept = client.post("/jobs/students/deletions/run-pending", headers=headers)
+        progress = client.get("/api/admin/students/s1/deletion")
+        idle = client.post("/jobs/students/deletions/run-pending", headers=headers)
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 202
+    assert response.json() == {"deleted": "s1", "status": "queued"}
+    assert queued.json()["status"] == "queued"
+    assert users == {}
+    assert swept.json() == {"done": ["s1"], "failed": []}
+    body = progress.json()
+    assert body["status"] == "done"
+    assert body["requestedBy"] == "staff-1"
+    assert body["deletedSteps"] == 120
+    assert body["deletedCompletions"] == 30
+    assert body["deletedQuestions"] == 0
+    assert plans == {}
+    assert steps["s1"] == {}
+    assert completions == {}
+    assert idle.json() == {"done": [], "failed": []}
+
+
+def test_stopped_deletion_is_resumed_and_counted_as_a_failure(monkeypatch):
+    users = {"s1": {"role": "student", "status": "active", "email": "s1@x.com"}}
+    fake_db = FakeFirestore(users=users, questions={"q1": {"studentUid": "s1"}})
+    stopped_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    fake_db._deletions["s1"] = {
+        "studentUid": "s1",
+        "status": "running",
+        "failures": 0,
+        "updatedAt": stopped_at,
+    }
+    fake_db._deletions["s2"] = {
+        "studentUid": "s2",
+        "status": "running",
+        "updatedAt": datetime.now(timezone.utc),
+    }
+    client = _job_client(monkeypatch, fake_db)
+    headers = {"X-Job-Token": "job-secret"}
+    try:
+        swept = client.post("/jobs/students/deletions/run-pending", headers=headers)
+        resumed = client.post("/jobs/students/s1/deletion", headers=headers)
+        missing = client.post("/jobs/students/s3/deletion", headers=headers)
+    finally:
+        app.dependency_overrides.clear()
+
+    assert swept.json() == {"done": ["s1"], "failed": []}
+    assert fake_db._deletions["s1"]["failures"] == 1
+    assert fake_db._deletions["s1"]["deletedQuestions"] == 1
+    assert fake_db._deletions["s2"]["status"] == "running"
+    assert users == {}
+    assert resumed.json()["status"] == "done"
+    assert missing.status_code == 404
+
+
 def test_delete_student_rejects_non_student(monkeypatch):
     users = {"a1": {"role": "admin", "status": "active", "email": "a1@x.com"}}
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[require_staff] = _override_staff
     client = TestClient(app)
 
@@ -30,22 +30,21 @@ class FakeDoc:
         self.id = doc_id
         self._subcollections = subcollections or {}
 
-    def get(self):
+    async def get(self, transaction=None):
         return FakeSnap(self, self._store.get(self.id))
 
-    def set(self, data, merge=False):
-        normalized = _normalize(data)
+    async def set(self, data, merge=False):
         if merge and self.id in self._store:
-            self._store[self.id].update(normalized)
+            self._store[self.id].update(_normalize(data, self._store[self.id]))
             return
-        self._store[self.id] = normalized
+        self._store[self.id] = _normalize(data)
 
-    def update(self, data):
+    async def update(self, data):
         if self.id not in self._store:
             raise KeyError("missing doc")
-        self._store[self.id].update(_normalize(data))
+        self._store[self.id].update(_normalize(data, self._store[self.id]))
 
-    def delete(self):
+    async def delete(self):
         self._store.pop(self.id, None)
 
     def collection(self, name):
@@ -65,7 +64,11 @@ class FakeCollection:
         sub = self._subcollections.setdefault(doc_id, {})
         return FakeDoc(self._store, doc_id, sub)
 
-    def stream(self):
+    async def stream(self):
+        for snap in self._snapshots():
+            yield snap
+
+    def _snapshots(self):
         return [
             FakeSnap(FakeDoc(self._store, doc_id), data)
             for doc_id, data in self._store.items()
@@ -80,9 +83,12 @@ class FakeCollection:
 
 
 class FakeSubCollection:
-    def __init__(self, store):
+    def __init__(self, store, start_after=None, limit=None):
         self._store = store
+        self._start_after = start_after
+        self._limit = limit
         self._counter = 0
+        self.pages = []
 
     def document(self, doc_id=None):
         if doc_id is None:
@@ -90,33 +96,91 @@ class FakeSubCollection:
             doc_id = f"step_{self._counter}"
         return FakeDoc(self._store, doc_id)
 
-    def stream(self):
+    async def stream(self):
+        snaps = self._snapshots()
+        self.pages.append(len(snaps))
+        for snap in snaps:
+            yield snap
+
+    def _snapshots(self):
+        doc_ids = sorted(
+            doc_id for doc_id, data in self._store.items() if data is not None
+        )
+        if self._start_after is not None:
+            doc_ids = [doc_id for doc_id in doc_ids if doc_id > self._start_after]
+        if self._limit is not None:
+            doc_ids = doc_ids[: self._limit]
         return [
-            FakeSnap(FakeDoc(self._store, doc_id), data)
-            for doc_id, data in self._store.items()
-            if data is not None
+            FakeSnap(FakeDoc(self._store, doc_id), self._store[doc_id])
+            for doc_id in doc_ids
         ]
 
     def order_by(self, _field, direction=None):
         return self
 
+    def start_after(self, values):
+        query = FakeSubCollection(self._store, values[0], self._limit)
+        query.pages = self.pages
+        return query
+
+    def limit(self, value):
+        query = FakeSubCollection(self._store, self._start_after, value)
+        query.pages = self.pages
+        return query
+
 
 class FakeBatch:
-    def __init__(self):
+    def __init__(self, db=None):
+        self._db = db
         self._ops = []
 
     def set(self, doc_ref, data, merge=False):
         self._ops.append(("set", doc_ref, data, merge))
 
+    def update(self, doc_ref, data):
+        self._ops.append(("update", doc_ref, data, False))
+
     def delete(self, doc_ref):
         self._ops.append(("delete", doc_ref, None, False))
 
-    def commit(self):
+    async def commit(self):
+        if self._db is not None:
+            self._db.commits.append(len(self._ops))
         for op, doc_ref, data, merge in self._ops:
             if op == "set":
-                doc_ref.set(data, merge=merge)
+                await doc_ref.set(data, merge=merge)
+            elif op == "update":
+                await doc_ref.update(data)
             elif op == "delete":
-                doc_ref.delete()
+                await doc_ref.delete()
+
+
+class FakeTransaction:
+    def __init__(self):
+        self._ops = []
+
+    _read_only = False
+    _max_attempts = 1
+    _id = b"fake-transaction"
+
+    def _clean_up(self):
+        pass
+
+    async def _begin(self, retry_id=None):
+        _ = retry_id
+
+    async def _commit(self):
+        await self.commit()
+
+    async def _rollback(self):
+        self._ops = []
+
+    def update(self, doc_ref, data):
+        self._ops.append(("update", doc_ref, data))
+
+    async def commit(self):
+        for _op, doc_ref, data in self._ops:
+            await doc_ref.update(data)
 
 
 class FakeFirestore:
@@ -125,6 +189,8 @@ class FakeFirestore:
         self._goals = goals or {}
         self._plans = plans or {}
         self._plan_steps = plan_steps or {}
+        self._tombstones = {}
+        self.commits = []
 
     def collection(self, name):
         if name == "users":
@@ -132,19 +198,30 @@ class FakeFirestore:
         if name == "goals":
             return FakeCollection(self._goals)
         if name == "student_plans":
-            sub = {uid: {"steps": steps} for uid, steps in self._plan_steps.items()}
+            sub = {
+                uid: {
+                    "steps": steps,
+                    "step_tombstones": self._tombstones.setdefault(uid, {}),
+                }
+                for uid, steps in self._plan_steps.items()
+            }
             return FakeCollection(self._plans, sub)
         raise ValueError(f"unsupported collection {name}")
 
     def batch(self):
-        return FakeBatch()
+        return FakeBatch(self)
+
+    def transaction(self):
+        return FakeTransaction()
 
 
-def _normalize(data):
+def _normalize(data, current=None):
     normalized = {}
     for key, value in data.items():
         if value is firestore.SERVER_TIMESTAMP:
             normalized[key] = "SERVER_TIMESTAMP"
+        elif isinstance(value, firestore.Increment):
+            normalized[key] = (current or {}).get(key, 0) + value.value
         else:
             normalized[key] = value
     return normalized
@@ -173,16 +250,16 @@ def test_preview_reset_counts(monkeypatch):
         }
     }
     fake_db = FakeFirestore(users, goals, plans, plan_steps)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
-    monkeypatch.setattr(
-        admin_students,
-        "list_steps",
-        lambda db, goal_id: [
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
+
+    async def _fake_list_steps(db, goal_id):
+        return [
             {"title": "A"},
             {"title": "B"},
             {"title": "C"},
-        ],
-    )
+        ]
+
+    monkeypatch.setattr(admin_students, "list_steps", _fake_list_steps)
     app.dependency_overrides[require_staff] = _override_staff
     client = TestClient(app)
 
@@ -204,8 +281,12 @@ def test_assign_reset_requires_confirm(monkeypatch):
     users = {"u1": {"role": "student", "status": "active"}}
     goals = {"g1": {"title": "Goal"}}
     fake_db = FakeFirestore(users, goals)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
-    monkeypatch.setattr(admin_students, "list_steps", lambda db, goal_id: [])
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
+
+    async def _fake_list_steps(db, goal_id):
+        return []
+
+    monkeypatch.setattr(admin_students, "list_steps", _fake_list_steps)
     app.dependency_overrides[require_staff] = _override_staff
     client = TestClient(app)
 
@@ -229,11 +310,10 @@ def test_assign_reset_replaces_steps(monkeypatch):
         }
     }
     fake_db = FakeFirestore(users, goals, plans, plan_steps)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
-    monkeypatch.setattr(
-        admin_students,
-        "list_steps",
-        lambda db, goal_id: [
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
+
+    async def _fake_list_steps(db, goal_id):
+        return [
             {
                 "title": "New 1",
                 "description": "D1",
@@ -246,8 +326,9 @@ def test_assign_reset_replaces_steps(monkeypatch):
                 "materialUrl": "https://y",
                 "order": 1,
             },
-        ],
-    )
+        ]
+
+    monkeypatch.setattr(admin_students, "list_steps", _fake_list_steps)
     app.dependency_overrides[require_staff] = _override_staff
     client = TestClient(app)
 
@@ -271,6 +352,142 @@ def test_assign_reset_replaces_steps(monkeypatch):
     app.dependency_overrides.clear()
 
 
+def test_assign_reset_chunks_large_plans_and_clears_marker(monkeypatch):
+    users = {"u1": {"role": "student", "status": "active"}}
+    goals = {"g1": {"title": "Goal"}}
+    plans = {
+        "u1": {"studentUid": "u1", "goalId": "g0", "createdAt": "old", "revision": 4}
+    }
+    plan_steps = {"u1": {f"old{i:04d}": {"isDone": True} for i in range(700)}}
+    fake_db = FakeFirestore(users, goals, plans, plan_steps)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
+
+    async def _fake_list_steps(db, goal_id):
+        return [{"title": f"T{i}"} for i in range(800)]
+
+    monkeypatch.setattr(admin_students, "list_steps", _fake_list_steps)
+    app.dependency_overrides[require_staff] = _override_staff
+    client = TestClient(app)
+
+    response = client.post(
+        "/api/admin/students/u1/plan",
+        json={
+            "goalId": "g1",
+            "resetStepsFromGoalTemplate": True,
+            "confirm": "RESET_STEPS",
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.json()["resetInProgress"] is False
+    steps_store = fake_db._plan_steps["u1"]
+    assert len(steps_store) == 800
+    assert sorted(step["order"] for step in steps_store.values()) == list(range(800))
+    assert sum(fake_db.commits) == 1500
+    assert max(fake_db.commits) <= 450
+    plan = fake_db._plans["u1"]
+    assert plan["createdAt"] == "old"
+    assert plan["resetInProgress"] is False
+    assert plan["lastResetBy"] == "staff-1"
+    assert plan["revision"] == 5
+    assert plan["stepsResetAt"] == "SERVER_TIMESTAMP"
+    assert fake_db._users["u1"]["stepsTotal"] == 800
+
+    app.dependency_overrides.clear()
+
+
+def test_assign_reset_resumes_interrupted_reset(monkeypatch):
+    users = {"u1": {"role": "student", "status": "active"}}
+    goals = {"g1": {"title": "Goal"}}
+    plans = {
+        "u1": {
+            "studentUid": "u1",
+            "goalId": "g1",
+            "resetInProgress": True,
+            "resetId": "r1",
+            "resetGoalId": "g1",
+        }
+    }
+    plan_steps = {
+        "u1": {
+            "old": {"title": "Old"},
+            "r1-00000": {"title": "A", "order": 0, "isDone": False},
+        }
+    }
+    fake_db = FakeFirestore(users, goals, plans, plan_steps)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
+
+    async def _fake_list_steps(db, goal_id):
+        return [{"title": "A"}, {"title": "B"}]
+
+    monkeypatch.setattr(admin_students, "list_steps", _fake_list_steps)
+    app.dependency_overrides[require_staff] = _override_staff
+    client = TestClient(app)
+
+    response = client.post(
+        "/api/admin/students/u1/plan",
+        json={
+            "goalId": "g1",
+            "resetStepsFromGoalTemplate": True,
+            "confirm": "RESET_STEPS",
+        },
+    )
+
+    assert response.status_code == 200
+    steps_store = fake_db._plan_steps["u1"]
+    assert sorted(steps_store) == ["r1-00000", "r1-00001"]
+    assert steps_store["r1-00001"]["title"] == "B"
+    assert fake_db._plans["u1"]["resetInProgress"] is False
+    assert fake_db._plans["u1"]["resetId"] is None
+
+    app.dependency_overrides.clear()
+
+
+def test_resumed_reset_drops_steps_beyond_a_shrunk_template(monkeypatch):
+    users = {"u1": {"role": "student", "status": "active"}}
+    goals = {"g1": {"title": "Goal"}}
+    plans = {
+        "u1": {
+            "studentUid": "u1",
+            "goalId": "g1",
+            "resetInProgress": True,
+            "resetId": "r1",
+            "resetGoalId": "g1",
+        }
+    }
+    # The interrupted attempt ran with a three-step template.
+    plan_steps = {
+        "u1": {
+            f"r1-{order:05d}": {"title": title, "order": order, "isDone": False}
+            for order, title in enumerate(["A", "B", "C"])
+        }
+    }
+    fake_db = FakeFirestore(users, goals, plans, plan_steps)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
+
+    async def _fake_list_steps(db, goal_id):
+        return [{"title": "A"}]
+
+    monkeypatch.setattr(admin_students, "list_steps", _fake_list_steps)
+    app.dependency_overrides[require_staff] = _override_staff
+    client = TestClient(app)
+
+    response = client.post(
+        "/api/admin/students/u1/plan",
+        json={
+            "goalId": "g1",
+            "resetStepsFromGoalTemplate": True,
+            "confirm": "RESET_STEPS",
+        },
+    )
+
+    assert response.status_code == 200
+    assert sorted(fake_db._plan_steps["u1"]) == ["r1-00000"]
+    assert fake_db._users["u1"]["stepsTotal"] == 1
+
+    app.dependency_overrides.clear()
+
+
 def test_assign_non_reset_preserves_steps(monkeypatch):
     users = {"u1": {"role": "student", "status": "active"}}
     goals = {"g1": {"title": "Goal"}}
@@ -281,7 +498,7 @@ def test_assign_non_reset_preserves_steps(monkeypatch):
         }
     }
     fake_db = FakeFirestore(users, goals, plans, plan_steps)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[require_staff] = _override_staff
     client = TestClient(app)
 
@@ -301,7 +518,7 @@ def test_delete_plan_step(monkeypatch):
     plans = {"u1": {"studentUid": "u1", "goalId": "g1"}}
     plan_steps = {"u1": {"s1": {"title": "Step 1", "isDone": False}}}
     fake_db = FakeFirestore(users, plans=plans, plan_steps=plan_steps)
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[require_staff] = _override_staff
     client = TestClient(app)
 
@@ -309,5 +526,8 @@ def test_delete_plan_step(monkeypatch):
     assert response.status_code == 200
     assert response.json() == {"deleted": "s1"}
     assert "s1" not in fake_db._plan_steps["u1"]
+    assert fake_db._tombstones["u1"] == {"s1": {"deletedAt": "SERVER_TIMESTAMP"}}
+    assert fake_db._plans["u1"]["revision"] == 1
+    assert fake_db._plans["u1"]["stepsUpdatedAt"] == "SERVER_TIMESTAMP"
 
     app.dependency_overrides.clear()
@@ -1,10 +1,13 @@
 import asyncio
+import time
 
 from fastapi.security import HTTPAuthorizationCredentials
 from starlette.requests import Request
 
 from app.auth import deps as auth_deps
 from app.auth.deps import _build_user_payload
+from app.auth.profile_cache import invalidate_user_profile
+from app.auth.token_cache import IdTokenCache
 
 
 class _FakeSnap:
@@ -25,13 +28,27 @@ class _FakeDoc:
         self._store = store
         self.id = doc_id
 
-    def get(self):
+    async def get(self, transaction=None):
+        _ = transaction
         return _FakeSnap(self)
 
-    def set(self, data):
+    async def set(self, data):
         self._store[self.id] = data
 
 
+class _FakeAggregation:
+    def __init__(self, value):
+        self.value = value
+
+
+class _FakeCountQuery:
+    def __init__(self, query):
+        self._query = query
+
+    async def get(self):
+        return [[_FakeAggregation(len(self._query._snapshots()))]]
+
+
 class _FakeQuery:
     def __init__(self, store):
         self._store = store
@@ -46,7 +63,14 @@ class _FakeQuery:
         self._limit = value
         return self
 
-    def stream(self):
+    def count(self):
+        return _FakeCountQuery(self)
+
+    async def stream(self):
+        for snap in self._snapshots():
+            yield snap
+
+    def _snapshots(self):
         items = []
         for doc_id, data in self._store.items():
             include = True
@@ -75,18 +99,49 @@ class _FakeCollection(_FakeQuery):
         return _FakeDoc(self._store, doc_id)
 
 
+class _FakeTransaction:
+    _read_only = False
+    _max_attempts = 1
+    _id = b"fake-transaction"
+
+    def __init__(self):
+        self._ops = []
+
+    def _clean_up(self):
+        pass
+
+    async def _begin(self, retry_id=None):
+        _ = retry_id
+
+    async def _commit(self):
+        for doc_ref, data in self._ops:
+            await doc_ref.set(data)
+
+    async def _rollback(self):
+        self._ops = []
+
+    def set(self, doc_ref, data):
+        self._ops.append((doc_ref, data))
+
+
 class _FakeFirestore:
     def __init__(self):
         self._users = {}
         self._goals = {}
+        self._counters = {}
 
     def collection(self, name):
         if name == "users":
             return _FakeCollection(self._users)
         if name == "goals":
             return _FakeCollection(self._goals)
+        if name == "counters":
+            return _FakeCollection(self._counters)
         raise ValueError("unsupported collection")
 
+    def transaction(self):
+        return _FakeTransaction()
+
 
 class _Settings:
     AUTH_REQUIRED = True
@@ -163,7 +218,7 @@ def test_build_user_payload_defaults_missing_onboarding_fields():
 
 def test_get_current_user_sends_registration_when_profile_bootstrapped(monkeypatch):
     fake_db = _FakeFirestore()
-    monkeypatch.setattr(auth_deps, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(auth_deps, "get_async_firestore_client", lambda: fake_db)
     monkeypatch.setattr(auth_deps, "get_settings", lambda: _Settings())
     monkeypatch.setattr(
         auth_deps,
@@ -189,6 +244,9 @@ def test_get_current_user_sends_registration_when_profile_bootstrapped(monkeypat
     assert payload["uid"] == "u1"
     assert payload["isFirstHundred"] is True
     assert fake_db._users["u1"]["isFirstHundred"] is True
+    assert fake_db._users["u1"]["stepsDone"] == 0
+    assert fake_db._users["u1"]["stepsTotal"] == 0
+    assert fake_db._users["u1"]["progressPercent"] == 0
     assert "text" in sent
     assert "🆕 Registration" in sent["text"]
     assert "uid: u1" in sent["text"]
@@ -205,7 +263,7 @@ def test_get_current_user_resolves_selected_goal_title(monkeypatch):
         "selectedGoalId": "goal-1",
     }
     fake_db._goals["goal-1"] = {"title": "Goal One"}
-    monkeypatch.setattr(auth_deps, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(auth_deps, "get_async_firestore_client", lambda: fake_db)
     monkeypatch.setattr(auth_deps, "get_settings", lambda: _Settings())
     monkeypatch.setattr(
         auth_deps,
@@ -234,7 +292,7 @@ def test_get_current_user_bootstrap_keeps_first_hundred_false_after_threshold(mo
     fake_db = _FakeFirestore()
     for index in range(100):
         fake_db._users[f"student-{index}"] = {"role": "student"}
-    monkeypatch.setattr(auth_deps, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(auth_deps, "get_async_firestore_client", lambda: fake_db)
     monkeypatch.setattr(auth_deps, "get_settings", lambda: _Settings())
     monkeypatch.setattr(
         auth_deps,
@@ -257,3 +315,82 @@ def test_get_current_user_bootstrap_keeps_first_hundred_false_after_threshold(mo
 
     assert payload["isFirstHundred"] is False
     assert fake_db._users["u101"]["isFirstHundred"] is False
+
+
+def test_get_current_user_reuses_verified_token_until_exp(monkeypatch):
+    fake_db = _FakeFirestore()
+    fake_db._users["u1"] = {"role": "student", "status": "active"}
+    monkeypatch.setattr(auth_deps, "get_async_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(auth_deps, "get_settings", lambda: _Settings())
+    monkeypatch.setattr(auth_deps, "id_token_cache", IdTokenCache(8))
+    verify_calls: list[str] = []
+
+    def _fake_verify(token: str):
+        verify_calls.append(token)
+        return {"uid": "u1", "email": "u1@example.com", "exp": time.time() + 3600}
+
+    monkeypatch.setattr(auth_deps, "verify_id_token", _fake_verify)
+
+    request = Request({"type": "http", "headers": []})
+    creds = HTTPAuthorizationCredentials(scheme="Bearer", credentials="token")
+    first = asyncio.run(auth_deps.get_current_user(request, creds))
+    second = asyncio.run(auth_deps.get_current_user(request, creds))
+
+    assert first["uid"] == second["uid"] == "u1"
+    assert verify_calls == ["token"]
+    assert auth_deps.id_token_cache.stats() == {
+        "size": 1,
+        "hits": 1,
+        "misses": 1,
+        "evictions": 0,
+    }
+
+
+def test_id_token_cache_expires_and_evicts_least_recently_used(monkeypatch):
+    cache = IdTokenCache(2)
+    now = time.time()
+    cache.put("expired", {"uid": "u0", "exp": now - 1})
+    cache.put("a", {"uid": "ua", "exp": now + 60})
+    cache.put("b", {"uid": "ub", "exp": now + 60})
+    assert cache.get("a") == {"uid": "ua", "exp": now + 60}
+    cache.put("c", {"uid": "uc", "exp": now + 60})
+
+    assert cache.get("expired") is None
+    assert cache.get("b") is None
+    assert cache.get("a")["uid"] == "ua"
+    assert cache.get("c")["uid"] == "uc"
+    assert cache.evictions == 1
+
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 1
+
+
+def test_get_current_user_serves_cached_profile_until_invalidated(monkeypatch):
+    fake_db = _FakeFirestore()
+    fake_db._users["u1"] = {
+        "role": "student",
+        "status": "active",
+        "selectedGoalId": "goal-1",
+    }
+    fake_db._goals["goal-1"] = {"title": "Goal One"}
+    monkeypatch.setattr(auth_deps, "get_async_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(auth_deps, "get_settings", lambda: _Settings())
+    monkeypatch.setattr(
+        auth_deps,
+        "verify_id_token",
+        lambda _token: {"uid": "u1", "email": "u1@example.com"},
+    )
+
+    request = Request({"type": "http", "headers": []})
+    creds = HTTPAuthorizationCredentials(scheme="Bearer", credentials="token")
+    first = asyncio.run(auth_deps.get_current_user(request, creds))
+    fake_db._users["u1"]["status"] = "expired"
+    cached = asyncio.run(auth_deps.get_current_user(request, creds))
+    invalidate_user_profile("u1")
+    refreshed = asyncio.run(auth_deps.get_current_user(request, creds))
+
+    assert first["status"] == "active"
+    assert cached["status"] == "active"
+    assert cached["selectedGoalTitle"] == "Goal One"
+    assert refreshed["status"] == "expired"
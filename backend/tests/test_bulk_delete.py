@@ -0,0 +1,196 @@
+import asyncio
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from app.db.bulk_delete import delete_document_tree, delete_query
+from app.db.bulk_writer import BulkWriter
+
+
+class FakeSnap:
+    def __init__(self, ref):
+        self.id = ref.id
+        self.reference = ref
+
+
+class FakeDoc:
+    def __init__(self, store, doc_id, children=None):
+        self._store = store
+        self.id = doc_id
+        self._children = children if children is not None else {}
+
+    async def collections(self):
+        for store in self._children.get(self.id, {}).values():
+            yield FakeCollection(store, self._children)
+
+
+class FakeCollection:
+    def __init__(self, store, children=None, start_after=None, limit=None):
+        self._store = store
+        self._children = children if children is not None else {}
+        self._start_after = start_after
+        self._limit = limit
+        self.pages = []
+
+    def order_by(self, field):
+        assert field == "__name__"
+        return self
+
+    def start_after(self, values):
+        query = FakeCollection(self._store, self._children, values[0], self._limit)
+        query.pages = self.pages
+        return query
+
+    def limit(self, value):
+        query = FakeCollection(self._store, self._children, self._start_after, value)
+        query.pages = self.pages
+        return query
+
+    def document(self, doc_id):
+        return FakeDoc(self._store, doc_id, self._children)
+
+    async def stream(self):
+        doc_ids = sorted(self._store)
+        if self._start_after is not None:
+            doc_ids = [doc_id for doc_id in doc_ids if doc_id > self._start_after]
+        doc_ids = doc_ids[: self._limit]
+        self.pages.append(len(doc_ids))
+        for doc_id in doc_ids:
+            yield FakeSnap(FakeDoc(self._store, doc_id, self._children))
+
+
+class FakeBatch:
+    def __init__(self, db):
+        self._db = db
+        self._refs = []
+
+    def delete(self, ref):
+        self._refs.append(ref)
+
+    async def commit(self):
+        self._db.in_flight += 1
+        self._db.peak_in_flight = max(self._db.peak_in_flight, self._db.in_flight)
+        try:
+            await asyncio.sleep(0)
+            if self._db.failures:
+                raise self._db.failures.pop(0)
+            for ref in self._refs:
+                ref._store.pop(ref.id, None)
+            self._db.commits.append(len(self._refs))
+        finally:
+            self._db.in_flight -= 1
+
+
+class FakeFirestore:
+    def __init__(self, failures=None):
+        self.failures = list(failures or [])
+        self.commits = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def batch(self):
+        return FakeBatch(self)
+
+
+def test_delete_query_pages_refs_into_bounded_concurrent_batches():
+    db = FakeFirestore()
+    store = {f"d{i:04d}": {} for i in range(1050)}
+    collection = FakeCollection(store)
+    writer = BulkWriter(db, batch_size=100, max_in_flight=3, base_delay=0)
+    reported = []
+
+    async def _on_page(done):
+        reported.append(done)
+
+    async def _run():
+        queued = await delete_query(writer, collection, page_size=400, on_page=_on_page)
+        return queued, await writer.flush()
+
+    queued, deleted = asyncio.run(_run())
+
+    assert (queued, deleted) == (1050, 1050)
+    assert store == {}
+    assert collection.pages == [400, 400, 250]
+    assert reported == [400, 800, 1050]
+    assert sorted(db.commits) == [50] + [100] * 10
+    assert 1 < db.peak_in_flight <= 3
+
+
+async def _delete_all(writer, refs):
+    for ref in refs:
+        await writer.delete(ref)
+    return await writer.flush()
+
+
+def test_bulk_writer_retries_transient_errors_then_gives_up():
+    db = FakeFirestore(failures=[google_exceptions.Aborted("contention")])
+    store = {"a": {}, "b": {}}
+    writer = BulkWriter(db, base_delay=0)
+
+    deleted = asyncio.run(
+        _delete_all(writer, [FakeDoc(store, "a"), FakeDoc(store, "b")])
+    )
+
+    assert deleted == 2
+    assert writer.retries == 1
+    assert store == {}
+
+    db.failures = [google_exceptions.ServiceUnavailable("down")] * 2
+    failing = BulkWriter(db, max_attempts=2, base_delay=0)
+    with pytest.raises(google_exceptions.ServiceUnavailable):
+        asyncio.run(_delete_all(failing, [FakeDoc({"x": {}}, "x")]))
+    assert failing.written == 0
+
+
+class SlowBatch(FakeBatch):
+    async def commit(self):
+        if self._db.failures:
+            raise self._db.failures.pop(0)
+        self._db.in_flight += 1
+        try:
+            await asyncio.sleep(10)
+            self._db.commits.append(len(self._refs))
+        finally:
+            self._db.in_flight -= 1
+
+
+class SlowFirestore(FakeFirestore):
+    def batch(self):
+        return SlowBatch(self)
+
+
+def test_bulk_writer_flush_cancels_other_batches_when_one_fails():
+    db = SlowFirestore()
+    writer = BulkWriter(db, batch_size=1, max_in_flight=2, base_delay=0)
+    store = {"a": {}, "b": {}}
+
+    async def _run():
+        await writer.delete(FakeDoc(store, "a"))
+        db.failures = [google_exceptions.PermissionDenied("denied")]
+        await writer.delete(FakeDoc(store, "b"))
+        with pytest.raises(google_exceptions.PermissionDenied):
+            await writer.flush()
+        return db.in_flight
+
+    assert asyncio.run(asyncio.wait_for(_run(), timeout=5)) == 0
+    assert db.commits == []
+
+
+def test_delete_document_tree_walks_nested_subcollections():
+    plans = {"u1": {}}
+    steps = {"s1": {}, "s2": {}}
+    notes = {"n1": {}}
+    children = {"u1": {"steps": steps}, "s1": {"notes": notes}}
+    db = FakeFirestore()
+    writer = BulkWriter(db, base_delay=0)
+    plan_ref = FakeDoc(plans, "u1", children)
+
+    async def _run(recursive):
+        queued = await delete_document_tree(writer, plan_ref, recursive=recursive)
+        await writer.flush()
+        return queued
+
+    assert asyncio.run(_run(True)) == 3
+    assert plans == {}
+    assert steps == {}
+    assert notes == {}
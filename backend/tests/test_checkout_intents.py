@@ -4,12 +4,14 @@ from google.cloud import firestore
 from app.auth import deps as auth_deps
 from app.main import app
 from app.routers import checkout
+from app.services.course_catalog import invalidate_course
 
 
 class FakeSnap:
-    def __init__(self, doc_id, data):
+    def __init__(self, doc_id, data, reference=None):
         self.id = doc_id
         self._data = data
+        self.reference = reference
 
     @property
     def exists(self):
@@ -23,11 +25,12 @@ class FakeDoc:
     def __init__(self, store, doc_id):
         self._store = store
         self.id = doc_id
+        self.path = f"{id(store)}/{doc_id}"
 
-    def get(self):
-        return FakeSnap(self.id, self._store.get(self.id))
+    async def get(self):
+        return FakeSnap(self.id, self._store.get(self.id), self)
 
-    def set(self, data, merge=False):
+    async def set(self, data, merge=False):
         normalized = _normalize(data)
         if merge and self.id in self._store:
             existing = self._store[self.id]
@@ -54,7 +57,11 @@ class FakeQuery:
         self._limit = value
         return self
 
-    def stream(self):
+    async def stream(self):
+        for snap in self._snapshots():
+            yield snap
+
+    def _snapshots(self):
         snaps: list[FakeSnap] = []
         for doc_id, data in self._store.items():
             if data is None:
@@ -94,9 +101,11 @@ class FakeFirestore:
         self._courses = courses or {}
         self._payments = payments or {}
         self._config = config or {}
+        self.course_reads = 0
 
     def collection(self, name):
         if name == "courses":
+            self.course_reads += 1
             return FakeCollection(self._courses)
         if name == "payments":
             return FakeCollection(self._payments)
@@ -131,10 +140,10 @@ def _student(status: str):
 def test_checkout_intent_allows_active_students(monkeypatch):
     fake_db = FakeFirestore(
         courses={
-            "c1": {"priceUsdCents": 1200, "isActive": True},
+            "c1": {"title": "Course 1", "priceUsdCents": 1200, "isActive": True},
         }
     )
-    monkeypatch.setattr(checkout, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(checkout, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = lambda: _student("active")
     client = TestClient(app)
 
@@ -147,13 +156,48 @@ def test_checkout_intent_allows_active_students(monkeypatch):
     app.dependency_overrides.clear()
 
 
+def test_checkout_intent_prices_courses_from_catalog_snapshot(monkeypatch):
+    fake_db = FakeFirestore(
+        courses={
+            "c1": {"title": "Course 1", "priceUsdCents": 1200, "isActive": True},
+            "c2": {"title": "Course 2", "priceUsdCents": 800, "isActive": True},
+            "c3": {"title": "Course 3", "priceUsdCents": 500, "isActive": False},
+        }
+    )
+    monkeypatch.setattr(checkout, "get_async_firestore_client", lambda: fake_db)
+    app.dependency_overrides[auth_deps.get_current_user] = lambda: _student("active")
+    client = TestClient(app)
+
+    ok = client.post("/api/checkout/intents", json={"selectedCourses": ["c1", "c2"]})
+    rejected = client.post(
+        "/api/checkout/intents", json={"selectedCourses": ["c1", "c3", "missing"]}
+    )
+    reads_before_edit = fake_db.course_reads
+    fake_db._courses["c1"]["priceUsdCents"] = 1500
+    invalidate_course("c1")
+    repriced = client.post("/api/checkout/intents", json={"selectedCourses": ["c1"]})
+
+    assert ok.status_code == 201
+    assert ok.json()["amount"] == 2000
+    assert rejected.status_code == 400
+    assert rejected.json()["error"]["details"]["invalidCourseIds"] == [
+        "c3",
+        "missing",
+    ]
+    assert reads_before_edit == 1
+    assert repriced.json()["amount"] == 1500
+    assert fake_db.course_reads == 2
+
+    app.dependency_overrides.clear()
+
+
 def test_checkout_intent_zeroes_amount_for_first_hundred_students(monkeypatch):
     fake_db = FakeFirestore(
         courses={
-            "c1": {"priceUsdCents": 1200, "isActive": True},
+            "c1": {"title": "Course 1", "priceUsdCents": 1200, "isActive": True},
         }
     )
-    monkeypatch.setattr(checkout, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(checkout, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = lambda: {
         **_student("active"),
         "isFirstHundred": True,
@@ -173,8 +217,8 @@ def test_checkout_intent_zeroes_amount_for_first_hundred_students(monkeypatch):
 def test_checkout_intent_retries_activation_code_until_unique(monkeypatch):
     fake_db = FakeFirestore(
         courses={
-            "c1": {"priceUsdCents": 1000, "isActive": True},
-            "c2": {"priceUsdCents": 2500, "isActive": True},
+            "c1": {"title": "Course 1", "priceUsdCents": 1000, "isActive": True},
+            "c2": {"title": "Course 2", "priceUsdCents": 2500, "isActive": True},
         },
         payments={
             "existing": {
@@ -183,7 +227,7 @@ def test_checkout_intent_retries_activation_code_until_unique(monkeypatch):
             }
         },
     )
-    monkeypatch.setattr(checkout, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(checkout, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = lambda: _student("disabled")
     sequence = iter(["SW-DUPL1CAT", "SW-UN1QU3AB"])
     monkeypatch.setattr(checkout, "_generate_activation_code", lambda: next(sequence))
@@ -212,10 +256,10 @@ def test_checkout_intent_retries_activation_code_until_unique(monkeypatch):
 def test_checkout_intent_allows_active_students_for_additional_courses(monkeypatch):
     fake_db = FakeFirestore(
         courses={
-            "c2": {"priceUsdCents": 2500, "isActive": True},
+            "c2": {"title": "Course 2", "priceUsdCents": 2500, "isActive": True},
         }
     )
-    monkeypatch.setattr(checkout, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(checkout, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = lambda: {
         **_student("active"),
         "selectedCourses": ["c1"],
@@ -235,10 +279,10 @@ def test_checkout_intent_allows_active_students_for_additional_courses(monkeypat
 def test_checkout_intent_rejects_already_owned_courses(monkeypatch):
     fake_db = FakeFirestore(
         courses={
-            "c1": {"priceUsdCents": 1200, "isActive": True},
+            "c1": {"title": "Course 1", "priceUsdCents": 1200, "isActive": True},
         }
     )
-    monkeypatch.setattr(checkout, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(checkout, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = lambda: {
         **_student("active"),
         "selectedCourses": ["c1"],
@@ -0,0 +1,391 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+from google.cloud import firestore
+
+from app.services import course_plan_sync, lesson_catalog
+
+
+class FakeSnap:
+    def __init__(self, doc, data):
+        self._doc = doc
+        self._data = data
+        self.id = doc.id
+
+    @property
+    def reference(self):
+        return self._doc
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return self._data
+
+
+class FakeDoc:
+    def __init__(self, db, store, doc_id, children=None):
+        self._db = db
+        self._store = store
+        self.id = doc_id
+        self.path = f"{id(store)}/{doc_id}"
+        self._children = children if children is not None else {}
+
+    async def get(self, transaction=None):
+        _ = transaction
+        return FakeSnap(self, self._store.get(self.id))
+
+    async def set(self, data, merge=False):
+        _ = merge
+        self._store[self.id] = _apply(self._store.get(self.id) or {}, data)
+
+    async def update(self, data):
+        self._store[self.id] = _apply(self._store[self.id], data)
+
+    def collection(self, name):
+        store = self._children.setdefault(self.id, {}).setdefault(name, {})
+        return FakeQuery(self._db, store)
+
+
+class FakeQuery:
+    def __init__(self, db, store, filters=(), order=None, limit=None):
+        self._db = db
+        self._store = store
+        self._filters = list(filters)
+        self._order = order
+        self._limit = limit
+
+    def document(self, doc_id=None):
+        if doc_id is None:
+            self._db.auto_ids += 1
+            doc_id = f"auto{self._db.auto_ids:03d}"
+        return FakeDoc(self._db, self._store, doc_id)
+
+    def where(self, field, op, value):
+        assert op == "=="
+        return FakeQuery(
+            self._db, self._store, [*self._filters, (field, value)], self._order
+        )
+
+    def order_by(self, field, direction=None):
+        return FakeQuery(
+            self._db,
+            self._store,
+            self._filters,
+            (field, direction == firestore.Query.DESCENDING),
+            self._limit,
+        )
+
+    def limit(self, value):
+        return FakeQuery(self._db, self._store, self._filters, self._order, value)
+
+    async def stream(self):
+        self._db.streams.append(self._limit)
+        await asyncio.sleep(0)
+        items = [
+            (doc_id, data)
+            for doc_id, data in self._store.items()
+            if all(data.get(field) == value for field, value in self._filters)
+        ]
+        if self._order is not None:
+            field, descending = self._order
+            items.sort(key=lambda item: item[1][field], reverse=descending)
+        for doc_id, data in items[: self._limit]:
+            yield FakeSnap(FakeDoc(self._db, self._store, doc_id), data)
+
+
+class FakeBatch:
+    def __init__(self, db):
+        self._db = db
+        self._ops = []
+
+    def set(self, doc_ref, data, merge=False):
+        self._ops.append((doc_ref.set, data, {"merge": merge}))
+
+    def update(self, doc_ref, data):
+        self._ops.append((doc_ref.update, data, {}))
+
+    async def commit(self):
+        if self._db.failing_commits:
+            self._db.failing_commits -= 1
+            raise google_exceptions.PermissionDenied("denied")
+        self._db.commits.append(len(self._ops))
+        for write, data, kwargs in self._ops:
+            await write(data, **kwargs)
+
+
+class FakeTransaction:
+    _read_only = False
+    _max_attempts = 1
+    _id = b"fake-transaction"
+
+    def __init__(self):
+        self._ops = []
+
+    def _clean_up(self):
+        pass
+
+    async def _begin(self, retry_id=None):
+        _ = retry_id
+
+    async def _commit(self):
+        for doc_ref, data in self._ops:
+            await doc_ref.update(data)
+
+    async def _rollback(self):
+        self._ops = []
+
+    def update(self, doc_ref, data):
+        self._ops.append((doc_ref, data))
+
+
+class FakeFirestore:
+    def __init__(self, users, plans=None, steps=None, courses=None, lessons=None):
+        self.users = users
+        self.plans = plans or {}
+        self.plan_children = {uid: {"steps": s} for uid, s in (steps or {}).items()}
+        self.courses = courses or {}
+        self.course_children = {
+            cid: {"lessons": items} for cid, items in (lessons or {}).items()
+        }
+        self.auto_ids = 0
+        self.streams = []
+        self.commits = []
+        self.failing_commits = 0
+        self.get_all_calls = []
+
+    def collection(self, name):
+        stores = {
+            "users": (self.users, None),
+            "student_plans": (self.plans, self.plan_children),
+            "courses": (self.courses, self.course_children),
+        }
+        store, children = stores[name]
+        query = FakeQuery(self, store)
+        query.document = lambda doc_id: FakeDoc(self, store, doc_id, children)
+        return query
+
+    async def get_all(self, refs):
+        self.get_all_calls.append([ref.id for ref in refs])
+        for ref in refs:
+            yield await ref.get()
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def transaction(self):
+        return FakeTransaction()
+
+
+def _apply(current, data):
+    result = dict(current)
+    for key, value in data.items():
+        if value is firestore.SERVER_TIMESTAMP:
+            result[key] = "SERVER_TIMESTAMP"
+        elif isinstance(value, firestore.ArrayUnion):
+            existing = list(result.get(key) or [])
+            result[key] = existing + [v for v in value.values if v not in existing]
+        elif isinstance(value, firestore.Increment):
+            result[key] = (result.get(key) or 0) + value.value
+        elif isinstance(value, firestore.ArrayRemove):
+            result[key] = [v for v in result.get(key) or [] if v not in value.values]
+        else:
+            result[key] = value
+    return result
+
+
+def _course():
+    return {"title": "Course", "priceUsdCents": 100, "isActive": True}
+
+
+def _lesson(order, active=True):
+    return {
+        "title": f"Lesson {order}",
+        "type": "text",
+        "content": "Body",
+        "order": order,
+        "isActive": active,
+    }
+
+
+def test_append_writes_only_missing_lessons_using_plan_index():
+    users = {
+        "u1": {
+            "selectedCourses": ["c1"],
+            "stepsDone": 1,
+            "stepsTotal": 2,
+            "progressPercent": 50,
+        }
+    }
+    plans = {"u1": {"goalId": "g1", "sourceLessonKeys": ["c1/l1"]}}
+    steps = {
+        "u1": {
+            "s1": {"order": 0, "isDone": True, "sourceCourseId": "c1"},
+            "s2": {"order": 4, "isDone": False},
+        }
+    }
+    lessons = {
+        "c1": {"l1": _lesson(0), "l2": _lesson(1), "off": _lesson(2, active=False)},
+        "c2": {"m1": _lesson(0)},
+    }
+    db = FakeFirestore(
+        users,
+        plans,
+        steps,
+        courses={"c1": _course(), "c2": _course()},
+        lessons=lessons,
+    )
+
+    result = asyncio.run(
+        course_plan_sync.append_courses_to_student_plan(db, "u1", ["c1", "c2"])
+    )
+
+    assert result == {"addedCourseIds": ["c2"], "createdSteps": 2}
+    assert db.get_all_calls == [["c1", "c2"]]
+    # Two lesson queries plus the limit(1) max-order probe; no steps scan.
+    assert sorted(db.streams, key=str) == [1, None, None]
+    created = {
+        step["sourceLessonId"]: step["order"]
+        for step in steps["u1"].values()
+        if "sourceLessonId" in step
+    }
+    assert created == {"l2": 5, "m1": 6}
+    # Both steps and the plan index update commit in one batch.
+    assert db.commits == [3]
+    assert plans["u1"]["revision"] == 1
+    assert plans["u1"]["sourceLessonKeys"] == ["c1/l1", "c1/l2", "c2/m1"]
+    assert users["u1"]["selectedCourses"] == ["c1", "c2"]
+    assert users["u1"]["stepsTotal"] == 4
+    assert users["u1"]["stepsDone"] == 1
+
+
+def test_append_scans_and_indexes_legacy_plans_once():
+    users = {"u1": {}}
+    plans = {"u1": {"goalId": "g1"}}
+    steps = {
+        "u1": {
+            "s1": {
+                "order": 0,
+                "isDone": True,
+                "sourceCourseId": "c1",
+                "sourceLessonId": "l1",
+            }
+        }
+    }
+    db = FakeFirestore(
+        users,
+        plans,
+        steps,
+        courses={"c1": _course()},
+        lessons={"c1": {"l1": _lesson(0), "l2": _lesson(1)}},
+    )
+
+    first = asyncio.run(
+        course_plan_sync.append_courses_to_student_plan(db, "u1", ["c1"])
+    )
+    again = asyncio.run(
+        course_plan_sync.append_courses_to_student_plan(db, "u1", ["c1"])
+    )
+
+    assert first == {"addedCourseIds": ["c1"], "createdSteps": 1}
+    assert again == {"addedCourseIds": [], "createdSteps": 0}
+    assert plans["u1"]["sourceLessonKeys"] == ["c1/l1", "c1/l2"]
+    assert users["u1"]["stepsDone"] == 1
+    assert users["u1"]["stepsTotal"] == 2
+    assert len(steps["u1"]) == 2
+
+
+def test_retry_after_a_failed_batch_does_not_duplicate_committed_steps(monkeypatch):
+    monkeypatch.setattr(course_plan_sync, "STEPS_PER_BATCH", 1)
+    users = {"u1": {}}
+    plans = {"other": {}}
+    steps = {"u1": {}}
+    db = FakeFirestore(
+        users,
+        plans,
+        steps,
+        courses={"c1": _course()},
+        lessons={"c1": {"l1": _lesson(0), "l2": _lesson(1)}},
+    )
+
+    db.failing_commits = 1
+    with pytest.raises(google_exceptions.PermissionDenied):
+        asyncio.run(course_plan_sync.append_courses_to_student_plan(db, "u1", ["c1"]))
+    committed = plans["u1"]["sourceLessonKeys"]
+    retried = asyncio.run(
+        course_plan_sync.append_courses_to_student_plan(db, "u1", ["c1"])
+    )
+
+    assert len(committed) == 1
+    assert plans["u1"]["studentUid"] == "u1"
+    assert retried["createdSteps"] == 1
+    assert sorted(plans["u1"]["sourceLessonKeys"]) == ["c1/l1", "c1/l2"]
+    assert sorted(step["sourceLessonId"] for step in steps["u1"].values()) == [
+        "l1",
+        "l2",
+    ]
+
+
+def test_reference_mode_stores_ids_and_hydrates_from_lesson_catalog(monkeypatch):
+    class _Settings:
+        PLAN_STEPS_REFERENCE_LESSONS = True
+
+    monkeypatch.setattr(course_plan_sync, "get_settings", lambda: _Settings())
+    lesson_catalog.lesson_catalog.clear()
+    users = {"u1": {}}
+    plans = {}
+    steps = {"u1": {}}
+    lessons = {"c1": {"l1": {**_lesson(0), "materialUrl": "https://x"}}}
+    db = FakeFirestore(users, plans, steps, courses={"c1": _course()}, lessons=lessons)
+
+    asyncio.run(course_plan_sync.append_courses_to_student_plan(db, "u1", ["c1"]))
+
+    [stored] = steps["u1"].values()
+    assert "title" not in stored
+    assert "description" not in stored
+    assert stored["sourceLessonId"] == "l1"
+
+    items = [
+        {**stored, "stepId": "auto001"},
+        {"title": "Custom", "description": "D", "materialUrl": None},
+    ]
+    asyncio.run(lesson_catalog.hydrate_plan_steps(db, items))
+    asyncio.run(lesson_catalog.hydrate_plan_steps(db, [{**stored}]))
+
+    assert items[0]["title"] == "Lesson 0"
+    assert items[0]["description"] == "Body"
+    assert items[0]["materialUrl"] == "https://x"
+    assert items[1]["title"] == "Custom"
+    # The second hydrate is served from the catalog cache.
+    assert len(db.get_all_calls) == 2
+    assert lesson_catalog.lesson_catalog.stats()["hits"] >= 1
+
+    lessons["c1"]["l1"]["title"] = "Renamed"
+    lesson_catalog.invalidate_lesson("c1", "l1")
+    renamed = asyncio.run(lesson_catalog.hydrate_plan_steps(db, [{**stored}]))
+    assert renamed[0]["title"] == "Renamed"
+
+
+def test_hydration_rereads_lessons_cached_before_the_step_changed():
+    step = {"order": 0, "sourceCourseId": "c1", "sourceLessonId": "l1"}
+    lessons = {"c1": {"l1": _lesson(0)}}
+    db = FakeFirestore({}, {}, {}, courses={"c1": _course()}, lessons=lessons)
+    asyncio.run(lesson_catalog.hydrate_plan_steps(db, [{**step}]))
+
+    # Edited on another instance: this one's cache is not invalidated, but
+    # the fan-out touches the step afterwards.
+    lessons["c1"]["l1"]["title"] = "Renamed"
+    now = datetime.now(timezone.utc)
+    older = {**step, "updatedAt": now - timedelta(minutes=5)}
+    touched = {**step, "updatedAt": now + timedelta(seconds=1)}
+
+    [cached] = asyncio.run(lesson_catalog.hydrate_plan_steps(db, [older]))
+    assert cached["title"] == "Lesson 0"
+    assert len(db.get_all_calls) == 1
+
+    [fresh] = asyncio.run(lesson_catalog.hydrate_plan_steps(db, [touched]))
+    assert fresh["title"] == "Renamed"
+    assert len(db.get_all_calls) == 2
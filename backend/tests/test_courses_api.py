@@ -1,9 +1,20 @@
+import asyncio
+import copy
+
+import httpx
+
 from fastapi.testclient import TestClient
 from datetime import datetime, timedelta, timezone
 
 from app.auth import deps as auth_deps
 from app.main import app
-from app.routers import courses
+from app.routers import courses, jobs
+from app.services import fx_rates
+from app.services.course_catalog import (
+    CatalogCourses,
+    CourseCatalog,
+    invalidate_course_lessons,
+)
 
 
 class FakeSnap:
@@ -25,10 +36,10 @@ class FakeDoc:
         self.id = doc_id
         self._subcollections = subcollections or {}
 
-    def get(self):
+    async def get(self):
         return FakeSnap(self.id, self._store.get(self.id))
 
-    def set(self, data):
+    async def set(self, data):
         self._store[self.id] = data
 
     def collection(self, name):
@@ -38,22 +49,54 @@ class FakeDoc:
         return FakeCollection(sub_store[name])
 
 
+class FakeAggregation:
+    def __init__(self, value):
+        self.value = value
+
+
+class FakeCountQuery:
+    def __init__(self, query):
+        self._query = query
+
+    async def get(self):
+        return [[FakeAggregation(len(self._query._snapshots()))]]
+
+
 class FakeQuery:
     def __init__(self, store):
         self._store = store
         self._order_field = None
         self._filters = []
+        self._limit = None
 
     def where(self, field, op, value):
         self._filters.append((field, op, value))
         return self
 
+    def _copy(self):
+        query = copy.copy(self)
+        query._filters = list(self._filters)
+        return query
+
     def order_by(self, field, direction=None):
         _ = direction
-        self._order_field = field
-        return self
+        query = self._copy()
+        query._order_field = field
+        return query
+
+    def limit(self, value):
+        query = self._copy()
+        query._limit = value
+        return query
+
+    def count(self):
+        return FakeCountQuery(self)
 
-    def stream(self):
+    async def stream(self):
+        for snap in self._snapshots():
+            yield snap
+
+    def _snapshots(self):
         items = []
         for doc_id, data in self._store.items():
             if data is None:
@@ -72,8 +115,14 @@ class FakeQuery:
             if include:
                 items.append(FakeSnap(doc_id, data))
         if self._order_field:
+            # Firestore leaves out documents without the order_by field.
+            items = [
+                snap
+                for snap in items
+                if (snap.to_dict() or {}).get(self._order_field) is not None
+            ]
             items.sort(key=lambda snap: (snap.to_dict() or {}).get(self._order_field))
-        return items
+        return items[: self._limit]
 
 
 class FakeCollection(FakeQuery):
@@ -162,7 +211,7 @@ def test_list_courses_returns_active_only_goal_filter_and_stable_order(monkeypat
             },
         }
     )
-    monkeypatch.setattr(courses, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(courses, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _student
     client = TestClient(app)
 
@@ -181,6 +230,20 @@ def test_list_courses_returns_active_only_goal_filter_and_stable_order(monkeypat
     app.dependency_overrides.clear()
 
 
+def test_course_catalog_drops_loads_that_raced_an_invalidation():
+    catalog = CourseCatalog(ttl_seconds=60, max_entries=10)
+    snapshot = CatalogCourses(items=(), by_id={}, fingerprint="f")
+
+    started = catalog.version
+    catalog.invalidate_course("c1")
+    catalog.put_courses(started, snapshot)
+    assert catalog.get_courses() is None
+
+    catalog.put_courses(catalog.version, snapshot)
+    assert catalog.get_courses() is snapshot
+    assert catalog.stats()["hits"] == 1
+
+
 def test_list_courses_requires_auth():
     client = TestClient(app)
 
@@ -201,7 +264,7 @@ def test_fx_rates_happy_path_reads_from_config_doc(monkeypatch):
             }
         }
     )
-    monkeypatch.setattr(courses, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(courses, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _student
     client = TestClient(app)
 
@@ -221,18 +284,18 @@ def test_fx_rates_happy_path_reads_from_config_doc(monkeypatch):
 
 def test_fx_rates_bootstraps_missing_doc(monkeypatch):
     fake_db = FakeFirestore(config_data={})
-    monkeypatch.setattr(courses, "get_firestore_client", lambda: fake_db)
-    monkeypatch.setattr(
-        courses,
-        "_fetch_live_fx_rates",
-        lambda: {
+    monkeypatch.setattr(courses, "get_async_firestore_client", lambda: fake_db)
+
+    async def _live_fetch():
+        return {
             "base": "USD",
             "rates": {"USD": 1.0, "EUR": 0.92, "PLN": 3.8, "RUB": 81.0},
             "asOf": "2026-02-20T12:00:00Z",
             "fetchedAt": "2026-02-20T13:00:00Z",
             "source": "live",
-        },
-    )
+        }
+
+    monkeypatch.setattr(fx_rates, "_fetch_live_fx_rates", _live_fetch)
     app.dependency_overrides[auth_deps.get_current_user] = _student
     client = TestClient(app)
 
@@ -261,7 +324,7 @@ def test_fx_rates_bootstraps_missing_doc(monkeypatch):
     app.dependency_overrides.clear()
 
 
-def test_fx_rates_refreshes_stale_doc(monkeypatch):
+def test_fx_rates_serves_stale_doc_and_refreshes_once_in_background(monkeypatch):
     stale_time = (datetime.now(timezone.utc) - timedelta(hours=13)).isoformat()
     fake_db = FakeFirestore(
         config_data={
@@ -273,30 +336,36 @@ def test_fx_rates_refreshes_stale_doc(monkeypatch):
             }
         }
     )
-    monkeypatch.setattr(courses, "get_firestore_client", lambda: fake_db)
-    monkeypatch.setattr(
-        courses,
-        "_fetch_live_fx_rates",
-        lambda: {
+    fetches = []
+    fetched_at = datetime.now(timezone.utc).isoformat()
+
+    async def _live_fetch():
+        fetches.append(1)
+        await asyncio.sleep(0)
+        return {
             "base": "USD",
             "rates": {"USD": 1.0, "EUR": 0.95, "PLN": 4.1, "RUB": 80.0},
             "asOf": "2026-02-21T10:00:00Z",
-            "fetchedAt": "2026-02-21T10:05:00Z",
+            "fetchedAt": fetched_at,
             "source": "live",
-        },
-    )
-    app.dependency_overrides[auth_deps.get_current_user] = _student
-    client = TestClient(app)
+        }
 
-    response = client.get("/api/fx-rates")
+    monkeypatch.setattr(fx_rates, "_fetch_live_fx_rates", _live_fetch)
 
-    assert response.status_code == 200
-    payload = response.json()
-    assert payload["rates"]["EUR"] == 0.95
-    assert payload["source"] == "live"
-    assert fake_db._config["fx_rates"]["fetchedAt"] == "2026-02-21T10:05:00Z"
+    async def _scenario():
+        burst = await asyncio.gather(
+            *(fx_rates.load_fx_rates(fake_db) for _ in range(5))
+        )
+        await fx_rates.fx_rates_cache.refresh_task
+        return burst, await fx_rates.load_fx_rates(fake_db)
 
-    app.dependency_overrides.clear()
+    burst, after = asyncio.run(_scenario())
+
+    assert {payload["rates"]["EUR"] for payload in burst} == {0.91}
+    assert fetches == [1]
+    assert after["rates"]["EUR"] == 0.95
+    assert after["source"] == "live"
+    assert fake_db._config["fx_rates"]["fetchedAt"] == fetched_at
 
 
 def test_fx_rates_does_not_refresh_recent_doc(monkeypatch):
@@ -311,12 +380,12 @@ def test_fx_rates_does_not_refresh_recent_doc(monkeypatch):
             }
         }
     )
-    monkeypatch.setattr(courses, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(courses, "get_async_firestore_client", lambda: fake_db)
 
     def _unexpected_fetch():
         raise AssertionError("unexpected live FX refresh")
 
-    monkeypatch.setattr(courses, "_fetch_live_fx_rates", _unexpected_fetch)
+    monkeypatch.setattr(fx_rates, "_fetch_live_fx_rates", _unexpected_fetch)
     app.dependency_overrides[auth_deps.get_current_user] = _student
     client = TestClient(app)
 
@@ -342,12 +411,12 @@ def test_fx_rates_falls_back_to_cached_doc_when_live_refresh_fails(monkeypatch):
             }
         }
     )
-    monkeypatch.setattr(courses, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(courses, "get_async_firestore_client", lambda: fake_db)
 
-    def _failing_fetch():
+    async def _failing_fetch():
         raise RuntimeError("provider unavailable")
 
-    monkeypatch.setattr(courses, "_fetch_live_fx_rates", _failing_fetch)
+    monkeypatch.setattr(fx_rates, "_fetch_live_fx_rates", _failing_fetch)
     app.dependency_overrides[auth_deps.get_current_user] = _student
     client = TestClient(app)
 
@@ -362,6 +431,100 @@ def test_fx_rates_falls_back_to_cached_doc_when_live_refresh_fails(monkeypatch):
     app.dependency_overrides.clear()
 
 
+def test_fx_refresh_failure_waits_before_retrying(monkeypatch):
+    stale_time = (datetime.now(timezone.utc) - timedelta(hours=13)).isoformat()
+    fake_db = FakeFirestore(
+        config_data={"fx_rates": {"rates": {"EUR": 0.91}, "fetchedAt": stale_time}}
+    )
+    fetches = []
+
+    async def _failing_fetch():
+        fetches.append(1)
+        raise RuntimeError("provider unavailable")
+
+    monkeypatch.setattr(fx_rates, "_fetch_live_fx_rates", _failing_fetch)
+
+    failures = fx_rates.fx_rates_cache.refresh_failures
+
+    async def _scenario():
+        await fx_rates.load_fx_rates(fake_db)
+        await fx_rates.fx_rates_cache.refresh_task
+        await fx_rates.load_fx_rates(fake_db)
+        return await fx_rates.refresh_fx_rates(fake_db)
+
+    assert asyncio.run(_scenario()) is None
+    assert fetches == [1]
+    assert fx_rates.fx_rates_cache.refresh_failures == failures + 1
+
+
+def test_fetch_live_fx_rates_parses_provider_payload(monkeypatch):
+    def _handler(request):
+        assert request.url == "https://open.er-api.com/v6/latest/USD"
+        return httpx.Response(
+            200,
+            json={
+                "base_code": "usd",
+                "time_last_update_unix": 1771545600,
+                "rates": {"EUR": 0.9, "GBP": 0.8, "bad": -1},
+            },
+        )
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(
+        fx_rates.httpx,
+        "AsyncClient",
+        lambda **kwargs: real_client(transport=httpx.MockTransport(_handler), **kwargs),
+    )
+
+    payload = asyncio.run(fx_rates._fetch_live_fx_rates())
+
+    assert payload["base"] == "USD"
+    assert payload["rates"]["EUR"] == 0.9
+    assert payload["rates"]["GBP"] == 0.8
+    assert payload["rates"]["RUB"] == 82.0
+    assert "BAD" not in payload["rates"]
+    assert payload["asOf"] == "2026-02-20T00:00:00Z"
+    assert payload["source"] == "live"
+
+
+class _JobSettings:
+    JOB_TOKEN = "job-secret"
+
+
+def test_fx_refresh_job_forces_a_refresh(monkeypatch):
+    fresh_time = (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat()
+    fake_db = FakeFirestore(
+        config_data={"fx_rates": {"rates": {"EUR": 0.91}, "fetchedAt": fresh_time}}
+    )
+    outcomes = [RuntimeError("provider unavailable")]
+
+    async def _live_fetch():
+        if outcomes:
+            raise outcomes.pop()
+        return {
+            "base": "USD",
+            "rates": {"USD": 1.0, "EUR": 0.93},
+            "asOf": None,
+            "fetchedAt": "2026-02-21T10:05:00Z",
+            "source": "live",
+        }
+
+    monkeypatch.setattr(fx_rates, "_fetch_live_fx_rates", _live_fetch)
+    monkeypatch.setattr(jobs, "get_settings", lambda: _JobSettings())
+    monkeypatch.setattr(jobs, "get_async_firestore_client", lambda: fake_db)
+    client = TestClient(app)
+    headers = {"X-Job-Token": "job-secret"}
+
+    failed = client.post("/jobs/fx-rates/refresh", headers=headers)
+    refreshed = client.post("/jobs/fx-rates/refresh", headers=headers)
+
+    assert failed.status_code == 502
+    assert failed.json()["error"]["code"] == "fx_rates_refresh_failed"
+    assert refreshed.status_code == 200
+    assert refreshed.json()["rates"]["EUR"] == 0.93
+    assert fake_db._config["fx_rates"]["fetchedAt"] == "2026-02-21T10:05:00Z"
+
+
 def test_onboarding_user_can_list_active_lessons(monkeypatch):
     long_content = " ".join(f"word{i}" for i in range(1, 26))
     fake_db = FakeFirestore(
@@ -384,7 +547,7 @@ def test_onboarding_user_can_list_active_lessons(monkeypatch):
             }
         },
     )
-    monkeypatch.setattr(courses, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(courses, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = lambda: _student("disabled")
     client = TestClient(app)
 
@@ -422,7 +585,7 @@ def test_active_student_can_read_active_lessons(monkeypatch):
             }
         },
     )
-    monkeypatch.setattr(courses, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(courses, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _student
     client = TestClient(app)
 
@@ -437,6 +600,37 @@ def test_active_student_can_read_active_lessons(monkeypatch):
     app.dependency_overrides.clear()
 
 
+def test_lesson_list_etag_depends_on_lessons_and_redaction(monkeypatch):
+    lessons = {
+        "l1": {"title": "Lesson 1", "content": "Text 1", "order": 0, "isActive": True}
+    }
+    fake_db = FakeFirestore(
+        courses_data={"c1": {"title": "Course A"}}, lesson_data={"c1": lessons}
+    )
+    monkeypatch.setattr(courses, "get_async_firestore_client", lambda: fake_db)
+    client = TestClient(app)
+
+    app.dependency_overrides[auth_deps.get_current_user] = _student
+    first = client.get("/api/courses/c1/lessons")
+    etag = first.headers["ETag"]
+    repeat = client.get("/api/courses/c1/lessons", headers={"If-None-Match": etag})
+    app.dependency_overrides[auth_deps.get_current_user] = lambda: _student("disabled")
+    redacted = client.get("/api/courses/c1/lessons", headers={"If-None-Match": etag})
+    app.dependency_overrides[auth_deps.get_current_user] = _student
+    lessons["l2"] = {"title": "Lesson 2", "order": 1, "isActive": True}
+    cached = client.get("/api/courses/c1/lessons", headers={"If-None-Match": etag})
+    invalidate_course_lessons("c1")
+    added = client.get("/api/courses/c1/lessons", headers={"If-None-Match": etag})
+    app.dependency_overrides.clear()
+
+    assert first.status_code == 200
+    assert repeat.status_code == 304
+    assert redacted.status_code == 200
+    assert cached.status_code == 304
+    assert added.status_code == 200
+    assert [item["id"] for item in added.json()["items"]] == ["l1", "l2"]
+
+
 def test_community_only_student_lesson_list_is_redacted(monkeypatch):
     long_content = " ".join(f"word{i}" for i in range(1, 23))
     fake_db = FakeFirestore(
@@ -453,7 +647,7 @@ def test_community_only_student_lesson_list_is_redacted(monkeypatch):
             }
         },
     )
-    monkeypatch.setattr(courses, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(courses, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = lambda: _student(
         "community_only"
     )
@@ -485,7 +679,7 @@ def test_staff_can_read_inactive_lesson_detail(monkeypatch):
             }
         },
     )
-    monkeypatch.setattr(courses, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(courses, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _staff
     client = TestClient(app)
 
@@ -511,7 +705,7 @@ def test_active_user_get_lesson_by_id(monkeypatch):
             }
         },
     )
-    monkeypatch.setattr(courses, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(courses, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _student
     client = TestClient(app)
 
@@ -0,0 +1,65 @@
+import asyncio
+
+from app.db.loader import DocumentLoader, get_documents
+
+
+class _FakeSnap:
+    def __init__(self, ref, data):
+        self.reference = ref
+        self.id = ref.id
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+
+class _FakeRef:
+    def __init__(self, doc_id):
+        self.id = doc_id
+        self.path = f"courses/{doc_id}"
+
+
+class _FakeDb:
+    def __init__(self, store):
+        self._store = store
+        self.calls: list[list[str]] = []
+
+    async def get_all(self, refs):
+        self.calls.append([ref.id for ref in refs])
+        for ref in refs:
+            yield _FakeSnap(ref, self._store.get(ref.id))
+
+
+def test_loader_batches_loads_from_the_same_tick_and_dedupes():
+    db = _FakeDb({"c1": {"title": "A"}, "c2": {"title": "B"}})
+
+    async def _run():
+        loader = DocumentLoader(db)
+        first, second, again = await asyncio.gather(
+            loader.load(_FakeRef("c1")),
+            loader.load(_FakeRef("c2")),
+            loader.load(_FakeRef("c1")),
+        )
+        later = await loader.load(_FakeRef("missing"))
+        cached = await loader.load(_FakeRef("c2"))
+        return first, second, again, later, cached
+
+    first, second, again, later, cached = asyncio.run(_run())
+
+    assert first is again
+    assert (first.id, second.id) == ("c1", "c2")
+    assert later.exists is False
+    assert cached is second
+    assert db.calls == [["c1", "c2"], ["missing"]]
+
+
+def test_get_documents_preserves_request_order():
+    db = _FakeDb({"c1": {}, "c2": {}})
+
+    snaps = asyncio.run(
+        get_documents(db, [_FakeRef("c2"), _FakeRef("c1"), _FakeRef("c2")])
+    )
+
+    assert [snap.id for snap in snaps] == ["c2", "c1", "c2"]
+    assert db.calls == [["c2", "c1"]]
@@ -1,6 +1,7 @@
 from types import SimpleNamespace
 
 from app.db import firestore as firestore_db
+from app.db.instrumentation import InstrumentedAsyncClient
 
 
 def test_get_firestore_client_uses_testing_db_for_local(monkeypatch):
@@ -64,3 +65,26 @@ def test_get_firestore_client_uses_pathways_db_for_production(monkeypatch):
 
     assert client == "client"
     assert calls == [{"project": "p1", "database": "pathways"}]
+
+
+def test_get_async_firestore_client_uses_pathways_db_for_production(monkeypatch):
+    calls: list[dict[str, str]] = []
+
+    def fake_client(**kwargs):
+        calls.append(kwargs)
+        return "async-client"
+
+    monkeypatch.setattr(
+        firestore_db,
+        "get_settings",
+        lambda: SimpleNamespace(ENV="production", FIREBASE_PROJECT_ID="p1"),
+    )
+    monkeypatch.setattr(firestore_db.firestore, "AsyncClient", fake_client)
+    firestore_db.get_async_firestore_client.cache_clear()
+
+    client = firestore_db.get_async_firestore_client()
+
+    assert isinstance(client, InstrumentedAsyncClient)
+    assert client._wrapped == "async-client"
+    assert calls == [{"project": "p1", "database": "pathways"}]
+    firestore_db.get_async_firestore_client.cache_clear()
@@ -0,0 +1,272 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+from google.cloud import firestore
+
+from app.core.background import start_background_task
+from app.core.middleware import FIRESTORE_OPS_HEADER
+from app.db.instrumentation import (
+    InstrumentedAsyncClient,
+    current_firestore_op_stats,
+    start_firestore_op_stats,
+    stop_firestore_op_stats,
+)
+from app.db.memo import (
+    current_document_memo,
+    start_document_memo,
+    stop_document_memo,
+)
+from app.main import app
+
+
+class _FakeSnap:
+    def __init__(self, doc, data):
+        self.reference = doc
+        self.id = doc.id
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return self._data
+
+
+COMMIT_TIME = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _write_result():
+    return SimpleNamespace(update_time=COMMIT_TIME)
+
+
+class _FakeDoc:
+    def __init__(self, store, doc_id):
+        self._store = store
+        self.id = doc_id
+        self.path = f"users/{doc_id}"
+
+    async def get(self):
+        return _FakeSnap(self, self._store.get(self.id))
+
+    async def set(self, data, merge=False):
+        self._store[self.id] = dict(data)
+        return _write_result()
+
+    async def update(self, data):
+        self._store[self.id].update(data)
+        return _write_result()
+
+    async def delete(self):
+        self._store.pop(self.id, None)
+
+
+class _FakeQuery:
+    def __init__(self, store):
+        self._store = store
+
+    def where(self, *_args, **_kwargs):
+        return self
+
+    async def stream(self):
+        for doc_id, data in list(self._store.items()):
+            yield _FakeSnap(_FakeDoc(self._store, doc_id), data)
+
+
+class _FakeCollection(_FakeQuery):
+    def document(self, doc_id):
+        return _FakeDoc(self._store, doc_id)
+
+
+class _FakeBatch:
+    def __init__(self):
+        self.ops = []
+
+    def set(self, doc_ref, data, merge=False):
+        self.ops.append(("set", doc_ref, data))
+
+    def delete(self, doc_ref):
+        self.ops.append(("delete", doc_ref, None))
+
+    async def commit(self):
+        for op, doc_ref, data in self.ops:
+            if op == "set":
+                await doc_ref.set(data)
+            else:
+                await doc_ref.delete()
+        return [_write_result() for _ in self.ops]
+
+
+class _FakeClient:
+    def __init__(self, store):
+        self._store = store
+        self.batches = []
+
+    def collection(self, _name):
+        return _FakeCollection(self._store)
+
+    def batch(self):
+        batch = _FakeBatch()
+        self.batches.append(batch)
+        return batch
+
+    async def get_all(self, refs):
+        for ref in refs:
+            yield await ref.get()
+
+
+def test_instrumented_client_counts_reads_writes_deletes_and_round_trips():
+    store = {"a": {"n": 1}, "b": {"n": 2}}
+    db = InstrumentedAsyncClient(_FakeClient(store))
+
+    async def _run():
+        stats, token = start_firestore_op_stats()
+        try:
+            users = db.collection("users")
+            await users.document("a").get()
+            streamed = [snap async for snap in users.where("n", ">", 0).stream()]
+            fetched = [
+                snap
+                async for snap in db.get_all(
+                    [users.document("a"), users.document("missing")]
+                )
+            ]
+            await streamed[0].reference.set({"n": 3})
+            batch = db.batch()
+            batch.set(users.document("c"), {"n": 4})
+            batch.delete(fetched[0].reference)
+            await batch.commit()
+            return stats
+        finally:
+            stop_firestore_op_stats(token)
+
+    stats = asyncio.run(_run())
+
+    assert (stats.reads, stats.writes, stats.deletes, stats.round_trips) == (
+        5,
+        2,
+        1,
+        5,
+    )
+    assert stats.duration_ms >= 0
+    assert store == {"b": {"n": 2}, "c": {"n": 4}}
+    assert current_firestore_op_stats() is None
+
+
+def test_batch_receives_unwrapped_references():
+    fake = _FakeClient({})
+    db = InstrumentedAsyncClient(fake)
+    batch = db.batch()
+    batch.set(db.collection("users").document("u1"), {"n": 1})
+
+    assert isinstance(fake.batches[0].ops[0][1], _FakeDoc)
+
+
+def test_request_logging_middleware_exposes_firestore_ops_header():
+    client = TestClient(app)
+
+    response = client.get("/api/healthz")
+
+    assert response.status_code == 200
+    assert response.headers[FIRESTORE_OPS_HEADER] == (
+        "reads=0, writes=0, deletes=0, round_trips=0, memo_hits=0, time_ms=0.0"
+    )
+
+
+def test_document_memo_serves_repeat_reads_and_merges_local_writes():
+    store = {"a": {"n": 1, "nested": {"x": 1}}, "b": {"n": 2}}
+    db = InstrumentedAsyncClient(_FakeClient(store))
+
+    async def _run():
+        stats, stats_token = start_firestore_op_stats()
+        _, memo_token = start_document_memo()
+        try:
+            users = db.collection("users")
+            doc = users.document("a")
+            await doc.get()
+            await doc.update(
+                {
+                    "n": firestore.Increment(2),
+                    "nested.y": 2,
+                    "updatedAt": firestore.SERVER_TIMESTAMP,
+                }
+            )
+            after_update = (await doc.get()).to_dict()
+            batch = db.batch()
+            batch.set(users.document("c"), {"n": 3})
+            batch.delete(users.document("b"))
+            await batch.commit()
+            fetched = {
+                snap.id: snap.to_dict()
+                async for snap in db.get_all(
+                    [users.document("a"), users.document("b"), users.document("c")]
+                )
+            }
+            return stats, after_update, fetched
+        finally:
+            stop_document_memo(memo_token)
+            stop_firestore_op_stats(stats_token)
+
+    stats, after_update, fetched = asyncio.run(_run())
+
+    assert after_update == {
+        "n": 3,
+        "nested": {"x": 1, "y": 2},
+        "updatedAt": COMMIT_TIME,
+    }
+    assert fetched == {"a": after_update, "b": None, "c": {"n": 3}}
+    assert stats.reads == 1
+    assert stats.memo_hits == 4
+    assert stats.round_trips == 3
+
+
+def test_document_memo_forgets_unresolvable_writes():
+    store = {"a": {"tags": ["x"]}}
+    db = InstrumentedAsyncClient(_FakeClient(store))
+
+    async def _run():
+        stats, stats_token = start_firestore_op_stats()
+        _, memo_token = start_document_memo()
+        try:
+            doc = db.collection("users").document("a")
+            await doc.get()
+            await doc.update({"tags": firestore.ArrayUnion(["y"])})
+            store["a"] = {"tags": ["x", "y"]}
+            snap = await doc.get()
+            return stats, snap.to_dict()
+        finally:
+            stop_document_memo(memo_token)
+            stop_firestore_op_stats(stats_token)
+
+    stats, data = asyncio.run(_run())
+
+    assert data == {"tags": ["x", "y"]}
+    assert stats.reads == 2
+    assert stats.memo_hits == 0
+
+
+def test_background_tasks_do_not_inherit_request_memo_or_stats():
+    store = {"a": {"n": 1}}
+    db = InstrumentedAsyncClient(_FakeClient(store))
+
+    async def _background():
+        snap = await db.collection("users").document("a").get()
+        return snap.to_dict(), current_document_memo(), current_firestore_op_stats()
+
+    async def _run():
+        stats, stats_token = start_firestore_op_stats()
+        _, memo_token = start_document_memo()
+        try:
+            await db.collection("users").document("a").get()
+            store["a"] = {"n": 2}
+            return stats, await start_background_task(_background())
+        finally:
+            stop_document_memo(memo_token)
+            stop_firestore_op_stats(stats_token)
+
+    stats, background = asyncio.run(_run())
+
+    assert background == ({"n": 2}, None, None)
+    assert stats.reads == 1
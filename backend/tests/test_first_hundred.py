@@ -0,0 +1,221 @@
+import asyncio
+
+from google.api_core import exceptions as google_exceptions
+
+from app.db import firestore as firestore_db
+from app.db.instrumentation import (
+    InstrumentedAsyncClient,
+    start_firestore_op_stats,
+    stop_firestore_op_stats,
+)
+
+
+class _FakeSnap:
+    def __init__(self, doc, data):
+        self.reference = doc
+        self.id = doc.id
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return self._data
+
+
+class _FakeDoc:
+    def __init__(self, db, collection, doc_id):
+        self._db = db
+        self._collection = collection
+        self.id = doc_id
+        self.path = f"{collection}/{doc_id}"
+
+    async def get(self, transaction=None):
+        # Yield so concurrent registrations interleave their reads.
+        await asyncio.sleep(0)
+        if transaction is not None:
+            transaction.read_versions[self.path] = self._db.versions.get(self.path, 0)
+        return _FakeSnap(self, self._db.stores[self._collection].get(self.id))
+
+
+class _FakeAggregation:
+    def __init__(self, value):
+        self.value = value
+
+
+class _FakeCountQuery:
+    def __init__(self, query):
+        self._query = query
+
+    async def get(self):
+        return [[_FakeAggregation(self._query.matching())]]
+
+
+class _FakeQuery:
+    def __init__(self, db, collection, filters=()):
+        self._db = db
+        self._collection = collection
+        self._filters = filters
+
+    def where(self, field, op, value):
+        assert op == "=="
+        return _FakeQuery(self._db, self._collection, (*self._filters, (field, value)))
+
+    def count(self):
+        return _FakeCountQuery(self)
+
+    def matching(self):
+        return sum(
+            1
+            for data in self._db.stores[self._collection].values()
+            if all(data.get(field) == value for field, value in self._filters)
+        )
+
+    def document(self, doc_id):
+        return _FakeDoc(self._db, self._collection, doc_id)
+
+
+class _FakeTransaction:
+    """Optimistic transaction: commit aborts if a read document changed."""
+
+    _read_only = False
+    _max_attempts = 10
+    _id = b"fake-transaction"
+
+    def __init__(self, db):
+        self._db = db
+        self.read_versions = {}
+        self._ops = []
+
+    def _clean_up(self):
+        self.read_versions = {}
+        self._ops = []
+
+    async def _begin(self, retry_id=None):
+        _ = retry_id
+
+    async def _commit(self):
+        await asyncio.sleep(0)
+        for path, version in self.read_versions.items():
+            if self._db.versions.get(path, 0) != version:
+                self._db.aborts += 1
+                raise google_exceptions.Aborted("contention")
+        for doc_ref, data in self._ops:
+            self._db.stores[doc_ref._collection][doc_ref.id] = dict(data)
+            self._db.versions[doc_ref.path] = self._db.versions.get(doc_ref.path, 0) + 1
+        return []
+
+    async def _rollback(self):
+        self._ops = []
+
+    def set(self, doc_ref, data, merge=False):
+        _ = merge
+        self._ops.append((doc_ref, data))
+
+
+class _FakeFirestore:
+    def __init__(self, students=0, claimed=None):
+        self.stores = {
+            "users": {f"s{index}": {"role": "student"} for index in range(students)},
+            "counters": {},
+        }
+        if claimed is not None:
+            self.stores["counters"][firestore_db.FIRST_HUNDRED_COUNTER_DOC_ID] = {
+                "claimed": claimed
+            }
+        self.versions = {}
+        self.aborts = 0
+
+    def collection(self, name):
+        return _FakeQuery(self, name)
+
+    def transaction(self):
+        return _FakeTransaction(self)
+
+
+def _claimed(db):
+    counters = db.stores["counters"]
+    return counters[firestore_db.FIRST_HUNDRED_COUNTER_DOC_ID]["claimed"]
+
+
+def test_concurrent_signups_cannot_overshoot_the_limit():
+    db = _FakeFirestore(claimed=firestore_db.FIRST_HUNDRED_STUDENT_LIMIT - 3)
+
+    async def _run():
+        return await asyncio.gather(
+            *(
+                firestore_db.should_mark_first_hundred_student(db, role="student")
+                for _ in range(8)
+            )
+        )
+
+    results = asyncio.run(_run())
+
+    assert results.count(True) == 3
+    assert _claimed(db) == firestore_db.FIRST_HUNDRED_STUDENT_LIMIT
+    assert db.aborts > 0
+
+
+def test_counter_is_seeded_from_a_count_of_existing_students():
+    db = _FakeFirestore(students=40)
+
+    assert asyncio.run(
+        firestore_db.should_mark_first_hundred_student(db, role="student")
+    )
+    assert not asyncio.run(
+        firestore_db.should_mark_first_hundred_student(db, role="admin")
+    )
+    assert _claimed(db) == 41
+
+
+def test_full_counter_short_circuits_after_one_read():
+    db = InstrumentedAsyncClient(
+        _FakeFirestore(claimed=firestore_db.FIRST_HUNDRED_STUDENT_LIMIT)
+    )
+
+    async def _run():
+        stats, token = start_firestore_op_stats()
+        try:
+            eligible = await firestore_db.should_mark_first_hundred_student(
+                db, role="student"
+            )
+            return eligible, stats
+        finally:
+            stop_firestore_op_stats(token)
+
+    eligible, stats = asyncio.run(_run())
+
+    assert eligible is False
+    assert (stats.reads, stats.writes, stats.round_trips) == (1, 0, 1)
+
+
+def test_registration_cost_does_not_grow_with_user_count():
+    """Benchmark: Firestore work per registration for small vs large tables."""
+
+    def _measure(students):
+        db = InstrumentedAsyncClient(_FakeFirestore(students=students))
+
+        async def _run():
+            costs = []
+            for _ in range(3):
+                stats, token = start_firestore_op_stats()
+                try:
+                    await firestore_db.should_mark_first_hundred_student(
+                        db, role="student"
+                    )
+                finally:
+                    stop_firestore_op_stats(token)
+                costs.append((stats.reads, stats.writes, stats.round_trips))
+            return costs
+
+        return asyncio.run(_run())
+
+    small = _measure(5)
+    large = _measure(50)
+    huge = _measure(20_000)
+
+    # The first call seeds with one count() aggregation; later calls skip it.
+    assert small == large == [(3, 1, 4), (2, 1, 3), (2, 1, 3)]
+    # Past the limit only the counter document is read.
+    assert huge == [(3, 1, 4), (1, 0, 1), (1, 0, 1)]
@@ -37,10 +37,10 @@ class _FakeDoc:
         self._store = store
         self.id = doc_id
 
-    def get(self):
+    async def get(self, transaction=None):
         return _FakeSnap(self)
 
-    def set(self, data, merge=False):
+    async def set(self, data, merge=False):
         payload = dict(data)
         if merge and self.id in self._store:
             self._store[self.id].update(payload)
@@ -62,7 +62,11 @@ class _FakeQuery:
         self._limit = value
         return self
 
-    def stream(self):
+    async def stream(self):
+        for snap in self._snapshots():
+            yield snap
+
+    def _snapshots(self):
         snaps = []
         for doc_id, data in self._store.items():
             include = True
@@ -87,6 +91,31 @@ class _FakeCollection(_FakeQuery):
         return _FakeDoc(self._store, doc_id)
 
 
+class _FakeTransaction:
+    _read_only = False
+    _max_attempts = 1
+    _id = b"fake-transaction"
+
+    def __init__(self):
+        self._ops = []
+
+    def set(self, doc_ref, data, merge=False):
+        self._ops.append((doc_ref, data, merge))
+
+    def _clean_up(self):
+        self._ops = []
+
+    async def _begin(self, retry_id=None):
+        _ = retry_id
+
+    async def _commit(self):
+        for doc_ref, data, merge in self._ops:
+            await doc_ref.set(data, merge=merge)
+
+    async def _rollback(self):
+        self._ops = []
+
+
 class _FakeFirestore:
     def __init__(self):
         self._settings: dict[str, dict] = {}
@@ -102,6 +131,9 @@ class _FakeFirestore:
             return _FakeCollection(self._users)
         raise ValueError(f"unsupported collection {name}")
 
+    def transaction(self):
+        return _FakeTransaction()
+
 
 def _pubsub_body(email: str, history_id: str) -> dict:
     encoded = base64.b64encode(
@@ -112,7 +144,7 @@ def _pubsub_body(email: str, history_id: str) -> dict:
 
 def test_gmail_webhook_rejects_invalid_secret(monkeypatch):
     monkeypatch.setattr(gmail_webhook, "get_settings", lambda: _Settings())
-    monkeypatch.setattr(gmail_webhook, "get_firestore_client", _FakeFirestore)
+    monkeypatch.setattr(gmail_webhook, "get_async_firestore_client", _FakeFirestore)
     client = TestClient(app)
 
     response = client.post(
@@ -133,7 +165,7 @@ def test_gmail_webhook_updates_history_checkpoint(monkeypatch):
         "lastHistoryId": "90",
     }
     monkeypatch.setattr(gmail_webhook, "get_settings", lambda: _Settings())
-    monkeypatch.setattr(gmail_webhook, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(gmail_webhook, "get_async_firestore_client", lambda: fake_db)
 
     class _FakeGmailClient:
         def list_history(self, _start):
@@ -151,6 +183,45 @@ def test_gmail_webhook_updates_history_checkpoint(monkeypatch):
     assert response.status_code == 200
     assert response.json() == {"ok": True}
     assert fake_db._settings["gmail"]["lastHistoryId"] == "101"
+    assert fake_db._settings["gmail"]["watchTopic"] == "projects/p/topics/gmail"
+
+
+def test_gmail_webhook_does_not_move_history_checkpoint_back(monkeypatch):
+    fake_db = _FakeFirestore()
+    fake_db._settings["gmail"] = {"enabled": True, "lastHistoryId": "90"}
+    monkeypatch.setattr(gmail_webhook, "get_settings", lambda: _Settings())
+    monkeypatch.setattr(gmail_webhook, "get_async_firestore_client", lambda: fake_db)
+    starts: list[str] = []
+
+    class _FakeGmailClient:
+        def list_history(self, start):
+            starts.append(start)
+            if len(starts) == 1:
+                # A newer push finishes while this one is being processed.
+                fake_db._settings["gmail"]["lastHistoryId"] = "120"
+            return []
+
+    monkeypatch.setattr(gmail_webhook, "GmailClient", _FakeGmailClient)
+    client = TestClient(app)
+
+    response = client.post(
+        "/webhooks/gmail",
+        headers={"X-Webhook-Secret": "whsec-1"},
+        json=_pubsub_body("user@example.com", "101"),
+    )
+    after_first = fake_db._settings["gmail"]["lastHistoryId"]
+    follow_up = client.post(
+        "/webhooks/gmail",
+        headers={"X-Webhook-Secret": "whsec-1"},
+        json=_pubsub_body("user@example.com", "130"),
+    )
+
+    assert response.status_code == 200
+    assert follow_up.status_code == 200
+    assert after_first == "120"
+    # Each push resumes from the stored checkpoint, read fresh.
+    assert starts == ["90", "120"]
+    assert fake_db._settings["gmail"]["lastHistoryId"] == "130"
 
 
 def test_gmail_webhook_triggers_activation_for_boosty_codes(monkeypatch):
@@ -161,7 +232,7 @@ def test_gmail_webhook_triggers_activation_for_boosty_codes(monkeypatch):
         "lastHistoryId": "150",
     }
     monkeypatch.setattr(gmail_webhook, "get_settings", lambda: _Settings())
-    monkeypatch.setattr(gmail_webhook, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(gmail_webhook, "get_async_firestore_client", lambda: fake_db)
 
     class _FakeGmailClient:
         def list_history(self, _start):
@@ -179,7 +250,7 @@ def test_gmail_webhook_triggers_activation_for_boosty_codes(monkeypatch):
 
     activated: list[tuple[str, str | None]] = []
 
-    def _fake_activate(_db, code: str, evidence: str | None = None):
+    async def _fake_activate(_db, code: str, evidence: str | None = None):
         activated.append((code, evidence))
         return True
 
@@ -203,11 +274,11 @@ def test_gmail_webhook_triggers_activation_for_boosty_codes(monkeypatch):
 def test_gmail_webhook_accepts_direct_n8n_payload_without_gmail_settings(monkeypatch):
     fake_db = _FakeFirestore()
     monkeypatch.setattr(gmail_webhook, "get_settings", lambda: _Settings())
-    monkeypatch.setattr(gmail_webhook, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(gmail_webhook, "get_async_firestore_client", lambda: fake_db)
 
     activated: list[tuple[str, str | None]] = []
 
-    def _fake_activate(_db, code: str, evidence: str | None = None):
+    async def _fake_activate(_db, code: str, evidence: str | None = None):
         activated.append((code, evidence))
         return True
 
@@ -238,11 +309,11 @@ def test_gmail_webhook_accepts_direct_n8n_payload_without_gmail_settings(monkeyp
 def test_gmail_webhook_accepts_direct_n8n_payload_and_persists_history(monkeypatch):
     fake_db = _FakeFirestore()
     monkeypatch.setattr(gmail_webhook, "get_settings", lambda: _Settings())
-    monkeypatch.setattr(gmail_webhook, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(gmail_webhook, "get_async_firestore_client", lambda: fake_db)
 
     activated: list[tuple[str, str | None]] = []
 
-    def _fake_activate(_db, code: str, evidence: str | None = None):
+    async def _fake_activate(_db, code: str, evidence: str | None = None):
         activated.append((code, evidence))
         return True
 
@@ -277,8 +348,12 @@ def test_gmail_webhook_accepts_direct_n8n_payload_and_persists_history(monkeypat
 def test_gmail_webhook_direct_payload_logs_processed_event(monkeypatch):
     fake_db = _FakeFirestore()
     monkeypatch.setattr(gmail_webhook, "get_settings", lambda: _Settings())
-    monkeypatch.setattr(gmail_webhook, "get_firestore_client", lambda: fake_db)
-    monkeypatch.setattr(gmail_webhook, "activate_by_code", lambda *_args, **_kwargs: True)
+    monkeypatch.setattr(gmail_webhook, "get_async_firestore_client", lambda: fake_db)
+
+    async def _fake_activate(*_args, **_kwargs):
+        return True
+
+    monkeypatch.setattr(gmail_webhook, "activate_by_code", _fake_activate)
 
     log_calls: list[tuple[str, dict]] = []
 
@@ -321,7 +396,7 @@ def test_gmail_webhook_direct_payload_logs_processed_event(monkeypatch):
 def test_gmail_webhook_notifies_when_processed_email_has_no_activation_code(monkeypatch):
     fake_db = _FakeFirestore()
     monkeypatch.setattr(gmail_webhook, "get_settings", lambda: _Settings())
-    monkeypatch.setattr(gmail_webhook, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(gmail_webhook, "get_async_firestore_client", lambda: fake_db)
 
     sent_messages: list[str] = []
 
@@ -363,7 +438,7 @@ def test_gmail_webhook_parses_n8n_donation_and_saves_boosty_user_id(monkeypatch)
         "status": "active",
     }
     monkeypatch.setattr(gmail_webhook, "get_settings", lambda: _Settings())
-    monkeypatch.setattr(gmail_webhook, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(gmail_webhook, "get_async_firestore_client", lambda: fake_db)
 
     sent_messages: list[str] = []
     monkeypatch.setattr(gmail_webhook, "_notify_admin_async", sent_messages.append)
@@ -414,7 +489,7 @@ def test_gmail_webhook_parses_n8n_donation_and_saves_boosty_user_id(monkeypatch)
 def test_gmail_webhook_parses_subscription_without_link_noise(monkeypatch):
     fake_db = _FakeFirestore()
     monkeypatch.setattr(gmail_webhook, "get_settings", lambda: _Settings())
-    monkeypatch.setattr(gmail_webhook, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(gmail_webhook, "get_async_firestore_client", lambda: fake_db)
 
     sent_messages: list[str] = []
     monkeypatch.setattr(gmail_webhook, "_notify_admin_async", sent_messages.append)
@@ -465,7 +540,7 @@ def test_gmail_webhook_parses_donation_with_merged_name_email_without_comment(mo
         "status": "active",
     }
     monkeypatch.setattr(gmail_webhook, "get_settings", lambda: _Settings())
-    monkeypatch.setattr(gmail_webhook, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(gmail_webhook, "get_async_firestore_client", lambda: fake_db)
 
     sent_messages: list[str] = []
     monkeypatch.setattr(gmail_webhook, "_notify_admin_async", sent_messages.append)
@@ -510,7 +585,7 @@ def test_gmail_webhook_parses_donation_with_merged_name_email_and_comment(monkey
         "status": "active",
     }
     monkeypatch.setattr(gmail_webhook, "get_settings", lambda: _Settings())
-    monkeypatch.setattr(gmail_webhook, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(gmail_webhook, "get_async_firestore_client", lambda: fake_db)
 
     sent_messages: list[str] = []
     monkeypatch.setattr(gmail_webhook, "_notify_admin_async", sent_messages.append)
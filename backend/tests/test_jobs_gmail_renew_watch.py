@@ -28,10 +28,10 @@ class _FakeDoc:
         self._store = store
         self.id = doc_id
 
-    def get(self):
+    async def get(self):
         return _FakeSnap(self)
 
-    def set(self, data, merge=False):
+    async def set(self, data, merge=False):
         payload = dict(data)
         if merge and self.id in self._store:
             self._store[self.id].update(payload)
@@ -61,7 +61,7 @@ class _FakeFirestore:
 
 def test_renew_watch_stores_settings_with_job_token(monkeypatch):
     fake_db = _FakeFirestore()
-    monkeypatch.setattr(jobs, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(jobs, "get_async_firestore_client", lambda: fake_db)
     monkeypatch.setattr(
         jobs,
         "get_settings",
@@ -96,7 +96,7 @@ def test_renew_watch_stores_settings_with_job_token(monkeypatch):
 
 def test_renew_watch_enforces_auth_when_job_token_not_matching(monkeypatch):
     fake_db = _FakeFirestore()
-    monkeypatch.setattr(jobs, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(jobs, "get_async_firestore_client", lambda: fake_db)
     monkeypatch.setattr(
         jobs,
         "get_settings",
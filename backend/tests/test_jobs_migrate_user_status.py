@@ -0,0 +1,127 @@
+from fastapi.testclient import TestClient
+from google.cloud import firestore
+
+from app.main import app
+from app.routers import jobs
+
+
+class _Settings:
+    JOB_TOKEN = "job-secret"
+
+
+class _FakeSnap:
+    def __init__(self, doc):
+        self._doc = doc
+        self.id = doc.id
+        self._data = doc._store.get(doc.id)
+
+    @property
+    def reference(self):
+        return self._doc
+
+    def to_dict(self):
+        return self._data
+
+
+class _FakeDoc:
+    def __init__(self, store, doc_id):
+        self._store = store
+        self.id = doc_id
+
+
+class _FakeQuery:
+    def __init__(self, store, start_after=None, limit=None):
+        self._store = store
+        self._start_after = start_after
+        self._limit = limit
+
+    def order_by(self, field):
+        assert field == "__name__"
+        return self
+
+    def start_after(self, values):
+        return _FakeQuery(self._store, values[0], self._limit)
+
+    def limit(self, value):
+        return _FakeQuery(self._store, self._start_after, value)
+
+    async def stream(self):
+        doc_ids = sorted(self._store)
+        if self._start_after is not None:
+            doc_ids = [doc_id for doc_id in doc_ids if doc_id > self._start_after]
+        for doc_id in doc_ids[: self._limit]:
+            yield _FakeSnap(_FakeDoc(self._store, doc_id))
+
+
+class _FakeBatch:
+    def __init__(self, db):
+        self._db = db
+        self._ops = []
+
+    def update(self, doc_ref, data):
+        self._ops.append((doc_ref, data))
+
+    async def commit(self):
+        self._db.commits.append(len(self._ops))
+        for doc_ref, data in self._ops:
+            doc_ref._store[doc_ref.id].update(data)
+
+
+class _FakeFirestore:
+    def __init__(self, users):
+        self._users = users
+        self.commits = []
+
+    def collection(self, name):
+        assert name == "users"
+        return _FakeQuery(self._users)
+
+    def batch(self):
+        return _FakeBatch(self)
+
+
+def test_migrate_status_job_fills_missing_status_in_chunks(monkeypatch):
+    users = {
+        "u1": {"email": "u1@x.com"},
+        "u2": {"email": "u2@x.com", "status": "disabled"},
+        "u3": {"email": "u3@x.com", "status": None},
+        "u4": {"email": "u4@x.com"},
+    }
+    fake_db = _FakeFirestore(users)
+    monkeypatch.setattr(jobs, "get_async_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(jobs, "get_settings", lambda: _Settings())
+    client = TestClient(app)
+
+    response = client.post(
+        "/jobs/users/migrate-status?limit=3",
+        headers={"X-Job-Token": "job-secret"},
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "status": "ok",
+        "scanned": 4,
+        "updated": 3,
+        "nextCursor": None,
+    }
+    assert fake_db.commits == [2, 1]
+    assert [users[uid]["status"] for uid in sorted(users)] == [
+        "active",
+        "disabled",
+        "active",
+        "active",
+    ]
+    assert users["u1"]["updatedAt"] is firestore.SERVER_TIMESTAMP
+    assert "updatedAt" not in users["u2"]
+
+
+def test_migrate_status_job_requires_staff_or_job_token(monkeypatch):
+    monkeypatch.setattr(jobs, "get_settings", lambda: _Settings())
+    client = TestClient(app)
+
+    response = client.post(
+        "/jobs/users/migrate-status",
+        headers={"X-Job-Token": "wrong"},
+    )
+
+    assert response.status_code == 401
@@ -0,0 +1,386 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from google.cloud import firestore
+
+from app.auth import deps as auth_deps
+from app.core.errors import AppError
+from app.main import app
+from app.routers import admin_courses, jobs
+from app.services.lesson_fanout import (
+    run_lesson_fanout,
+    run_pending_lesson_fanouts,
+    start_lesson_fanout,
+)
+
+
+class _Settings:
+    JOB_TOKEN = "job-secret"
+
+
+def _normalize(data):
+    return {
+        key: datetime.now(timezone.utc)
+        if value is firestore.SERVER_TIMESTAMP
+        else value
+        for key, value in data.items()
+    }
+
+
+def _apply(target, data):
+    for key, value in data.items():
+        if isinstance(value, firestore.Increment):
+            target[key] = target.get(key, 0) + value.value
+        else:
+            target[key] = value
+
+
+class FakeSnap:
+    def __init__(self, db, path):
+        self._db = db
+        self.reference = FakeDoc(db, path)
+        self.id = self.reference.id
+        self._data = db.docs.get(path)
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeDoc:
+    def __init__(self, db, path):
+        self._db = db
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    @property
+    def parent(self):
+        return FakeCollection(self._db, self.path.rsplit("/", 1)[0])
+
+    def collection(self, name):
+        return FakeCollection(self._db, f"{self.path}/{name}")
+
+    async def get(self, transaction=None):
+        return FakeSnap(self._db, self.path)
+
+    async def set(self, data):
+        self._db.docs[self.path] = _normalize(data)
+
+    async def update(self, data):
+        _apply(self._db.docs[self.path], _normalize(data))
+
+
+class FakeCollection:
+    def __init__(self, db, path):
+        self._db = db
+        self._path = path
+
+    @property
+    def parent(self):
+        return FakeDoc(self._db, self._path.rsplit("/", 1)[0])
+
+    def document(self, doc_id=None):
+        if doc_id is None:
+            self._db.counter += 1
+            doc_id = f"job{self._db.counter}"
+        return FakeDoc(self._db, f"{self._path}/{doc_id}")
+
+    def where(self, field, op, value):
+        assert (field, op) == ("status", "in")
+        return FakeJobQuery(self._db, self._path, value)
+
+
+class FakeJobQuery:
+    def __init__(self, db, path, statuses):
+        self._db = db
+        self._path = path
+        self._statuses = statuses
+
+    def limit(self, value):
+        return self
+
+    async def stream(self):
+        prefix = f"{self._path}/"
+        for path, data in sorted(self._db.docs.items()):
+            if path.startswith(prefix) and data.get("status") in self._statuses:
+                yield FakeSnap(self._db, path)
+
+
+class FakeGroupQuery:
+    def __init__(self, db, group, filters=(), start_after=None, limit=None):
+        self._db = db
+        self._group = group
+        self._filters = filters
+        self._start_after = start_after
+        self._limit = limit
+
+    def _copy(self, **changes):
+        state = {
+            "filters": self._filters,
+            "start_after": self._start_after,
+            "limit": self._limit,
+            **changes,
+        }
+        return FakeGroupQuery(self._db, self._group, **state)
+
+    def where(self, field, op, value):
+        assert op == "=="
+        return self._copy(filters=(*self._filters, (field, value)))
+
+    def order_by(self, field):
+        assert field == "__name__"
+        return self
+
+    def start_after(self, values):
+        return self._copy(start_after=values[0].path)
+
+    def limit(self, value):
+        return self._copy(limit=value)
+
+    async def stream(self):
+        paths = sorted(
+            path
+            for path, data in self._db.docs.items()
+            if path.split("/")[-2] == self._group
+            and all(data.get(field) == value for field, value in self._filters)
+        )
+        if self._start_after is not None:
+            paths = [path for path in paths if path > self._start_after]
+        self._db.pages.append(len(paths[: self._limit]))
+        for path in paths[: self._limit]:
+            yield FakeSnap(self._db, path)
+
+
+class FakeBatch:
+    def __init__(self, db):
+        self._db = db
+        self._ops = []
+
+    def update(self, doc_ref, data):
+        self._ops.append((doc_ref.path, data))
+
+    async def commit(self):
+        if self._db.fail_commits:
+            self._db.fail_commits -= 1
+            raise RuntimeError("commit failed")
+        self._db.commits.append(len(self._ops))
+        for path, data in self._ops:
+            _apply(self._db.docs.setdefault(path, {}), data)
+
+
+class FakeTransaction(FakeBatch):
+    _read_only = False
+    _max_attempts = 1
+    _id = b"fake-transaction"
+
+    def _clean_up(self):
+        self._ops = []
+
+    async def _begin(self, retry_id=None):
+        _ = retry_id
+
+    async def _commit(self):
+        for path, data in self._ops:
+            _apply(self._db.docs[path], _normalize(data))
+
+    async def _rollback(self):
+        self._ops = []
+
+
+class FakeFirestore:
+    def __init__(self, docs):
+        self.docs = docs
+        self.counter = 0
+        self.pages = []
+        self.commits = []
+        self.fail_commits = 0
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+    def collection_group(self, name):
+        return FakeGroupQuery(self, name)
+
+    def document(self, path):
+        return FakeDoc(self, path)
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def transaction(self):
+        return FakeTransaction(self)
+
+
+def _step(order, **extra):
+    return {
+        "sourceCourseId": "c1",
+        "sourceLessonId": "l1",
+        "title": "Old",
+        "description": "Old body",
+        "materialUrl": None,
+        "order": order,
+        **extra,
+    }
+
+
+def _docs():
+    return {
+        "courses/c1/lessons/l1": {
+            "title": "New",
+            "content": "New body",
+            "materialUrl": "https://example.com/new",
+        },
+        "student_plans/u1/steps/a": _step(0),
+        "student_plans/u1/steps/b": _step(1, sourceLessonId="l2"),
+        "student_plans/u2/steps/a": _step(0),
+        "student_plans/u3/steps/a": _step(0, sourceCourseId="c2"),
+        "student_plans/u4/steps/a": {"sourceCourseId": "c1", "sourceLessonId": "l1"},
+        "student_plans/u5/steps/a": _step(0),
+    }
+
+
+def _staff():
+    return {
+        "uid": "s1",
+        "email": "staff@example.com",
+        "displayName": "Staff",
+        "role": "staff",
+        "status": "active",
+        "roleRaw": "admin",
+    }
+
+
+def test_fanout_updates_copied_steps_and_checkpoints_each_page():
+    fake_db = FakeFirestore(_docs())
+
+    async def _run():
+        job_id = await start_lesson_fanout(fake_db, "c1", "l1", requested_by="s1")
+        return await run_lesson_fanout(fake_db, job_id, page_size=2)
+
+    result = asyncio.run(_run())
+
+    assert result["status"] == "done"
+    assert result["scanned"] == 5
+    assert result["updated"] == 4
+    assert fake_db.pages == [2, 2, 1]
+    for uid in ("u1", "u2", "u5"):
+        step = fake_db.docs[f"student_plans/{uid}/steps/a"]
+        assert step["title"] == "New"
+        assert step["description"] == "New body"
+        assert step["materialUrl"] == "https://example.com/new"
+        assert step["updatedAt"] is firestore.SERVER_TIMESTAMP
+    assert fake_db.docs["student_plans/u1/steps/b"]["title"] == "Old"
+    assert fake_db.docs["student_plans/u3/steps/a"]["title"] == "Old"
+    assert "title" not in fake_db.docs["student_plans/u4/steps/a"]
+    assert "updatedAt" in fake_db.docs["student_plans/u4/steps/a"]
+    assert fake_db.docs["student_plans/u1"]["revision"] == 1
+    assert fake_db.docs["student_plans/u4"]["revision"] == 1
+    assert "student_plans/u3" not in fake_db.docs
+    job = fake_db.docs["lesson_fanouts/job1"]
+    assert job["status"] == "done"
+    assert job["cursor"] == "student_plans/u5/steps/a"
+
+
+def test_fanout_resumes_from_checkpoint_after_failure():
+    fake_db = FakeFirestore(_docs())
+
+    async def _start():
+        job_id = await start_lesson_fanout(fake_db, "c1", "l1", requested_by="s1")
+        partial = await run_lesson_fanout(fake_db, job_id, page_size=2, max_pages=1)
+        fake_db.fail_commits = 1
+        with pytest.raises(RuntimeError):
+            await run_lesson_fanout(fake_db, job_id, page_size=2)
+        return job_id, partial
+
+    job_id, partial = asyncio.run(_start())
+
+    assert partial["status"] == "queued"
+    assert partial["updated"] == 2
+    job = fake_db.docs[f"lesson_fanouts/{job_id}"]
+    assert job["status"] == "failed"
+    assert job["failures"] == 1
+    assert job["cursor"] == "student_plans/u2/steps/a"
+    assert fake_db.docs["student_plans/u5/steps/a"]["title"] == "Old"
+
+    result = asyncio.run(run_lesson_fanout(fake_db, job_id, page_size=2))
+
+    assert result["status"] == "done"
+    assert result["scanned"] == 5
+    assert result["updated"] == 4
+    assert fake_db.docs["student_plans/u5/steps/a"]["title"] == "New"
+
+
+def test_fanout_unknown_job_is_not_found():
+    with pytest.raises(AppError) as exc:
+        asyncio.run(run_lesson_fanout(FakeFirestore({}), "missing"))
+    assert exc.value.status_code == 404
+
+
+def test_fanout_job_endpoint_and_progress(monkeypatch):
+    fake_db = FakeFirestore(_docs())
+    job_id = asyncio.run(start_lesson_fanout(fake_db, "c1", "l1", requested_by="s1"))
+    monkeypatch.setattr(jobs, "get_async_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(jobs, "get_settings", lambda: _Settings())
+    monkeypatch.setattr(admin_courses, "get_async_firestore_client", lambda: fake_db)
+    client = TestClient(app)
+
+    response = client.post(
+        f"/jobs/lessons/fan-out/{job_id}",
+        headers={"X-Job-Token": "job-secret"},
+    )
+    assert response.status_code == 200
+    assert response.json()["status"] == "done"
+    assert response.json()["updated"] == 4
+
+    app.dependency_overrides[auth_deps.get_current_user] = _staff
+    try:
+        progress = client.get(f"/api/admin/lesson-fanouts/{job_id}")
+        missing = client.get("/api/admin/lesson-fanouts/nope")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert progress.status_code == 200
+    body = progress.json()
+    assert body["status"] == "done"
+    assert body["scanned"] == 5
+    assert body["updated"] == 4
+    assert body["requestedBy"] == "s1"
+    assert missing.status_code == 404
+
+
+def test_pending_sweep_runs_queued_fanouts_within_the_page_budget():
+    fake_db = FakeFirestore(_docs())
+
+    async def _sweep():
+        job_id = await start_lesson_fanout(fake_db, "c1", "l1", requested_by="s1")
+        first = await run_pending_lesson_fanouts(fake_db, limit=5, max_pages=1)
+        return job_id, first
+
+    job_id, first = asyncio.run(_sweep())
+
+    # Steps are read 400 a page, so one page covers every step here.
+    assert first == {"done": [job_id], "queued": [], "failed": []}
+    assert fake_db.docs[f"lesson_fanouts/{job_id}"]["status"] == "done"
+    assert fake_db.docs["student_plans/u5/steps/a"]["title"] == "New"
+
+    again = asyncio.run(run_pending_lesson_fanouts(fake_db, limit=5))
+    assert again == {"done": [], "queued": [], "failed": []}
+
+
+def test_stalled_running_fanout_is_resumed_by_the_sweep():
+    fake_db = FakeFirestore(_docs())
+    job_id = asyncio.run(start_lesson_fanout(fake_db, "c1", "l1", requested_by="s1"))
+    job = fake_db.docs[f"lesson_fanouts/{job_id}"]
+    # A run whose instance stopped mid-page: claimed, never reported back.
+    job["status"] = "running"
+    job["updatedAt"] = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+    result = asyncio.run(run_pending_lesson_fanouts(fake_db, limit=5))
+
+    assert result["done"] == [job_id]
+    assert fake_db.docs[f"lesson_fanouts/{job_id}"]["failures"] == 1
@@ -0,0 +1,93 @@
+from datetime import datetime, timezone
+
+from fastapi.testclient import TestClient
+
+from app.auth import deps as auth_deps
+from app.main import app
+from app.routers import library
+
+UPDATED = datetime(2025, 5, 1, tzinfo=timezone.utc)
+
+
+class FakeSnap:
+    def __init__(self, doc_id, data, update_time):
+        self.id = doc_id
+        self._data = data
+        self.update_time = update_time
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeDoc:
+    def __init__(self, db, doc_id):
+        self._db = db
+        self.id = doc_id
+
+    async def get(self):
+        data, update_time = self._db.entries.get(self.id, (None, None))
+        return FakeSnap(self.id, data, update_time)
+
+
+class FakeCollection:
+    def __init__(self, db):
+        self._db = db
+
+    def document(self, doc_id):
+        return FakeDoc(self._db, doc_id)
+
+
+class FakeFirestore:
+    def __init__(self, entries):
+        self.entries = entries
+
+    def collection(self, name):
+        assert name == "library_entries"
+        return FakeCollection(self)
+
+
+def _student():
+    return {
+        "uid": "u1",
+        "email": "u1@example.com",
+        "role": "student",
+        "status": "active",
+        "roleRaw": "student",
+    }
+
+
+def test_library_entry_etag_tracks_update_time(monkeypatch):
+    fake_db = FakeFirestore(
+        {
+            "e1": ({"title": "Entry", "status": "published"}, UPDATED),
+            "draft": ({"title": "Draft", "status": "draft"}, UPDATED),
+        }
+    )
+    monkeypatch.setattr(library, "get_async_firestore_client", lambda: fake_db)
+    app.dependency_overrides[auth_deps.get_current_user] = _student
+    client = TestClient(app)
+    try:
+        first = client.get("/api/library/e1")
+        etag = first.headers["ETag"]
+        repeat = client.get(
+            "/api/library/e1", headers={"If-None-Match": f'"other", W/{etag}'}
+        )
+        fake_db.entries["e1"] = (
+            {"title": "Edited", "status": "published"},
+            datetime(2025, 5, 2, tzinfo=timezone.utc),
+        )
+        edited = client.get("/api/library/e1", headers={"If-None-Match": etag})
+        draft = client.get("/api/library/draft", headers={"If-None-Match": "*"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"] == "private, no-cache"
+    assert repeat.status_code == 304
+    assert edited.status_code == 200
+    assert edited.json()["title"] == "Edited"
+    assert draft.status_code == 404
@@ -0,0 +1,165 @@
+from datetime import datetime, timezone
+
+from fastapi.testclient import TestClient
+
+from app.auth import deps as auth_deps
+from app.main import app
+from app.routers import auth
+
+NOW = datetime.now(timezone.utc)
+
+
+class FakeSnap:
+    def __init__(self, path, data):
+        self.id = path.rsplit("/", 1)[-1]
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeDoc:
+    def __init__(self, db, path):
+        self._db = db
+        self.path = path
+
+    def collection(self, name):
+        return FakeQuery(self._db, f"{self.path}/{name}")
+
+    async def get(self):
+        self._db.reads.append(self.path)
+        return FakeSnap(self.path, self._db.docs.get(self.path))
+
+
+class FakeQuery:
+    def __init__(self, db, path, filters=(), order=None):
+        self._db = db
+        self._path = path
+        self._filters = filters
+        self._order = order
+
+    def document(self, doc_id):
+        return FakeDoc(self._db, f"{self._path}/{doc_id}")
+
+    def where(self, field, op, value):
+        assert op == "=="
+        return FakeQuery(
+            self._db, self._path, (*self._filters, (field, value)), self._order
+        )
+
+    def order_by(self, field, direction=None):
+        return FakeQuery(self._db, self._path, self._filters, field)
+
+    async def stream(self):
+        self._db.reads.append(self._path)
+        prefix = f"{self._path}/"
+        rows = [
+            (path, data)
+            for path, data in self._db.docs.items()
+            if path.startswith(prefix)
+            and "/" not in path[len(prefix) :]
+            and all(data.get(field) == value for field, value in self._filters)
+        ]
+        if self._order:
+            rows.sort(key=lambda row: row[1][self._order])
+        for path, data in rows:
+            yield FakeSnap(path, data)
+
+
+class FakeFirestore:
+    def __init__(self, docs):
+        self.docs = docs
+        self.reads = []
+
+    def collection(self, name):
+        return FakeQuery(self, name)
+
+
+def _docs():
+    return {
+        "student_plans/u1": {"goalId": "g1", "createdAt": NOW, "updatedAt": NOW},
+        "student_plans/u1/steps/b": {"title": "Second", "order": 1},
+        "student_plans/u1/steps/a": {"title": "First", "order": 0},
+        "courses/c2": {"title": "Zeta", "priceUsdCents": 200, "isActive": True},
+        "courses/c1": {"title": "Alpha", "priceUsdCents": 100, "isActive": True},
+        "courses/c3": {"title": "Hidden", "priceUsdCents": 100, "isActive": False},
+        "config/fx_rates": {
+            "base": "USD",
+            "rates": {"USD": 1, "EUR": 0.9},
+            "asOf": "2026-02-20T12:00:00Z",
+            "fetchedAt": NOW.isoformat(),
+        },
+    }
+
+
+def _user(status="active"):
+    return {
+        "uid": "u1",
+        "email": "u1@example.com",
+        "displayName": "Student One",
+        "role": "student",
+        "status": status,
+        "roleRaw": "student",
+    }
+
+
+def _get_home(monkeypatch, fake_db, user):
+    monkeypatch.setattr(auth, "get_async_firestore_client", lambda: fake_db)
+    app.dependency_overrides[auth_deps.get_current_user] = lambda: user
+    try:
+        return TestClient(app).get("/api/me/home")
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_home_returns_profile_plan_steps_courses_and_rates(monkeypatch):
+    fake_db = FakeFirestore(_docs())
+
+    response = _get_home(monkeypatch, fake_db, _user())
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["me"]["uid"] == "u1"
+    assert body["me"]["preferredCurrency"] == "USD"
+    assert body["plan"]["goalId"] == "g1"
+    assert [step["stepId"] for step in body["steps"]] == ["a", "b"]
+    assert [course["id"] for course in body["courses"]] == ["c1", "c2"]
+    assert body["fxRates"]["rates"]["EUR"] == 0.9
+    assert body["fxRates"]["source"] == "firestore"
+    assert sorted(fake_db.reads) == [
+        "config/fx_rates",
+        "courses",
+        "student_plans/u1",
+        "student_plans/u1/steps",
+    ]
+
+
+def test_home_for_blocked_student_skips_plan_reads(monkeypatch):
+    fake_db = FakeFirestore(_docs())
+
+    response = _get_home(monkeypatch, fake_db, _user(status="disabled"))
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["plan"] is None
+    assert body["steps"] == []
+    assert len(body["courses"]) == 2
+    assert not any(path.startswith("student_plans") for path in fake_db.reads)
+
+
+def test_home_without_plan(monkeypatch):
+    docs = {
+        path: data
+        for path, data in _docs().items()
+        if not path.startswith("student_plans")
+    }
+
+    response = _get_home(monkeypatch, FakeFirestore(docs), _user())
+
+    assert response.status_code == 200
+    assert response.json()["plan"] is None
+    assert response.json()["steps"] == []
@@ -2,6 +2,7 @@ from fastapi.testclient import TestClient
 from google.cloud import firestore
 
 from app.auth import deps as auth_deps
+from app.auth.profile_cache import profile_cache
 from app.main import app
 import app.main as app_main
 from app.routers import auth
@@ -25,10 +26,10 @@ class FakeDoc:
         self._store = store
         self.id = doc_id
 
-    def get(self):
+    async def get(self):
         return FakeSnap(self.id, self._store.get(self.id))
 
-    def update(self, data):
+    async def update(self, data):
         if self.id not in self._store:
             raise KeyError("missing doc")
         self._store[self.id].update(_normalize(data))
@@ -98,7 +99,7 @@ def test_patch_me_requires_auth():
 def test_patch_me_rejects_extra_fields(monkeypatch):
     users = {"u1": {"displayName": "User One", "email": "u1@example.com"}}
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(auth, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(auth, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _override_user
     client = TestClient(app)
 
@@ -116,7 +117,7 @@ def test_patch_me_logs_validation_errors_with_request_body(monkeypatch):
     def _fake_warning(message, *, extra):
         log_calls.append((message, extra))
 
-    monkeypatch.setattr(auth, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(auth, "get_async_firestore_client", lambda: fake_db)
     monkeypatch.setattr(app_main.logger, "warning", _fake_warning)
     app.dependency_overrides[auth_deps.get_current_user] = _override_user
     client = TestClient(app)
@@ -139,7 +140,7 @@ def test_patch_me_logs_validation_errors_with_request_body(monkeypatch):
 def test_patch_me_rejects_forbidden_fields(monkeypatch):
     users = {"u1": {"displayName": "User One", "email": "u1@example.com"}}
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(auth, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(auth, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _override_user
     client = TestClient(app)
 
@@ -153,7 +154,7 @@ def test_patch_me_rejects_forbidden_fields(monkeypatch):
 def test_patch_me_validates_display_name(monkeypatch):
     users = {"u1": {"displayName": "User One", "email": "u1@example.com"}}
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(auth, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(auth, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _override_user
     client = TestClient(app)
 
@@ -174,7 +175,7 @@ def test_patch_me_trims_and_updates_self(monkeypatch):
         "u2": {"displayName": "User Two", "email": "u2@example.com"},
     }
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(auth, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(auth, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _override_user
     client = TestClient(app)
 
@@ -189,6 +190,21 @@ def test_patch_me_trims_and_updates_self(monkeypatch):
     app.dependency_overrides.clear()
 
 
+def test_patch_me_invalidates_cached_profile(monkeypatch):
+    users = {"u1": {"displayName": "User One", "email": "u1@example.com"}}
+    fake_db = FakeFirestore(users)
+    monkeypatch.setattr(auth, "get_async_firestore_client", lambda: fake_db)
+    profile_cache.put("u1", {"displayName": "User One"})
+    app.dependency_overrides[auth_deps.get_current_user] = _override_user
+    client = TestClient(app)
+
+    response = client.patch("/api/me", json={"displayName": "New Name"})
+    assert response.status_code == 200
+    assert profile_cache.get("u1") is None
+
+    app.dependency_overrides.clear()
+
+
 def test_patch_me_updates_onboarding_fields(monkeypatch):
     users = {
         "u1": {
@@ -206,7 +222,7 @@ def test_patch_me_updates_onboarding_fields(monkeypatch):
         }
     }
     fake_db = FakeFirestore(users, goals={"goal-1": {"title": "Goal One"}})
-    monkeypatch.setattr(auth, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(auth, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _override_user
     client = TestClient(app)
 
@@ -265,7 +281,7 @@ def test_patch_me_rejects_submitted_profile_without_telegram(monkeypatch):
         }
     }
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(auth, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(auth, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _override_user
     client = TestClient(app)
 
@@ -306,7 +322,7 @@ def test_patch_me_clears_display_name_when_profile_names_are_removed(monkeypatch
         }
     }
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(auth, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(auth, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _override_user
     client = TestClient(app)
 
@@ -354,7 +370,7 @@ def test_patch_me_sends_questionnaire_completed_once_on_course_selection_transit
         }
     }
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(auth, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(auth, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _override_user
     sent: dict[str, str] = {}
 
@@ -407,7 +423,7 @@ def test_patch_me_does_not_resend_questionnaire_completed_when_already_marked(
         }
     }
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(auth, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(auth, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _override_user
     calls = {"count": 0}
 
@@ -439,7 +455,7 @@ def test_patch_me_accepts_preferred_currency_pln(monkeypatch):
         }
     }
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(auth, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(auth, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _override_user
     client = TestClient(app)
 
@@ -461,7 +477,7 @@ def test_patch_me_migrates_missing_status(monkeypatch):
         }
     }
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(auth, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(auth, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _override_user
     client = TestClient(app)
 
@@ -483,7 +499,7 @@ def test_patch_me_rejects_invalid_stored_status(monkeypatch):
         }
     }
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(auth, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(auth, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _override_user
     client = TestClient(app)
 
@@ -504,7 +520,7 @@ def test_patch_me_allows_subscription_selection_during_incomplete_onboarding_for
         }
     }
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(auth, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(auth, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _override_user_disabled
     client = TestClient(app)
 
@@ -537,7 +553,7 @@ def test_patch_me_allows_subscription_selection_for_non_active_after_onboarding(
         }
     }
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(auth, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(auth, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _override_user_disabled
     client = TestClient(app)
 
@@ -551,7 +567,7 @@ def test_patch_me_allows_subscription_selection_for_non_active_after_onboarding(
 def test_patch_me_validates_onboarding_fields(monkeypatch):
     users = {"u1": {"displayName": "User One", "email": "u1@example.com"}}
     fake_db = FakeFirestore(users)
-    monkeypatch.setattr(auth, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(auth, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[auth_deps.get_current_user] = _override_user
     client = TestClient(app)
 
@@ -1,3 +1,5 @@
+import asyncio
+
 from google.cloud import firestore
 
 from app.services import payments as payments_service
@@ -31,17 +33,17 @@ class _FakeDoc:
         self._store = store
         self.id = doc_id
 
-    def get(self):
+    async def get(self):
         return _FakeSnap(self)
 
-    def set(self, data, merge=False):
+    async def set(self, data, merge=False):
         payload = _normalize(data)
         if merge and self.id in self._store:
             self._store[self.id].update(payload)
         else:
             self._store[self.id] = payload
 
-    def update(self, data):
+    async def update(self, data):
         if self.id not in self._store:
             raise KeyError("missing doc")
         self._store[self.id].update(_normalize(data))
@@ -61,7 +63,11 @@ class _FakeQuery:
         self._limit = value
         return self
 
-    def stream(self):
+    async def stream(self):
+        for snap in self._snapshots():
+            yield snap
+
+    def _snapshots(self):
         snaps = []
         for doc_id, data in self._store.items():
             include = True
@@ -94,9 +100,9 @@ class _FakeTransaction:
     def update(self, doc_ref, data):
         self._ops.append((doc_ref, data))
 
-    def commit(self):
+    async def commit(self):
         for doc_ref, data in self._ops:
-            doc_ref.update(data)
+            await doc_ref.update(data)
         self.committed = True
 
 
@@ -144,7 +150,7 @@ def test_activate_by_code_is_idempotent_when_already_activated(monkeypatch):
     sent_messages: list[str] = []
     monkeypatch.setattr(payments_service, "_notify_admin_async", sent_messages.append)
 
-    result = payments_service.activate_by_code(fake_db, "SW-AAAA1111", "ev-1")
+    result = asyncio.run(payments_service.activate_by_code(fake_db, "SW-AAAA1111", "ev-1"))
 
     assert result is True
     assert fake_db._payments["p1"]["status"] == "activated"
@@ -168,15 +174,17 @@ def test_activate_by_code_rejects_payment_with_invalid_status(monkeypatch):
         users={"u2": {"status": "disabled"}},
     )
     monkeypatch.setattr(payments_service, "get_settings", lambda: _Settings())
+
+    async def _fake_append(db, uid, course_ids):
+        return {"addedCourseIds": course_ids, "createdSteps": 0}
+
     monkeypatch.setattr(
-        payments_service,
-        "append_courses_to_student_plan",
-        lambda db, uid, course_ids: {"addedCourseIds": course_ids, "createdSteps": 0},
+        payments_service, "append_courses_to_student_plan", _fake_append
     )
     sent_messages: list[str] = []
     monkeypatch.setattr(payments_service, "_notify_admin_async", sent_messages.append)
 
-    result = payments_service.activate_by_code(fake_db, "SW-BBBB2222", "ev-2")
+    result = asyncio.run(payments_service.activate_by_code(fake_db, "SW-BBBB2222", "ev-2"))
 
     assert result is False
     assert fake_db._payments["p2"]["status"] == "rejected"
@@ -202,15 +210,17 @@ def test_activate_by_code_rejects_when_user_status_is_blocked(monkeypatch):
         users={"u3": {"status": "expired"}},
     )
     monkeypatch.setattr(payments_service, "get_settings", lambda: _Settings())
+
+    async def _fake_append(db, uid, course_ids):
+        return {"addedCourseIds": course_ids, "createdSteps": 0}
+
     monkeypatch.setattr(
-        payments_service,
-        "append_courses_to_student_plan",
-        lambda db, uid, course_ids: {"addedCourseIds": course_ids, "createdSteps": 0},
+        payments_service, "append_courses_to_student_plan", _fake_append
     )
     sent_messages: list[str] = []
     monkeypatch.setattr(payments_service, "_notify_admin_async", sent_messages.append)
 
-    result = payments_service.activate_by_code(fake_db, "SW-CCCC3333", "ev-3")
+    result = asyncio.run(payments_service.activate_by_code(fake_db, "SW-CCCC3333", "ev-3"))
 
     assert result is False
     assert fake_db._payments["p3"]["status"] == "rejected"
@@ -237,16 +247,18 @@ def test_activate_by_code_transaction_activates_user_and_payment(monkeypatch):
     )
     monkeypatch.setattr(payments_service, "get_settings", lambda: _Settings())
     append_calls: list[tuple[str, list[str]]] = []
+
+    async def _fake_append(db, uid, course_ids):
+        append_calls.append((uid, course_ids))
+        return {"addedCourseIds": course_ids, "createdSteps": 2}
+
     monkeypatch.setattr(
-        payments_service,
-        "append_courses_to_student_plan",
-        lambda db, uid, course_ids: append_calls.append((uid, course_ids))
-        or {"addedCourseIds": course_ids, "createdSteps": 2},
+        payments_service, "append_courses_to_student_plan", _fake_append
     )
     sent_messages: list[str] = []
     monkeypatch.setattr(payments_service, "_notify_admin_async", sent_messages.append)
 
-    result = payments_service.activate_by_code(fake_db, "SW-DDDD4444", "ev-4")
+    result = asyncio.run(payments_service.activate_by_code(fake_db, "SW-DDDD4444", "ev-4"))
 
     assert result is True
     assert len(fake_db._transactions) == 1
@@ -271,7 +283,7 @@ def test_activate_by_code_not_found_sends_failure_notification(monkeypatch):
     sent_messages: list[str] = []
     monkeypatch.setattr(payments_service, "_notify_admin_async", sent_messages.append)
 
-    result = payments_service.activate_by_code(fake_db, "SW-MISSING1", "ev-404")
+    result = asyncio.run(payments_service.activate_by_code(fake_db, "SW-MISSING1", "ev-404"))
 
     assert result is False
     assert len(sent_messages) == 1
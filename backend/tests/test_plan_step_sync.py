@@ -0,0 +1,311 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+from google.cloud import firestore
+
+from app.auth import deps as auth_deps
+from app.main import app
+from app.routers import admin_students, auth
+from app.services.lesson_catalog import invalidate_lesson
+
+T0 = datetime(2025, 3, 1, tzinfo=timezone.utc)
+
+
+def _at(minutes):
+    return T0 + timedelta(minutes=minutes)
+
+
+def _apply(target, data):
+    for key, value in data.items():
+        if value is firestore.SERVER_TIMESTAMP:
+            target[key] = datetime.now(timezone.utc)
+        elif isinstance(value, firestore.Increment):
+            target[key] = target.get(key, 0) + value.value
+        else:
+            target[key] = value
+
+
+class FakeSnap:
+    def __init__(self, path, data):
+        self.id = path.rsplit("/", 1)[-1]
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeDoc:
+    def __init__(self, db, path):
+        self._db = db
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    def collection(self, name):
+        return FakeQuery(self._db, f"{self.path}/{name}")
+
+    async def get(self, transaction=None):
+        return FakeSnap(self.path, self._db.docs.get(self.path))
+
+
+_OPS = {
+    "==": lambda left, right: left == right,
+    ">": lambda left, right: left is not None and left > right,
+}
+
+
+class FakeQuery:
+    def __init__(self, db, path, filters=()):
+        self._db = db
+        self._path = path
+        self._filters = filters
+
+    def document(self, doc_id):
+        return FakeDoc(self._db, f"{self._path}/{doc_id}")
+
+    def where(self, field, op, value):
+        return FakeQuery(self._db, self._path, (*self._filters, (field, op, value)))
+
+    def order_by(self, field, direction=None):
+        return self
+
+    async def stream(self):
+        self._db.reads.append(self._path)
+        prefix = f"{self._path}/"
+        for path, data in sorted(self._db.docs.items()):
+            if not path.startswith(prefix) or "/" in path[len(prefix) :]:
+                continue
+            if all(
+                _OPS[op](data.get(field), value) for field, op, value in self._filters
+            ):
+                yield FakeSnap(path, data)
+
+
+class FakeBatch:
+    def __init__(self, db):
+        self._db = db
+        self._ops = []
+
+    def update(self, doc_ref, data):
+        self._ops.append((doc_ref.path, data))
+
+    async def commit(self):
+        for path, data in self._ops:
+            _apply(self._db.docs[path], data)
+
+
+class FakeTransaction(FakeBatch):
+    _read_only = False
+    _max_attempts = 1
+    _id = b"fake-transaction"
+
+    def _clean_up(self):
+        self._ops = []
+
+    async def _begin(self, retry_id=None):
+        _ = retry_id
+
+    async def _commit(self):
+        await self.commit()
+
+    async def _rollback(self):
+        self._ops = []
+
+
+class FakeFirestore:
+    def __init__(self, docs):
+        self.docs = docs
+        self.reads = []
+
+    def collection(self, name):
+        return FakeQuery(self, name)
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def transaction(self):
+        return FakeTransaction(self)
+
+    async def get_all(self, refs):
+        for ref in refs:
+            snap = FakeSnap(ref.path, self.docs.get(ref.path))
+            snap.reference = ref
+            yield snap
+
+
+def _docs():
+    return {
+        "student_plans/u1": {
+            "goalId": "g1",
+            "revision": 7,
+            "stepsUpdatedAt": _at(30),
+            "stepsResetAt": _at(0),
+        },
+        "student_plans/u1/steps/a": {"title": "A", "order": 0, "updatedAt": _at(5)},
+        "student_plans/u1/steps/b": {"title": "B", "order": 1, "updatedAt": _at(20)},
+        "student_plans/u1/steps/c": {"title": "C", "order": 2, "updatedAt": _at(30)},
+        "student_plans/u1/step_tombstones/x": {"deletedAt": _at(25)},
+        "student_plans/u1/step_tombstones/y": {"deletedAt": _at(8)},
+    }
+
+
+def _student():
+    return {
+        "uid": "u1",
+        "email": "u1@example.com",
+        "role": "student",
+        "status": "active",
+        "roleRaw": "student",
+    }
+
+
+def _staff():
+    return {**_student(), "uid": "s1", "role": "staff", "roleRaw": "admin"}
+
+
+def _client(monkeypatch, fake_db, user):
+    monkeypatch.setattr(auth, "get_async_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
+    app.dependency_overrides[auth_deps.get_current_user] = lambda: user
+    return TestClient(app)
+
+
+def test_without_since_returns_full_list_and_cursor(monkeypatch):
+    client = _client(monkeypatch, FakeFirestore(_docs()), _student())
+    try:
+        response = client.get("/api/me/plan/steps")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [step["stepId"] for step in body["items"]] == ["a", "b", "c"]
+    assert body["deleted"] == []
+    assert body["full"] is True
+    assert body["revision"] == 7
+    assert datetime.fromisoformat(body["cursor"]) == _at(30)
+
+
+def test_since_returns_changed_steps_and_tombstones(monkeypatch):
+    fake_db = FakeFirestore(_docs())
+    client = _client(monkeypatch, fake_db, _staff())
+    try:
+        delta = client.get(
+            "/api/admin/students/u1/plan/steps",
+            params={"since": _at(10).isoformat()},
+        )
+        fake_db.reads.clear()
+        unchanged = client.get(
+            "/api/admin/students/u1/plan/steps",
+            params={"since": _at(30).isoformat()},
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert delta.status_code == 200
+    body = delta.json()
+    assert [step["stepId"] for step in body["items"]] == ["b", "c"]
+    assert body["deleted"] == ["x"]
+    assert body["full"] is False
+    assert unchanged.json()["items"] == []
+    assert unchanged.json()["deleted"] == []
+    assert fake_db.reads == []
+
+
+def test_since_before_reset_returns_full_list(monkeypatch):
+    docs = _docs()
+    docs["student_plans/u1"]["stepsResetAt"] = _at(15)
+    client = _client(monkeypatch, FakeFirestore(docs), _student())
+    try:
+        response = client.get(
+            "/api/me/plan/steps", params={"since": _at(10).isoformat()}
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.json()["full"] is True
+    assert len(response.json()["items"]) == 3
+
+
+def test_toggle_bumps_revision_and_shows_up_in_next_delta(monkeypatch):
+    docs = _docs()
+    docs["users/u1"] = {"stepsDone": 0, "stepsTotal": 3, "progressPercent": 0}
+    fake_db = FakeFirestore(docs)
+    client = _client(monkeypatch, fake_db, _student())
+    try:
+        first = client.get("/api/me/plan/steps")
+        toggled = client.patch("/api/me/plan/steps/a", json={"isDone": True})
+        plan = client.get("/api/me/plan")
+        delta = client.get(
+            "/api/me/plan/steps", params={"since": first.json()["cursor"]}
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert toggled.status_code == 200
+    assert plan.json()["revision"] == 8
+    assert delta.json()["revision"] == 8
+    assert [step["stepId"] for step in delta.json()["items"]] == ["a"]
+    assert delta.json()["items"][0]["isDone"] is True
+    assert fake_db.docs["users/u1"]["stepsDone"] == 1
+
+
+def test_plan_steps_etag_follows_revision(monkeypatch):
+    fake_db = FakeFirestore(_docs())
+    client = _client(monkeypatch, fake_db, _student())
+    try:
+        first = client.get("/api/me/plan/steps")
+        fake_db.reads.clear()
+        repeat = client.get(
+            "/api/me/plan/steps", headers={"If-None-Match": first.headers["ETag"]}
+        )
+        repeat_reads = list(fake_db.reads)
+        fake_db.docs["student_plans/u1"]["revision"] = 8
+        changed = client.get(
+            "/api/me/plan/steps", headers={"If-None-Match": first.headers["ETag"]}
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert repeat.status_code == 304
+    assert repeat_reads == []
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != first.headers["ETag"]
+
+
+def test_plan_steps_etag_follows_hydrated_lesson_content(monkeypatch):
+    docs = _docs()
+    docs["student_plans/u1"]["sourceLessonKeys"] = ["c1/l1"]
+    docs["student_plans/u1/steps/r"] = {
+        "order": 3,
+        "sourceCourseId": "c1",
+        "sourceLessonId": "l1",
+        "updatedAt": _at(10),
+    }
+    docs["courses/c1/lessons/l1"] = {"title": "Intro", "updatedAt": _at(1)}
+    fake_db = FakeFirestore(docs)
+    client = _client(monkeypatch, fake_db, _student())
+    try:
+        first = client.get("/api/me/plan/steps")
+        repeat = client.get(
+            "/api/me/plan/steps", headers={"If-None-Match": first.headers["ETag"]}
+        )
+        fake_db.docs["courses/c1/lessons/l1"] = {
+            "title": "Basics",
+            "updatedAt": _at(40),
+        }
+        invalidate_lesson("c1", "l1")
+        edited = client.get(
+            "/api/me/plan/steps", headers={"If-None-Match": first.headers["ETag"]}
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert first.json()["items"][-1]["title"] == "Intro"
+    assert repeat.status_code == 304
+    assert edited.status_code == 200
+    assert edited.headers["ETag"] != first.headers["ETag"]
+    assert edited.json()["items"][-1]["title"] == "Basics"
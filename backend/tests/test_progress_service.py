@@ -0,0 +1,317 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+from google.api_core import exceptions as google_exceptions
+from google.cloud import firestore
+
+from app.main import app
+from app.routers import jobs
+from app.services import progress
+
+
+class FakeSnap:
+    def __init__(self, data):
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return self._data
+
+
+class FakeDoc:
+    def __init__(self, store, doc_id, steps=None):
+        self._store = store
+        self.id = doc_id
+        self._steps = steps if steps is not None else {}
+
+    async def get(self, transaction=None):
+        if transaction is not None:
+            transaction.reads.append(self.id)
+        return FakeSnap(self._store.get(self.id))
+
+    async def update(self, data):
+        if self.id not in self._store:
+            raise google_exceptions.NotFound("missing doc")
+        self._store[self.id].update(data)
+
+    def collection(self, name):
+        assert name == "steps"
+        return FakeSteps(self._steps.get(self.id, {}))
+
+
+class FakeAggregation:
+    def __init__(self, value):
+        self.value = value
+
+
+class FakeCountQuery:
+    def __init__(self, count):
+        self._count = count
+
+    async def get(self):
+        return [[FakeAggregation(self._count)]]
+
+
+class FakeSteps:
+    def __init__(self, store, filters=None):
+        self._store = store
+        self._filters = filters or []
+
+    def where(self, field, op, value):
+        assert op == "=="
+        return FakeSteps(self._store, [*self._filters, (field, value)])
+
+    def count(self):
+        matched = [
+            data
+            for data in self._store.values()
+            if all(data.get(field) == value for field, value in self._filters)
+        ]
+        return FakeCountQuery(len(matched))
+
+    async def stream(self):
+        raise AssertionError("progress backfill must not stream steps")
+        yield
+
+
+class FakeListSnap(FakeSnap):
+    def __init__(self, doc, data):
+        super().__init__(data)
+        self.id = doc.id
+        self.reference = doc
+
+
+class FakeCollection:
+    def __init__(self, store, steps=None, start_after=None, limit=None):
+        self._store = store
+        self._steps = steps
+        self._start_after = start_after
+        self._limit = limit
+
+    def document(self, doc_id):
+        return FakeDoc(self._store, doc_id, self._steps)
+
+    def order_by(self, field):
+        assert field == "__name__"
+        return self
+
+    def start_after(self, values):
+        return FakeCollection(self._store, self._steps, values[0], self._limit)
+
+    def limit(self, value):
+        return FakeCollection(self._store, self._steps, self._start_after, value)
+
+    async def stream(self):
+        doc_ids = sorted(self._store)
+        if self._start_after is not None:
+            doc_ids = [doc_id for doc_id in doc_ids if doc_id > self._start_after]
+        for doc_id in doc_ids[: self._limit]:
+            yield FakeListSnap(FakeDoc(self._store, doc_id), self._store[doc_id])
+
+
+class FakeBatch:
+    def __init__(self, db):
+        self._db = db
+        self._ops = []
+
+    def update(self, doc_ref, data):
+        self._ops.append((doc_ref, data))
+
+    async def commit(self):
+        self._db.commits.append(len(self._ops))
+        for doc_ref, data in self._ops:
+            await doc_ref.update(data)
+
+
+class FakeTransaction:
+    _read_only = False
+    _max_attempts = 1
+    _id = b"fake-transaction"
+
+    def __init__(self):
+        self.reads = []
+        self._ops = []
+        self.committed = False
+
+    def _clean_up(self):
+        pass
+
+    async def _begin(self, retry_id=None):
+        _ = retry_id
+
+    async def _commit(self):
+        for doc_ref, data in self._ops:
+            await doc_ref.update(data)
+        self.committed = True
+
+    async def _rollback(self):
+        self._ops = []
+
+    def update(self, doc_ref, data):
+        self._ops.append((doc_ref, data))
+
+
+class FakeFirestore:
+    def __init__(self, users, steps=None):
+        self._users = users
+        self._steps = steps or {}
+        self.transactions = []
+        self.commits = []
+
+    def collection(self, name):
+        if name == "student_plans":
+            return FakeCollection({}, self._steps)
+        assert name == "users"
+        return FakeCollection(self._users)
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def transaction(self):
+        tx = FakeTransaction()
+        self.transactions.append(tx)
+        return tx
+
+
+def _progress(user):
+    return {key: user[key] for key in ("stepsDone", "stepsTotal", "progressPercent")}
+
+
+def test_progress_fields_clamps_and_recomputes_percent():
+    assert progress.progress_fields(5, 3) == {
+        "stepsDone": 3,
+        "stepsTotal": 3,
+        "progressPercent": 100,
+    }
+    assert progress.progress_fields(-1, -4) == {
+        "stepsDone": 0,
+        "stepsTotal": 0,
+        "progressPercent": 0,
+    }
+    assert progress.progress_percent(1, 3) == 33
+
+
+def test_apply_delta_reads_and_writes_inside_one_transaction():
+    users = {"u1": {"stepsDone": 1, "stepsTotal": 4, "progressPercent": 25}}
+    db = FakeFirestore(users)
+
+    asyncio.run(progress.apply_user_progress_delta(db, "u1", done_delta=1))
+    asyncio.run(
+        progress.apply_user_progress_delta(db, "u1", done_delta=-5, total_delta=-2)
+    )
+
+    assert _progress(users["u1"]) == {
+        "stepsDone": 0,
+        "stepsTotal": 2,
+        "progressPercent": 0,
+    }
+    assert [tx.reads for tx in db.transactions] == [["u1"], ["u1"]]
+    assert all(tx.committed for tx in db.transactions)
+
+
+def test_apply_delta_skips_missing_user_and_zero_delta():
+    db = FakeFirestore({})
+
+    asyncio.run(progress.apply_user_progress_delta(db, "ghost", done_delta=1))
+    asyncio.run(progress.apply_user_progress_delta(db, "ghost"))
+
+    assert db._users == {}
+    assert len(db.transactions) == 1
+
+
+def test_write_step_done_reads_the_step_in_the_transaction_and_counts_once():
+    users = {"u1": {"stepsDone": 1, "stepsTotal": 4, "progressPercent": 25}}
+    steps = {"s1": {"isDone": False}}
+    db = FakeFirestore(users)
+    step_ref = FakeDoc(steps, "s1")
+
+    for _ in range(2):
+        asyncio.run(progress.write_step_done(db, "u1", step_ref, {"isDone": True}))
+    missing = asyncio.run(
+        progress.write_step_done(db, "u1", FakeDoc(steps, "s2"), {"isDone": True})
+    )
+
+    assert missing is None
+    assert steps["s1"] == {"isDone": True}
+    assert _progress(users["u1"]) == {
+        "stepsDone": 2,
+        "stepsTotal": 4,
+        "progressPercent": 50,
+    }
+    assert [tx.reads for tx in db.transactions] == [["s1", "u1"], ["s1", "u1"], ["s2"]]
+
+
+def test_set_user_progress_writes_without_reading():
+    users = {"u1": {"stepsDone": 9, "stepsTotal": 9, "progressPercent": 100}}
+    db = FakeFirestore(users)
+
+    asyncio.run(progress.set_user_progress(db, "u1", done=2, total=8))
+    asyncio.run(progress.set_user_progress(db, "ghost", done=0, total=0))
+
+    assert _progress(users["u1"]) == {
+        "stepsDone": 2,
+        "stepsTotal": 8,
+        "progressPercent": 25,
+    }
+    assert db.transactions == []
+
+
+def test_backfill_progress_job_fills_in_users_missing_fields(monkeypatch):
+    users = {
+        "a1": {"role": "admin"},
+        "s1": {"role": "student"},
+        "s2": {"role": "student", "stepsDone": 1, "stepsTotal": 1},
+        "s3": {
+            "role": "student",
+            "stepsDone": 0,
+            "stepsTotal": 0,
+            "progressPercent": 0,
+        },
+    }
+    steps = {
+        "s1": {"a": {"isDone": True}, "b": {"isDone": False}, "c": {}},
+        "s2": {"a": {"isDone": True}, "b": {"isDone": True}},
+    }
+    fake_db = FakeFirestore(users, steps)
+    monkeypatch.setattr(jobs, "get_async_firestore_client", lambda: fake_db)
+
+    class _Settings:
+        JOB_TOKEN = "job-secret"
+
+    monkeypatch.setattr(jobs, "get_settings", lambda: _Settings())
+    client = TestClient(app)
+
+    response = client.post(
+        "/jobs/users/backfill-progress?limit=2",
+        headers={"X-Job-Token": "job-secret"},
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "status": "ok",
+        "scanned": 4,
+        "updated": 3,
+        "nextCursor": None,
+    }
+    assert _progress(users["s1"]) == {
+        "stepsDone": 1,
+        "stepsTotal": 3,
+        "progressPercent": 33,
+    }
+    assert _progress(users["s2"]) == {
+        "stepsDone": 2,
+        "stepsTotal": 2,
+        "progressPercent": 100,
+    }
+    # Not counted, but listed on progress sorts like every other role.
+    assert _progress(users["a1"]) == {
+        "stepsDone": 0,
+        "stepsTotal": 0,
+        "progressPercent": 0,
+    }
+    assert users["s1"]["updatedAt"] is firestore.SERVER_TIMESTAMP
+    assert "updatedAt" not in users["s3"]
+    assert fake_db.commits == [2, 1]
@@ -0,0 +1,295 @@
+import asyncio
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+from google.cloud import firestore
+
+from app.auth import deps as auth_deps
+from app.core.errors import AppError
+from app.db.ranking import DEFAULT_RANK, rank_between, sort_ranked
+from app.main import app
+from app.routers import admin_students, jobs
+from app.services.ranked_lists import move_ranked_item, rebalance_ranks
+
+
+class _Settings:
+    JOB_TOKEN = "job-secret"
+
+
+def _apply(target, data):
+    for key, value in data.items():
+        if value is firestore.DELETE_FIELD:
+            target.pop(key, None)
+        elif isinstance(value, firestore.Increment):
+            target[key] = target.get(key, 0) + value.value
+        else:
+            target[key] = value
+
+
+class FakeSnap:
+    def __init__(self, db, path):
+        self.reference = FakeDoc(db, path)
+        self.id = self.reference.id
+        self._data = db.docs.get(path)
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeDoc:
+    def __init__(self, db, path):
+        self._db = db
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    def collection(self, name):
+        return FakeCollection(self._db, f"{self.path}/{name}")
+
+    async def get(self):
+        return FakeSnap(self._db, self.path)
+
+    async def update(self, data):
+        self._db.writes += 1
+        _apply(self._db.docs[self.path], data)
+
+
+class FakeCollection:
+    def __init__(self, db, path):
+        self._db = db
+        self._path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    @property
+    def parent(self):
+        return FakeDoc(self._db, self._path.rsplit("/", 1)[0])
+
+    def document(self, doc_id):
+        return FakeDoc(self._db, f"{self._path}/{doc_id}")
+
+    def order_by(self, field):
+        assert field == "order"
+        return self
+
+    async def stream(self):
+        prefix = f"{self._path}/"
+        paths = [
+            path
+            for path in self._db.docs
+            if path.startswith(prefix) and "/" not in path[len(prefix) :]
+        ]
+        paths.sort(key=lambda path: self._db.docs[path]["order"])
+        for path in paths:
+            yield FakeSnap(self._db, path)
+
+
+class FakeBatch:
+    def __init__(self, db):
+        self._db = db
+        self._ops = []
+
+    def update(self, doc_ref, data):
+        self._ops.append((doc_ref.path, data))
+
+    async def commit(self):
+        for path, data in self._ops:
+            self._db.writes += 1
+            _apply(self._db.docs[path], data)
+
+
+class FakeFirestore:
+    def __init__(self, docs):
+        self.docs = docs
+        self.writes = 0
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+    async def get_all(self, refs):
+        for ref in refs:
+            yield FakeSnap(self, ref.path)
+
+    def batch(self):
+        return FakeBatch(self)
+
+
+def _plan(count):
+    docs = {"student_plans/u1": {"studentUid": "u1"}}
+    for order in range(count):
+        docs[f"student_plans/u1/steps/s{order}"] = {
+            "title": f"S{order}",
+            "order": order,
+        }
+    return docs
+
+
+def _steps_ref(db):
+    return db.collection("student_plans").document("u1").collection("steps")
+
+
+def _titles(db):
+    prefix = "student_plans/u1/steps/"
+    items = [
+        {**data, "id": path[len(prefix) :]}
+        for path, data in db.docs.items()
+        if path.startswith(prefix)
+    ]
+    return [item["title"] for item in sort_ranked(items)]
+
+
+def _staff():
+    return {
+        "uid": "s1",
+        "email": "staff@example.com",
+        "displayName": "Staff",
+        "role": "staff",
+        "status": "active",
+        "roleRaw": "admin",
+    }
+
+
+def test_rank_between_stays_ordered_under_random_inserts():
+    rng = random.Random(7)
+    keys = [DEFAULT_RANK]
+    for _ in range(2000):
+        index = rng.randint(0, len(keys))
+        before = keys[index - 1] if index else None
+        after = keys[index] if index < len(keys) else None
+        key = rank_between(before, after)
+        assert before is None or before < key
+        assert after is None or key < after
+        assert not key.endswith("0")
+        keys.insert(index, key)
+    assert keys == sorted(keys)
+    with pytest.raises(ValueError):
+        rank_between("b", "a")
+
+
+def test_move_writes_only_the_moved_step():
+    db = FakeFirestore(_plan(4))
+
+    async def _run():
+        await move_ranked_item(db, _steps_ref(db), "s3", after_id="s0", before_id="s1")
+        await move_ranked_item(db, _steps_ref(db), "s0", after_id="s2", before_id=None)
+        await move_ranked_item(db, _steps_ref(db), "s2", after_id=None, before_id="s3")
+
+    asyncio.run(_run())
+
+    assert db.writes == 3
+    assert _titles(db) == ["S2", "S3", "S1", "S0"]
+
+
+def test_move_rejects_unordered_or_missing_neighbours():
+    db = FakeFirestore(_plan(3))
+
+    with pytest.raises(AppError) as conflict:
+        asyncio.run(
+            move_ranked_item(db, _steps_ref(db), "s0", after_id="s2", before_id="s1")
+        )
+    assert conflict.value.status_code == 409
+    with pytest.raises(AppError) as missing:
+        asyncio.run(
+            move_ranked_item(db, _steps_ref(db), "s0", after_id="nope", before_id=None)
+        )
+    assert missing.value.status_code == 404
+    with pytest.raises(AppError) as empty:
+        asyncio.run(
+            move_ranked_item(db, _steps_ref(db), "s0", after_id=None, before_id=None)
+        )
+    assert empty.value.status_code == 400
+    assert db.writes == 0
+
+
+def test_rebalance_renumbers_and_clears_ranks():
+    db = FakeFirestore(_plan(4))
+
+    async def _run():
+        for _ in range(10):
+            await move_ranked_item(
+                db, _steps_ref(db), "s3", after_id="s0", before_id="s1"
+            )
+            await move_ranked_item(
+                db, _steps_ref(db), "s1", after_id="s0", before_id="s3"
+            )
+        return await rebalance_ranks(db, _steps_ref(db))
+
+    result = asyncio.run(_run())
+
+    assert result == {"scanned": 4, "updated": 3}
+    assert _titles(db) == ["S0", "S1", "S3", "S2"]
+    steps = {path.rsplit("/", 1)[-1]: data for path, data in db.docs.items()}
+    orders = {step_id: steps[step_id]["order"] for step_id in ("s0", "s1", "s2", "s3")}
+    assert orders == {"s0": 0, "s1": 1, "s3": 2, "s2": 3}
+    assert not any("rank" in data for data in steps.values())
+
+
+def test_move_endpoint_and_rebalance_job(monkeypatch):
+    db = FakeFirestore(_plan(3))
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: db)
+    monkeypatch.setattr(jobs, "get_async_firestore_client", lambda: db)
+    monkeypatch.setattr(jobs, "get_settings", lambda: _Settings())
+    app.dependency_overrides[auth_deps.get_current_user] = _staff
+    client = TestClient(app)
+    try:
+        moved = client.post(
+            "/api/admin/students/u1/plan/steps/s2/move",
+            json={"afterStepId": None, "beforeStepId": "s0"},
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert moved.status_code == 200
+    assert moved.json()["stepId"] == "s2"
+    assert moved.json()["order"] == 0
+    assert moved.json()["rebalanced"] is False
+    assert db.writes == 2
+    assert db.docs["student_plans/u1"]["revision"] == 1
+    assert _titles(db) == ["S2", "S0", "S1"]
+
+    rebalanced = client.post(
+        "/jobs/plans/u1/steps/rebalance",
+        headers={"X-Job-Token": "job-secret"},
+    )
+
+    assert rebalanced.status_code == 200
+    assert rebalanced.json() == {"scanned": 3, "updated": 3}
+    assert _titles(db) == ["S2", "S0", "S1"]
+    assert db.docs["student_plans/u1"]["revision"] == 2
+
+
+def test_move_with_an_exhausted_rank_gap_rebalances_before_returning(monkeypatch):
+    docs = _plan(3)
+    docs["student_plans/u1/steps/s0"].update(order=0, rank="VVVVVVVV")
+    docs["student_plans/u1/steps/s1"].update(order=0, rank="VVVVVVVW")
+    db = FakeFirestore(docs)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: db)
+    app.dependency_overrides[auth_deps.get_current_user] = _staff
+    client = TestClient(app)
+    try:
+        moved = client.post(
+            "/api/admin/students/u1/plan/steps/s2/move",
+            json={"afterStepId": "s0", "beforeStepId": "s1"},
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert moved.status_code == 200
+    assert moved.json() == {
+        "stepId": "s2",
+        "order": 1,
+        "rank": None,
+        "rebalanced": True,
+    }
+    assert _titles(db) == ["S0", "S2", "S1"]
+    assert not any("rank" in data for data in db.docs.values())
+    assert [db.docs[f"student_plans/u1/steps/s{i}"]["order"] for i in range(3)] == [
+        0,
+        2,
+        1,
+    ]
+    # Once for the move, once for the renumbering.
+    assert db.docs["student_plans/u1"]["revision"] == 2
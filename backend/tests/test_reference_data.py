@@ -0,0 +1,206 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from app.auth import deps as auth_deps
+from app.db import reference_data
+from app.db.reference_data import ReferenceListener
+from app.main import app
+from app.routers import admin_settings, jobs
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+class FakeSnap:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeWatch:
+    def __init__(self, callback):
+        self.callback = callback
+        self.is_active = True
+
+    def unsubscribe(self):
+        self.is_active = False
+
+
+class FakeWatchedRef:
+    def __init__(self, client, path):
+        self._client = client
+        self._path = path
+
+    def document(self, doc_id):
+        return FakeWatchedRef(self._client, f"{self._path}/{doc_id}")
+
+    def on_snapshot(self, callback):
+        watch = FakeWatch(callback)
+        self._client.watches.append((self._path, watch))
+        return watch
+
+
+class FakeSyncClient:
+    def __init__(self):
+        self.watches = []
+
+    def collection(self, name):
+        return FakeWatchedRef(self, name)
+
+
+class FakeDoc:
+    def __init__(self, db, collection, doc_id):
+        self._db = db
+        self._collection = collection
+        self.id = doc_id
+
+    async def get(self):
+        self._db.reads.append(f"{self._collection}/{self.id}")
+        return FakeSnap(self.id, self._db.docs[self._collection].get(self.id))
+
+
+class FakeCollection:
+    def __init__(self, db, name):
+        self._db = db
+        self._name = name
+
+    def document(self, doc_id):
+        return FakeDoc(self._db, self._name, doc_id)
+
+    async def stream(self):
+        self._db.reads.append(self._name)
+        for doc_id, data in self._db.docs[self._name].items():
+            yield FakeSnap(doc_id, data)
+
+
+class FakeFirestore:
+    def __init__(self, docs):
+        self.docs = docs
+        self.reads = []
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+
+def _goals():
+    return {
+        "g1": {"title": "Goal 1", "isActive": True, "createdAt": T0},
+        "g2": {"title": "Goal 2", "isActive": False, "createdAt": T0},
+    }
+
+
+def _push(watch, docs, read_time):
+    watch.callback(
+        [FakeSnap(doc_id, data) for doc_id, data in docs.items()], [], read_time
+    )
+
+
+def _started(path="goals"):
+    client = FakeSyncClient()
+    listener = ReferenceListener(path, restart_seconds=30)
+    listener.start(client)
+    return listener, client
+
+
+def test_listener_snapshot_is_served_without_reads():
+    listener, client = _started()
+    _, watch = client.watches[0]
+    _push(watch, _goals(), T0)
+    db = FakeFirestore({"goals": {}})
+
+    snapshot = asyncio.run(listener.get(db))
+    goal = asyncio.run(listener.document(db, "g1"))
+    goal["title"] = "Mutated"
+
+    assert snapshot.source == "listener"
+    assert sorted(item["id"] for item in snapshot.items()) == ["g1", "g2"]
+    assert listener.current().document("g1")["title"] == "Goal 1"
+    assert db.reads == []
+    assert listener.stats()["listening"] is True
+    assert listener.stats()["fallbackReads"] == 0
+
+
+def test_local_write_reads_through_until_the_watch_catches_up():
+    listener, client = _started()
+    _, watch = client.watches[0]
+    _push(watch, _goals(), T0)
+    db = FakeFirestore({"goals": {**_goals(), "g3": {"title": "New"}}})
+
+    listener.mark_written()
+    pending = asyncio.run(listener.get(db))
+    _push(watch, db.docs["goals"], datetime.now(timezone.utc) + timedelta(seconds=1))
+    caught_up = asyncio.run(listener.get(db))
+
+    assert pending.source == "direct"
+    assert "g3" in pending.docs
+    assert caught_up.source == "listener"
+    assert "g3" in caught_up.docs
+    assert db.reads == ["goals"]
+    assert listener.stats()["writePending"] is False
+
+
+def test_dropped_watch_falls_back_and_restarts(monkeypatch):
+    listener, client = _started("config/fx_rates")
+    path, watch = client.watches[0]
+    _push(watch, {"fx_rates": {"rates": {"EUR": 0.9}}}, T0)
+    db = FakeFirestore({"config": {"fx_rates": {"rates": {"EUR": 0.8}}}})
+    monkeypatch.setattr(reference_data, "get_firestore_client", lambda: client)
+
+    watch.is_active = False
+    listener._last_start -= 60
+    rates = asyncio.run(listener.get(db)).document("fx_rates")["rates"]
+
+    assert path == "config/fx_rates"
+    assert rates == {"EUR": 0.8}
+    assert db.reads == ["config/fx_rates"]
+    assert len(client.watches) == 2
+    assert listener.stats()["restarts"] == 1
+    assert listener.listening is True
+
+
+def test_goal_list_uses_listener_snapshot(monkeypatch):
+    listener, client = _started()
+    _, watch = client.watches[0]
+    _push(watch, _goals(), T0)
+    fake_db = FakeFirestore({"goals": {}})
+    monkeypatch.setitem(reference_data._listeners, "goals", listener)
+    monkeypatch.setattr(admin_settings, "get_async_firestore_client", lambda: fake_db)
+    app.dependency_overrides[auth_deps.get_current_user] = lambda: {
+        "uid": "u1",
+        "role": "student",
+        "status": "active",
+    }
+    try:
+        response = TestClient(app).get("/api/admin/goals")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()["items"]] == ["g1"]
+    assert fake_db.reads == []
+
+
+class _Settings:
+    JOB_TOKEN = "job-secret"
+
+
+def test_reference_data_status_reports_every_path(monkeypatch):
+    monkeypatch.setattr(jobs, "get_settings", lambda: _Settings())
+    client = TestClient(app)
+
+    response = client.get("/jobs/reference-data", headers={"X-Job-Token": "job-secret"})
+    unauthorized = client.get("/jobs/reference-data")
+
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert set(items) == set(reference_data.REFERENCE_PATHS)
+    assert items["goals"]["listening"] is False
+    assert unauthorized.status_code == 401
@@ -32,18 +32,18 @@ class FakeDoc:
         self.id = doc_id
         self._subcollections = subcollections or {}
 
-    def get(self, transaction=None):
+    async def get(self, transaction=None):
         return FakeSnap(self, self._store.get(self.id))
 
-    def set(self, data):
+    async def set(self, data):
         self._store[self.id] = _normalize(data)
 
-    def update(self, data):
+    async def update(self, data):
         if self.id not in self._store:
             raise KeyError("missing doc")
         self._store[self.id].update(_normalize(data))
 
-    def delete(self):
+    async def delete(self):
         self._store.pop(self.id, None)
 
     def collection(self, name):
@@ -79,7 +79,11 @@ class FakeQuery:
         self._start_after_values = values
         return self
 
-    def stream(self):
+    async def stream(self):
+        for snap in self._snapshots():
+            yield snap
+
+    def _snapshots(self):
         docs = []
         for doc_id, data in self._store.items():
             if data is None:
@@ -144,27 +148,48 @@ class FakeBatch:
     def delete(self, doc_ref):
         self._ops.append(("delete", doc_ref, None))
 
-    def commit(self):
+    async def commit(self):
         for op, doc_ref, data in self._ops:
             if op == "set":
-                doc_ref.set(data)
+                await doc_ref.set(data)
             elif op == "update":
-                doc_ref.update(data)
+                await doc_ref.update(data)
             elif op == "delete":
-                doc_ref.delete()
+                await doc_ref.delete()
 
 
 class FakeTransaction:
     def __init__(self):
         self._ops = []
 
+    _read_only = False
+    _max_attempts = 1
+    _id = b"fake-transaction"
+
+    def _clean_up(self):
+        pass
+
+    async def _begin(self, retry_id=None):
+        _ = retry_id
+
+    async def _commit(self):
+        await self.commit()
+
+    async def _rollback(self):
+        self._ops = []
+
+    def set(self, doc_ref, data):
+        self._ops.append(("set", doc_ref, data))
+
     def update(self, doc_ref, data):
         self._ops.append(("update", doc_ref, data))
 
-    def commit(self):
+    async def commit(self):
         for op, doc_ref, data in self._ops:
-            if op == "update":
-                doc_ref.update(data)
+            if op == "set":
+                await doc_ref.set(data)
+            elif op == "update":
+                await doc_ref.update(data)
 
 
 class FakeFirestore:
@@ -267,7 +292,7 @@ def test_student_complete_step_writes_step_and_feed(monkeypatch):
         goals={"g1": {"title": "Goal One"}},
         users={"u1": {"stepsDone": 0, "stepsTotal": 1}},
     )
-    monkeypatch.setattr(auth, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(auth, "get_async_firestore_client", lambda: fake_db)
     telegram_messages: list[str] = []
 
     async def _fake_send_admin_message(text: str) -> None:
@@ -321,6 +346,35 @@ def test_student_complete_step_writes_step_and_feed(monkeypatch):
     app.dependency_overrides.clear()
 
 
+def test_student_complete_step_reuses_selected_goal_title(monkeypatch):
+    fake_db = FakeFirestore(
+        plans={"u1": {"goalId": "g1"}},
+        steps={"u1": {"s1": {"title": "Step One", "isDone": False}}},
+        goals={},
+        users={"u1": {"stepsDone": 0, "stepsTotal": 1}},
+    )
+    monkeypatch.setattr(auth, "get_async_firestore_client", lambda: fake_db)
+
+    async def _fake_send_admin_message(_text: str) -> None:
+        return None
+
+    monkeypatch.setattr(auth, "send_admin_message", _fake_send_admin_message)
+    app.dependency_overrides[get_current_user] = lambda: {
+        **_override_student(),
+        "selectedGoalId": "g1",
+        "selectedGoalTitle": "Goal From Profile",
+    }
+    client = TestClient(app)
+
+    response = client.post("/api/student/steps/s1/complete", json={})
+
+    assert response.status_code == 201
+    completion = fake_db._completions[response.json()["completionId"]]
+    assert completion["goalTitle"] == "Goal From Profile"
+
+    app.dependency_overrides.clear()
+
+
 def test_admin_patch_and_revoke_updates_feed_and_step(monkeypatch):
     fake_db = FakeFirestore(
         plans={"u1": {"goalId": "g1"}},
@@ -347,7 +401,7 @@ def test_admin_patch_and_revoke_updates_feed_and_step(monkeypatch):
         },
         users={"u1": {"stepsDone": 1, "stepsTotal": 1}},
     )
-    monkeypatch.setattr(admin_step_completions, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_step_completions, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[require_staff] = _override_staff
     client = TestClient(app)
 
@@ -407,8 +461,8 @@ def test_revoked_step_can_be_completed_again_and_listed_in_admin(monkeypatch):
         },
         users={"u1": {"stepsDone": 1, "stepsTotal": 1}},
     )
-    monkeypatch.setattr(auth, "get_firestore_client", lambda: fake_db)
-    monkeypatch.setattr(admin_step_completions, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(auth, "get_async_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_step_completions, "get_async_firestore_client", lambda: fake_db)
     client = TestClient(app)
 
     app.dependency_overrides[require_staff] = _override_staff
@@ -453,7 +507,7 @@ def test_admin_list_step_completions_default_completed_with_cursor(monkeypatch):
             "c3": {"status": "revoked", "completedAt": t3},
         }
     )
-    monkeypatch.setattr(admin_step_completions, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_step_completions, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[require_staff] = _override_staff
     client = TestClient(app)
 
@@ -482,7 +536,7 @@ def test_admin_list_step_completions_all_status(monkeypatch):
             "c2": {"status": "revoked", "completedAt": t2},
         }
     )
-    monkeypatch.setattr(admin_step_completions, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_step_completions, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[require_staff] = _override_staff
     client = TestClient(app)
 
@@ -496,7 +550,7 @@ def test_admin_list_step_completions_all_status(monkeypatch):
 
 def test_admin_list_step_completions_invalid_cursor(monkeypatch):
     fake_db = FakeFirestore(completions={})
-    monkeypatch.setattr(admin_step_completions, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_step_completions, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[require_staff] = _override_staff
     client = TestClient(app)
 
@@ -535,7 +589,7 @@ def test_admin_patch_partial_keeps_other_step_fields(monkeypatch):
             }
         },
     )
-    monkeypatch.setattr(admin_step_completions, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_step_completions, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[require_staff] = _override_staff
     client = TestClient(app)
 
@@ -576,7 +630,7 @@ def test_admin_patch_skips_step_sync_when_not_done(monkeypatch):
             }
         },
     )
-    monkeypatch.setattr(admin_step_completions, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_step_completions, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[require_staff] = _override_staff
     client = TestClient(app)
 
@@ -604,7 +658,7 @@ def test_student_complete_sanitizes_and_validates_link(monkeypatch):
         steps={"u1": {"s1": {"title": "Step One", "isDone": False}}},
         goals={"g1": {"title": "Goal One"}},
     )
-    monkeypatch.setattr(auth, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(auth, "get_async_firestore_client", lambda: fake_db)
     app.dependency_overrides[get_current_user] = _override_student
     client = TestClient(app)
 
@@ -636,7 +690,7 @@ def test_student_complete_telegram_failure_does_not_break_request(monkeypatch):
         goals={"g1": {"title": "Goal One"}},
         users={"u1": {"stepsDone": 0, "stepsTotal": 1}},
     )
-    monkeypatch.setattr(auth, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(auth, "get_async_firestore_client", lambda: fake_db)
 
     async def _raise_send(_text: str) -> None:
         raise RuntimeError("telegram down")
@@ -0,0 +1,198 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from app.auth import deps as auth_deps
+from app.main import app
+from app.routers import admin_students
+
+NOW = datetime(2025, 1, 10, tzinfo=timezone.utc)
+
+
+class FakeSnap:
+    def __init__(self, path, data):
+        self.id = path.rsplit("/", 1)[-1]
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeDoc:
+    def __init__(self, db, path):
+        self._db = db
+        self.path = path
+
+    def collection(self, name):
+        return FakeQuery(self._db, f"{self.path}/{name}")
+
+    async def get(self):
+        return FakeSnap(self.path, self._db.docs.get(self.path))
+
+
+class FakeQuery:
+    def __init__(self, db, path, filters=(), order=None, limit=None, fields=None):
+        self._db = db
+        self._path = path
+        self._filters = filters
+        self._order = order
+        self._limit = limit
+        self._fields = fields
+
+    def _copy(self, **changes):
+        state = {
+            "filters": self._filters,
+            "order": self._order,
+            "limit": self._limit,
+            "fields": self._fields,
+            **changes,
+        }
+        return FakeQuery(self._db, self._path, **state)
+
+    def document(self, doc_id):
+        return FakeDoc(self._db, f"{self._path}/{doc_id}")
+
+    def where(self, field, op, value):
+        assert op == "=="
+        return self._copy(filters=(*self._filters, (field, value)))
+
+    def order_by(self, field, direction=None):
+        return self._copy(order=(field, direction == "DESCENDING"))
+
+    def limit(self, value):
+        return self._copy(limit=value)
+
+    def select(self, fields):
+        self._db.selects.append((self._path, list(fields)))
+        return self._copy(fields=list(fields))
+
+    async def stream(self):
+        prefix = f"{self._path}/"
+        rows = [
+            (path, data)
+            for path, data in self._db.docs.items()
+            if path.startswith(prefix)
+            and "/" not in path[len(prefix) :]
+            and all(data.get(field) == value for field, value in self._filters)
+        ]
+        if self._order:
+            field, descending = self._order
+            rows.sort(key=lambda row: row[1][field], reverse=descending)
+        for path, data in rows[: self._limit]:
+            if self._fields is not None:
+                data = {key: data[key] for key in self._fields if key in data}
+            yield FakeSnap(path, data)
+
+
+class FakeFirestore:
+    def __init__(self, docs):
+        self.docs = docs
+        self.selects = []
+
+    def collection(self, name):
+        return FakeQuery(self, name)
+
+
+def _docs():
+    docs = {
+        "users/u1": {
+            "email": "u1@example.com",
+            "displayName": "Student One",
+            "role": "student",
+            "searchTokens": ["student"],
+        },
+        "users/u2": {"email": "u2@example.com", "role": "student"},
+        "student_plans/u1": {"goalId": "g1", "createdAt": NOW, "updatedAt": NOW},
+        "student_plans/u1/steps/b": {"title": "Second", "order": 1, "isDone": False},
+        "student_plans/u1/steps/a": {"title": "First", "order": 0, "isDone": True},
+        "payments/p1": {"userUid": "u1", "amount": 100, "createdAt": NOW},
+        "payments/p2": {"userUid": "u2", "amount": 200, "createdAt": NOW},
+        "questions/q1": {"studentUid": "u1", "title": "Help", "createdAt": NOW},
+    }
+    for index in range(3):
+        docs[f"step_completions/c{index}"] = {
+            "studentUid": "u1",
+            "stepId": "a",
+            "comment": f"note {index}",
+            "completedAt": NOW + timedelta(minutes=index),
+        }
+    return docs
+
+
+def _staff():
+    return {
+        "uid": "s1",
+        "email": "staff@example.com",
+        "displayName": "Staff",
+        "role": "staff",
+        "status": "active",
+        "roleRaw": "admin",
+    }
+
+
+def _client(monkeypatch, fake_db):
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
+    app.dependency_overrides[auth_deps.get_current_user] = _staff
+    return TestClient(app)
+
+
+def test_dossier_returns_every_section_with_timings(monkeypatch):
+    client = _client(monkeypatch, FakeFirestore(_docs()))
+    try:
+        response = client.get("/api/admin/students/u1/dossier?limit=2")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["user"]["uid"] == "u1"
+    assert body["user"]["status"] == "active"
+    assert "searchTokens" not in body["user"]
+    assert body["plan"]["goalId"] == "g1"
+    assert [step["stepId"] for step in body["steps"]] == ["a", "b"]
+    assert [item["id"] for item in body["completions"]] == ["c2", "c1"]
+    assert [item["id"] for item in body["payments"]] == ["p1"]
+    assert [item["id"] for item in body["questions"]] == ["q1"]
+    timing = response.headers["Server-Timing"]
+    for section in ("user", "plan", "steps", "completions", "payments", "total"):
+        assert f"{section};dur=" in timing
+
+
+def test_dossier_projects_requested_fields(monkeypatch):
+    fake_db = FakeFirestore(_docs())
+    client = _client(monkeypatch, fake_db)
+    try:
+        response = client.get(
+            "/api/admin/students/u1/dossier",
+            params={"fields": "user.email,steps.isDone,completions.comment"},
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["user"] == {"uid": "u1", "email": "u1@example.com"}
+    assert body["steps"] == [
+        {"stepId": "a", "isDone": True},
+        {"stepId": "b", "isDone": False},
+    ]
+    assert body["completions"][0] == {"id": "c2", "comment": "note 2"}
+    assert body["payments"][0]["amount"] == 100
+    assert ("step_completions", ["completedAt", "comment"]) in fake_db.selects
+
+
+def test_dossier_errors(monkeypatch):
+    client = _client(monkeypatch, FakeFirestore(_docs()))
+    try:
+        missing = client.get("/api/admin/students/nope/dossier")
+        invalid = client.get("/api/admin/students/u1/dossier?fields=grades.score")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert missing.status_code == 404
+    assert invalid.status_code == 400
+    assert invalid.json()["error"]["code"] == "validation_error"
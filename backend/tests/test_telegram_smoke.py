@@ -27,14 +27,14 @@ class FakeDoc:
         self.id = doc_id
         self._subcollections = subcollections or {}
 
-    def get(self, transaction=None):
+    async def get(self, transaction=None):
         _ = transaction
         return FakeSnap(self)
 
-    def set(self, data):
+    async def set(self, data):
         self._store[self.id] = _normalize(data)
 
-    def update(self, data):
+    async def update(self, data):
         if self.id not in self._store:
             raise KeyError("missing doc")
         self._store[self.id].update(_normalize(data))
@@ -46,6 +46,19 @@ class FakeDoc:
         return FakeCollection(per_doc[name])
 
 
+class FakeAggregation:
+    def __init__(self, value):
+        self.value = value
+
+
+class FakeCountQuery:
+    def __init__(self, query):
+        self._query = query
+
+    async def get(self):
+        return [[FakeAggregation(len(self._query._snapshots()))]]
+
+
 class FakeQuery:
     def __init__(self, store):
         self._store = store
@@ -60,7 +73,14 @@ class FakeQuery:
         self._limit = value
         return self
 
-    def stream(self):
+    def count(self):
+        return FakeCountQuery(self)
+
+    async def stream(self):
+        for snap in self._snapshots():
+            yield snap
+
+    def _snapshots(self):
         items = []
         for doc_id, data in self._store.items():
             if data is None:
@@ -115,12 +135,46 @@ class FakeBatch:
     def update(self, doc_ref, data):
         self._ops.append(("update", doc_ref, data))
 
-    def commit(self):
+    async def commit(self):
         for op, doc_ref, data in self._ops:
             if op == "set":
-                doc_ref.set(data)
+                await doc_ref.set(data)
             elif op == "update":
-                doc_ref.update(data)
+                await doc_ref.update(data)
+
+
+class FakeTransaction:
+    def __init__(self):
+        self._ops = []
+
+    _read_only = False
+    _max_attempts = 1
+    _id = b"fake-transaction"
+
+    def _clean_up(self):
+        pass
+
+    async def _begin(self, retry_id=None):
+        _ = retry_id
+
+    async def _commit(self):
+        await self.commit()
+
+    async def _rollback(self):
+        self._ops = []
+
+    def set(self, doc_ref, data):
+        self._ops.append(("set", doc_ref, data))
+
+    def update(self, doc_ref, data):
+        self._ops.append(("update", doc_ref, data))
+
+    async def commit(self):
+        for op, doc_ref, data in self._ops:
+            if op == "set":
+                await doc_ref.set(data)
+            else:
+                await doc_ref.update(data)
 
 
 class FakeFirestore:
@@ -132,10 +186,13 @@ class FakeFirestore:
         self._steps = steps or {}
         self._goals = goals or {}
         self._completions = completions or {}
+        self._counters = {}
 
     def collection(self, name):
         if name == "users":
             return FakeCollection(self._users)
+        if name == "counters":
+            return FakeCollection(self._counters)
         if name == "student_plans":
             return FakeCollectionWithSubcollections(
                 self._plans,
@@ -150,6 +207,9 @@ class FakeFirestore:
     def batch(self):
         return FakeBatch()
 
+    def transaction(self):
+        return FakeTransaction()
+
 
 def _normalize(data):
     normalized = {}
@@ -185,7 +245,7 @@ def _override_student(status: str = "active"):
 
 def test_telegram_registration_event_sent_on_admin_create_student(monkeypatch):
     fake_db = FakeFirestore(users={})
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
     monkeypatch.setattr(
         admin_students,
         "get_or_create_user",
@@ -232,7 +292,7 @@ def test_telegram_questionnaire_completion_is_idempotent(monkeypatch):
             }
         }
     )
-    monkeypatch.setattr(auth, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(auth, "get_async_firestore_client", lambda: fake_db)
     calls = {"count": 0}
 
     async def _fake_send(_text: str) -> None:
@@ -276,7 +336,7 @@ def test_telegram_status_changed_sent_on_admin_patch(monkeypatch):
             }
         }
     )
-    monkeypatch.setattr(admin_students, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(admin_students, "get_async_firestore_client", lambda: fake_db)
     calls = {"count": 0}
 
     async def _fake_send(_text: str) -> None:
@@ -307,7 +367,7 @@ def test_telegram_lesson_completion_active_only(monkeypatch):
         },
         goals={"g1": {"title": "Goal One"}},
     )
-    monkeypatch.setattr(auth, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(auth, "get_async_firestore_client", lambda: fake_db)
     calls = {"count": 0}
 
     async def _fake_send(_text: str) -> None:
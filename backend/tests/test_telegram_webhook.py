@@ -32,10 +32,10 @@ class _FakeDoc:
         self._store = store
         self.id = doc_id
 
-    def get(self):
+    async def get(self):
         return _FakeSnap(self)
 
-    def set(self, data, merge=False):
+    async def set(self, data, merge=False):
         normalized = _normalize(data)
         if merge and self.id in self._store:
             self._store[self.id].update(normalized)
@@ -76,7 +76,7 @@ def _normalize(data: dict) -> dict:
 def test_webhook_accepts_without_secret(monkeypatch):
     monkeypatch.setattr(telegram_webhook, "get_settings", lambda: _Settings(None, 999))
     fake_db = _FakeFirestore()
-    monkeypatch.setattr(telegram_webhook, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(telegram_webhook, "get_async_firestore_client", lambda: fake_db)
     calls = {"count": 0}
 
     async def _fake_send(_text: str) -> None:
@@ -131,7 +131,7 @@ def test_webhook_accepts_valid_secret_and_logs_ids(monkeypatch):
         telegram_webhook, "get_settings", lambda: _Settings("expected-secret", 999)
     )
     fake_db = _FakeFirestore()
-    monkeypatch.setattr(telegram_webhook, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(telegram_webhook, "get_async_firestore_client", lambda: fake_db)
 
     captured: list[tuple[str, dict]] = []
 
@@ -190,7 +190,7 @@ def test_webhook_accepts_valid_secret_and_logs_ids(monkeypatch):
 def test_webhook_safe_parse_on_non_message_payload(monkeypatch):
     monkeypatch.setattr(telegram_webhook, "get_settings", lambda: _Settings(None, 999))
     fake_db = _FakeFirestore()
-    monkeypatch.setattr(telegram_webhook, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(telegram_webhook, "get_async_firestore_client", lambda: fake_db)
 
     captured: list[tuple[str, dict]] = []
 
@@ -225,7 +225,7 @@ def test_webhook_safe_parse_on_non_message_payload(monkeypatch):
 def test_webhook_ignores_non_private_chat(monkeypatch):
     monkeypatch.setattr(telegram_webhook, "get_settings", lambda: _Settings(None, 999))
     fake_db = _FakeFirestore()
-    monkeypatch.setattr(telegram_webhook, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(telegram_webhook, "get_async_firestore_client", lambda: fake_db)
     calls = {"count": 0}
 
     async def _fake_send(_text: str) -> None:
@@ -256,7 +256,7 @@ def test_webhook_ignores_non_private_chat(monkeypatch):
 def test_webhook_ignores_non_text_message(monkeypatch):
     monkeypatch.setattr(telegram_webhook, "get_settings", lambda: _Settings(None, 999))
     fake_db = _FakeFirestore()
-    monkeypatch.setattr(telegram_webhook, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(telegram_webhook, "get_async_firestore_client", lambda: fake_db)
     calls = {"count": 0}
 
     async def _fake_send(_text: str) -> None:
@@ -287,7 +287,7 @@ def test_webhook_ignores_non_text_message(monkeypatch):
 def test_webhook_swallow_send_errors(monkeypatch):
     monkeypatch.setattr(telegram_webhook, "get_settings", lambda: _Settings(None, 999))
     fake_db = _FakeFirestore()
-    monkeypatch.setattr(telegram_webhook, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(telegram_webhook, "get_async_firestore_client", lambda: fake_db)
 
     async def _raise_send(_text: str) -> None:
         raise RuntimeError("send failed")
@@ -317,7 +317,7 @@ def test_webhook_upsert_preserves_first_seen_and_updates_last_seen(monkeypatch):
     monkeypatch.setattr(telegram_webhook, "get_settings", lambda: _Settings(None, 999))
     fake_db = _FakeFirestore()
     fake_db._telegram_users["42"] = {"chatId": 70, "firstSeenAt": "EXISTING_FIRST"}
-    monkeypatch.setattr(telegram_webhook, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(telegram_webhook, "get_async_firestore_client", lambda: fake_db)
 
     async def _fake_send(_text: str) -> None:
         return True, None
@@ -348,7 +348,7 @@ def test_webhook_upsert_preserves_first_seen_and_updates_last_seen(monkeypatch):
 def test_reply_command_ignored_from_non_admin_chat(monkeypatch):
     monkeypatch.setattr(telegram_webhook, "get_settings", lambda: _Settings(None, 999))
     fake_db = _FakeFirestore()
-    monkeypatch.setattr(telegram_webhook, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(telegram_webhook, "get_async_firestore_client", lambda: fake_db)
     sent_admin = {"count": 0}
     sent_direct = {"count": 0}
 
@@ -386,7 +386,7 @@ def test_reply_command_ignored_from_non_admin_chat(monkeypatch):
 def test_id_command_replies_with_current_chat_id(monkeypatch):
     monkeypatch.setattr(telegram_webhook, "get_settings", lambda: _Settings(None, 999))
     fake_db = _FakeFirestore()
-    monkeypatch.setattr(telegram_webhook, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(telegram_webhook, "get_async_firestore_client", lambda: fake_db)
     sent: dict[str, object] = {}
 
     async def _fake_send(chat_id, text: str):
@@ -418,7 +418,7 @@ def test_id_command_replies_with_current_chat_id(monkeypatch):
 def test_reply_command_parse_fail_sends_help(monkeypatch):
     monkeypatch.setattr(telegram_webhook, "get_settings", lambda: _Settings(None, 999))
     fake_db = _FakeFirestore()
-    monkeypatch.setattr(telegram_webhook, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(telegram_webhook, "get_async_firestore_client", lambda: fake_db)
     sent: dict[str, str] = {}
 
     async def _fake_admin(text: str) -> None:
@@ -453,7 +453,7 @@ def test_reply_command_sends_message_to_mapped_chat(monkeypatch):
         "firstSeenAt": "OLD",
         "lastSeenAt": "OLD",
     }
-    monkeypatch.setattr(telegram_webhook, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(telegram_webhook, "get_async_firestore_client", lambda: fake_db)
     sent: dict[str, object] = {}
     confirmations: list[str] = []
 
@@ -500,7 +500,7 @@ def test_reply_command_works_from_admin_group_chat(monkeypatch):
         "firstSeenAt": "OLD",
         "lastSeenAt": "OLD",
     }
-    monkeypatch.setattr(telegram_webhook, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(telegram_webhook, "get_async_firestore_client", lambda: fake_db)
     sent: dict[str, object] = {}
 
     async def _fake_send(chat_id, text: str):
@@ -536,7 +536,7 @@ def test_reply_command_works_from_admin_group_chat(monkeypatch):
 def test_reply_command_sends_error_when_mapping_missing(monkeypatch):
     monkeypatch.setattr(telegram_webhook, "get_settings", lambda: _Settings(None, 999))
     fake_db = _FakeFirestore()
-    monkeypatch.setattr(telegram_webhook, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(telegram_webhook, "get_async_firestore_client", lambda: fake_db)
     sent: dict[str, str] = {}
 
     async def _fake_admin(text: str) -> None:
@@ -571,7 +571,7 @@ def test_reply_command_reports_send_failure_to_admin(monkeypatch):
         "firstSeenAt": "OLD",
         "lastSeenAt": "OLD",
     }
-    monkeypatch.setattr(telegram_webhook, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(telegram_webhook, "get_async_firestore_client", lambda: fake_db)
     sent_admin: list[str] = []
 
     async def _fake_send(_chat_id, _text: str):
@@ -606,7 +606,7 @@ def test_reply_command_reports_send_failure_to_admin(monkeypatch):
 def test_webhook_truncates_inbound_forward_text(monkeypatch):
     monkeypatch.setattr(telegram_webhook, "get_settings", lambda: _Settings(None, 999))
     fake_db = _FakeFirestore()
-    monkeypatch.setattr(telegram_webhook, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(telegram_webhook, "get_async_firestore_client", lambda: fake_db)
     sent: dict[str, str] = {}
 
     async def _fake_admin(text: str):
@@ -646,7 +646,7 @@ def test_webhook_rate_limits_forward_to_max_one_per_two_seconds(monkeypatch):
         "lastSeenAt": "OLD",
         "lastForwardedAt": datetime.now(timezone.utc),
     }
-    monkeypatch.setattr(telegram_webhook, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(telegram_webhook, "get_async_firestore_client", lambda: fake_db)
     calls = {"count": 0}
 
     async def _fake_admin(_text: str):
@@ -681,7 +681,7 @@ def test_reply_command_truncates_outbound_text_to_3500(monkeypatch):
         "firstSeenAt": "OLD",
         "lastSeenAt": "OLD",
     }
-    monkeypatch.setattr(telegram_webhook, "get_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(telegram_webhook, "get_async_firestore_client", lambda: fake_db)
     sent: dict[str, object] = {}
 
     async def _fake_send(chat_id, text: str):
@@ -0,0 +1,146 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers import jobs
+from app.services.user_search import (
+    matches_search_terms,
+    search_terms,
+    user_search_fields,
+)
+
+
+class _Settings:
+    JOB_TOKEN = "job-secret"
+
+
+class _FakeSnap:
+    def __init__(self, doc):
+        self._doc = doc
+        self.id = doc.id
+        self._data = doc._store.get(doc.id)
+
+    @property
+    def reference(self):
+        return self._doc
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return self._data
+
+
+class _FakeDoc:
+    def __init__(self, store, doc_id):
+        self._store = store
+        self.id = doc_id
+
+
+class _FakeQuery:
+    def __init__(self, store, start_after=None, limit=None):
+        self._store = store
+        self._start_after = start_after
+        self._limit = limit
+
+    def order_by(self, field):
+        assert field == "__name__"
+        return self
+
+    def start_after(self, values):
+        return _FakeQuery(self._store, values[0], self._limit)
+
+    def limit(self, value):
+        return _FakeQuery(self._store, self._start_after, value)
+
+    async def stream(self):
+        doc_ids = sorted(self._store)
+        if self._start_after is not None:
+            doc_ids = [doc_id for doc_id in doc_ids if doc_id > self._start_after]
+        for doc_id in doc_ids[: self._limit]:
+            yield _FakeSnap(_FakeDoc(self._store, doc_id))
+
+
+class _FakeBatch:
+    def __init__(self, db):
+        self._db = db
+        self._ops = []
+
+    def update(self, doc_ref, data):
+        self._ops.append((doc_ref, data))
+
+    async def commit(self):
+        self._db.commits.append(len(self._ops))
+        for doc_ref, data in self._ops:
+            doc_ref._store[doc_ref.id].update(data)
+
+
+class _FakeFirestore:
+    def __init__(self, users):
+        self._users = users
+        self.commits = []
+
+    def collection(self, name):
+        assert name == "users"
+        return _FakeQuery(self._users)
+
+    def batch(self):
+        return _FakeBatch(self)
+
+
+def test_user_search_fields_index_word_and_email_prefixes():
+    fields = user_search_fields("Anna.Smith@Example.com ", "Anna  Smith")
+
+    assert fields["emailLower"] == "anna.smith@example.com"
+    assert fields["displayNameLower"] == "anna smith"
+    for token in ["a", "ann", "anna.smith@ex", "smi", "example", "com"]:
+        assert token in fields["searchTokens"]
+    assert "mith" not in fields["searchTokens"]
+    assert matches_search_terms(fields, search_terms("Ann SMI"))
+    assert matches_search_terms(fields, search_terms("anna.smith@example"))
+    assert not matches_search_terms(fields, search_terms("anna jones"))
+    assert search_terms("  ") == []
+
+
+def test_backfill_job_writes_missing_search_fields_in_pages(monkeypatch):
+    users = {
+        "u1": {"email": "one@x.com", "displayName": "One"},
+        "u2": {
+            "email": "two@x.com",
+            "displayName": "Two",
+            **user_search_fields("two@x.com", "Two"),
+        },
+        "u3": {"email": "three@x.com", "displayName": "Three"},
+    }
+    fake_db = _FakeFirestore(users)
+    monkeypatch.setattr(jobs, "get_async_firestore_client", lambda: fake_db)
+    monkeypatch.setattr(jobs, "get_settings", lambda: _Settings())
+    client = TestClient(app)
+
+    partial = client.post(
+        "/jobs/users/backfill-search?limit=2&maxBatches=1",
+        headers={"X-Job-Token": "job-secret"},
+    )
+    resumed = client.post(
+        f"/jobs/users/backfill-search?limit=2&cursor={partial.json()['nextCursor']}",
+        headers={"X-Job-Token": "job-secret"},
+    )
+
+    assert partial.status_code == 200
+    assert partial.json() == {
+        "status": "partial",
+        "scanned": 2,
+        "updated": 1,
+        "nextCursor": "u2",
+    }
+    assert resumed.json() == {
+        "status": "ok",
+        "scanned": 1,
+        "updated": 1,
+        "nextCursor": None,
+    }
+    assert fake_db.commits == [1, 1]
+    assert (
+        users["u3"]["searchTokens"]
+        == user_search_fields("three@x.com", "Three")["searchTokens"]
+    )